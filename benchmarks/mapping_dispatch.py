@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Measures the per-attribute cost of the mapping tables lookups the parsers
+dispatch their conversion methods with, comparing the immutable views of the
+`Mapping` tables with the previous dict subclass, which overrode
+`__getattribute__` and then called a Python function on every `.get()`, and
+the resolution of the parsing methods through the class-level dispatch tables
+with the former lookup of their names with `getattr` on the parser instance.
+
+    python benchmarks/mapping_dispatch.py --size 1000000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from misp_stix_converter import ( # noqa
+    InternalSTIX2toMISPMapping, Mapping, MISPtoSTIX21Mapping,
+    MISPtoSTIX21Parser)
+from misp_stix_converter.misp2stix.stix2_mapping import MISPtoSTIX2Mapping # noqa
+
+# Object types of the STIX 2.1 bundles exported from MISP
+_STIX_OBJECT_TYPES = (
+    'identity', 'report', 'indicator', 'observed-data', 'ipv4-addr',
+    'domain-name', 'file', 'attack-pattern', 'malware', 'relationship',
+    'x-misp-attribute', 'x-misp-object', 'marking-definition', 'sighting'
+)
+
+
+class _DictSubclassMapping(dict):
+    # Reproduces the former `Mapping` implementation
+    def __setitem__(self, key, value):
+        raise TypeError(f'{type(self).__name__} object does not support item assignment')
+
+    def __delitem__(self, key):
+        raise TypeError(f'{type(self).__name__} object does not support item deletion')
+
+    def __getattribute__(self, attribute):
+        if attribute in ('clear', 'update', 'pop', 'popitem', 'setdefault'):
+            raise AttributeError(f'{type(self).__name__} object has no attribute {attribute}')
+        return super().__getattribute__(attribute)
+
+
+def _measure(lookup, keys: list) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        lookup(key)
+    # Nanoseconds per lookup
+    return round((time.perf_counter() - start) * 1e9 / len(keys), 1)
+
+
+def _measure_table(table, keys: list) -> float:
+    # The `get` method is looked up on every call, as in the mapping classes
+    start = time.perf_counter()
+    for key in keys:
+        table.get(key)
+    return round((time.perf_counter() - start) * 1e9 / len(keys), 1)
+
+
+def _measure_getattr(parser, keys: list) -> float:
+    # Former dispatch: name lookup in the mapping, then on the parser instance
+    start = time.perf_counter()
+    for key in keys:
+        getattr(parser, parser._mapping.attribute_types_mapping(key))
+    return round((time.perf_counter() - start) * 1e9 / len(keys), 1)
+
+
+def _measure_handlers(parser, keys: list) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        parser._attribute_handlers.get(key)
+    return round((time.perf_counter() - start) * 1e9 / len(keys), 1)
+
+
+def _repeat(keys: list, size: int) -> list:
+    return (keys * (size // len(keys) + 1))[:size]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the mapping tables lookups.'
+    )
+    parser.add_argument(
+        '--size', type=int, default=1000000,
+        help='Number of lookups in every table.'
+    )
+    args = parser.parse_args()
+    attribute_types = dict(MISPtoSTIX2Mapping.attribute_types_mapping())
+    keys = _repeat(list(attribute_types), args.size)
+    stix_object_types = _repeat(list(_STIX_OBJECT_TYPES), args.size)
+    parser_instance = MISPtoSTIX21Parser()
+    results = {
+        'lookups': args.size,
+        'unit': 'ns per lookup',
+        'attribute_types_table': {
+            'dict_subclass': _measure_table(
+                _DictSubclassMapping(attribute_types), keys
+            ),
+            'mapping': _measure_table(Mapping(attribute_types), keys)
+        },
+        # Whole dispatch, including the call of the mapping class methods
+        'attribute_dispatch': _measure(
+            MISPtoSTIX21Mapping.attribute_types_mapping, keys
+        ),
+        'stix_object_loading_dispatch': _measure(
+            InternalSTIX2toMISPMapping.stix_object_loading_mapping,
+            stix_object_types
+        ),
+        # Resolution of the parsing method itself
+        'attribute_handler_resolution': {
+            'getattr': _measure_getattr(parser_instance, keys),
+            'dispatch_table': _measure_handlers(parser_instance, keys)
+        }
+    }
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
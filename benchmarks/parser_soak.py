@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Soak test of the parsers reuse: converts a large number of distinct inputs
+through a single instance of every parser, calling `reset()` between two
+inputs, and samples the resident memory of the process along the way.
+
+Every input is a synthetic MISP event built from the templates of the
+benchmark suite, with its own UUIDs, exported to STIX 2.0 and 2.1, then the
+STIX 2.1 results are imported with the internal and the external parsers.
+Once the first inputs have warmed up the caches of the libraries, the
+resident memory must stay flat; the script exits with an error when it grows
+by more than `--threshold` MB. Running it with `--without_reset` shows the
+growth of the parsers state when they are reused without being reset.
+
+    python benchmarks/parser_soak.py --count 10000
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from misp_stix_converter import ( # noqa
+    ExternalSTIX2toMISPParser, InternalSTIX2toMISPParser, MISPtoSTIX20Parser,
+    MISPtoSTIX21Parser)
+from stix2.parsing import parse as stix2_parser # noqa
+from suite import _fetch_templates, _generate_uuid, _with_uuids # noqa
+from tests import test_events # noqa
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+_STATM = Path('/proc/self/statm')
+
+
+def _generate_event(index: int, size: int, attributes: list,
+                    objects: list) -> dict:
+    generator = random.Random(index)
+    event = test_events.get_base_event()
+    event['Event'].update(
+        {
+            'uuid': _generate_uuid(generator),
+            'Attribute': [
+                _with_uuids(generator.choice(attributes), generator)
+                for _ in range(size - size // 4)
+            ],
+            'Object': [
+                _with_uuids(generator.choice(objects), generator)
+                for _ in range(size // 4)
+            ]
+        }
+    )
+    return event
+
+
+def _rss() -> float:
+    # Current resident memory in MB, or the peak one without procfs
+    if _STATM.exists():
+        return int(_STATM.read_text().split()[1]) * _PAGE_SIZE / 1024 ** 2
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def _soak(count: int, size: int, reset: bool) -> dict:
+    attributes, objects = _fetch_templates()
+    exporters = {
+        'export.stix20': MISPtoSTIX20Parser(),
+        'export.stix21': MISPtoSTIX21Parser()
+    }
+    importers = {
+        'import.internal': InternalSTIX2toMISPParser(),
+        'import.external': ExternalSTIX2toMISPParser()
+    }
+    warm_up = max(count // 10, 1)
+    samples = []
+    start = time.perf_counter()
+    for index in range(count):
+        event = _generate_event(index, size, attributes, objects)
+        bundles = {}
+        for name, parser in exporters.items():
+            parser.parse_misp_event(event)
+            bundles[name] = parser.bundle.serialize()
+            if reset:
+                parser.reset()
+        content = stix2_parser(
+            bundles['export.stix21'], allow_custom=True, interoperability=True
+        )
+        for parser in importers.values():
+            parser.load_stix_bundle(content)
+            parser.parse_stix_bundle()
+            parser.misp_event.to_json()
+            if reset:
+                parser.reset()
+        if (index + 1) % warm_up == 0:
+            samples.append({'inputs': index + 1, 'rss': round(_rss(), 2)})
+    return {
+        'count': count, 'size': size, 'reset': reset, 'unit': 'MB',
+        'time': round(time.perf_counter() - start, 2), 'samples': samples,
+        'growth': round(samples[-1]['rss'] - samples[0]['rss'], 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Soak test of the parsers reuse with `reset()`.'
+    )
+    parser.add_argument(
+        '--count', type=int, default=10000,
+        help='Number of inputs converted through every parser.'
+    )
+    parser.add_argument(
+        '--size', type=int, default=8,
+        help='Number of attributes and objects of every MISP event.'
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=8,
+        help='Maximum RSS growth in MB after the warm-up inputs.'
+    )
+    parser.add_argument(
+        '--without_reset', action='store_true',
+        help='Reuse the parsers without resetting them.'
+    )
+    args = parser.parse_args()
+    logging.getLogger('pymisp').setLevel(logging.ERROR)
+    warnings.simplefilter('ignore')
+    results = _soak(args.count, args.size, not args.without_reset)
+    print(json.dumps(results, indent=4))
+    if results['growth'] > args.threshold:
+        sys.exit(
+            f"RSS grew by {results['growth']} MB after the warm-up inputs."
+        )
+
+
+if __name__ == '__main__':
+    main()
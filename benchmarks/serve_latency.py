@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compares the latency of a conversion run with the command line, as MISP
+does for every export or import, with the latency of the same conversion sent
+as a job to the conversion daemon, started once for all the jobs.
+
+The measured conversions are the STIX 2.1 export of the MISP events of the
+tests and the import of its result, using the internal STIX 2 parser.
+
+    python benchmarks/serve_latency.py --repeat 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(_ROOT))
+
+from misp_stix_converter.misp_stix_server import UnixHTTPConnection # noqa
+
+_COMMAND_LINE = (
+    sys.executable, '-c',
+    'import sys; from misp_stix_converter import main; sys.exit(main())'
+)
+_INPUT_FILE = _ROOT / 'tests' / 'test_events_collection_1.json'
+
+
+def _jobs(tmp_dir: Path) -> dict:
+    exported = tmp_dir / 'event.stix21.json'
+    return {
+        'export.stix21': (
+            'export',
+            {
+                'file': [str(_INPUT_FILE)], 'version': '2.1',
+                'output_name': str(exported)
+            }
+        ),
+        'import.stix21': (
+            'import',
+            {
+                'file': [str(exported)], 'version': '2',
+                'output_name': str(tmp_dir / 'event.misp.json')
+            }
+        )
+    }
+
+
+def _command_line_arguments(feature: str, job: dict) -> list:
+    return [
+        feature, '-f', *job['file'], '-v', job['version'],
+        '-o', job['output_name']
+    ]
+
+
+def _measure(repeat: int, function, *args) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return {
+        'min': round(min(timings), 4),
+        'median': round(statistics.median(timings), 4),
+        'max': round(max(timings), 4)
+    }
+
+
+def _request(socket_path: Path, feature: str, job: dict):
+    connection = UnixHTTPConnection(socket_path, timeout=60)
+    connection.request('POST', f'/{feature}', body=json.dumps(job))
+    response = connection.getresponse()
+    content = response.read()
+    connection.close()
+    if response.status != 200:
+        sys.exit(f'Conversion daemon error: {content.decode()}')
+
+
+def _run_command_line(feature: str, job: dict):
+    subprocess.run(
+        (*_COMMAND_LINE, *_command_line_arguments(feature, job)),
+        capture_output=True, check=True, cwd=_ROOT
+    )
+
+
+def _start_daemon(socket_path: Path) -> tuple:
+    start = time.perf_counter()
+    daemon = subprocess.Popen(
+        (*_COMMAND_LINE, 'serve', '--socket', str(socket_path)),
+        cwd=_ROOT, stderr=subprocess.DEVNULL
+    )
+    while True:
+        try:
+            connection = UnixHTTPConnection(socket_path, timeout=1)
+            connection.request('GET', '/status')
+            connection.getresponse().read()
+            connection.close()
+            break
+        except OSError:
+            if daemon.poll() is not None:
+                sys.exit('The conversion daemon failed to start.')
+            time.sleep(0.01)
+    return daemon, round(time.perf_counter() - start, 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the command line and conversion daemon latency.'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=10,
+        help='Number of runs of every conversion.'
+    )
+    args = parser.parse_args()
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        jobs = _jobs(tmp_dir)
+        results = {'repeat': args.repeat, 'unit': 'seconds', 'measures': []}
+        for name, (feature, job) in jobs.items():
+            results['measures'].append(
+                {
+                    'name': name, 'mode': 'command_line',
+                    'time': _measure(args.repeat, _run_command_line, feature, job)
+                }
+            )
+        socket_path = tmp_dir / 'misp_stix.sock'
+        daemon, start_up = _start_daemon(socket_path)
+        results['daemon_start_up'] = start_up
+        try:
+            for name, (feature, job) in jobs.items():
+                results['measures'].append(
+                    {
+                        'name': name, 'mode': 'daemon',
+                        'time': _measure(
+                            args.repeat, _request, socket_path, feature, job
+                        )
+                    }
+                )
+        finally:
+            daemon.terminate()
+            daemon.wait()
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compares the memory peak and the throughput of the STIX 1 XML serialisation
+of a synthetic MISP event when the whole package is first rendered as a string
+with `to_xml()` and when every element is written straight to the output file.
+
+Both the standalone package file and the content of an events collection file
+are measured.
+
+    python benchmarks/stix1_xml_writer.py --size 100000
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from misp_stix_converter import MISPtoSTIX1EventsParser # noqa
+from misp_stix_converter.misp2stix.framing import _handle_namespaces # noqa
+from misp_stix_converter.misp2stix.stix1_mapping import SCHEMALOC_DICT # noqa
+from misp_stix_converter.misp_stix_converter import ( # noqa
+    _default_namespace, _default_org, _write_events, _write_raw_stix)
+from tests.test_events import get_base_event # noqa
+
+
+def _generate_event(size: int) -> dict:
+    event = get_base_event()
+    event['Event']['Attribute'] = [
+        {
+            'uuid': str(uuid4()),
+            'type': 'ip-dst',
+            'category': 'Network activity',
+            'value': f'10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}',
+            'timestamp': '1603642920',
+            'to_ids': True
+        } for index in range(size)
+    ]
+    return event
+
+
+def _measure(function, *args) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(*args)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'time': round(duration, 3), 'peak_memory_mb': round(peak / 2**20, 1)}
+
+
+def _collection_streamed(package, filename: Path):
+    with open(filename, 'wt', encoding='utf-8') as f:
+        _write_events(f.write, package)
+
+
+def _collection_to_xml(package, filename: Path):
+    content = '\n            '.join(
+        package.to_xml(include_namespaces=False).decode().split('\n')
+    )
+    with open(filename, 'wt', encoding='utf-8') as f:
+        f.write(f'            {content}\n')
+
+
+def _package_streamed(package, filename: Path):
+    _write_raw_stix(package, filename, _default_namespace, _default_org, 'xml')
+
+
+def _package_to_xml(package, filename: Path):
+    namespaces = _handle_namespaces(_default_namespace, _default_org)
+    with open(filename, 'wb') as f:
+        f.write(
+            package.to_xml(
+                auto_namespace=False, ns_dict=namespaces,
+                schemaloc_dict=SCHEMALOC_DICT
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the STIX 1 XML serialisation.'
+    )
+    parser.add_argument(
+        '--size', type=int, default=100000,
+        help='Number of attributes in the synthetic event.'
+    )
+    args = parser.parse_args()
+    stix_parser = MISPtoSTIX1EventsParser(_default_org, '1.2')
+    stix_parser.parse_misp_event(_generate_event(args.size))
+    package = stix_parser.stix_package
+    results = {'attributes': args.size}
+    with TemporaryDirectory() as tmp_dir:
+        filename = Path(tmp_dir) / 'package.xml'
+        for feature, to_xml, streamed in (
+                ('package', _package_to_xml, _package_streamed),
+                ('collection', _collection_to_xml, _collection_streamed)):
+            to_xml_result = _measure(to_xml, package, filename)
+            streamed_result = _measure(streamed, package, filename)
+            size = filename.stat().st_size / 2**20
+            for result in (to_xml_result, streamed_result):
+                result['throughput_mb_per_second'] = round(size / result['time'], 1)
+            results[feature] = {
+                'output_size_mb': round(size, 1),
+                'to_xml': to_xml_result,
+                'streamed': streamed_result
+            }
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
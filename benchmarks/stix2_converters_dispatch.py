@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Measures the cost of the converter dispatch (the `*_parser` properties of the
+STIX 2 import parsers) for every indicator of a synthetic bundle, comparing the
+lazily initialised converters with the previous behaviour, which instantiated a
+new converter on every property access.
+
+    python benchmarks/stix2_converters_dispatch.py --size 50000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from misp_stix_converter import ( # noqa
+    ExternalSTIX2toMISPParser, InternalSTIX2toMISPParser)
+
+_FEATURES = (
+    'attack_pattern', 'campaign', 'course_of_action', 'indicator',
+    'intrusion_set', 'malware', 'malware_analysis', 'threat_actor', 'tool',
+    'vulnerability'
+)
+
+
+def _eager_dispatch(parser, feature: str, indicator_ids: list) -> float:
+    # Reproduces the former `getattr(self, '_x_parser', self._set_x_parser())`
+    # call, where the default value is evaluated every single time
+    start = time.perf_counter()
+    for _ in indicator_ids:
+        getattr(
+            parser, f'_{feature}_parser',
+            getattr(parser, f'_set_{feature}_parser')()
+        )
+    return time.perf_counter() - start
+
+
+def _lazy_dispatch(parser, feature: str, indicator_ids: list) -> float:
+    start = time.perf_counter()
+    for _ in indicator_ids:
+        getattr(parser, f'{feature}_parser')
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the STIX 2 import converters dispatch.'
+    )
+    parser.add_argument(
+        '--size', type=int, default=50000,
+        help='Number of indicators in the synthetic bundle.'
+    )
+    args = parser.parse_args()
+    indicator_ids = [f'indicator--{uuid4()}' for _ in range(args.size)]
+    results = {'objects': args.size}
+    for parser_class in (ExternalSTIX2toMISPParser, InternalSTIX2toMISPParser):
+        results[parser_class.__name__] = {
+            feature: {
+                'eager': round(
+                    _eager_dispatch(parser_class(), feature, indicator_ids), 4
+                ),
+                'lazy': round(
+                    _lazy_dispatch(parser_class(), feature, indicator_ids), 4
+                )
+            } for feature in _FEATURES
+        }
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Exports a large synthetic MISP event to STIX 2.1 with a delta manifest, then
+exports it again with a growing number of modified attributes and objects,
+and checks the cost of the delta exports is proportional to the number of
+changes.
+
+The event is built from the templates of the benchmark suite. The modified
+attributes and objects only get a more recent timestamp, so every delta
+export converts them again; the unchanged ones are only referenced by the
+report. Every delta export still goes through the whole event to compare the
+timestamps and writes a report referencing everything, which is measured
+with 0 changes: the cost of every changed attribute or object above it must
+stay under `--tolerance` times the cost of an attribute or object in the full
+export.
+
+    python benchmarks/stix2_delta_export.py --size 10000 --changes 0 10 100 1000
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+import warnings
+from copy import deepcopy
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from misp_stix_converter import DeltaManifest, MISPtoSTIX21Parser # noqa
+from suite import _fetch_templates, _generate_event # noqa
+
+
+def _export(event: dict, manifest: DeltaManifest) -> tuple:
+    parser = MISPtoSTIX21Parser()
+    parser.enable_delta_export(manifest)
+    start = time.perf_counter()
+    parser.parse_misp_event(event)
+    bundle = parser.bundle
+    return time.perf_counter() - start, len(bundle.objects)
+
+
+def _modify(event: dict, changes: int) -> dict:
+    event = deepcopy(event)
+    items = [*event['Event']['Attribute'], *event['Event']['Object']]
+    for item in random.Random(changes).sample(items, changes):
+        item['timestamp'] = str(int(item['timestamp']) + 1)
+    return event
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the STIX 2 delta export.'
+    )
+    parser.add_argument(
+        '--size', type=int, default=10000,
+        help='Number of attributes and objects in the synthetic event.'
+    )
+    parser.add_argument(
+        '--changes', nargs='+', type=int, default=[0, 10, 100, 1000],
+        help='Numbers of modified attributes and objects.'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=2,
+        help='Maximum cost of a changed attribute or object, relative to its '
+             'cost in the full export.'
+    )
+    args = parser.parse_args()
+    logging.getLogger('pymisp').setLevel(logging.ERROR)
+    warnings.simplefilter('ignore')
+    event = _generate_event(args.size, *_fetch_templates())
+    manifest = DeltaManifest()
+    duration, objects = _export(deepcopy(event), manifest)
+    previous = manifest.to_dict()
+    results = {
+        'size': args.size,
+        'full': {'time': round(duration, 3), 'objects': objects},
+        'delta': []
+    }
+    per_item = duration / args.size
+    for changes in sorted({0, *args.changes}):
+        duration, objects = _export(
+            _modify(event, changes), DeltaManifest(previous)
+        )
+        results['delta'].append(
+            {'changes': changes, 'time': round(duration, 3), 'objects': objects}
+        )
+    print(json.dumps(results, indent=4))
+    baseline, *deltas = results['delta']
+    for delta in deltas:
+        per_change = (delta['time'] - baseline['time']) / delta['changes']
+        if per_change > args.tolerance * per_item:
+            sys.exit(
+                f"The delta export with {delta['changes']} changes costs "
+                f"{per_change / per_item:.2f} times the full export for "
+                'every change.'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Exports synthetic MISP events of increasing size to STIX 2.1 and checks that
+the conversion time grows linearly with the number of attributes and objects.
+
+Each event is built from the templates of the benchmark suite, with the given
+number of attributes and objects, and an event level galaxy with one cluster
+for every 10 of them, which all end up in the report `object_refs`. The UUIDs
+are drawn from generators seeded with the size, so the same sizes always give
+the same content.
+
+    python benchmarks/stix2_export_scaling.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+import warnings
+from copy import deepcopy
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from misp_stix_converter import MISPtoSTIX21Parser # noqa
+from suite import _fetch_templates, _generate_event, _generate_uuid # noqa
+from tests.test_events import _TEST_ATTACK_PATTERN_GALAXY # noqa
+
+
+def _generate_galaxy_event(size: int, templates: tuple) -> dict:
+    event = _generate_event(size, *templates)
+    # Distinct seed from the event one, so the clusters get their own UUIDs
+    generator = random.Random(f'galaxy-{size}')
+    galaxy = deepcopy(_TEST_ATTACK_PATTERN_GALAXY)
+    cluster = galaxy['GalaxyCluster'][0]
+    galaxy['GalaxyCluster'] = [
+        dict(
+            cluster, uuid=_generate_uuid(generator),
+            value=f"{cluster['value']} {index}"
+        ) for index in range(size // 10)
+    ]
+    event['Event']['Galaxy'] = [galaxy]
+    return event
+
+
+def _export(event: dict) -> float:
+    parser = MISPtoSTIX21Parser()
+    start = time.perf_counter()
+    parser.parse_misp_event(event)
+    parser.bundle
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the STIX 2 export scaling.'
+    )
+    parser.add_argument(
+        '--sizes', nargs='+', type=int, default=[1000, 10000, 100000],
+        help='Number of attributes and objects in the synthetic events.'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=1.5,
+        help='Maximum accepted deviation from a linear growth.'
+    )
+    args = parser.parse_args()
+    logging.getLogger('pymisp').setLevel(logging.ERROR)
+    warnings.simplefilter('ignore')
+    templates = _fetch_templates()
+    results = []
+    for size in sorted(args.sizes):
+        duration = _export(_generate_galaxy_event(size, templates))
+        results.append(
+            {
+                'size': size, 'time': round(duration, 3),
+                'time_per_item_ms': round(duration * 1000 / size, 4)
+            }
+        )
+    print(json.dumps(results, indent=4))
+    reference = results[0]['time_per_item_ms']
+    for result in results[1:]:
+        ratio = result['time_per_item_ms'] / reference
+        if ratio > args.tolerance:
+            sys.exit(
+                f"Non linear growth: time per attribute or object with "
+                f"{result['size']} of them is {ratio:.2f} times the time "
+                f"with {results[0]['size']} of them."
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Imports the STIX 2.1 export of a large synthetic MISP event with an empty
+seen-object store, then imports it again with the filled store and a growing
+number of updated STIX objects, and checks the cost of the incremental imports
+is proportional to the number of updated objects.
+
+The event is built from the templates of the benchmark suite. The updated
+objects only get a more recent `modified` timestamp, so every incremental
+import converts them again. Every incremental import still loads the whole
+bundle and looks every object up in the store: this loading time is reported
+separately, and the conversion time of every updated object must stay under
+`--tolerance` times the conversion time of an object in the full import. The
+same parser is reset between the imports, as with the polling of a TAXII
+collection, so the converters are only set up once.
+
+    python benchmarks/stix2_incremental_import.py --size 10000 --changes 0 10 100 1000
+"""
+
+import argparse
+import json
+import logging
+import random
+import shutil
+import sys
+import warnings
+from copy import deepcopy
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from misp_stix_converter import ( # noqa
+    ConversionStats, InternalSTIX2toMISPParser, MISPtoSTIX21Parser,
+    SeenObjectStore)
+from stix2.parsing import parse as stix2_parser # noqa
+from suite import _export, _fetch_templates, _generate_event # noqa
+
+_CONVERTED_TYPES = ('indicator', 'observed-data', 'x-misp-attribute', 'x-misp-object')
+
+
+def _import(parser: InternalSTIX2toMISPParser, bundle: dict,
+            store: SeenObjectStore) -> tuple:
+    bundle = stix2_parser(
+        json.dumps(bundle), allow_custom=True, interoperability=True
+    )
+    stats = ConversionStats()
+    parser.enable_profiling(stats)
+    parser.enable_incremental_import(store)
+    parser.load_stix_bundle(bundle)
+    parser.parse_stix_bundle()
+    misp_event = parser.misp_event
+    parser.commit_seen()
+    parser.reset()
+    store.close()
+    timers = stats.to_dict()['timers']
+    return (
+        timers['loading']['time'], timers['conversion']['time'],
+        len(misp_event.attributes) + len(misp_event.objects)
+    )
+
+
+def _update(bundle: dict, changes: int) -> dict:
+    bundle = deepcopy(bundle)
+    stix_objects = [
+        stix_object for stix_object in bundle['objects']
+        if stix_object['type'] in _CONVERTED_TYPES
+    ]
+    for stix_object in random.Random(changes).sample(stix_objects, changes):
+        stix_object['modified'] = '2030-01-01T00:00:00.000Z'
+    return bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the STIX 2 incremental import.'
+    )
+    parser.add_argument(
+        '--size', type=int, default=10000,
+        help='Number of attributes and objects in the synthetic event.'
+    )
+    parser.add_argument(
+        '--changes', nargs='+', type=int, default=[0, 10, 100, 1000],
+        help='Numbers of updated STIX objects.'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='Number of runs of every incremental import, the fastest one '
+             'being kept.'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=2,
+        help='Maximum cost of an updated STIX object, relative to its cost in '
+             'the full import.'
+    )
+    args = parser.parse_args()
+    logging.getLogger('pymisp').setLevel(logging.ERROR)
+    warnings.simplefilter('ignore')
+    event = _generate_event(args.size, *_fetch_templates())
+    bundle = json.loads(_export(MISPtoSTIX21Parser, event))
+    import_parser = InternalSTIX2toMISPParser(0, None, False)
+    with TemporaryDirectory() as tmp_dir:
+        seeded = Path(tmp_dir) / 'seeded.db'
+        loading, conversion, converted = _import(
+            import_parser, bundle, SeenObjectStore(seeded)
+        )
+        results = {
+            'size': args.size,
+            'full': {
+                'loading': round(loading, 3),
+                'conversion': round(conversion, 3), 'converted': converted
+            },
+            'incremental': []
+        }
+        per_object = conversion / converted
+        for changes in sorted({0, *args.changes}):
+            updated = _update(bundle, changes)
+            runs = []
+            for run in range(args.repeat):
+                # Every import starts from the store filled by the full import
+                store = Path(tmp_dir) / f'{changes}_{run}.db'
+                shutil.copy(seeded, store)
+                runs.append(
+                    _import(import_parser, updated, SeenObjectStore(store))
+                )
+            loading, conversion, converted = min(runs, key=lambda run: run[1])
+            results['incremental'].append(
+                {
+                    'changes': changes, 'loading': round(loading, 3),
+                    'conversion': round(conversion, 3), 'converted': converted
+                }
+            )
+    print(json.dumps(results, indent=4))
+    baseline, *incrementals = results['incremental']
+    for incremental in incrementals:
+        per_change = (
+            incremental['conversion'] - baseline['conversion']
+        ) / incremental['changes']
+        if per_change > args.tolerance * per_object:
+            sys.exit(
+                f"The incremental import with {incremental['changes']} "
+                f"updated objects costs {per_change / per_object:.2f} times "
+                'the full import for every updated object.'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Measures the time and the output size of the STIX 2.1 bundle serialisation of a
+synthetic MISP event with every JSON backend installed, indented and compact.
+
+The event is built from the templates of the benchmark suite, with UUIDs drawn
+from a generator seeded with the size, so the same size always gives the same
+bundle.
+
+    python benchmarks/stix2_json_serialization.py --size 10000
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+import warnings
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from misp_stix_converter import ( # noqa
+    JSONSerializer, JSONSerializerError, MISPtoSTIX21Parser)
+from suite import _fetch_templates, _generate_event # noqa
+
+_CONFIGURATIONS = (
+    ('json', 4), ('json', None), ('orjson', 2), ('orjson', None),
+    ('ujson', 4), ('ujson', None)
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the JSON serialisation of STIX 2 bundles.'
+    )
+    parser.add_argument(
+        '--size', type=int, default=10000,
+        help='Number of attributes and objects in the synthetic event.'
+    )
+    args = parser.parse_args()
+    logging.getLogger('pymisp').setLevel(logging.ERROR)
+    warnings.simplefilter('ignore')
+    stix_parser = MISPtoSTIX21Parser()
+    stix_parser.parse_misp_event(
+        _generate_event(args.size, *_fetch_templates())
+    )
+    bundle = stix_parser.bundle
+    results = {'size': args.size, 'serializers': []}
+    with TemporaryDirectory() as tmp_dir:
+        filename = Path(tmp_dir) / 'bundle.json'
+        for backend, indent in _CONFIGURATIONS:
+            try:
+                serializer = JSONSerializer(indent=indent, backend=backend)
+            except JSONSerializerError:
+                continue
+            start = time.perf_counter()
+            with open(filename, 'wt', encoding='utf-8') as f:
+                serializer.dump_stix(bundle, f)
+            results['serializers'].append(
+                {
+                    'backend': backend,
+                    'indent': indent,
+                    'time': round(time.perf_counter() - start, 3),
+                    'output_size_mb': round(filename.stat().st_size / 2**20, 2)
+                }
+            )
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Measures the STIX patterns compilation throughput over the indicators of the
+test bundles, comparing the ANTLR grammar with the fast path used for simple
+comparison patterns. The patterns cache is bypassed so every pattern is
+actually compiled.
+
+    python benchmarks/stix2_pattern_compilation.py --rounds 20
+"""
+
+import argparse
+import inspect
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from misp_stix_converter.stix2misp.stix2_pattern_parser import ( # noqa
+    _fast_compile_stix_pattern, _parse_stix_pattern)
+from tests.test_external_stix20_bundles import TestExternalSTIX20Bundles # noqa
+from tests.test_external_stix21_bundles import TestExternalSTIX21Bundles # noqa
+from tests.test_internal_stix20_bundles import TestInternalSTIX20Bundles # noqa
+from tests.test_internal_stix21_bundles import TestInternalSTIX21Bundles # noqa
+
+_BUNDLES = (
+    TestExternalSTIX20Bundles, TestExternalSTIX21Bundles,
+    TestInternalSTIX20Bundles, TestInternalSTIX21Bundles
+)
+
+
+def _compile(function, patterns: list, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for version, pattern in patterns:
+            function(version, pattern)
+    return time.perf_counter() - start
+
+
+def _fetch_patterns() -> list:
+    patterns = set()
+    for bundles in _BUNDLES:
+        for name, method in inspect.getmembers(bundles, inspect.ismethod):
+            if not name.startswith('get_bundle'):
+                continue
+            for stix_object in method().objects:
+                if stix_object['type'] != 'indicator':
+                    continue
+                if stix_object.get('pattern_type', 'stix') != 'stix':
+                    continue
+                version = stix_object.get('spec_version', '2.0')
+                patterns.add((version.replace('.', ''), stix_object['pattern']))
+    return sorted(patterns)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the STIX patterns compilation.'
+    )
+    parser.add_argument(
+        '--rounds', type=int, default=20,
+        help='Number of times every pattern is compiled.'
+    )
+    args = parser.parse_args()
+    patterns = _fetch_patterns()
+    simple_patterns = [
+        (version, pattern) for version, pattern in patterns
+        if _fast_compile_stix_pattern(version, pattern) is not None
+    ]
+    compiled = len(simple_patterns) * args.rounds
+    antlr = _compile(_parse_stix_pattern, simple_patterns, args.rounds)
+    fast_path = _compile(_fast_compile_stix_pattern, simple_patterns, args.rounds)
+    results = {
+        'patterns': len(patterns),
+        'simple_patterns': len(simple_patterns),
+        'rounds': args.rounds,
+        'antlr': {
+            'duration': round(antlr, 4),
+            'patterns_per_second': round(compiled / antlr)
+        },
+        'fast_path': {
+            'duration': round(fast_path, 4),
+            'patterns_per_second': round(compiled / fast_path)
+        },
+        'speedup': round(antlr / fast_path, 1)
+    }
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
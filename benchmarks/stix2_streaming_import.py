@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compares the peak memory usage and the wall time of the standard STIX 2 import
+path (the whole file content parsed with `stix2.parsing.parse`) with the
+streaming import path (`STIX2toMISPParser.load_stix_file`) on synthetic
+bundles.
+
+    python benchmarks/stix2_streaming_import.py --sizes 100000 1000000
+"""
+
+import argparse
+import json
+import resource
+import sys
+import time
+from multiprocessing import get_context
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from misp_stix_converter import ExternalSTIX2toMISPParser # noqa
+from stix2.parsing import parse as stix2_parser # noqa
+
+_TIMESTAMP = '2020-10-25T16:22:00.000Z'
+
+
+def _generate_bundle(filename: Path, size: int):
+    indicator_ids = []
+    with open(filename, 'wt', encoding='utf-8') as f:
+        f.write(f'{{"type": "bundle", "id": "bundle--{uuid4()}", "objects": [')
+        for index in range(size):
+            indicator_id = f'indicator--{uuid4()}'
+            indicator_ids.append(indicator_id)
+            indicator = {
+                'type': 'indicator', 'spec_version': '2.1',
+                'id': indicator_id, 'created': _TIMESTAMP,
+                'modified': _TIMESTAMP, 'pattern_type': 'stix',
+                'pattern': f"[ipv4-addr:value = '10.{index >> 16 & 255}."
+                           f"{index >> 8 & 255}.{index & 255}']",
+                'valid_from': _TIMESTAMP
+            }
+            f.write(f'{json.dumps(indicator)},')
+        report = {
+            'type': 'report', 'spec_version': '2.1',
+            'id': f'report--{uuid4()}', 'created': _TIMESTAMP,
+            'modified': _TIMESTAMP, 'name': 'Synthetic benchmark report',
+            'published': _TIMESTAMP, 'object_refs': indicator_ids
+        }
+        f.write(f'{json.dumps(report)}]}}')
+
+
+def _load(filename: Path, streaming: bool, queue):
+    start = time.perf_counter()
+    parser = ExternalSTIX2toMISPParser()
+    if streaming:
+        parser.load_stix_file(filename)
+    else:
+        with open(filename, 'rt', encoding='utf-8') as f:
+            bundle = stix2_parser(
+                f.read(), allow_custom=True, interoperability=True
+            )
+        parser.load_stix_bundle(bundle)
+        del bundle
+    duration = time.perf_counter() - start
+    # ru_maxrss is expressed in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({'wall_time': round(duration, 3), 'peak_rss_mb': peak // 1024})
+
+
+def _measure(filename: Path, streaming: bool) -> dict:
+    context = get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_load, args=(filename, streaming, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the streaming STIX 2 import.'
+    )
+    parser.add_argument(
+        '--sizes', nargs='+', type=int, default=[100000, 1000000],
+        help='Number of objects in the synthetic bundles.'
+    )
+    args = parser.parse_args()
+    results = []
+    with TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            filename = Path(tmp_dir) / f'bundle_{size}.json'
+            _generate_bundle(filename, size)
+            result = {
+                'objects': size,
+                'file_size_mb': filename.stat().st_size // (1024 * 1024)
+            }
+            for mode, streaming in (('standard', False), ('streaming', True)):
+                result[mode] = _measure(filename, streaming)
+            results.append(result)
+            filename.unlink()
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
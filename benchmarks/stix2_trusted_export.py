@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compares the STIX 2 export time of a synthetic MISP event when the STIX objects
+are validated by the stix2 library and when they are built as plain
+dictionaries in trusted mode, with and without the separate validation pass.
+
+The event is built from the templates of the benchmark suite, with UUIDs drawn
+from a generator seeded with the size, so the same size always gives the same
+content.
+
+    python benchmarks/stix2_trusted_export.py --size 10000
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from misp_stix_converter import MISPtoSTIX20Parser, MISPtoSTIX21Parser # noqa
+from stix2.serialization import STIXJSONEncoder # noqa
+from suite import _fetch_templates, _generate_event # noqa
+
+_PARSERS = {'2.0': MISPtoSTIX20Parser, '2.1': MISPtoSTIX21Parser}
+
+
+def _comparable(content: str) -> list:
+    # The identities of the organisations in the sightings are timestamped
+    # with the export time, which differs between the exports
+    stix_objects = json.loads(content)['objects']
+    for stix_object in stix_objects:
+        if stix_object['type'] == 'identity':
+            stix_object.pop('created')
+            stix_object.pop('modified')
+    return stix_objects
+
+
+def _export(parser_class, event: dict, trusted: bool, validate: bool) -> tuple:
+    parser = parser_class(trusted=trusted)
+    start = time.perf_counter()
+    parser.parse_misp_event(event)
+    content = json.dumps(parser.bundle, cls=STIXJSONEncoder, indent=4)
+    export = time.perf_counter() - start
+    result = {'time': round(export, 3)}
+    if validate:
+        parser.validate()
+        result['validation_time'] = round(time.perf_counter() - start - export, 3)
+    return result, content
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the trusted STIX 2 export mode.'
+    )
+    parser.add_argument(
+        '--size', type=int, default=10000,
+        help='Number of attributes and objects in the synthetic event.'
+    )
+    parser.add_argument(
+        '--version', choices=tuple(_PARSERS), default='2.1',
+        help='STIX 2 version to export to.'
+    )
+    args = parser.parse_args()
+    logging.getLogger('pymisp').setLevel(logging.ERROR)
+    warnings.simplefilter('ignore')
+    event = _generate_event(args.size, *_fetch_templates())
+    parser_class = _PARSERS[args.version]
+    validated, reference = _export(parser_class, event, False, False)
+    trusted, content = _export(parser_class, event, True, True)
+    results = {
+        'size': args.size,
+        'version': args.version,
+        'validated': validated,
+        'trusted': trusted,
+        'identical': _comparable(content) == _comparable(reference),
+        'speedup': round(validated['time'] / trusted['time'], 1)
+    }
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Reproducible benchmark suite of the MISP to STIX export, the STIX 2 to MISP
+import and the full round trip, on synthetic content of parametrised sizes.
+
+The synthetic MISP events are made of the attributes and objects defined by
+the `get_event_with_*` builders of `tests/test_events.py`, repeated until the
+requested size with UUIDs drawn from a generator seeded with the size, so the
+same sizes always give the same content. Only the attributes and objects every
+benchmarked parser converts without error are used. The STIX 2 bundles used by
+the import benchmarks are the export results of those events, imported with
+the internal parser and with the external parser.
+
+The results are written as JSON, with the commit and the environment they
+were measured in. Giving the results of a previous run with `--compare` adds
+the time ratio of every measure and exits with an error when one of them is
+over the `--threshold`.
+
+    python benchmarks/suite.py --sizes 100 1000 --output results.json
+    python benchmarks/suite.py --sizes 100 1000 --compare results.json
+"""
+
+import argparse
+import inspect
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from copy import deepcopy
+from datetime import datetime, timezone
+from pathlib import Path
+from uuid import UUID
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from misp_stix_converter import ( # noqa
+    __version__, ExternalSTIX2toMISPParser, InternalSTIX2toMISPParser,
+    MISPtoSTIX1EventsParser, MISPtoSTIX20Parser, MISPtoSTIX21Parser)
+from misp_stix_converter.misp_stix_converter import _default_org # noqa
+from stix2.parsing import parse as stix2_parser # noqa
+from stix2.serialization import STIXJSONEncoder # noqa
+from tests import test_events # noqa
+
+_EXPORT_PARSERS = {
+    'stix1': lambda: MISPtoSTIX1EventsParser(_default_org, '1.2'),
+    'stix20': MISPtoSTIX20Parser,
+    'stix21': MISPtoSTIX21Parser
+}
+_IMPORT_PARSERS = {
+    'internal': InternalSTIX2toMISPParser,
+    'external': ExternalSTIX2toMISPParser
+}
+
+
+################################################################################
+#                        SYNTHETIC CONTENT GENERATION.                         #
+################################################################################
+
+def _fetch_templates() -> tuple:
+    attributes = []
+    objects = []
+    for name, get_event in inspect.getmembers(test_events, inspect.isfunction):
+        if not name.startswith('get_event_with_'):
+            continue
+        try:
+            event = get_event()['Event']
+        except Exception:
+            continue
+        templates = (
+            *(('Attribute', attribute) for attribute in event.get('Attribute', [])),
+            *(('Object', misp_object) for misp_object in event.get('Object', []))
+        )
+        for feature, template in templates:
+            template = deepcopy(template)
+            template.pop('ObjectReference', None)
+            if _is_convertible(feature, template):
+                (attributes if feature == 'Attribute' else objects).append(template)
+    return attributes, objects
+
+
+def _generate_event(size: int, attributes: list, objects: list) -> dict:
+    generator = random.Random(size)
+    event = test_events.get_base_event()
+    event['Event'].update(
+        {
+            'uuid': _generate_uuid(generator),
+            'Attribute': [
+                _with_uuids(attributes[index % len(attributes)], generator)
+                for index in range(size - size // 4)
+            ],
+            'Object': [
+                _with_uuids(objects[index % len(objects)], generator)
+                for index in range(size // 4)
+            ]
+        }
+    )
+    return event
+
+
+def _generate_uuid(generator: random.Random) -> str:
+    # Version 4 UUIDs, as expected for the STIX identifiers
+    return str(UUID(int=generator.getrandbits(128), version=4))
+
+
+def _is_convertible(feature: str, template: dict) -> bool:
+    event = test_events.get_base_event()
+    event['Event'][feature] = [template]
+    try:
+        for name, parser_class in _EXPORT_PARSERS.items():
+            content = _export(parser_class, event)
+            if name == 'stix1':
+                continue
+            for import_parser in _IMPORT_PARSERS.values():
+                _import(import_parser, content)
+    except Exception:
+        return False
+    return True
+
+
+def _with_uuids(template: dict, generator: random.Random) -> dict:
+    content = deepcopy(template)
+    content['uuid'] = _generate_uuid(generator)
+    for attribute in content.get('Attribute', []):
+        attribute['uuid'] = _generate_uuid(generator)
+    return content
+
+
+################################################################################
+#                             BENCHMARKED FEATURES                             #
+################################################################################
+
+def _export(parser_class, event: dict) -> str:
+    parser = parser_class()
+    parser.parse_misp_event(deepcopy(event))
+    if isinstance(parser, MISPtoSTIX1EventsParser):
+        return parser.stix_package.to_xml()
+    return json.dumps(parser.bundle, cls=STIXJSONEncoder, indent=4)
+
+
+def _import(parser_class, content: str) -> str:
+    parser = parser_class()
+    parser.load_stix_bundle(
+        stix2_parser(content, allow_custom=True, interoperability=True)
+    )
+    parser.parse_stix_bundle()
+    return parser.misp_event.to_json(indent=4)
+
+
+def _round_trip(event: dict) -> str:
+    return _import(
+        InternalSTIX2toMISPParser, _export(MISPtoSTIX21Parser, event)
+    )
+
+
+def _measure(repeat: int, function, *args) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return {
+        'min': round(min(timings), 4),
+        'median': round(statistics.median(timings), 4),
+        'max': round(max(timings), 4)
+    }
+
+
+################################################################################
+#                           RESULTS HANDLING FUNCTIONS                          #
+################################################################################
+
+def _compare(results: dict, reference: dict, threshold: float) -> list:
+    references = {
+        (measure['size'], measure['name']): measure
+        for measure in reference['measures']
+    }
+    regressions = []
+    for measure in results['measures']:
+        previous = references.get((measure['size'], measure['name']))
+        if previous is None:
+            continue
+        ratio = measure['time']['median'] / previous['time']['median']
+        measure['ratio'] = round(ratio, 2)
+        if ratio > threshold:
+            regressions.append(
+                f"{measure['name']} with {measure['size']} attributes and "
+                f"objects: {ratio:.2f} times slower than the reference."
+            )
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', 'HEAD'), capture_output=True, check=True,
+            cwd=Path(__file__).resolve().parent, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _run(sizes: list, repeat: int) -> list:
+    attributes, objects = _fetch_templates()
+    measures = []
+    for size in sorted(sizes):
+        event = _generate_event(size, attributes, objects)
+        for name, parser_class in _EXPORT_PARSERS.items():
+            measures.append(
+                {
+                    'name': f'export.{name}', 'size': size,
+                    'time': _measure(repeat, _export, parser_class, event)
+                }
+            )
+        for version, parser_class in (('stix20', MISPtoSTIX20Parser),
+                                      ('stix21', MISPtoSTIX21Parser)):
+            content = _export(parser_class, event)
+            for name, import_parser in _IMPORT_PARSERS.items():
+                measures.append(
+                    {
+                        'name': f'import.{name}.{version}', 'size': size,
+                        'time': _measure(repeat, _import, import_parser, content)
+                    }
+                )
+        measures.append(
+            {
+                'name': 'round_trip.stix21', 'size': size,
+                'time': _measure(repeat, _round_trip, event)
+            }
+        )
+    return measures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run the MISP-STIX conversion benchmark suite.'
+    )
+    parser.add_argument(
+        '--sizes', nargs='+', type=int, default=[100, 1000],
+        help='Number of attributes and objects in the synthetic events.'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help='Number of runs of every measure.'
+    )
+    parser.add_argument(
+        '--output', type=Path,
+        help='File to write the JSON results in - printed if not set.'
+    )
+    parser.add_argument(
+        '--compare', type=Path,
+        help='JSON results of a previous run to compare the results with.'
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=1.25,
+        help='Maximum accepted time ratio with the compared results.'
+    )
+    args = parser.parse_args()
+    # The conversion warnings are part of the measured work, not of the output
+    logging.getLogger('pymisp').setLevel(logging.ERROR)
+    warnings.simplefilter('ignore')
+    results = {
+        'commit': _git_commit(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'misp_stix_version': __version__,
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'repeat': args.repeat,
+        'measures': _run(args.sizes, args.repeat)
+    }
+    regressions = []
+    if args.compare is not None:
+        with open(args.compare, 'rt', encoding='utf-8') as f:
+            reference = json.load(f)
+        results['compared_commit'] = reference.get('commit')
+        regressions = _compare(results, reference, args.threshold)
+    content = json.dumps(results, indent=4)
+    if args.output is None:
+        print(content)
+    else:
+        with open(args.output, 'wt', encoding='utf-8') as f:
+            f.write(content)
+    if regressions:
+        sys.exit('\n'.join(regressions))
+
+
+if __name__ == '__main__':
+    main()
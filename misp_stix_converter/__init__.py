@@ -2,36 +2,118 @@ __version__ = '2.4.178'
 
 import argparse
 from .misp_stix_mapping import Mapping # noqa
-from .misp2stix import MISPtoSTIX1AttributesParser, MISPtoSTIX1EventsParser # noqa
-from .misp2stix import MISPtoSTIX1Mapping # noqa
-from .misp2stix import MISPtoSTIX20Parser, MISPtoSTIX21Parser # noqa
-from .misp2stix import MISPtoSTIX20Mapping, MISPtoSTIX21Mapping # noqa
-from .misp2stix import stix1_attributes_framing, stix1_framing # noqa
-from .misp2stix import stix20_framing, stix21_framing # noqa
-# Helpers
-from .misp_stix_converter import ( # noqa
-    _from_misp, misp_attribute_collection_to_stix1, misp_collection_to_stix2,
-    misp_event_collection_to_stix1, misp_to_stix1, misp_to_stix2,
-    stix_1_to_misp, stix_2_to_misp)
-# STIX 1 special helpers
-from .misp_stix_converter import ( # noqa
-    _get_campaigns, _get_courses_of_action, _get_events, _get_indicators,
-    _get_observables, _get_threat_actors, _get_ttps, _from_misp)
-# STIX 1 footers
-from .misp_stix_converter import ( # noqa
-    _get_campaigns_footer, _get_courses_of_action_footer, _get_indicators_footer,
-    _get_observables_footer, _get_threat_actors_footer, _get_ttps_footer)
-# STIX 1 headers
-from .misp_stix_converter import ( # noqa
-    _get_campaigns_header, _get_courses_of_action_header, _get_indicators_header,
-    _get_observables_header, _get_threat_actors_header, _get_ttps_header)
-# Command line methods
-from .misp_stix_converter import _misp_to_stix, _stix_to_misp # noqa
-from .stix2misp import ExternalSTIX2toMISPParser, InternalSTIX2toMISPParser # noqa
-from .stix2misp import ExternalSTIX2toMISPMapping, InternalSTIX2toMISPMapping # noqa
-from .stix2misp import STIX2PatternParser # noqa
+from importlib import import_module
 from pathlib import Path
 
+# The parsers, and the STIX libraries they rely on, are only imported once one
+# of the following names is accessed, so importing the package, or running a
+# conversion with the command line, only loads what is actually used
+_lazy_attributes = {
+    # MISP to STIX parsers and mappings
+    'MISPtoSTIX1AttributesParser': '.misp2stix.misp_to_stix1',
+    'MISPtoSTIX1EventsParser': '.misp2stix.misp_to_stix1',
+    'MISPtoSTIX1Mapping': '.misp2stix.stix1_mapping',
+    'MISPtoSTIX20Parser': '.misp2stix.misp_to_stix20',
+    'MISPtoSTIX21Parser': '.misp2stix.misp_to_stix21',
+    'MISPtoSTIX20Mapping': '.misp2stix.stix20_mapping',
+    'MISPtoSTIX21Mapping': '.misp2stix.stix21_mapping',
+    'stix1_attributes_framing': '.misp2stix.framing',
+    'stix1_framing': '.misp2stix.framing',
+    'stix20_framing': '.misp2stix.framing',
+    'stix21_framing': '.misp2stix.framing',
+    # Helpers
+    **dict.fromkeys(
+        (
+            '_from_misp', 'misp_attribute_collection_to_stix1',
+            'misp_collection_to_stix2', 'misp_event_collection_to_stix1',
+            'misp_to_stix1', 'misp_to_stix2', 'stix_1_to_misp',
+            'stix_2_to_misp'
+        ),
+        '.misp_stix_converter'
+    ),
+    # STIX 1 special helpers, footers and headers
+    **dict.fromkeys(
+        (
+            f'_get_{feature}{suffix}' for feature in (
+                'campaigns', 'courses_of_action', 'indicators', 'observables',
+                'threat_actors', 'ttps'
+            ) for suffix in ('', '_footer', '_header')
+        ),
+        '.misp_stix_converter'
+    ),
+    '_get_events': '.misp_stix_converter',
+    # Command line methods
+    '_misp_to_stix': '.misp_stix_converter',
+    '_stix_to_misp': '.misp_stix_converter',
+    '_serve': '.misp_stix_server',
+    'ConversionCache': '.misp_stix_cache',
+    'ConversionCacheError': '.misp_stix_cache',
+    'ConversionStats': '.misp_stix_stats',
+    'DeltaManifest': '.misp_stix_delta',
+    'DispatchTableError': '.misp_stix_dispatch',
+    'JSONSerializer': '.misp_stix_serializer',
+    'JSONSerializerError': '.misp_stix_serializer',
+    'PayloadStore': '.misp_stix_payloads',
+    'PayloadStoreError': '.misp_stix_payloads',
+    'SeenObjectStore': '.misp_stix_seen',
+    'ConversionServer': '.misp_stix_server',
+    'ConversionServerError': '.misp_stix_server',
+    'ParserPool': '.misp_stix_server',
+    # STIX to MISP parsers and mappings
+    'ExternalSTIX2toMISPParser': '.stix2misp.external_stix2_to_misp',
+    'InternalSTIX2toMISPParser': '.stix2misp.internal_stix2_to_misp',
+    'ExternalSTIX2toMISPMapping': '.stix2misp.external_stix2_mapping',
+    'InternalSTIX2toMISPMapping': '.stix2misp.internal_stix2_mapping',
+    'STIX2PatternParser': '.stix2misp.stix2_pattern_parser'
+}
+# A star import does not go through `__getattr__`, the public lazy attributes
+# are then listed here to be imported as well
+__all__ = [
+    'Mapping', 'main',
+    *(name for name in _lazy_attributes if not name.startswith('_'))
+]
+
+
+def __getattr__(name: str):
+    module = _lazy_attributes.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(module, __name__), name)
+    # Set as a module attribute, so it is only resolved once
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_lazy_attributes})
+
+
+def _add_cache_arguments(parser):
+    parser.add_argument(
+        '--cache_dir', type=Path,
+        help='Directory where the conversion results are cached, so the '
+             'same content converted again with the same options is not '
+             'parsed again.'
+    )
+    parser.add_argument(
+        '--cache_size', type=int, default=256,
+        help='Maximum size of the cache in MB - the least recently used '
+             'results are removed above it.'
+    )
+
+
+def _add_json_arguments(parser):
+    parser.add_argument(
+        '--indent', type=int, default=4,
+        help='Indentation of the JSON results - 0 for a compact output.'
+    )
+    parser.add_argument(
+        '--json_backend', default='json',
+        choices=['auto', 'json', 'orjson', 'ujson'],
+        help='JSON library used to write the results - orjson and ujson must '
+             'be installed, and `auto` selects the fastest one available.'
+    )
+
 
 def _handle_return_message(traceback):
     if isinstance(traceback, dict):
@@ -44,13 +126,34 @@ def _handle_return_message(traceback):
     return '\n - '.join(traceback)
 
 
-def main():
-    parser = argparse.ArgumentParser(description='Convert MISP <-> STIX')
+def _handle_stats_message(stats):
+    messages = [
+        f"- {stage}: {timer['time']:.3f}s ({timer['calls']} calls)"
+        for stage, timer in stats['timers'].items()
+    ]
+    messages.extend(
+        f'- {counter}: {value}' for counter, value in stats['counters'].items()
+    )
+    return '\n '.join(messages)
+
+
+def _argument_parser(
+        parser_class: type = argparse.ArgumentParser) -> argparse.ArgumentParser:
+    parser = parser_class(description='Convert MISP <-> STIX')
     parser.add_argument(
         '--debug', action='store_true', help='Show errors and warnings'
     )
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=1,
+        help='Number of processes used to convert multiple files in parallel.'
+    )
+    parser.add_argument(
+        '--profile', action='store_true',
+        help='Show the time spent in the conversion stages and the number of '
+             'converted objects.'
+    )
 
-    # SUBPARSERS TO SEPARATE THE 2 MAIN FEATURES
+    # SUBPARSERS TO SEPARATE THE MAIN FEATURES
     subparsers = parser.add_subparsers(
         title='Main feature', dest='feature', required=True
     )
@@ -105,7 +208,35 @@ def main():
         '-org', default='MISP',
         help='Organisation name to be used in the STIX 1 header.'
     )
-    export_parser.set_defaults(func=_misp_to_stix)
+    # STIX 2 EXPORT SPECIFIC ARGUMENTS
+    stix2_parser = export_parser.add_argument_group('STIX 2 specific arguments')
+    _add_json_arguments(stix2_parser)
+    _add_cache_arguments(stix2_parser)
+    stix2_parser.add_argument(
+        '--payloads_dir', type=Path,
+        help='Directory where the attachment and malware-sample payloads are '
+             'written, the STIX Artifacts then referencing them with their '
+             'SHA-256 hash, and their file name as relative URL, instead of '
+             'embedding them.'
+    )
+    stix2_parser.add_argument(
+        '--trusted', action='store_true',
+        help='Build the STIX objects as plain dictionaries without validating '
+             'them, for MISP content known to be valid.'
+    )
+    stix2_parser.add_argument(
+        '--manifest', type=Path,
+        help='Manifest of the delta exports: only the attributes and objects '
+             'modified since the export it records are converted, the report '
+             'still referencing all of them - the manifest is then updated, '
+             'and created if it does not exist yet.'
+    )
+    stix2_parser.add_argument(
+        '--since', type=int,
+        help='Timestamp the attributes and objects modified after are '
+             'converted again, even if the manifest holds them.'
+    )
+    export_parser.set_defaults(func='_misp_to_stix')
 
     # IMPORT SUBPARSER
     import_parser = subparsers.add_parser(
@@ -147,14 +278,92 @@ def main():
         '--galaxies_as_tags', action='store_true',
         help='Import MISP Galaxies as tag names instead of the standard Galaxy format.'
     )
-    import_parser.set_defaults(func=_stix_to_misp)
+    import_parser.add_argument(
+        '--streaming', action='store_true',
+        help='Read STIX 2 Bundles incrementally, one object at a time, '
+             'instead of loading the whole file content in memory.'
+    )
+    import_parser.add_argument(
+        '--payloads_dir', type=Path,
+        help='Directory where the attachment and malware-sample payloads '
+             'referenced by the STIX 2 Artifacts are read from, by SHA-256 '
+             'hash - the URL of the Artifacts is never followed.'
+    )
+    import_parser.add_argument(
+        '--seen_store', type=Path,
+        help='SQLite database of the STIX 2 objects already imported: only '
+             'the new and updated objects are converted, and recorded in the '
+             'database, created if it does not exist yet.'
+    )
+    _add_json_arguments(import_parser)
+    _add_cache_arguments(import_parser)
+    import_parser.set_defaults(func='_stix_to_misp')
+
+    # SERVE SUBPARSER
+    serve_parser = subparsers.add_parser(
+        'serve', help='Run a conversion daemon accepting export and import '
+                      'jobs - try `misp_stix_converter serve -h` for more help.'
+    )
+    serve_parser.add_argument(
+        '--socket', type=Path,
+        help='Unix socket to listen on, only accessible to the user running '
+             'the daemon - defaults to tmp/misp_stix_converter.sock.'
+    )
+    serve_parser.add_argument(
+        '--host', default='127.0.0.1', help='Address of the HTTP server.'
+    )
+    serve_parser.add_argument(
+        '--port', type=int,
+        help='Port of a local HTTP server to listen on instead of the Unix '
+             'socket.'
+    )
+    serve_parser.add_argument(
+        '--token_file', type=Path,
+        help='File holding the token the clients send in an `Authorization: '
+             'Bearer` header - a token is generated and written to this file '
+             'if it does not exist. Defaults to '
+             'tmp/misp_stix_converter.token.'
+    )
+    serve_parser.add_argument(
+        '--root', type=Path, action='append',
+        help='Directory the jobs can read their files from and write their '
+             'results to - can be repeated. Defaults to the current '
+             'directory.'
+    )
+    serve_parser.add_argument(
+        '--max_concurrency', type=int, default=4,
+        help='Maximum number of conversion jobs processed at the same time.'
+    )
+    serve_parser.add_argument(
+        '--queue_timeout', type=float, default=30,
+        help='Number of seconds a job waits for a free conversion slot '
+             'before being rejected.'
+    )
+    serve_parser.add_argument(
+        '--stix1', action='store_true',
+        help='Also load the STIX 1 libraries and parsers at start-up.'
+    )
+    serve_parser.set_defaults(func='_serve')
+    return parser
+
 
-    stix_args = parser.parse_args()
+def _check_arguments(stix_args: argparse.Namespace) -> argparse.Namespace:
     if len(stix_args.file) > 1 and stix_args.single_output and stix_args.output_dir is None:
         stix_args.output_dir = Path(__file__).parents[1] / 'tmp'
+    return stix_args
+
+
+def main():
+    stix_args = _argument_parser().parse_args()
+    if stix_args.feature == 'serve':
+        return __getattr__(stix_args.func)(stix_args)
+    _check_arguments(stix_args)
     feature = 'MISP to STIX' if stix_args.feature == 'export' else 'STIX to MISP'
     try:
-        traceback = stix_args.func(stix_args)
+        # The conversion functions are only imported once the arguments are
+        # parsed, so they load the STIX libraries of the requested version
+        convert = __getattr__(stix_args.func)
+        traceback = convert(stix_args)
         for field in ('errors', 'warnings'):
             if field in traceback:
                 messages = _handle_return_message(traceback[field])
@@ -181,6 +390,13 @@ def main():
                 )
         else:
             print(f'No result from the {feature} conversion.')
+        if 'cache' in traceback:
+            cache = traceback['cache']
+            print(f"Conversion results cache: {cache['hits']} hits, "
+                  f"{cache['misses']} misses.")
+        if 'stats' in traceback:
+            stats = _handle_stats_message(traceback['stats'])
+            print(f'{feature} conversion stages and counters:\n {stats}')
     except Exception as exception:
         print(f'Breaking exception encountered during the {feature} conversion '
               f'process: {exception.__str__()}')
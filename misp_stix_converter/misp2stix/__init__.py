@@ -1,7 +1,31 @@
-from .framing import stix1_attributes_framing, stix1_framing, stix20_framing, stix21_framing # noqa
-from .misp_to_stix1 import MISPtoSTIX1AttributesParser, MISPtoSTIX1EventsParser # noqa
-from .misp_to_stix20 import MISPtoSTIX20Parser # noqa
-from .misp_to_stix21 import MISPtoSTIX21Parser # noqa
-from .stix1_mapping import MISPtoSTIX1Mapping # noqa
-from .stix20_mapping import MISPtoSTIX20Mapping # noqa
-from .stix21_mapping import MISPtoSTIX21Mapping # noqa
+from importlib import import_module
+
+# Imported on first access, so that using the STIX 2 parsers does not load the
+# STIX 1 libraries, and conversely
+_lazy_attributes = {
+    'stix1_attributes_framing': '.framing',
+    'stix1_framing': '.framing',
+    'stix20_framing': '.framing',
+    'stix21_framing': '.framing',
+    'MISPtoSTIX1AttributesParser': '.misp_to_stix1',
+    'MISPtoSTIX1EventsParser': '.misp_to_stix1',
+    'MISPtoSTIX20Parser': '.misp_to_stix20',
+    'MISPtoSTIX21Parser': '.misp_to_stix21',
+    'MISPtoSTIX1Mapping': '.stix1_mapping',
+    'MISPtoSTIX20Mapping': '.stix20_mapping',
+    'MISPtoSTIX21Mapping': '.stix21_mapping'
+}
+__all__ = list(_lazy_attributes)
+
+
+def __getattr__(name: str):
+    module = _lazy_attributes.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_lazy_attributes})
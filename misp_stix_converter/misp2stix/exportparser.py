@@ -5,6 +5,8 @@ import traceback
 from .stix1_mapping import MISPtoSTIX1Mapping
 from .stix20_mapping import MISPtoSTIX20Mapping
 from .stix21_mapping import MISPtoSTIX21Mapping
+from ..misp_stix_dispatch import set_dispatch_tables
+from ..misp_stix_stats import ConversionStats, _disabled_stats, _stats_typing
 from abc import ABCMeta
 from collections import defaultdict
 from datetime import datetime, timezone
@@ -21,12 +23,17 @@ class MISPtoSTIXParser(metaclass=ABCMeta):
         super().__init__()
         self.__errors: defaultdict = defaultdict(list)
         self.__warnings: defaultdict = defaultdict(set)
+        self.__stats: _stats_typing = _disabled_stats
         self._identifier: str
         self._mapping: Union[
             MISPtoSTIX1Mapping, MISPtoSTIX20Mapping, MISPtoSTIX21Mapping
         ]
         self._misp_event: dict
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        set_dispatch_tables(cls)
+
     @property
     def composite_separators(cls) -> tuple:
         return cls.__composite_separators
@@ -35,10 +42,42 @@ class MISPtoSTIXParser(metaclass=ABCMeta):
     def errors(self) -> dict:
         return self.__errors
 
+    @property
+    def stats(self) -> _stats_typing:
+        return self.__stats
+
     @property
     def warnings(self) -> dict:
         return {identifier: list(warnings) for identifier, warnings in self.__warnings.items()}
 
+    def enable_profiling(self, stats: Optional[ConversionStats] = None):
+        """
+        Records the time spent in the conversion stages and the number of
+        converted objects, then available with `stats.to_dict()`.
+
+        :param stats: Existing stats to record the figures in, e.g. to
+            include the time spent loading a file before the parser is created
+        """
+        self.__stats = ConversionStats() if stats is None else stats
+
+    def reset(self):
+        """
+        Re-initialises the conversion state, so the same parser instance can
+        convert any number of MISP contents, one after the other:
+
+            parser.parse_misp_event(misp_event)
+            bundle = parser.bundle
+            errors, warnings = parser.errors, parser.warnings
+            parser.reset()
+
+        The results, errors and warnings must be fetched before the reset.
+        The settings, the mapping tables and the stats, which then sum up all
+        the conversions, are kept.
+        """
+        self.__errors = defaultdict(list)
+        self.__warnings = defaultdict(set)
+        self.__dict__.pop('_misp_event', None)
+
     ################################################################################
     #                           COMMON PARSING FUNCTIONS                           #
     ################################################################################
@@ -122,25 +161,29 @@ class MISPtoSTIXParser(metaclass=ABCMeta):
     def _handle_event_tags_and_galaxies(self) -> tuple:
         if self._misp_event.get('Galaxy'):
             tag_names: list = []
-            for galaxy in self._misp_event['Galaxy']:
-                galaxy_type = galaxy['type']
-                to_call = self._mapping.galaxy_types_mapping(galaxy_type)
-                if to_call is not None:
-                    getattr(self, to_call.format('event'))(galaxy)
-                    tag_names.extend(self._quick_fetch_tag_names(galaxy))
-                else:
-                    self._handle_undefined_event_galaxy(galaxy)
+            with self.stats.timer('galaxies'):
+                for galaxy in self._misp_event['Galaxy']:
+                    self.stats.count('galaxies')
+                    galaxy_type = galaxy['type']
+                    handler = self._event_galaxy_handlers.get(galaxy_type)
+                    if handler is not None:
+                        handler(self, galaxy)
+                        tag_names.extend(self._quick_fetch_tag_names(galaxy))
+                    else:
+                        self._handle_undefined_event_galaxy(galaxy)
             return tuple(tag['name'] for tag in self._misp_event.get('Tag', []) if tag['name'] not in tag_names)
         return tuple(tag['name'] for tag in self._misp_event.get('Tag', []))
 
     def _parse_event_galaxies(self, galaxies: list):
-        for galaxy in galaxies:
-            galaxy_type = galaxy['type']
-            to_call = self._mapping.galaxy_types_mapping(galaxy_type)
-            if to_call is not None:
-                getattr(self, to_call.format('parent'))(galaxy)
-            else:
-                self._handle_undefined_parent_galaxy(galaxy)
+        with self.stats.timer('galaxies'):
+            for galaxy in galaxies:
+                self.stats.count('galaxies')
+                galaxy_type = galaxy['type']
+                handler = self._parent_galaxy_handlers.get(galaxy_type)
+                if handler is not None:
+                    handler(self, galaxy)
+                else:
+                    self._handle_undefined_parent_galaxy(galaxy)
 
     ################################################################################
     #                           COMMON UTILITY FUNCTIONS                           #
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compact on-disk index of the MITRE CTI content used to match MISP galaxy
+clusters with the corresponding ATT&CK objects in interoperability mode.
+
+The index is built once from the `data/cti` bundles and then memory-mapped,
+so every parser (and every process when converting files in a pool) shares
+the same pages instead of loading and indexing the whole CTI content again.
+
+File layout:
+    - header: magic, format version, number of slots, data fingerprint
+    - hash table: fixed size slots (key hash, key offset, value offset)
+      resolved with linear probing
+    - data region: length prefixed UTF-8 records (keys and JSON values),
+      every offset in the index being relative to the start of this region
+
+Keys are prefixed by their kind:
+    - `n:<name>`: catalog entry for a name or an external ID, mapping every
+      object type to the offsets of the objects with this exact name
+    - `r:<feature>:<value>`: IDs of the objects with an external reference
+      from a known source name whose `external_id` or `url` is the value
+    - `i:<identity_id>`: the identity object
+"""
+
+import argparse
+import json
+import mmap
+import os
+import stat
+import struct
+import sys
+from .stix2_mapping import MISPtoSTIX2Mapping
+from collections import defaultdict
+from hashlib import blake2b
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Iterator, Optional, Union
+
+_CTI_PATH = Path(__file__).resolve().parent.parent / 'data' / 'cti'
+_INDEX_PATH = _CTI_PATH.parent / 'galaxies_catalog.idx'
+
+_HEADER = struct.Struct('<4sIQ32s')
+_LENGTH = struct.Struct('<I')
+_MAGIC = b'MSGC'
+_SLOT = struct.Struct('<QQQ')
+_VERSION = 1
+
+_catalogs: dict = {}
+
+
+class GalaxiesCatalogError(Exception):
+    pass
+
+
+class GalaxiesCatalog:
+    """Read-only view of a memory-mapped galaxies catalog index."""
+
+    def __init__(self, filename: Union[Path, str]):
+        self.__filename = Path(filename)
+        with open(self.__filename, 'rb') as f:
+            try:
+                self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as error:
+                raise GalaxiesCatalogError(
+                    f'Empty galaxies catalog index: {self.__filename}'
+                ) from error
+        magic, version, slots, fingerprint = _HEADER.unpack_from(self.__map)
+        if magic != _MAGIC or version != _VERSION:
+            self.__map.close()
+            raise GalaxiesCatalogError(
+                f'Invalid galaxies catalog index: {self.__filename}'
+            )
+        self.__data_offset = _HEADER.size + slots * _SLOT.size
+        self.__fingerprint = fingerprint
+        self.__slots = slots
+
+    def __contains__(self, name: str) -> bool:
+        return self.__lookup(f'n:{name}') is not None
+
+    def __del__(self):
+        try:
+            self.__map.close()
+        except AttributeError:
+            pass
+
+    @property
+    def filename(self) -> Path:
+        return self.__filename
+
+    @property
+    def fingerprint(self) -> bytes:
+        return self.__fingerprint
+
+    def get_identity(self, identity_id: str) -> Union[dict, None]:
+        offset = self.__lookup(f'i:{identity_id}')
+        if offset is not None:
+            return json.loads(self.__read_record(offset))
+
+    def get_named_objects(self, name: str, object_type: str) -> Iterator[dict]:
+        """
+        Yields the objects of the given type named exactly like the catalog
+        entry, in the same order as they appear in the CTI content.
+        """
+        entry = self.__get_entry(name)
+        for offset in entry.get(object_type, []):
+            yield json.loads(self.__read_record(offset))
+
+    def get_object_types(self, name: str) -> tuple:
+        return tuple(self.__get_entry(name))
+
+    def get_referenced_object_ids(self, feature: str, value: str) -> tuple:
+        offset = self.__lookup(f'r:{feature}:{value}')
+        if offset is None:
+            return tuple()
+        return tuple(json.loads(self.__read_record(offset)))
+
+    ############################################################################
+    #                          INDEX LOOKUP METHODS                            #
+    ############################################################################
+
+    def __get_entry(self, name: str) -> dict:
+        offset = self.__lookup(f'n:{name}')
+        if offset is None:
+            return {}
+        return json.loads(self.__read_record(offset))
+
+    def __lookup(self, key: str) -> Union[int, None]:
+        encoded = key.encode()
+        key_hash = _hash_key(encoded)
+        slot = key_hash % self.__slots
+        while True:
+            stored_hash, key_offset, value_offset = _SLOT.unpack_from(
+                self.__map, _HEADER.size + slot * _SLOT.size
+            )
+            if not key_offset:
+                return None
+            if stored_hash == key_hash and self.__read_record(key_offset) == encoded:
+                return value_offset
+            slot = (slot + 1) % self.__slots
+
+    def __read_record(self, offset: int) -> bytes:
+        offset += self.__data_offset
+        length, = _LENGTH.unpack_from(self.__map, offset)
+        start = offset + _LENGTH.size
+        return self.__map[start:start + length]
+
+
+################################################################################
+#                        INDEX BUILDING & LOADING FUNCTIONS                    #
+################################################################################
+
+def build_galaxies_catalog(cti_path: Optional[Path] = None,
+                           filename: Optional[Path] = None) -> Path:
+    """
+    Compiles the CTI bundles into a galaxies catalog index.
+
+    The index is written in a temporary file which then replaces the target
+    atomically, so parsers running in other processes never read a partially
+    written index.
+    """
+    cti_path = _CTI_PATH if cti_path is None else Path(cti_path)
+    filename = _INDEX_PATH if filename is None else Path(filename)
+    source_names = MISPtoSTIX2Mapping.source_names()
+    records: dict = {}
+    catalog = defaultdict(lambda: defaultdict(dict))
+    identities = {}
+    references = defaultdict(dict)
+    for bundle_file in _cti_files(cti_path):
+        with open(bundle_file, 'rt', encoding='utf-8') as f:
+            bundle = json.loads(f.read())
+        for stix_object in bundle['objects']:
+            object_id = stix_object['id']
+            if stix_object['type'] == 'identity':
+                identities[object_id] = stix_object
+                continue
+            if not stix_object.get('name'):
+                continue
+            record = (object_id, stix_object['name'])
+            records.setdefault(record, stix_object)
+            object_type = stix_object['type']
+            catalog[record[1]][object_type].setdefault(object_id, record)
+            external_id = None
+            for reference in stix_object.get('external_references', []):
+                if reference.get('source_name') not in source_names:
+                    continue
+                if external_id is None:
+                    external_id = reference['external_id']
+                for feature in ('external_id', 'url'):
+                    if reference.get(feature) is not None:
+                        references[(feature, reference[feature])][object_id] = None
+            if external_id is not None:
+                catalog[external_id][object_type].setdefault(object_id, record)
+    writer = _IndexWriter()
+    offsets = {
+        record: writer.add_record(json.dumps(stix_object).encode())
+        for record, stix_object in records.items()
+    }
+    for identity_id, identity in identities.items():
+        writer.add_key(
+            f'i:{identity_id}', writer.add_record(json.dumps(identity).encode())
+        )
+    for name, object_types in catalog.items():
+        entry = {
+            object_type: [
+                offsets[record] for record in objects.values()
+                if record[1] == name
+            ] for object_type, objects in object_types.items()
+        }
+        writer.add_key(f'n:{name}', writer.add_record(json.dumps(entry).encode()))
+    for (feature, value), object_ids in references.items():
+        writer.add_key(
+            f'r:{feature}:{value}',
+            writer.add_record(json.dumps(list(object_ids)).encode())
+        )
+    with NamedTemporaryFile(dir=filename.parent, delete=False) as f:
+        writer.write(f, _fingerprint(cti_path))
+    os.replace(f.name, filename)
+    return filename
+
+
+def load_galaxies_catalog(cti_path: Optional[Path] = None,
+                          filename: Optional[Path] = None) -> GalaxiesCatalog:
+    """
+    Returns the galaxies catalog index for the CTI content.
+
+    The index is opened once per process and shared by every parser. It is
+    (re)built when missing or when the CTI content changed since it was built,
+    in the user cache directory if it cannot be written next to the CTI data.
+    """
+    cti_path = _CTI_PATH if cti_path is None else Path(cti_path)
+    filename = _INDEX_PATH if filename is None else Path(filename)
+    fingerprint = _fingerprint(cti_path)
+    catalog = _catalogs.get(filename)
+    if catalog is not None and catalog.fingerprint == fingerprint:
+        return catalog
+    index = filename
+    if not os.access(filename.parent, os.W_OK):
+        # Read-only installation: the index goes in the user cache directory
+        index = _cache_directory() / f'galaxies-catalog-{fingerprint.hex()[:16]}.idx'
+    try:
+        catalog = GalaxiesCatalog(index)
+    except (GalaxiesCatalogError, OSError):
+        catalog = None
+    if catalog is None or catalog.fingerprint != fingerprint:
+        catalog = GalaxiesCatalog(build_galaxies_catalog(cti_path, index))
+    _catalogs[filename] = catalog
+    return catalog
+
+
+def _cache_directory() -> Path:
+    """
+    Returns the per-user directory holding the galaxies catalog index of a
+    read-only installation.
+
+    The directory is only trusted when it belongs to the current user and
+    nobody else can access it, so no other user can plant a crafted index.
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME')
+    directory = (
+        Path(cache_home) if cache_home else Path.home() / '.cache'
+    ) / 'misp-stix'
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    status = directory.lstat()
+    if not stat.S_ISDIR(status.st_mode) or (
+            hasattr(os, 'getuid') and (
+                status.st_uid != os.getuid() or status.st_mode & 0o077)):
+        raise GalaxiesCatalogError(
+            f'Unsafe galaxies catalog cache directory: {directory}'
+        )
+    return directory
+
+
+def _cti_files(cti_path: Path) -> list:
+    return sorted(cti_path.glob('*/*.json'))
+
+
+def _fingerprint(cti_path: Path) -> bytes:
+    fingerprint = blake2b(digest_size=32)
+    for filename in _cti_files(cti_path):
+        status = filename.stat()
+        fingerprint.update(
+            f'{filename.relative_to(cti_path)}:{status.st_size}:{status.st_mtime_ns}\n'.encode()
+        )
+    return fingerprint.digest()
+
+
+def _hash_key(key: bytes) -> int:
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), 'little')
+
+
+class _IndexWriter:
+    def __init__(self):
+        # The offset 0 is reserved to mark the empty slots of the hash table
+        self.__data = bytearray(_LENGTH.pack(0))
+        self.__keys: list = []
+
+    def add_key(self, key: str, value_offset: int):
+        encoded = key.encode()
+        self.__keys.append(
+            (_hash_key(encoded), self.add_record(encoded), value_offset)
+        )
+
+    def add_record(self, record: bytes) -> int:
+        offset = len(self.__data)
+        self.__data += _LENGTH.pack(len(record))
+        self.__data += record
+        return offset
+
+    def write(self, f, fingerprint: bytes):
+        slots = 1
+        while slots < 2 * len(self.__keys) or slots < 8:
+            slots <<= 1
+        table = [None] * slots
+        for key_hash, key_offset, value_offset in self.__keys:
+            slot = key_hash % slots
+            while table[slot] is not None:
+                slot = (slot + 1) % slots
+            table[slot] = (key_hash, key_offset, value_offset)
+        f.write(_HEADER.pack(_MAGIC, _VERSION, slots, fingerprint))
+        empty = _SLOT.pack(0, 0, 0)
+        for slot in table:
+            f.write(empty if slot is None else _SLOT.pack(*slot))
+        f.write(self.__data)
+
+
+def main(args: Optional[list] = None):
+    parser = argparse.ArgumentParser(
+        description='Build the galaxies catalog index used in interoperability mode.'
+    )
+    parser.add_argument(
+        '--cti', type=Path, default=_CTI_PATH,
+        help='Path to the MITRE CTI repository content.'
+    )
+    parser.add_argument(
+        '-o', '--output', type=Path, default=_INDEX_PATH,
+        help='Path of the index file to generate.'
+    )
+    arguments = parser.parse_args(args)
+    filename = build_galaxies_catalog(arguments.cti, arguments.output)
+    print(f'Galaxies catalog index written in {filename}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,15 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
 import re
 import socket
 from .exportparser import MISPtoSTIXParser
 from .framing import _create_stix_package as _stix_package
+from .. import Mapping
+from ..misp_stix_payloads import encode_payload
+from ..misp_stix_streaming import JSONStreamReader
 from .stix1_mapping import MISPtoSTIX1Mapping
 from abc import ABCMeta
-from base64 import b64encode
 from collections import defaultdict
 from cybox.core import Observable, ObservableComposition, RelatedObject
 from cybox.common import Hash, HashList, ByteRun, ByteRuns
@@ -51,7 +52,7 @@ from stix.campaign import Campaign, Names
 from stix.coa import CourseOfAction
 from stix.common import InformationSource, Identity, ToolInformation
 from stix.common.confidence import Confidence
-from stix.common.related import RelatedCOA, RelatedIndicator, RelatedObservable, RelatedThreatActor, RelatedTTP
+from stix.common.related import RelatedCOA, RelatedIndicator, RelatedObservable, RelatedPackage, RelatedThreatActor, RelatedTTP
 from stix.common.vocabs import IncidentStatus
 from stix.core import STIXPackage, STIXHeader
 from stix.data_marking import Marking, MarkingSpecification
@@ -73,7 +74,7 @@ from stix.ttp.attack_pattern import AttackPattern
 from stix.ttp.malware_instance import MalwareInstance
 from stix.ttp.resource import Resource, Tools
 from stix.ttp.victim_targeting import VictimTargeting
-from typing import Optional, Tuple, Union
+from typing import Iterator, Optional, Tuple, Union
 from uuid import uuid5, UUID
 
 _FILE_SINGLE_ATTRIBUTES = (
@@ -90,27 +91,33 @@ _OBSERVABLE_OBJECT_TYPES = Union[
 
 
 class MISPtoSTIX1Parser(MISPtoSTIXParser, metaclass=ABCMeta):
+    _mapping = MISPtoSTIX1Mapping
+
     def __init__(self, orgname: str, version: str):
         super().__init__()
         self._orgname = orgname
         self._orgname_id = re.sub('[\W]+', '', orgname.replace(" ", "_"))
         self._version = version
-        self._mapping = MISPtoSTIX1Mapping
 
     @property
     def stix_package(self) -> STIXPackage:
         return self._stix_package
 
+    def reset(self):
+        super().reset()
+        self.__dict__.pop('_stix_package', None)
+
     ################################################################################
     #                         ATTRIBUTES PARSING FUNCTIONS                         #
     ################################################################################
 
     def _resolve_attribute(self, attribute: dict):
+        self.stats.count('attributes')
         attribute_type = attribute['type']
         try:
-            to_call = self._mapping.attribute_types_mapping(attribute_type)
-            if to_call is not None:
-                getattr(self, to_call)(attribute)
+            handler = self._attribute_handlers.get(attribute_type)
+            if handler is not None:
+                handler(self, attribute)
             else:
                 self._parse_custom_attribute(attribute)
                 self._attribute_not_mapped_warning(attribute_type)
@@ -141,14 +148,16 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser, metaclass=ABCMeta):
     def _handle_attribute_tags_and_galaxies(self, attribute: dict, indicator: Indicator) -> tuple:
         if attribute.get('Galaxy'):
             tag_names = []
-            for galaxy in attribute['Galaxy']:
-                galaxy_type = galaxy['type']
-                to_call = self._mapping.galaxy_types_mapping(galaxy_type)
-                if to_call is not None:
-                    getattr(self, to_call.format('attribute'))(galaxy, indicator)
-                    tag_names.extend(self._quick_fetch_tag_names(galaxy))
-                else:
-                    self._attribute_galaxy_not_mapped_warning(galaxy_type, attribute['type'])
+            with self.stats.timer('galaxies'):
+                for galaxy in attribute['Galaxy']:
+                    self.stats.count('galaxies')
+                    galaxy_type = galaxy['type']
+                    handler = self._attribute_galaxy_handlers.get(galaxy_type)
+                    if handler is not None:
+                        handler(self, galaxy, indicator)
+                        tag_names.extend(self._quick_fetch_tag_names(galaxy))
+                    else:
+                        self._attribute_galaxy_not_mapped_warning(galaxy_type, attribute['type'])
             return tuple(tag['name'] for tag in attribute.get('Tag', []) if tag['name'] not in tag_names)
         return tuple(tag['name'] for tag in attribute.get('Tag', []))
 
@@ -174,14 +183,16 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser, metaclass=ABCMeta):
     def _handle_non_indicator_attribute_tags_and_galaxies(self, attribute: dict, ttp: TTP) -> tuple:
         if attribute.get('Galaxy'):
             tag_names = []
-            for galaxy in attribute['Galaxy']:
-                galaxy_type = galaxy['type']
-                to_call = self._mapping.galaxy_types_mapping(galaxy_type)
-                if galaxy_type not in self._mapping.ttp_names() or to_call is None:
-                    self._attribute_galaxy_not_mapped_warning(galaxy_type, attribute['type'])
-                    continue
-                getattr(self, to_call.format('object'))(galaxy, ttp)
-                tag_names.extend(self._quick_fetch_tag_names(galaxy))
+            with self.stats.timer('galaxies'):
+                for galaxy in attribute['Galaxy']:
+                    self.stats.count('galaxies')
+                    galaxy_type = galaxy['type']
+                    handler = self._object_galaxy_handlers.get(galaxy_type)
+                    if galaxy_type not in self._mapping.ttp_names() or handler is None:
+                        self._attribute_galaxy_not_mapped_warning(galaxy_type, attribute['type'])
+                        continue
+                    handler(self, galaxy, ttp)
+                    tag_names.extend(self._quick_fetch_tag_names(galaxy))
             return tuple(tag['name'] for tag in attribute.get('Tag', []) if tag['name'] not in tag_names)
         return tuple(tag['name'] for tag in attribute.get('Tag', []))
 
@@ -789,9 +800,7 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         return observable
 
     def _create_artifact_object(self, data: Union[str, BytesIO]) -> Artifact:
-        if not isinstance(data, str):
-            data = b64encode(data.getvalue()).decode()
-        raw_artifact = RawArtifact(data)
+        raw_artifact = RawArtifact(encode_payload(data))
         artifact = Artifact()
         artifact.raw_artifact = raw_artifact
         artifact.raw_artifact.condition = "Equals"
@@ -1096,22 +1105,35 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser, metaclass=ABCMeta):
 
 
 class MISPtoSTIX1AttributesParser(MISPtoSTIX1Parser):
+    _dispatch_tables = Mapping(
+        _attribute_handlers=('attribute_types',),
+        _attribute_galaxy_handlers=('galaxy_types', 'attribute'),
+        _object_galaxy_handlers=('galaxy_types', 'object')
+    )
+
     def __init__(self, orgname: str, version: str):
         super().__init__(orgname, version)
         self._producer = self._create_information_source(orgname)
         self._identifier = 'attributes collection'
         self._ids = set()
 
+    def reset(self):
+        super().reset()
+        self._ids = set()
+
     def parse_json_content(self, filename):
-        with open(filename, 'rt', encoding='utf-8') as f:
-            attributes = json.loads(f.read())
-            if attributes.get('response') is not None:
-                attributes = attributes['response']
         self._stix_package = STIXPackage()
-        if 'Attribute' in attributes:
-            attributes = attributes['Attribute']
-        for attribute in attributes:
-            self._resolve_attribute(attribute)
+        with open(filename, 'rt', encoding='utf-8') as f:
+            self._parse_json_attributes(JSONStreamReader(f))
+
+    def _parse_json_attributes(self, reader: JSONStreamReader):
+        if reader.peek() == '[':
+            for attribute in reader.iter_items():
+                self._resolve_attribute(attribute)
+            return
+        for key in reader.iter_keys():
+            if key in ('Attribute', 'response') and reader.peek() in '[{':
+                self._parse_json_attributes(reader)
 
     ################################################################################
     #                         ATTRIBUTES PARSING FUNCTIONS                         #
@@ -1149,20 +1171,62 @@ class MISPtoSTIX1AttributesParser(MISPtoSTIX1Parser):
 
 
 class MISPtoSTIX1EventsParser(MISPtoSTIX1Parser):
+    _dispatch_tables = Mapping(
+        _attribute_handlers=('attribute_types',),
+        _attribute_galaxy_handlers=('galaxy_types', 'attribute'),
+        _event_galaxy_handlers=('galaxy_types', 'event'),
+        _non_indicator_object_handlers=('non_indicator_names',),
+        _object_galaxy_handlers=('galaxy_types', 'object'),
+        _object_handlers=('objects',)
+    )
+
     def __init__(self, orgname: str, version: str):
         super().__init__(orgname, version)
 
+    def reset(self):
+        super().reset()
+        for feature in ('_contextualised_data', '_header_comment', '_ids',
+                        '_incident', '_objects_to_parse', '_producer',
+                        '_ttp_references'):
+            self.__dict__.pop(feature, None)
+
     def parse_json_content(self, filename):
+        json_content = {}
         with open(filename, 'rt', encoding='utf-8') as f:
-            json_content = json.loads(f.read())
-        if json_content.get('response'):
-            package = _stix_package(self._orgname, self._version, header=False)
-            for event in json_content['response']:
-                self.parse_misp_event(event)
-                package.add_related_package(self._stix_package)
-            self._stix_package = package
-        else:
-            self.parse_misp_event(json_content)
+            reader = JSONStreamReader(f)
+            for key in reader.iter_keys():
+                if key == 'response' and reader.peek() == '[':
+                    package = _stix_package(
+                        self._orgname, self._version, header=False
+                    )
+                    for event in reader.iter_items():
+                        self.parse_misp_event(event)
+                        package.add_related_package(self._stix_package)
+                    self._stix_package = package
+                    return
+                json_content[key] = reader.read_value()
+        self.parse_misp_event(json_content)
+
+    def iter_json_content(
+            self, filename) -> Iterator[Union[RelatedPackage, STIXPackage]]:
+        """
+        Parses the MISP events of a JSON file one at a time and yields the STIX
+        content of every event as soon as it is converted, so only the package
+        of the current event is held in memory: the related package of every
+        event within a collection of events, or the package of a single event.
+        """
+        json_content = {}
+        with open(filename, 'rt', encoding='utf-8') as f:
+            reader = JSONStreamReader(f)
+            for key in reader.iter_keys():
+                if key == 'response' and reader.peek() == '[':
+                    for event in reader.iter_items():
+                        self.parse_misp_event(event)
+                        yield RelatedPackage(self._stix_package)
+                    return
+                json_content[key] = reader.read_value()
+        self.parse_misp_event(json_content)
+        yield self._stix_package
 
     def parse_misp_event(self, misp_event: dict):
         self._header_comment = []
@@ -1174,32 +1238,34 @@ class MISPtoSTIX1EventsParser(MISPtoSTIX1Parser):
             misp_event = misp_event['Event']
         self._misp_event = misp_event
         self._identifier = self._misp_event['uuid']
-        producer = self._set_producer()
-        self._producer = self._create_information_source(producer)
-        self._stix_package = self._create_stix_package()
-        self._incident = self._create_incident()
-        self._generate_stix_objects()
-        if self._stix_package.ttps is not None:
-            for ttp in self._stix_package.ttps.ttp:
-                uuid = '-'.join(ttp.id_.split('-')[-5:])
-                if uuid in self._ttp_references:
-                    for referenced_uuid, relationship in self._ttp_references[uuid]:
-                        if referenced_uuid in self._contextualised_data:
-                            referenced_id = f'{self._orgname_id}:TTP-{referenced_uuid}'
-                            timestamp = self._quick_fetch_ttp_timestamp(referenced_id)
-                            related_ttp = self._create_related_ttp(
-                                f'{self._orgname_id}:TTP-{referenced_uuid}',
-                                relationship,
-                                timestamp=timestamp
-                            )
-                            ttp.add_related_ttp(related_ttp)
-        self._stix_package.add_incident(self._incident)
-        stix_header = STIXHeader()
-        stix_header.title = f"Export from {producer}'s MISP"
-        stix_header.package_intents = "Threat Report"
-        if self._header_comment and len(self._header_comment) == 1:
-            stix_header.description = self._header_comment[0]
-        self._stix_package.stix_header = stix_header
+        self.stats.count('events')
+        with self.stats.timer('conversion'):
+            producer = self._set_producer()
+            self._producer = self._create_information_source(producer)
+            self._stix_package = self._create_stix_package()
+            self._incident = self._create_incident()
+            self._generate_stix_objects()
+            if self._stix_package.ttps is not None:
+                for ttp in self._stix_package.ttps.ttp:
+                    uuid = '-'.join(ttp.id_.split('-')[-5:])
+                    if uuid in self._ttp_references:
+                        for referenced_uuid, relationship in self._ttp_references[uuid]:
+                            if referenced_uuid in self._contextualised_data:
+                                referenced_id = f'{self._orgname_id}:TTP-{referenced_uuid}'
+                                timestamp = self._quick_fetch_ttp_timestamp(referenced_id)
+                                related_ttp = self._create_related_ttp(
+                                    f'{self._orgname_id}:TTP-{referenced_uuid}',
+                                    relationship,
+                                    timestamp=timestamp
+                                )
+                                ttp.add_related_ttp(related_ttp)
+            self._stix_package.add_incident(self._incident)
+            stix_header = STIXHeader()
+            stix_header.title = f"Export from {producer}'s MISP"
+            stix_header.package_intents = "Threat Report"
+            if self._header_comment and len(self._header_comment) == 1:
+                stix_header.description = self._header_comment[0]
+            self._stix_package.stix_header = stix_header
 
     ################################################################################
     #                         INCIDENT HANDLING FUNCTIONS.                         #
@@ -1284,17 +1350,21 @@ class MISPtoSTIX1EventsParser(MISPtoSTIX1Parser):
 
     def _resolve_objects(self):
         for misp_object in self._misp_event['Object']:
+            self.stats.count('objects')
             object_name = misp_object['name']
             if self._check_object_name(misp_object):
                 continue
             try:
-                to_call = self._mapping.non_indicator_names(object_name)
-                if to_call is not None:
-                    getattr(self, to_call)(misp_object)
+                handler = self._non_indicator_object_handlers.get(object_name)
+                if handler is not None:
+                    handler(self, misp_object)
                 else:
                     to_ids = self._fetch_ids_flag(misp_object['Attribute'])
-                    to_call = self._mapping.objects_mapping(object_name) or '_parse_custom_object'
-                    observable = getattr(self, to_call)(misp_object)
+                    handler = self._object_handlers.get(object_name)
+                    observable = (
+                        self._parse_custom_object(misp_object) if handler is None
+                        else handler(self, misp_object)
+                    )
                     if to_ids:
                         self._handle_misp_object_with_context(misp_object, observable)
                     else:
@@ -1404,16 +1474,18 @@ class MISPtoSTIX1EventsParser(MISPtoSTIX1Parser):
         tags, galaxies = self._extract_object_attribute_tags_and_galaxies(misp_object)
         tag_names = set()
         if galaxies:
-            for galaxy_type, galaxy in galaxies.items():
-                if galaxy_type in getattr(self._mapping, galaxy_name)():
-                    to_call = self._mapping.galaxy_types_mapping(galaxy_type)
-                    getattr(self, to_call.format('object'))(galaxy, stix_object)
-                    tag_names.update(self._quick_fetch_tag_names(galaxy))
-                else:
-                    self._object_galaxy_incompatible_warning(
-                        galaxy_type,
-                        misp_object['name']
-                    )
+            with self.stats.timer('galaxies'):
+                for galaxy_type, galaxy in galaxies.items():
+                    self.stats.count('galaxies')
+                    if galaxy_type in getattr(self._mapping, galaxy_name)():
+                        handler = self._object_galaxy_handlers[galaxy_type]
+                        handler(self, galaxy, stix_object)
+                        tag_names.update(self._quick_fetch_tag_names(galaxy))
+                    else:
+                        self._object_galaxy_incompatible_warning(
+                            galaxy_type,
+                            misp_object['name']
+                        )
             return tuple(tag for tag in tags if tag not in tag_names)
         return tuple(tags)
 
@@ -1437,16 +1509,18 @@ class MISPtoSTIX1EventsParser(MISPtoSTIX1Parser):
         tags, galaxies = self._extract_object_attribute_tags_and_galaxies(misp_object)
         if galaxies:
             tag_names = set()
-            for galaxy_type, galaxy in galaxies.items():
-                to_call = self._mapping.galaxy_types_mapping(galaxy_type)
-                if to_call is not None:
-                    getattr(self, to_call.format('attribute'))(galaxy, indicator)
-                    tag_names.update(self._quick_fetch_tag_names(galaxy))
-                else:
-                    self._object_galaxy_not_mapped_warning(
-                        galaxy_type,
-                        misp_object['name']
-                    )
+            with self.stats.timer('galaxies'):
+                for galaxy_type, galaxy in galaxies.items():
+                    self.stats.count('galaxies')
+                    handler = self._attribute_galaxy_handlers.get(galaxy_type)
+                    if handler is not None:
+                        handler(self, galaxy, indicator)
+                        tag_names.update(self._quick_fetch_tag_names(galaxy))
+                    else:
+                        self._object_galaxy_not_mapped_warning(
+                            galaxy_type,
+                            misp_object['name']
+                        )
             return tuple(tag for tag in tags if tag not in tag_names)
         return tuple(tags)
 
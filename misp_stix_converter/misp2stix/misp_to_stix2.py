@@ -2,74 +2,155 @@
 # -*- coding: utf-8 -*-
 
 import io
-import json
-import os
 import re
 from .exportparser import MISPtoSTIXParser
+from .. import Mapping
+from .galaxies_catalog import load_galaxies_catalog
+from ..misp_stix_delta import DeltaManifest
+from ..misp_stix_payloads import PayloadStore, encode_payload
+from ..misp_stix_streaming import JSONStreamReader
 from abc import ABCMeta
-from base64 import b64encode
 from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 from pymisp import MISPAttribute, MISPEvent, MISPGalaxy, MISPGalaxyCluster, MISPObject
+from stix2.base import _STIXBase
 from stix2.hashes import check_hash, Hash
-from stix2.properties import ListProperty, StringProperty
+from stix2.parsing import dict_to_stix2
+from stix2.properties import (
+    BooleanProperty, EmbeddedObjectProperty, ExtensionsProperty, FloatProperty,
+    HashesProperty, IntegerProperty, ListProperty, ObservableProperty,
+    StringProperty, TimestampProperty)
+from stix2.utils import get_timestamp, NOW
+from stix2.version import __version__ as _stix2_version
 from stix2.v20.bundle import Bundle as Bundle_v20
 from stix2.v21.bundle import Bundle as Bundle_v21
-from typing import Generator, Optional, Tuple, Union
+from typing import Optional, Tuple, Union
 
 _label_fields = ('type', 'category', 'to_ids')
 _misp_time_fields = ('first_seen', 'last_seen')
 _object_attributes_additional_fields = ('category', 'comment', 'to_ids', 'uuid')
 _object_attributes_fields = ('type', 'object_relation', 'value')
 _special_characters = (' ', '.')
+# Properties whose cleaned value is serialised differently than the value given
+# to the stix2 constructors, and then still cleaned in trusted mode
+_stix_formatted_properties = (
+    BooleanProperty, EmbeddedObjectProperty, ExtensionsProperty, FloatProperty,
+    HashesProperty, IntegerProperty, TimestampProperty
+)
+_stix_interoperability_properties = (
+    EmbeddedObjectProperty, ExtensionsProperty, HashesProperty
+)
 _stix_time_fields = {
     'indicator': ('valid_from', 'valid_until'),
     'observed-data': ('first_observed', 'last_observed')
 }
+# The trusted mode reproduces the serialisation of the stix2 objects from the
+# properties of their classes, which are internal to the stix2 library and only
+# checked against the following releases
+_trusted_stix2_versions = ('3.0',)
 
 
 class InvalidHashValueError(Exception):
     pass
 
 
+class TrustedModeError(Exception):
+    pass
+
+
 class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
-    def __init__(self, interoperability: bool):
+    _dispatch_tables = Mapping(
+        _attribute_handlers=('attribute_types',),
+        _attribute_galaxy_handlers=('galaxy_types', 'attribute'),
+        _event_galaxy_handlers=('galaxy_types', 'event'),
+        _object_handlers=('objects',),
+        _parent_galaxy_handlers=('galaxy_types', 'parent')
+    )
+
+    def __init__(self, interoperability: bool, trusted: bool = False,
+                 payloads_dir: Optional[Path] = None):
         super().__init__()
+        self.__delta: Union[DeltaManifest, None] = None
+        self.__delta_refs: Union[list, None] = None
+        self.__delta_sources: dict = {}
         self.__ids: dict = {}
         self.__index = 0
         self.__initiated = False
         self.__interoperability = interoperability
+        if trusted:
+            self.__check_trusted_mode()
+        self.__trusted = trusted
+        self.__payloads = None
+        if payloads_dir is not None:
+            self.__payloads = PayloadStore(payloads_dir)
         self._id_parsing_function = {
             'attribute': '_define_stix_object_id',
             'object': '_define_stix_object_id'
         }
         self._markings = {}
 
+    def enable_delta_export(self, manifest: DeltaManifest):
+        """
+        Only converts the attributes and objects of the MISP events that have
+        been modified since the export recorded in the manifest, the report of
+        every event still referencing all of them.
+        The manifest is filled with the events converted now, to be given to
+        the next delta export of the same events.
+
+        :param manifest: Manifest of the previous export, possibly empty
+        """
+        self.__delta = manifest
+
     def parse_json_content(self, filename: Union[Path, str]):
+        """
+        Parses the MISP content of a JSON file.
+        The file is read incrementally, so that with collections of events or
+        attributes, only one event or attribute at a time is held in memory.
+
+        :param filename: The path of the JSON file to parse
+        """
         self._results_handling_function = '_append_SDO'
         with open(filename, 'rt', encoding='utf-8') as f:
-            json_content = json.loads(f.read())
-        if json_content.get('response'):
-            json_content = json_content['response']
-            if isinstance(json_content, list):
-                if not self.__initiated:
-                    self._initiate_events_parsing()
-                for event in json_content:
-                    self._parse_misp_event(event)
-                    self.__index = len(self.__objects)
-            else:
-                self.parse_misp_attributes(json_content)
-        else:
-            if isinstance(json_content, list):
-                for content in json_content:
+            reader = JSONStreamReader(f)
+            if reader.peek() == '[':
+                for content in reader.iter_items():
                     if 'Attribute' in content:
                         self.parse_misp_attribute(content)
-            else:
-                if 'Attribute' in json_content:
-                    self.parse_misp_attributes(json_content)
-                else:
-                    self.parse_misp_event(json_content)
+                return
+            json_content = {}
+            for key in reader.iter_keys():
+                if key == 'response' and reader.peek() in '[{':
+                    if reader.peek() == '[':
+                        self._parse_json_events(reader)
+                    else:
+                        self._parse_json_attributes(reader)
+                    return
+                json_content[key] = reader.read_value()
+        if 'Attribute' in json_content:
+            self.parse_misp_attributes(json_content)
+        else:
+            self.parse_misp_event(json_content)
+
+    def _parse_json_attributes(self, reader: JSONStreamReader):
+        self._results_handling_function = '_append_SDO_without_refs'
+        self._identifier = 'attributes collection'
+        if not self.__initiated:
+            self._initiate_attributes_parsing()
+        for key in reader.iter_keys():
+            if key == 'Attribute':
+                for attribute in reader.iter_items():
+                    self._resolve_attribute(attribute)
+            elif key == 'Galaxy':
+                self._parse_event_galaxies(reader.read_value())
+        self._handle_attributes_collection_remaining_objects()
+
+    def _parse_json_events(self, reader: JSONStreamReader):
+        if not self.__initiated:
+            self._initiate_events_parsing()
+        for event in reader.iter_items():
+            self._parse_misp_event(event)
+            self.__index = len(self.__objects)
 
     def parse_misp_attribute(self, attribute: Union[MISPAttribute, dict]):
         self._results_handling_function = '_append_SDO_without_refs'
@@ -92,6 +173,9 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
             attributes = attributes['Attribute']
         for attribute in attributes:
             self._resolve_attribute(attribute)
+        self._handle_attributes_collection_remaining_objects()
+
+    def _handle_attributes_collection_remaining_objects(self):
         if self._markings:
             for marking in self._markings.values():
                 if not marking['used']:
@@ -111,13 +195,18 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
             misp_event = misp_event['Event']
         self._misp_event = misp_event
         self._identifier = self._misp_event['uuid']
-        self.__event_timestamp = self._handle_event_timestamp()
-        self.__object_refs = []
-        self.__relationships = []
-        self._handle_identity_from_event()
-        self._parse_event_data()
-        report = self._generate_event_report()
-        self.__objects.insert(self.__index, report)
+        self.stats.count('events')
+        with self.stats.timer('conversion'):
+            self.__event_timestamp = self._handle_event_timestamp()
+            self.__object_refs = {}
+            self.__relationships = []
+            if self.__delta is not None:
+                self.__delta.start_event(self._misp_event)
+                self.__delta_sources = {}
+            self._handle_identity_from_event()
+            self._parse_event_data()
+            report = self._generate_event_report()
+            self.__objects.insert(self.__index, report)
 
     def _define_stix_object_id(self, feature: str, misp_object: Union[MISPObject, dict]) -> str:
         return f"{feature}--{misp_object['uuid']}"
@@ -170,20 +259,42 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
 
     def _initiate_attributes_parsing(self):
         self.__objects = []
-        self.__object_refs = []
+        self.__prepended_objects = []
+        self.__object_refs = {}
         self.__relationships = []
         self._handle_default_identity()
         self.__initiated = True
 
     def _initiate_events_parsing(self):
         self.__objects = []
+        self.__prepended_objects = []
         self.__index = 0
         self.__initiated = True
 
     def _initiate_feed_parsing(self):
         self.__objects = []
+        self.__prepended_objects = []
         self.__initiated = True
 
+    def reset(self):
+        super().reset()
+        self.__ids = {}
+        self.__index = 0
+        self.__initiated = False
+        self._id_parsing_function = {
+            'attribute': '_define_stix_object_id',
+            'object': '_define_stix_object_id'
+        }
+        self._markings = {}
+        self.__delta = None
+        self.__delta_refs = None
+        self.__delta_sources = {}
+        for feature in ('event_timestamp', 'identity_id', 'object_refs',
+                        'objects', 'prepended_objects', 'relationships'):
+            self.__dict__.pop(f'_MISPtoSTIX2Parser__{feature}', None)
+        for feature in ('_objects_to_parse', '_results_handling_function'):
+            self.__dict__.pop(feature, None)
+
     @property
     def bundle(self) -> Union[Bundle_v20, Bundle_v21]:
         """
@@ -192,11 +303,17 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         be then re-initialised so the next MISP content that is converted does not
         concern the Bundle that is generated here.
         """
-        self.__ids = {}
-        self.__initiated = False
-        self._markings = {}
-        self.__index = 0
-        return self._create_bundle()
+        with self.stats.timer('bundle'):
+            self.__insert_prepended_objects()
+            self.__ids = {}
+            self.__initiated = False
+            self._markings = {}
+            self.__index = 0
+            return self._create_bundle()
+
+    @property
+    def delta_manifest(self) -> Union[DeltaManifest, None]:
+        return self.__delta
 
     @property
     def event_timestamp(self) -> datetime:
@@ -216,6 +333,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         re-initialised, but the list of unique IDs for instance remains the same.
         """
         self.__initiated = False
+        self.__insert_prepended_objects()
         return self.__objects
 
     @property
@@ -228,7 +346,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
 
     @property
     def object_refs(self) -> list:
-        return self.__object_refs
+        return list(self.__object_refs)
 
     def populate_unique_ids(self, unique_ids: dict):
         self.__ids.update(unique_ids)
@@ -240,19 +358,77 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         All variables containing the IDs, STIX objects, references and so on remain
         the same and are not re-initialised.
         """
+        self.__insert_prepended_objects()
         return self.__objects
 
+    @property
+    def payloads(self) -> Union[PayloadStore, None]:
+        return self.__payloads
+
+    @property
+    def trusted(self) -> bool:
+        return self.__trusted
+
     @property
     def unique_ids(self) -> dict:
         return self.__ids
 
+    def validate(self):
+        """
+        Validates the STIX objects built as plain dictionaries in trusted mode
+        with the stix2 library, which raises an exception for the first object
+        that is not valid.
+        """
+        for stix_object in self.stix_objects:
+            if isinstance(stix_object, dict):
+                dict_to_stix2(
+                    stix_object, allow_custom=True, interoperability=True,
+                    version=self._version
+                )
+
+    @staticmethod
+    def __check_trusted_mode():
+        if _stix2_version.rsplit('.', 1)[0] not in _trusted_stix2_versions:
+            supported = ', '.join(
+                f'{version}.x' for version in _trusted_stix2_versions
+            )
+            raise TrustedModeError(
+                f'The trusted mode is only available with stix2 {supported}, '
+                f'not with stix2 {_stix2_version}.'
+            )
+
+    def __insert_prepended_objects(self):
+        # Objects that must come first in the list of STIX objects (like the
+        # identities referenced by galaxies matching) are kept aside while
+        # parsing, so they are all inserted at once instead of one by one
+        if self.__prepended_objects:
+            self.__objects[:0] = reversed(self.__prepended_objects)
+            self.__index += len(self.__prepended_objects)
+            self.__prepended_objects = []
+
+    def __skip_unchanged(self, misp_item: Union[MISPAttribute, MISPObject, dict]) -> bool:
+        # The STIX objects converted from an unchanged attribute or object by
+        # the previous export are only referenced; the STIX objects converted
+        # from a modified one are recorded in the manifest while converted
+        unchanged, object_refs = self.__delta.track(misp_item)
+        if unchanged:
+            self.stats.count('unchanged')
+            self.__object_refs.update(dict.fromkeys(object_refs))
+            self._handle_unchanged_object_refs(misp_item, object_refs)
+            return True
+        self.__delta_refs = object_refs
+        return False
+
     ################################################################################
     #                            MAIN PARSING FUNCTIONS                            #
     ################################################################################
 
     def _append_SDO(self, stix_object):
         self.__objects.append(stix_object)
-        self.__object_refs.append(stix_object.id)
+        self.__object_refs[stix_object['id']] = None
+        if self.__delta_refs is not None:
+            self.__delta_refs.append(stix_object['id'])
+            self.__delta_sources[stix_object['id']] = self.__delta_refs
 
     def _append_SDO_without_refs(self, stix_object):
         self.__objects.append(stix_object)
@@ -292,7 +468,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
                     'id': report_id,
                     'type': 'report',
                     'published': published,
-                    'object_refs': self.__object_refs,
+                    'object_refs': list(self.__object_refs),
                     'allow_custom': True
                 }
             )
@@ -300,36 +476,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         return self._handle_unpublished_report(report_args)
 
     def _generate_galaxies_catalog(self):
-        current_path = Path(os.path.dirname(os.path.realpath(__file__)))
-        cti_path = current_path.parent / 'data' / 'cti'
-        self._galaxies_catalog = defaultdict(lambda: defaultdict(list))
-        self._identities = {}
-        for filename in cti_path.glob('*/*.json'):
-            with open(filename, 'rt', encoding='utf-8') as f:
-                bundle = json.loads(f.read())
-            for stix_object in bundle['objects']:
-                if stix_object['type'] == 'identity':
-                    object_id = stix_object['id']
-                    if object_id not in self.unique_ids or object_id not in self._identities:
-                        self._identities[object_id] = stix_object
-                    continue
-                if not stix_object.get('name'):
-                    continue
-                name = stix_object['name']
-                object_type = stix_object['type']
-                object_id = stix_object['id']
-                if object_id not in self._get_object_ids(name, object_type):
-                    self._galaxies_catalog[name][object_type].append(stix_object)
-                if stix_object.get('external_references'):
-                    for reference in stix_object['external_references']:
-                        if reference['source_name'] in self._mapping.source_names():
-                            external_id = reference['external_id']
-                            if object_id not in self._get_object_ids(external_id, object_type):
-                                self._galaxies_catalog[external_id][object_type].append(stix_object)
-                            break
-
-    def _get_object_ids(self, name: str, object_type: str) -> Generator[None, None, str]:
-        return (stix_object['id'] for stix_object in self._galaxies_catalog[name][object_type])
+        self._galaxies_catalog = load_galaxies_catalog()
 
     def _handle_relationships(self):
         for relationship in self.__relationships:
@@ -338,7 +485,13 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
                 if target_ref is None:
                     continue
                 relationship['target_ref'] = target_ref
+            if self.__delta is not None:
+                # Recorded with the attribute or object it is converted from
+                self.__delta_refs = self.__delta_sources.get(
+                    relationship['source_ref']
+                )
             self._append_SDO(self._create_relationship(relationship))
+        self.__delta_refs = None
 
     def _handle_sightings(self, sightings: list, reference_id: str):
         for sighting in sightings:
@@ -378,16 +531,34 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
             self._handle_identity(identity_id, name)
         return identity_id
 
+    def _handle_unchanged_object_refs(self, misp_item: Union[MISPAttribute, MISPObject, dict],
+                                      object_refs: list):
+        # The STIX objects of an unchanged attribute or object are already
+        # referenced by the report; only the STIX 2.1 notes of the event
+        # reports need to reference them as well
+        pass
+
     ################################################################################
     #                         ATTRIBUTES PARSING FUNCTIONS                         #
     ################################################################################
 
+    def _resolve_event_attributes(self):
+        if self.__delta is None:
+            for attribute in self._misp_event['Attribute']:
+                self._resolve_attribute(attribute)
+            return
+        for attribute in self._misp_event['Attribute']:
+            if not self.__skip_unchanged(attribute):
+                self._resolve_attribute(attribute)
+        self.__delta_refs = None
+
     def _resolve_attribute(self, attribute: Union[MISPAttribute, dict]):
+        self.stats.count('attributes')
         attribute_type = attribute['type']
         try:
-            to_call = self._mapping.attribute_types_mapping(attribute_type)
-            if to_call is not None:
-                getattr(self, to_call)(attribute)
+            handler = self._attribute_handlers.get(attribute_type)
+            if handler is not None:
+                handler(self, attribute)
             else:
                 self._parse_custom_attribute(attribute)
                 self._attribute_not_mapped_warning(attribute_type)
@@ -453,14 +624,16 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
                                             object_id: str, timestamp: datetime) -> tuple:
         if attribute.get('Galaxy'):
             tag_names: list = []
-            for galaxy in attribute['Galaxy']:
-                galaxy_type = galaxy['type']
-                to_call = self._mapping.galaxy_types_mapping(galaxy_type)
-                if to_call is not None:
-                    getattr(self, to_call.format('attribute'))(galaxy, object_id, timestamp)
-                else:
-                    self._handle_undefined_attribute_galaxy(galaxy, object_id, timestamp)
-                tag_names.extend(self._quick_fetch_tag_names(galaxy))
+            with self.stats.timer('galaxies'):
+                for galaxy in attribute['Galaxy']:
+                    self.stats.count('galaxies')
+                    galaxy_type = galaxy['type']
+                    handler = self._attribute_galaxy_handlers.get(galaxy_type)
+                    if handler is not None:
+                        handler(self, galaxy, object_id, timestamp)
+                    else:
+                        self._handle_undefined_attribute_galaxy(galaxy, object_id, timestamp)
+                    tag_names.extend(self._quick_fetch_tag_names(galaxy))
             return tuple(tag['name'] for tag in attribute.get('Tag', []) if tag['name'] not in tag_names)
         return tuple(tag['name'] for tag in attribute.get('Tag', []))
 
@@ -474,12 +647,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
             if attribute.get('to_ids', False):
                 value = self._handle_value_for_pattern(attribute['value'])
                 file_pattern = self._create_filename_pattern(value)
-                data = attribute['data']
-                if not isinstance(data, str):
-                    data = b64encode(data.getvalue()).decode()
-                data_pattern = self._create_content_ref_pattern(
-                    self._handle_value_for_pattern(data)
-                )
+                data_pattern = self._create_payload_pattern(attribute['data'])
                 pattern = f"[{file_pattern} AND {data_pattern}]"
                 self._handle_attribute_indicator(attribute, pattern)
             else:
@@ -749,14 +917,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         if attribute.get('data'):
             if attribute.get('to_ids', False):
                 value = self._handle_value_for_pattern(attribute['value'])
-                data = attribute['data']
-                if not isinstance(data, str):
-                    data = b64encode(data.getvalue()).decode()
-                pattern = [
-                    self._create_content_ref_pattern(
-                        self._handle_value_for_pattern(data)
-                    )
-                ]
+                pattern = [self._create_payload_pattern(attribute['data'])]
                 for separator in self.composite_separators:
                     if separator in value:
                         pattern.append(
@@ -881,16 +1042,26 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
 
     def _resolve_objects(self):
         for misp_object in self._misp_event['Object']:
+            if self.__delta is not None and self.__skip_unchanged(misp_object):
+                continue
+            self.stats.count('objects')
             try:
                 object_name = misp_object['name']
-                to_call = self._mapping.objects_mapping(object_name)
-                if to_call is not None:
-                    getattr(self, to_call)(misp_object)
+                handler = self._object_handlers.get(object_name)
+                if handler is not None:
+                    handler(self, misp_object)
                 else:
                     self._parse_custom_object(misp_object)
                     self._object_not_mapped_warning(object_name)
             except Exception as exception:
                 self._object_error(misp_object, exception)
+            if self.__delta is not None:
+                # Objects converted with the objects they reference are always
+                # converted again, as they are not converted on their own
+                uuid = misp_object['uuid']
+                if uuid in self._objects_to_parse.get(misp_object['name'], {}):
+                    self.__delta.discard(uuid)
+        self.__delta_refs = None
 
     def _extract_multiple_object_attributes_escaped(self, attributes: list, force_single: Optional[tuple] = None) -> dict:
         attributes_dict = defaultdict(list)
@@ -1022,13 +1193,15 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         tags, galaxies = self._extract_object_attribute_tags_and_galaxies(misp_object)
         if galaxies:
             tag_names = set()
-            for galaxy_type, galaxy in galaxies.items():
-                to_call = self._mapping.galaxy_types_mapping(galaxy_type)
-                if to_call is not None:
-                    getattr(self, to_call.format('attribute'))(galaxy, object_id, timestamp)
-                else:
-                    self._handle_undefined_attribute_galaxy(galaxy, object_id, timestamp)
-                tag_names.update(self._quick_fetch_tag_names(galaxy))
+            with self.stats.timer('galaxies'):
+                for galaxy_type, galaxy in galaxies.items():
+                    self.stats.count('galaxies')
+                    handler = self._attribute_galaxy_handlers.get(galaxy_type)
+                    if handler is not None:
+                        handler(self, galaxy, object_id, timestamp)
+                    else:
+                        self._handle_undefined_attribute_galaxy(galaxy, object_id, timestamp)
+                    tag_names.update(self._quick_fetch_tag_names(galaxy))
             return tuple(tag for tag in tags if tag not in tag_names)
         return tuple(tags)
 
@@ -1249,10 +1422,9 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
     @staticmethod
     def _parse_custom_attachment(attachment: Union[str, tuple]) -> dict:
         if isinstance(attachment, tuple):
-            data = attachment[1]
-            if not isinstance(data, str):
-                data = b64encode(data.getvalue()).decode()
-            attachment = {'value': attachment[0], 'data': data}
+            attachment = {
+                'value': attachment[0], 'data': encode_payload(attachment[1])
+            }
         return {
             'allow_custom': True,
             'x_misp_attachment': attachment
@@ -1300,10 +1472,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
             if attribute.get(field):
                 custom_attribute[field] = attribute[field]
         if attribute.get('data'):
-            data = attribute['data']
-            if not isinstance(data, str):
-                data = b64encode(data.getvalue()).decode()
-            custom_attribute['data'] = data
+            custom_attribute['data'] = encode_payload(attribute['data'])
         return custom_attribute
 
     def _parse_domain_ip_object(self, misp_object: Union[MISPObject, dict]):
@@ -1466,10 +1635,8 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
             value = attributes.pop('attachment')
             if isinstance(value, tuple):
                 value, data = value
-                if not isinstance(data, str):
-                    data = b64encode(data.getvalue()).decode()
                 filename_pattern = self._create_content_ref_pattern(value, 'x_misp_filename')
-                data_pattern = self._create_content_ref_pattern(data)
+                data_pattern = self._create_payload_pattern(data)
                 pattern.append(f'({data_pattern} AND {filename_pattern})')
             else:
                 pattern.append(self._create_content_ref_pattern(value, 'x_misp_filename'))
@@ -1524,9 +1691,9 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
                 attachment = attributes.pop('attachment')
                 if isinstance(attachment, tuple):
                     attachment, data = attachment
-                    if not isinstance(data, str):
-                        data = b64encode(data.getvalue()).decode()
-                    pattern.append(self._create_content_ref_pattern(data))
+                    pattern.append(
+                        self._create_content_ref_pattern(encode_payload(data))
+                    )
                 if '.' in attachment:
                     extension = attachment.split('.')[-1]
                     pattern.append(self._create_content_ref_pattern(f'image/{extension}', 'mime_type'))
@@ -1669,9 +1836,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         pattern = []
         if isinstance(malware_sample, tuple):
             malware_sample, data = malware_sample
-            if not isinstance(data, str):
-                data = b64encode(data.getvalue()).decode()
-            pattern.append(self._create_content_ref_pattern(data))
+            pattern.append(self._create_payload_pattern(data))
         for separator in self.composite_separators:
             if separator in malware_sample:
                 filename, md5 = malware_sample.split(separator)
@@ -2266,43 +2431,41 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
     #                          GALAXIES PARSING FUNCTIONS                          #
     ################################################################################
 
-    def _check_external_references(self, references: list, values: list, feature: str) -> bool:
-        for reference in references:
-            if reference['source_name'] in self._mapping.source_names() and reference[feature] in values:
-                return True
-        return False
+    def _check_external_references(self, values: Union[list, str], feature: str,
+                                   name: str, object_type: str) -> list:
+        if isinstance(values, str):
+            values = [values]
+        object_ids = set()
+        for value in values:
+            object_ids.update(
+                self._galaxies_catalog.get_referenced_object_ids(feature, value)
+            )
+        if not object_ids:
+            return []
+        return [
+            stix_object for stix_object
+            in self._galaxies_catalog.get_named_objects(name, object_type)
+            if stix_object['id'] in object_ids
+        ]
 
     def _check_galaxy_matching(self, cluster: dict, *args: Tuple[str, str]) -> Union[str, None]:
-        if self._check_galaxy_name(*args):
-            return self._fetch_galaxy_matching_by_name(cluster, *args)
+        stix_objects = self._check_galaxy_name(*args)
+        if len(stix_objects) == 1:
+            return self._fetch_galaxy_matching(args[1], stix_objects[0])
         if cluster.get('meta') is not None:
             meta = cluster['meta']
             key = 'external_id'
             for key, feature in zip((key, 'refs'), (key, 'url')):
                 if meta.get(key) is None:
                     continue
-                if self._check_galaxy_references(meta[key], feature, *args):
-                    return self._fetch_galaxy_matching_by_reference(
-                        meta[key],
-                        feature,
-                        *args
-                    )
+                stix_objects = self._check_external_references(
+                    meta[key], feature, *args
+                )
+                if len(stix_objects) == 1:
+                    return self._fetch_galaxy_matching(args[1], stix_objects[0])
 
-    def _check_galaxy_name(self, name: str, object_type: str) -> bool:
-        names = 0
-        for stix_object in self._galaxies_catalog[name][object_type]:
-            if stix_object['name'] == name:
-                names += 1
-        return names == 1
-
-    def _check_galaxy_references(self, values: str, feature: str, name: str, object_type: str) -> bool:
-        numbers = 0
-        for stix_object in self._galaxies_catalog[name][object_type]:
-            if stix_object['name'] != name or not stix_object.get('external_references'):
-                continue
-            if self._check_external_references(stix_object['external_references'], values, feature):
-                numbers += 1
-        return numbers == 1
+    def _check_galaxy_name(self, name: str, object_type: str) -> list:
+        return list(self._galaxies_catalog.get_named_objects(name, object_type))
 
     def _define_source_name(self, value: str) -> str:
         for prefix, source_name in self._mapping.external_id_to_source_name().items():
@@ -2314,19 +2477,9 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
             return 'WASC'
         return 'mitre-attack'
 
-    def _fetch_galaxy_matching_by_name(self, cluster: dict, name: str, object_type: str) -> Union[str, None]:
-        for stix_object in self._galaxies_catalog[name][object_type]:
-            if stix_object['name'] == name:
-                self._handle_galaxy_matching(object_type, stix_object)
-                return stix_object['id']
-
-    def _fetch_galaxy_matching_by_reference(self, values: list, feature: str, name: str, object_type: str) -> Union[str, None]:
-        for stix_object in self._galaxies_catalog[name][object_type]:
-            if stix_object['name'] != name or not stix_object.get('external_references'):
-                continue
-            if self._check_external_references(stix_object['external_references'], values, feature):
-                self._handle_galaxy_matching(object_type, stix_object)
-                return stix_object['id']
+    def _fetch_galaxy_matching(self, object_type: str, stix_object: dict) -> str:
+        self._handle_galaxy_matching(object_type, stix_object)
+        return stix_object['id']
 
     def _handle_attribute_galaxy_relationships(self, source_id: str, target_ids: list, timestamp: datetime):
         relationships = self._mapping.relationship_specs(source_id.split('--')[0])
@@ -2356,9 +2509,10 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
     def _handle_galaxy_matching(self, object_type: str, stix_object: dict):
         identity_id = stix_object['created_by_ref']
         if identity_id not in self.unique_ids:
-            identity = self._create_identity(self._identities[identity_id])
-            self.__objects.insert(0, identity)
-            self.__index += 1
+            identity = self._create_identity(
+                self._galaxies_catalog.get_identity(identity_id)
+            )
+            self.__prepended_objects.append(identity)
             self.__ids[identity_id] = identity_id
         stix_object['allow_custom'] = True
         self._append_SDO_without_refs(
@@ -2372,9 +2526,13 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
             return getattr(self._mapping, f'{object_type}_meta_mapping')(key)
 
     def _handle_object_refs(self, object_refs: list):
+        # Dict keys keep the insertion order, and the membership test of
+        # references already in the report is then constant
         for object_ref in object_refs:
             if object_ref not in self.__object_refs:
-                self.__object_refs.append(object_ref)
+                self.__object_refs[object_ref] = None
+        if self.__delta_refs is not None:
+            self.__delta_refs.extend(object_refs)
 
     def _handle_undefined_attribute_galaxy(self, galaxy: Union[MISPGalaxy, dict],
                                            object_id: str, timestamp: datetime):
@@ -2403,7 +2561,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
                 self._generate_galaxies_catalog()
                 in_catalog = value in self._galaxies_catalog
             if in_catalog:
-                if object_type in self._galaxies_catalog[value]:
+                if object_type in self._galaxies_catalog.get_object_types(value):
                     args = (value, object_type)
                     stix_object_id = self._check_galaxy_matching(cluster, *args)
                     if stix_object_id is not None:
@@ -2413,7 +2571,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
                 return False
             if ' - ' in value:
                 for part in value.split(' - '):
-                    if part in self._galaxies_catalog and object_type in self._galaxies_catalog[part]:
+                    if object_type in self._galaxies_catalog.get_object_types(part):
                         args = (part, object_type)
                         stix_object_id = self._check_galaxy_matching(cluster, *args)
                         if stix_object_id is not None:
@@ -2458,6 +2616,39 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         object_refs = self._parse_attack_pattern_galaxy(galaxy)
         self._handle_object_refs(object_refs)
 
+    def _parse_campaign_attribute_galaxy(self, galaxy: Union[MISPGalaxy, dict],
+                                         object_id: str, timestamp: datetime):
+        object_refs = self._parse_campaign_galaxy(galaxy, timestamp)
+        self._handle_attribute_galaxy_relationships(object_id, object_refs, timestamp)
+
+    def _parse_campaign_event_galaxy(self, galaxy: Union[MISPGalaxy, dict]):
+        object_refs = self._parse_campaign_galaxy(galaxy, self.event_timestamp)
+        self._handle_object_refs(object_refs)
+
+    def _parse_campaign_galaxy(self, galaxy: Union[MISPGalaxy, dict],
+                               timestamp: Optional[datetime] = None) -> list:
+        object_refs = []
+        for cluster in galaxy['GalaxyCluster']:
+            if self._is_galaxy_parsed(object_refs, cluster):
+                continue
+            campaign_id = f"campaign--{cluster['uuid']}"
+            campaign_args = self._create_galaxy_args(
+                cluster, galaxy['name'], campaign_id, timestamp
+            )
+            if cluster.get('meta'):
+                campaign_args.update(
+                    self._parse_meta_fields(cluster['meta'], 'campaign')
+                )
+            campaign = self._create_campaign(campaign_args)
+            self._append_SDO_without_refs(campaign)
+            object_refs.append(campaign_id)
+            self.__ids[cluster['uuid']] = campaign_id
+        return object_refs
+
+    def _parse_campaign_parent_galaxy(self, galaxy: Union[MISPGalaxy, dict]):
+        object_refs = self._parse_campaign_galaxy(galaxy)
+        self._handle_object_refs(object_refs)
+
     def _parse_course_of_action_attribute_galaxy(self, galaxy: Union[MISPGalaxy, dict],
                                                  object_id: str, timestamp: datetime):
         object_refs = self._parse_course_of_action_galaxy(galaxy, timestamp)
@@ -2635,8 +2826,8 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
             )
             sector = self._create_identity(sector_args)
             self._append_SDO_without_refs(sector)
-            object_refs.append(sector.id)
-            ids[cluster['uuid']] = sector.id
+            object_refs.append(sector['id'])
+            ids[cluster['uuid']] = sector['id']
         self.populate_unique_ids(ids)
         return object_refs
 
@@ -2651,6 +2842,10 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         object_refs = self._parse_sector_galaxy(galaxy, self.event_timestamp)
         self._handle_object_refs(object_refs)
 
+    def _parse_sector_parent_galaxy(self, galaxy: Union[MISPGalaxy, dict]):
+        object_refs = self._parse_sector_galaxy(galaxy, None)
+        self._handle_object_refs(object_refs)
+
     def _create_sector_galaxy_args(
             self, cluster: Union[MISPGalaxyCluster, dict], description: str,
             name: str, timestamp: datetime) -> dict:
@@ -2814,12 +3009,51 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
     ################################################################################
 
     @staticmethod
-    def _create_attachment_args(value: str, data: str) -> dict:
-        if not isinstance(data, str):
-            data = b64encode(data.getvalue()).decode()
+    def _build_stix_dict(stix_class: type, stix_args: dict) -> dict:
+        """
+        Builds the STIX object as the plain dictionary an instance of
+        `stix_class` would be serialised to: same properties order, same
+        default values and same formatting of the timestamps, embedded
+        objects and hashes, but without validating the content.
+        """
+        stix_args = stix_args.copy()
+        stix_args.pop('allow_custom', None)
+        interoperability = stix_args.pop('interoperability', False)
+        now = get_timestamp()
+        stix_dict = {}
+        for name, stix_property in stix_class._properties.items():
+            value = stix_args.pop(name, None)
+            if value in (None, []):
+                if not hasattr(stix_property, 'default'):
+                    continue
+                value = stix_property.default()
+                if value == NOW:
+                    value = now
+            if isinstance(stix_property, _stix_formatted_properties):
+                arguments = [value, True]
+                if isinstance(stix_property, _stix_interoperability_properties):
+                    arguments.append(interoperability)
+                value, _ = stix_property.clean(*arguments)
+            elif isinstance(stix_property, ListProperty):
+                if isinstance(stix_property.contained, EmbeddedObjectProperty):
+                    value, _ = stix_property.clean(value, True)
+                else:
+                    value = list(value)
+            elif isinstance(stix_property, ObservableProperty):
+                if not all(isinstance(observable, _STIXBase) for observable in value.values()):
+                    value, _ = stix_property.clean(value, True)
+            if _is_defaulted_optional_property(stix_property, value):
+                continue
+            stix_dict[name] = value
+        for name in sorted(stix_args):
+            if stix_args[name] not in (None, []):
+                stix_dict[name] = stix_args[name]
+        return stix_dict
+
+    def _create_attachment_args(self, value: str, data: Union[io.BytesIO, str]) -> dict:
         return {
             'allow_custom': True,
-            'payload_bin': data,
+            **self._create_payload_args(data),
             'x_misp_filename': value
         }
 
@@ -2927,6 +3161,17 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         self.__index += 1
         self.unique_ids[identity_id] = identity_id
 
+    def _create_payload_args(self, data: Union[io.BytesIO, str]) -> dict:
+        if self.payloads is None:
+            return {'payload_bin': encode_payload(data)}
+        sha256_hash, url = self.payloads.store(data)
+        return {'hashes': {'SHA-256': sha256_hash}, 'url': url}
+
+    def _create_stix_object(self, stix_class: type, stix_args: dict):
+        if self.trusted:
+            return self._build_stix_dict(stix_class, stix_args)
+        return stix_class(**stix_args)
+
     def _parse_contact_information(self, attributes: dict, name: str) -> list:
         contact_information = []
         for key in getattr(self._mapping, f"{name}_contact_info_fields")():
@@ -3164,10 +3409,8 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         return file_args
 
     def _parse_malware_sample_additional_fields(self, data: Union[io.BytesIO, str]) -> dict:
-        if not isinstance(data, str):
-            data = b64encode(data.getvalue()).decode()
         return {
-            'payload_bin': data,
+            **self._create_payload_args(data),
             **self._mapping.malware_sample_additional_observable_values()
         }
 
@@ -3188,7 +3431,10 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         else:
             self._composite_attribute_value_warning('malware-sample', value)
             args['x_misp_filename'] = value
-        args.update(self._parse_malware_sample_additional_fields(data))
+        additional_fields = self._parse_malware_sample_additional_fields(data)
+        if 'hashes' in additional_fields:
+            args.setdefault('hashes', {}).update(additional_fields.pop('hashes'))
+        args.update(additional_fields)
         return args
 
     def _parse_malware_sample_custom_args(self, value: str, data: Union[io.BytesIO, str]) -> dict:
@@ -3397,6 +3643,18 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
     def _create_content_ref_pattern(value: str, feature: str = 'payload_bin') -> str:
         return f"file:content_ref.{feature} = '{value}'"
 
+    def _create_payload_pattern(self, data: Union[io.BytesIO, str]) -> str:
+        if self.payloads is None:
+            return self._create_content_ref_pattern(
+                self._handle_value_for_pattern(encode_payload(data))
+            )
+        sha256_hash, url = self.payloads.store(data)
+        url_pattern = self._create_content_ref_pattern(url, 'url')
+        hash_pattern = self._create_content_ref_pattern(
+            sha256_hash, "hashes.'SHA-256'"
+        )
+        return f'{url_pattern} AND {hash_pattern}'
+
     @staticmethod
     def _create_domain_pattern(domain: str) -> str:
         return f"domain-name:value = '{domain}'"
@@ -3565,10 +3823,8 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
     def _handle_custom_data_pattern(prefix: str, key: str, value: Union[str, tuple]) -> list:
         if isinstance(value, tuple):
             value, data = value
-            if not isinstance(data, str):
-                data = b64encode(data.getvalue()).decode()
             return [
-                f"{prefix}:x_misp_{key}.data = '{data}'",
+                f"{prefix}:x_misp_{key}.data = '{encode_payload(data)}'",
                 f"{prefix}:x_misp_{key}.value = '{value}'"
             ]
         return [f"{prefix}:x_misp_{key} = '{value}'"]
@@ -3608,9 +3864,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
     def _parse_custom_data_value(value_to_parse: Union[str, tuple]) -> Union[dict, str]:
         if isinstance(value_to_parse, tuple):
             value, data = value_to_parse
-            if not isinstance(data, str):
-                data = b64encode(data.getvalue()).decode()
-            return {'value': value, 'data': data}
+            return {'value': value, 'data': encode_payload(data)}
         return value_to_parse
 
     def _parse_email_display_names(self, attributes: dict, feature: str) -> dict:
@@ -3699,3 +3953,12 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser, metaclass=ABCMeta):
         to_ids, pe_object = self._objects_to_parse['pe'][pe_uuid]
         self._objects_to_parse['pe'][pe_uuid] = to_ids
         return pe_object
+
+
+def _is_defaulted_optional_property(stix_property, value) -> bool:
+    if stix_property.required or hasattr(stix_property, '_fixed_value'):
+        return False
+    try:
+        return stix_property.default() == value
+    except AttributeError:
+        return False
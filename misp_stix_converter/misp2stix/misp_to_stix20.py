@@ -3,7 +3,7 @@
 
 from .misp_to_stix2 import InvalidHashValueError, MISPtoSTIX2Parser
 from .stix20_mapping import MISPtoSTIX20Mapping
-from base64 import b64encode
+from ..misp_stix_payloads import encode_payload
 from collections import defaultdict
 from copy import deepcopy
 from datetime import datetime
@@ -116,15 +116,15 @@ class CustomOpinion:
 
 
 class MISPtoSTIX20Parser(MISPtoSTIX2Parser):
-    def __init__(self, interoperability=False):
-        super().__init__(interoperability)
+    _mapping = MISPtoSTIX20Mapping
+
+    def __init__(self, interoperability=False, trusted=False, payloads_dir=None):
+        super().__init__(interoperability, trusted, payloads_dir)
         self._version = '2.0'
-        self._mapping = MISPtoSTIX20Mapping
 
     def _parse_event_data(self):
         if self._misp_event.get('Attribute'):
-            for attribute in self._misp_event['Attribute']:
-                self._resolve_attribute(attribute)
+            self._resolve_event_attributes()
         if self._misp_event.get('Object'):
             self._objects_to_parse = defaultdict(dict)
             self._resolve_objects()
@@ -142,7 +142,7 @@ class MISPtoSTIX20Parser(MISPtoSTIX2Parser):
             'object_ref': object_id,
             'interoperability': True
         }
-        self._append_SDO(CustomNote(**custom_args))
+        self._append_SDO(self._create_stix_object(CustomNote, custom_args))
 
     def _handle_markings(self, object_args: dict, markings: tuple):
         marking_ids = []
@@ -191,7 +191,9 @@ class MISPtoSTIX20Parser(MISPtoSTIX2Parser):
             )
         if sighting.get('source', ''):
             opinion_args['x_misp_source'] = sighting['source']
-        getattr(self, self._results_handling_function)(CustomOpinion(**opinion_args))
+        getattr(self, self._results_handling_function)(
+            self._create_stix_object(CustomOpinion, opinion_args)
+        )
 
     def _handle_unpublished_report(self, report_args: dict) -> Report:
         report_id = f"report--{self._misp_event['uuid']}"
@@ -206,23 +208,22 @@ class MISPtoSTIX20Parser(MISPtoSTIX2Parser):
                 'allow_custom': True
             }
         )
-        return Report(**report_args)
+        return self._create_stix_object(Report, report_args)
 
     ################################################################################
     #                         ATTRIBUTES PARSING FUNCTIONS                         #
     ################################################################################
 
     def _parse_attachment_attribute_observable(self, attribute: Union[MISPAttribute, dict]):
-        data = attribute['data']
-        if not isinstance(data, str):
-            data = b64encode(data.getvalue()).decode()
         observable_object = {
             '0': File(
                 name=attribute['value'],
                 _valid_refs={'1': 'artifact'},
                 content_ref='1'
             ),
-            '1': self._create_artifact(data)
+            '1': self._create_artifact(
+                self._create_payload_args(attribute['data'])
+            )
         }
         self._handle_attribute_observable(attribute, observable_object)
 
@@ -491,12 +492,12 @@ class MISPtoSTIX20Parser(MISPtoSTIX2Parser):
         else:
             self._composite_attribute_value_warning(attribute['type'], attribute['value'])
             file_args['name'] = attribute['value']
-        data = attribute['data']
-        if not isinstance(data, str):
-            data = b64encode(data.getvalue()).decode()
         observable_object = {
             '0': File(**file_args),
-            '1': self._create_artifact(data, malware_sample=True)
+            '1': self._create_artifact(
+                self._create_payload_args(attribute['data']),
+                malware_sample=True
+            )
         }
         self._handle_attribute_observable(attribute, observable_object)
 
@@ -698,10 +699,8 @@ class MISPtoSTIX20Parser(MISPtoSTIX2Parser):
                         str_index = str(index)
                         if isinstance(value, tuple):
                             value, data = value
-                            if not isinstance(data, str):
-                                data = b64encode(data.getvalue()).decode()
                             observable_object[str_index] = self._create_artifact(
-                                data,
+                                {'payload_bin': encode_payload(data)},
                                 filename=value
                             )
                         else:
@@ -1101,8 +1100,8 @@ class MISPtoSTIX20Parser(MISPtoSTIX2Parser):
     #                    STIX OBJECTS CREATION HELPER FUNCTIONS                    #
     ################################################################################
 
-    def _create_artifact(self, content: str, filename: Optional[str] = None, malware_sample: Optional[bool] = False) -> Artifact:
-        args: dict[str, Union[bool, str]] = {'payload_bin': content}
+    def _create_artifact(self, payload_args: dict, filename: Optional[str] = None, malware_sample: Optional[bool] = False) -> Artifact:
+        args: dict[str, Union[bool, dict, str]] = dict(payload_args)
         if filename is not None:
             args.update(
                 {
@@ -1114,31 +1113,32 @@ class MISPtoSTIX20Parser(MISPtoSTIX2Parser):
             args.update(self._mapping.malware_sample_additional_observable_values())
         return Artifact(**args)
 
-    @staticmethod
-    def _create_attack_pattern(attack_pattern_args: dict) -> AttackPattern:
-        return AttackPattern(**attack_pattern_args)
+    def _create_attack_pattern(self, attack_pattern_args: dict) -> AttackPattern:
+        return self._create_stix_object(AttackPattern, attack_pattern_args)
 
     def _create_bundle(self) -> Bundle:
-        return Bundle(self.stix_objects, allow_custom=True, id=f"bundle--{self._misp_event.get('uuid')}" if hasattr(self, "_misp_event") else None )
+        bundle_args = {
+            'objects': self.stix_objects, 'allow_custom': True,
+            'id': f"bundle--{self._misp_event.get('uuid')}" if hasattr(self, "_misp_event") else None
+        }
+        return self._create_stix_object(Bundle, bundle_args)
 
-    @staticmethod
-    def _create_campaign(campaign_args: dict) -> Campaign:
-        return Campaign(**campaign_args)
+    def _create_campaign(self, campaign_args: dict) -> Campaign:
+        return self._create_stix_object(Campaign, campaign_args)
 
-    @staticmethod
-    def _create_course_of_action(course_of_action_args: dict) -> CourseOfAction:
-        return CourseOfAction(**course_of_action_args)
+    def _create_course_of_action(self, course_of_action_args: dict) -> CourseOfAction:
+        return self._create_stix_object(CourseOfAction, course_of_action_args)
 
     def _create_custom_attribute(self, custom_args: dict) -> CustomAttribute:
         self._clean_custom_properties(custom_args)
-        return CustomAttribute(**custom_args)
+        return self._create_stix_object(CustomAttribute, custom_args)
 
     def _create_custom_galaxy(self, custom_args: dict) -> CustomGalaxyCluster:
-        return CustomGalaxyCluster(**custom_args)
+        return self._create_stix_object(CustomGalaxyCluster, custom_args)
 
     def _create_custom_object(self, custom_args: dict) -> CustomMispObject:
         self._clean_custom_properties(custom_args)
-        return CustomMispObject(**custom_args)
+        return self._create_stix_object(CustomMispObject, custom_args)
 
     @staticmethod
     def _create_email_address(email_address: str, display_name: Optional[str] = None) -> EmailAddress:
@@ -1157,9 +1157,8 @@ class MISPtoSTIX20Parser(MISPtoSTIX2Parser):
     def _create_file_object(file_args: dict) -> File:
         return File(**file_args)
 
-    @staticmethod
-    def _create_identity(identity_args: dict) -> Identity:
-        return Identity(**identity_args)
+    def _create_identity(self, identity_args: dict) -> Identity:
+        return self._create_stix_object(Identity, identity_args)
 
     def _create_identity_object(self, orgname: str) -> Identity:
         identity_args = {
@@ -1173,49 +1172,42 @@ class MISPtoSTIX20Parser(MISPtoSTIX2Parser):
         }
         return self._create_identity(identity_args)
 
-    @staticmethod
-    def _create_indicator(indicator_args: dict) -> Indicator:
-        return Indicator(**indicator_args)
+    def _create_indicator(self, indicator_args: dict) -> Indicator:
+        return self._create_stix_object(Indicator, indicator_args)
 
-    @staticmethod
-    def _create_intrusion_set(intrusion_set_args: dict) -> IntrusionSet:
-        return IntrusionSet(**intrusion_set_args)
+    def _create_intrusion_set(self, intrusion_set_args: dict) -> IntrusionSet:
+        return self._create_stix_object(IntrusionSet, intrusion_set_args)
 
-    @staticmethod
-    def _create_malware(malware_args: dict) -> Malware:
-        return Malware(**malware_args)
+    def _create_malware(self, malware_args: dict) -> Malware:
+        return self._create_stix_object(Malware, malware_args)
 
     def _create_observed_data(self, args: dict, observable: dict):
         args['objects'] = observable
-        getattr(self, self._results_handling_function)(ObservedData(**args))
+        getattr(self, self._results_handling_function)(
+            self._create_stix_object(ObservedData, args)
+        )
 
     @staticmethod
     def _create_PE_extension(extension_args: dict) -> WindowsPEBinaryExt:
         return WindowsPEBinaryExt(**extension_args)
 
-    @staticmethod
-    def _create_relationship(relationship_args: dict) -> Relationship:
-        return Relationship(**relationship_args)
+    def _create_relationship(self, relationship_args: dict) -> Relationship:
+        return self._create_stix_object(Relationship, relationship_args)
 
-    @staticmethod
-    def _create_report(report_args: dict) -> Report:
-        return Report(**report_args)
+    def _create_report(self, report_args: dict) -> Report:
+        return self._create_stix_object(Report, report_args)
 
-    @staticmethod
-    def _create_sighting(sighting_args: dict) -> Sighting:
-        return Sighting(**sighting_args)
+    def _create_sighting(self, sighting_args: dict) -> Sighting:
+        return self._create_stix_object(Sighting, sighting_args)
 
-    @staticmethod
-    def _create_threat_actor(threat_actor_args: dict) -> ThreatActor:
-        return ThreatActor(**threat_actor_args)
+    def _create_threat_actor(self, threat_actor_args: dict) -> ThreatActor:
+        return self._create_stix_object(ThreatActor, threat_actor_args)
 
-    @staticmethod
-    def _create_tool(tool_args: dict) -> Tool:
-        return Tool(**tool_args)
+    def _create_tool(self, tool_args: dict) -> Tool:
+        return self._create_stix_object(Tool, tool_args)
 
-    @staticmethod
-    def _create_vulnerability(vulnerability_args: dict) -> Vulnerability:
-        return Vulnerability(**vulnerability_args)
+    def _create_vulnerability(self, vulnerability_args: dict) -> Vulnerability:
+        return self._create_stix_object(Vulnerability, vulnerability_args)
 
     @staticmethod
     def _create_windowsPESection(section_args: dict) -> WindowsPESection:
@@ -1268,10 +1260,8 @@ class MISPtoSTIX20Parser(MISPtoSTIX2Parser):
         if not isinstance(attachment, tuple):
             return None
         filename, data = attachment
-        if not isinstance(data, str):
-            data = b64encode(data.getvalue()).decode()
         artifact_args = {
-            'payload_bin': data,
+            'payload_bin': encode_payload(data),
             'allow_custom': True
         }
         if '.' in filename:
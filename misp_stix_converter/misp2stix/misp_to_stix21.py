@@ -4,13 +4,14 @@
 import re
 from .misp_to_stix2 import InvalidHashValueError, MISPtoSTIX2Parser
 from .stix21_mapping import MISPtoSTIX21Mapping
-from base64 import b64encode
+from ..misp_stix_payloads import encode_payload
 from collections import defaultdict
 from copy import deepcopy
 from datetime import datetime
 from pymisp import MISPAttribute, MISPGalaxy, MISPGalaxyCluster, MISPObject
 from stix2.properties import (DictionaryProperty, IDProperty, ListProperty,
                               ReferenceProperty, StringProperty, TimestampProperty)
+from stix2.registry import STIX2_OBJ_MAPS
 from stix2.v21.bundle import Bundle
 from stix2.v21.observables import (
     Artifact, AutonomousSystem, Directory, DomainName, EmailAddress, EmailMessage,
@@ -84,10 +85,15 @@ class CustomGalaxyCluster:
 
 
 class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
-    def __init__(self, interoperability=False):
-        super().__init__(interoperability)
+    _mapping = MISPtoSTIX21Mapping
+
+    def __init__(self, interoperability=False, trusted=False, payloads_dir=None):
+        super().__init__(interoperability, trusted, payloads_dir)
         self._version = '2.1'
-        self._mapping = MISPtoSTIX21Mapping
+
+    def reset(self):
+        super().reset()
+        self.__dict__.pop('_event_report_matching', None)
 
     def _parse_event_data(self):
         if self._misp_event.get('EventReport'):
@@ -114,7 +120,7 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
                     if reference in self._event_report_matching:
                         object_refs.update(self._event_report_matching[reference])
                 note_args['object_refs'] = list(object_refs) if object_refs else self._handle_empty_note_refs()
-                self._append_SDO(Note(**note_args))
+                self._append_SDO(self._create_stix_object(Note, note_args))
         else:
             self._id_parsing_function = {
                 'attribute': '_define_stix_object_id',
@@ -138,8 +144,7 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
 
     def _handle_attributes_and_objects(self):
         if self._misp_event.get('Attribute'):
-            for attribute in self._misp_event['Attribute']:
-                self._resolve_attribute(attribute)
+            self._resolve_event_attributes()
         if self._misp_event.get('Object'):
             self._objects_to_parse = defaultdict(dict)
             self._resolve_objects()
@@ -162,7 +167,7 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
             'content': 'This MISP Event is empty and contains no attribute, object, galaxy or tag.',
             'object_refs': [object_id]
         }
-        self._append_SDO(Note(**note_args))
+        self._append_SDO(self._create_stix_object(Note, note_args))
 
     def _handle_markings(self, object_args: dict, markings: tuple):
         marking_ids = []
@@ -219,7 +224,26 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
                     'allow_custom': True
                 }
             )
-        getattr(self, self._results_handling_function)(Opinion(**opinion_args))
+        getattr(self, self._results_handling_function)(
+            self._create_stix_object(Opinion, opinion_args)
+        )
+
+    def _handle_unchanged_object_refs(self, misp_item: Union[MISPAttribute, MISPObject, dict],
+                                      object_refs: list):
+        # The notes of the event reports reference the STIX objects converted
+        # from the attributes and objects they mention
+        if not self._misp_event.get('EventReport'):
+            return
+        # The observables converted with the observed-data are not mentioned
+        observables = STIX2_OBJ_MAPS['2.1']['observables']
+        uuid = misp_item['uuid']
+        stix_ids = [
+            object_ref for object_ref in object_refs
+            if object_ref.endswith(uuid) and object_ref.split('--')[0] not in observables
+        ]
+        self._event_report_matching[uuid].extend(stix_ids)
+        for attribute in misp_item.get('Attribute', []):
+            self._event_report_matching[attribute['uuid']].extend(stix_ids)
 
     def _handle_unpublished_report(self, report_args: dict) -> Grouping:
         grouping_id = f"grouping--{self._misp_event['uuid']}"
@@ -234,7 +258,7 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
                 'allow_custom': True
             }
         )
-        return Grouping(**report_args)
+        return self._create_stix_object(Grouping, report_args)
 
     ################################################################################
     #                         ATTRIBUTES PARSING FUNCTIONS                         #
@@ -242,9 +266,6 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
 
     def _parse_attachment_attribute_observable(self, attribute: Union[MISPAttribute, dict]):
         artifact_id = f"artifact--{attribute['uuid']}"
-        data = attribute['data']
-        if not isinstance(data, str):
-            data = b64encode(data.getvalue()).decode()
         objects = [
             File(
                 id=f"file--{attribute['uuid']}",
@@ -253,7 +274,7 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
             ),
             Artifact(
                 id=artifact_id,
-                payload_bin=data
+                **self._create_payload_args(attribute['data'])
             )
         ]
         self._handle_attribute_observable(attribute, objects)
@@ -556,12 +577,12 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
         else:
             self._composite_attribute_value_warning(attribute['type'], attribute['value'])
             file_args['name'] = attribute['value']
-        data = attribute['data']
-        if not isinstance(data, str):
-            data = b64encode(data.getvalue()).decode()
         objects = [
             File(**file_args),
-            self._create_artifact(artifact_id, data, malware_sample=True)
+            self._create_artifact(
+                artifact_id, self._create_payload_args(attribute['data']),
+                malware_sample=True
+            )
         ]
         self._handle_attribute_observable(attribute, objects)
 
@@ -737,7 +758,7 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
                     note_args[feature] = self._handle_custom_data_field(values)
                     continue
                 note_args[feature] = values[0] if isinstance(values, list) and len(values) == 1 else values
-        self._append_SDO(Note(**note_args))
+        self._append_SDO(self._create_stix_object(Note, note_args))
 
     def _parse_asn_object_observable(self, misp_object: Union[MISPObject, dict]):
         as_args = self._parse_AS_args(misp_object['Attribute'])
@@ -866,11 +887,12 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
                     for attribute in attributes.pop(feature):
                         if len(attribute) == 3:
                             value, data, uuid = attribute
-                            if not isinstance(data, str):
-                                data = b64encode(data.getvalue()).decode()
                             object_id = f'artifact--{uuid}'
                             objects.append(
-                                self._create_artifact(object_id, data, filename=value)
+                                self._create_artifact(
+                                    object_id, {'payload_bin': encode_payload(data)},
+                                    filename=value
+                                )
                             )
                         else:
                             value, uuid = attribute
@@ -1544,8 +1566,8 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
             )
             location = self._create_location(location_args)
             self._append_SDO_without_refs(location)
-            object_refs.append(location.id)
-            ids[cluster['uuid']] = location.id
+            object_refs.append(location['id'])
+            ids[cluster['uuid']] = location['id']
         self.populate_unique_ids(ids)
         return object_refs
 
@@ -1553,8 +1575,8 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
     #                    STIX OBJECTS CREATION HELPER FUNCTIONS                    #
     ################################################################################
 
-    def _create_artifact(self, artifact_id: str, content: str, filename: Optional[str] = None, malware_sample: Optional[bool] = False) -> Artifact:
-        args: dict[str, Union[bool, str]] = {'id': artifact_id, 'payload_bin': content}
+    def _create_artifact(self, artifact_id: str, payload_args: dict, filename: Optional[str] = None, malware_sample: Optional[bool] = False) -> Artifact:
+        args: dict[str, Union[bool, dict, str]] = {'id': artifact_id, **payload_args}
         if filename is not None:
             args.update(
                 {
@@ -1566,32 +1588,32 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
             args.update(self._mapping.malware_sample_additional_observable_values())
         return Artifact(**args)
 
-    @staticmethod
-    def _create_attack_pattern(attack_pattern_args: dict) -> AttackPattern:
-        return AttackPattern(**attack_pattern_args)
+    def _create_attack_pattern(self, attack_pattern_args: dict) -> AttackPattern:
+        return self._create_stix_object(AttackPattern, attack_pattern_args)
 
     def _create_bundle(self) -> Bundle:
-        return Bundle(self.stix_objects, allow_custom=True, id=f"bundle--{self._misp_event.get('uuid')}" if hasattr(self, "_misp_event") else None )
+        bundle_args = {
+            'objects': self.stix_objects, 'allow_custom': True,
+            'id': f"bundle--{self._misp_event.get('uuid')}" if hasattr(self, "_misp_event") else None
+        }
+        return self._create_stix_object(Bundle, bundle_args)
 
-    @staticmethod
-    def _create_campaign(campaign_args: dict) -> Campaign:
-        return Campaign(**campaign_args)
+    def _create_campaign(self, campaign_args: dict) -> Campaign:
+        return self._create_stix_object(Campaign, campaign_args)
 
-    @staticmethod
-    def _create_course_of_action(course_of_action_args: dict) -> CourseOfAction:
-        return CourseOfAction(**course_of_action_args)
+    def _create_course_of_action(self, course_of_action_args: dict) -> CourseOfAction:
+        return self._create_stix_object(CourseOfAction, course_of_action_args)
 
     def _create_custom_attribute(self, custom_args: dict) -> CustomAttribute:
         self._clean_custom_properties(custom_args)
-        return CustomAttribute(**custom_args)
+        return self._create_stix_object(CustomAttribute, custom_args)
 
-    @staticmethod
-    def _create_custom_galaxy(custom_args: dict) -> CustomGalaxyCluster:
-        return CustomGalaxyCluster(**custom_args)
+    def _create_custom_galaxy(self, custom_args: dict) -> CustomGalaxyCluster:
+        return self._create_stix_object(CustomGalaxyCluster, custom_args)
 
     def _create_custom_object(self, custom_args: dict) -> CustomMispObject:
         self._clean_custom_properties(custom_args)
-        return CustomMispObject(**custom_args)
+        return self._create_stix_object(CustomMispObject, custom_args)
 
     @staticmethod
     def _create_email_address(address_id: str, email_address: str, display_name: Optional[str] = None) -> EmailAddress:
@@ -1611,9 +1633,8 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
     def _create_file_object(file_args: dict) -> File:
         return File(**file_args)
 
-    @staticmethod
-    def _create_identity(identity_args: dict) -> Identity:
-        return Identity(**identity_args)
+    def _create_identity(self, identity_args: dict) -> Identity:
+        return self._create_stix_object(Identity, identity_args)
 
     def _create_identity_object(self, orgname: str) -> Identity:
         identity_args = {
@@ -1627,32 +1648,30 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
         }
         return self._create_identity(identity_args)
 
-    @staticmethod
-    def _create_indicator(indicator_args: dict) -> Indicator:
+    def _create_indicator(self, indicator_args: dict) -> Indicator:
         indicator_args['spec_version'] = '2.1'
         if indicator_args.get('pattern_type') is None:
             indicator_args['pattern_type'] = 'stix'
         if indicator_args.get('pattern_version') is None:
             indicator_args['pattern_version'] = '2.1'
-        return Indicator(**indicator_args)
+        return self._create_stix_object(Indicator, indicator_args)
 
-    @staticmethod
-    def _create_intrusion_set(intrusion_set_args: dict) -> IntrusionSet:
-        return IntrusionSet(**intrusion_set_args)
+    def _create_intrusion_set(self, intrusion_set_args: dict) -> IntrusionSet:
+        return self._create_stix_object(IntrusionSet, intrusion_set_args)
 
-    @staticmethod
-    def _create_location(location_args: dict) -> Location:
-        return Location(**location_args)
+    def _create_location(self, location_args: dict) -> Location:
+        return self._create_stix_object(Location, location_args)
 
-    @staticmethod
-    def _create_malware(malware_args: dict) -> Malware:
+    def _create_malware(self, malware_args: dict) -> Malware:
         if 'is_family' not in malware_args:
             malware_args['is_family'] = False
-        return Malware(**malware_args)
+        return self._create_stix_object(Malware, malware_args)
 
     def _create_observed_data(self, args: dict, observables: list):
-        args['object_refs'] = [observable.id for observable in observables]
-        getattr(self, self._results_handling_function)(ObservedData(**args))
+        args['object_refs'] = [observable['id'] for observable in observables]
+        getattr(self, self._results_handling_function)(
+            self._create_stix_object(ObservedData, args)
+        )
         for observable in observables:
             getattr(self, self._results_handling_function)(observable)
 
@@ -1660,29 +1679,23 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
     def _create_PE_extension(extension_args: dict) -> WindowsPEBinaryExt:
         return WindowsPEBinaryExt(**extension_args)
 
-    @staticmethod
-    def _create_relationship(relationship_args: dict) -> Relationship:
-        return Relationship(**relationship_args)
+    def _create_relationship(self, relationship_args: dict) -> Relationship:
+        return self._create_stix_object(Relationship, relationship_args)
 
-    @staticmethod
-    def _create_report(report_args: dict) -> Report:
-        return Report(**report_args)
+    def _create_report(self, report_args: dict) -> Report:
+        return self._create_stix_object(Report, report_args)
 
-    @staticmethod
-    def _create_sighting(sighting_args: dict) -> Sighting:
-        return Sighting(**sighting_args)
+    def _create_sighting(self, sighting_args: dict) -> Sighting:
+        return self._create_stix_object(Sighting, sighting_args)
 
-    @staticmethod
-    def _create_threat_actor(threat_actor_args: dict) -> ThreatActor:
-        return ThreatActor(**threat_actor_args)
+    def _create_threat_actor(self, threat_actor_args: dict) -> ThreatActor:
+        return self._create_stix_object(ThreatActor, threat_actor_args)
 
-    @staticmethod
-    def _create_tool(tool_args: dict) -> Tool:
-        return Tool(**tool_args)
+    def _create_tool(self, tool_args: dict) -> Tool:
+        return self._create_stix_object(Tool, tool_args)
 
-    @staticmethod
-    def _create_vulnerability(vulnerability_args: dict) -> Vulnerability:
-        return Vulnerability(**vulnerability_args)
+    def _create_vulnerability(self, vulnerability_args: dict) -> Vulnerability:
+        return self._create_stix_object(Vulnerability, vulnerability_args)
 
     @staticmethod
     def _create_windowsPESection(section_args: dict) -> WindowsPESection:
@@ -1754,13 +1767,11 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
         if len(attachment) < 3:
             return None
         filename, data, uuid = attachment
-        if not isinstance(data, str):
-            data = b64encode(data.getvalue()).decode()
         artifact_args = {
             'id': getattr(self, self._id_parsing_function['attribute'])(
                 'artifact', {'uuid': uuid}
             ),
-            'payload_bin': data,
+            'payload_bin': encode_payload(data),
             'allow_custom': True
         }
         if '.' in filename:
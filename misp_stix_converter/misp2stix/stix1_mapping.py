@@ -666,6 +666,15 @@ class MISPtoSTIX1Mapping(MISPtoSTIXMapping):
     def credential_object_mapping(cls) -> dict:
         return cls.__credential_object_mapping
 
+    @classmethod
+    def dispatch_mappings(cls) -> dict:
+        return {
+            'attribute_types': cls.__attribute_types_mapping,
+            'galaxy_types': cls.__galaxy_types_mapping,
+            'non_indicator_names': cls.__non_indicator_names,
+            'objects': cls.__objects_mapping
+        }
+
     @classmethod
     def email_attribute_mapping(cls, field: str) -> Union[str, None]:
         return cls.__email_attribute_mapping.get(field)
@@ -172,6 +172,14 @@ class MISPtoSTIX20Mapping(MISPtoSTIX2Mapping):
     def credential_object_mapping(cls) -> dict:
         return cls.__credential_object_mapping
 
+    @classmethod
+    def dispatch_mappings(cls) -> dict:
+        return {
+            'attribute_types': cls.__attribute_types_mapping,
+            'galaxy_types': cls.__galaxy_types_mapping,
+            'objects': cls.__objects_mapping
+        }
+
     @classmethod
     def email_object_mapping(cls) -> dict:
         return cls.__email_object_mapping
@@ -328,6 +328,14 @@ class MISPtoSTIX21Mapping(MISPtoSTIX2Mapping):
     def cluster_to_stix_object(cls, field: str) -> Union[str, None]:
         return cls.__cluster_to_stix_object.get(field)
 
+    @classmethod
+    def dispatch_mappings(cls) -> dict:
+        return {
+            'attribute_types': cls.__attribute_types_mapping,
+            'galaxy_types': cls.__galaxy_types_mapping,
+            'objects': cls.__objects_mapping
+        }
+
     @classmethod
     def email_object_mapping(cls) -> dict:
         return cls.__email_object_mapping
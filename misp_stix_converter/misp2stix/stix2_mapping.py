@@ -51,7 +51,7 @@ class MISPtoSTIX2Mapping(MISPtoSTIXMapping):
         'reference_from_CAPEC'
     )
     __generic_galaxy_types = (
-        'attack-pattern', 'campaign', 'course-of-actiion', 'intrusion-set',
+        'attack-pattern', 'campaign', 'course-of-action', 'intrusion-set',
         'malware', 'threat-actor', 'tool', 'vulnerability'
     )
     __misp_identity_args = Mapping(
@@ -237,6 +237,9 @@ class MISPtoSTIX2Mapping(MISPtoSTIXMapping):
     __attack_pattern_meta_mapping = Mapping(
         kill_chain='_parse_kill_chain'
     )
+    __campaign_meta_mapping = Mapping(
+        synonyms='_parse_synonyms_meta_field'
+    )
     __intrusion_set_meta_mapping = Mapping(
         synonyms='_parse_synonyms_meta_field'
     )
@@ -918,6 +921,10 @@ class MISPtoSTIX2Mapping(MISPtoSTIXMapping):
     def attribute_types_mapping(cls) -> dict:
         return cls.__attribute_types_mapping
 
+    @classmethod
+    def campaign_meta_mapping(cls, field: str) -> Union[str, None]:
+        return cls.__campaign_meta_mapping.get(field)
+
     @classmethod
     def cluster_to_stix_object(cls) -> dict:
         return cls.__cluster_to_stix_object
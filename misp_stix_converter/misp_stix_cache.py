@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Content-addressed cache of the conversion results.
+
+The same MISP events and STIX bundles are often converted again while their
+content did not change. The results of a conversion are then stored on disk
+under a key made of the hash of the input files content and of every option
+changing the output, so converting the same content with the same options
+again simply copies the cached results instead of running the parser.
+
+The cache size is bounded: once it is reached, the least recently used
+results are removed.
+"""
+
+import json
+import os
+import shutil
+from . import __version__
+from hashlib import sha256
+from pathlib import Path
+from tempfile import mkdtemp
+from typing import Optional, Union
+
+_CHUNK_SIZE = 1024 * 1024
+_DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+_MANIFEST = 'manifest.json'
+
+
+class ConversionCacheError(Exception):
+    pass
+
+
+class ConversionCache:
+    """
+    Directory of conversion results, every entry being a directory named after
+    its key, with the result files and a manifest holding their labels, and
+    the errors and warnings of the conversion.
+
+    Only paths and sizes are kept, so a cache can be sent to the worker
+    processes of a pool, the entries being written atomically.
+    """
+
+    def __init__(self, directory: Union[Path, str],
+                 max_size: Optional[int] = _DEFAULT_MAX_SIZE):
+        if max_size < 1:
+            raise ConversionCacheError(
+                f'Invalid cache maximum size: {max_size}'
+            )
+        self.__directory = Path(directory).resolve()
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        self.__max_size = max_size
+
+    @property
+    def directory(self) -> Path:
+        return self.__directory
+
+    @property
+    def max_size(self) -> int:
+        return self.__max_size
+
+    @property
+    def size(self) -> int:
+        return sum(size for _, _, size in self.__entries())
+
+    def fetch(self, key: str) -> Union[dict, None]:
+        """
+        Returns the cached results of a conversion, as a dict with the paths
+        of the result files in the cache by label, and the errors and
+        warnings of the conversion, or None when the key is not cached.
+        """
+        entry = self.directory / key
+        try:
+            with open(entry / _MANIFEST, 'rt', encoding='utf-8') as f:
+                manifest = json.load(f)
+            # The entry is marked as the most recently used one
+            os.utime(entry)
+        except (OSError, ValueError):
+            return None
+        manifest['results'] = {
+            label: entry / filename
+            for label, filename in manifest['results'].items()
+        }
+        return manifest
+
+    def key(self, *filenames: Union[Path, str], **options) -> str:
+        """
+        Hashes the content of the input files, in the given order, with the
+        options of the conversion and the version of the converter.
+        """
+        key = sha256(f'misp-stix {__version__}\0'.encode())
+        for filename in filenames:
+            with open(filename, 'rb') as f:
+                for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                    key.update(chunk)
+            key.update(f'\0{os.path.getsize(filename)}\0'.encode())
+        key.update(json.dumps(options, default=str, sort_keys=True).encode())
+        return key.hexdigest()
+
+    def store(self, key: str, results: dict,
+              errors: Optional[dict] = None, warnings: Optional[dict] = None):
+        """
+        Copies the result files of a conversion in the cache.
+
+        :param key: Key of the conversion, as returned by `key`
+        :param results: Paths of the result files, by label - the labels are
+            what the conversion functions need to name the result files when
+            they are fetched from the cache
+        :param errors: Errors of the conversion
+        :param warnings: Warnings of the conversion
+        """
+        entry = self.directory / key
+        if entry.exists():
+            return
+        tmp_entry = Path(mkdtemp(prefix='.', dir=self.directory))
+        try:
+            manifest = {'results': {}}
+            for index, (label, filename) in enumerate(results.items()):
+                shutil.copyfile(filename, tmp_entry / str(index))
+                manifest['results'][label] = str(index)
+            for feature, messages in (('errors', errors), ('warnings', warnings)):
+                if messages:
+                    manifest[feature] = messages
+            with open(tmp_entry / _MANIFEST, 'wt', encoding='utf-8') as f:
+                json.dump(manifest, f, default=sorted)
+            os.rename(tmp_entry, entry)
+        except OSError:
+            # Another conversion stored the same results in the meantime
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return
+        self.__evict()
+
+    def __entries(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith('.') or not entry.is_dir():
+                continue
+            try:
+                size = sum(
+                    item.stat().st_size for item in os.scandir(entry.path)
+                )
+                yield entry.stat().st_mtime, entry.path, size
+            except OSError:
+                continue
+
+    def __evict(self):
+        entries = sorted(self.__entries())
+        size = sum(entry_size for _, _, entry_size in entries)
+        for _, path, entry_size in entries:
+            if size <= self.max_size:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            size -= entry_size
@@ -2,37 +2,38 @@
 #!/usr/bin/env python3
 
 import json
-import os
 import re
 import sys
-from .misp2stix.framing import (
-    _stix1_attributes_framing, _stix1_framing, _handle_namespaces,
-    _create_stix_package)
-from .misp2stix.misp_to_stix1 import (
-    MISPtoSTIX1AttributesParser, MISPtoSTIX1EventsParser)
-from .misp2stix.misp_to_stix20 import MISPtoSTIX20Parser
-from .misp2stix.misp_to_stix21 import MISPtoSTIX21Parser
-from .misp2stix.stix1_mapping import NS_DICT, SCHEMALOC_DICT
-from .stix2misp.external_stix1_to_misp import ExternalSTIX1toMISPParser
-from .stix2misp.external_stix2_to_misp import ExternalSTIX2toMISPParser
-from .stix2misp.internal_stix1_to_misp import InternalSTIX1toMISPParser
-from .stix2misp.internal_stix2_to_misp import InternalSTIX2toMISPParser
+from .misp_stix_cache import ConversionCache
+from .misp_stix_delta import DeltaManifest
+from .misp_stix_seen import SeenObjectStore
+from .misp_stix_serializer import JSONSerializer
+from .misp_stix_stats import ConversionStats, _disabled_stats
+from .misp_stix_streaming import JSONStreamReader
 from collections import defaultdict
-from cybox.core.observable import Observables
-from mixbox import idgen
-from mixbox.namespaces import (
-    Namespace, NamespaceNotFoundError, register_namespace)
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from io import StringIO
 from pathlib import Path
-from stix.core import (
-    Campaigns, CoursesOfAction, Indicators, ThreatActors, STIXPackage)
-from stix.core.ttps import TTPs
-from stix2.base import STIXJSONEncoder
-from stix2.exceptions import InvalidValueError
-from stix2.parsing import parse as stix2_parser, ParseError
-from stix2.v20 import Bundle as Bundle_v20
-from stix2.v21 import Bundle as Bundle_v21
-from typing import List, Optional, Union
-from uuid import uuid4
+from shutil import copyfile, copyfileobj
+from tempfile import SpooledTemporaryFile
+from typing import Callable, List, Optional, TextIO, TYPE_CHECKING, Union
+
+# The STIX 1 and STIX 2 libraries and the parsers relying on them are only
+# imported by the functions using them, so a conversion only loads the
+# libraries of the STIX version it handles
+if TYPE_CHECKING:
+    from cybox.core.observable import Observables
+    from stix.common.related import RelatedPackage
+    from stix.core import (
+        Campaigns, CoursesOfAction, ExploitTargets, Indicators, ThreatActors,
+        STIXPackage)
+    from stix.core.ttps import TTPs
+    from .misp_stix_server import ParserPool
+    _STIX1_containers_type = Union[
+        Campaigns, CoursesOfAction, ExploitTargets, Indicators, Observables,
+        ThreatActors, TTPs
+    ]
 
 _cybox_features = (
     'cybox_major_version', 'cybox_minor_version', 'cybox_update_version'
@@ -47,8 +48,19 @@ _STIX1_features = (
     'campaigns', 'courses_of_action', 'exploit_targets', 'indicators',
     'observables', 'threat_actors', 'ttps'
 )
+# Size above which the content of an attributes collection feature is spooled
+# to disk until the different features are merged in the single output file
+_STIX1_spool_size = 8 * 1024 * 1024
 _STIX1_valid_formats = ('json', 'xml')
 _STIX1_valid_versions = ('1.1.1', '1.2')
+_STIX1_xml_elements = {
+    'campaigns': 'Campaign',
+    'courses_of_action': 'Course_Of_Action',
+    'exploit_targets': 'Exploit_Target',
+    'indicators': 'Indicator',
+    'threat_actors': 'Threat_Actor',
+    'ttps': 'TTP'
+}
 _STIX2_default_version = '2.1'
 _STIX2_event_types = ('grouping', 'report')
 _STIX2_valid_versions = ('2.0', '2.1')
@@ -69,11 +81,11 @@ class AttributeCollectionHandler():
 
     @property
     def campaigns(self):
-        return self.features['campaigns'].get('filename')
+        return self.features['campaigns'].get('stream')
 
     @campaigns.setter
-    def campaigns(self, filename):
-        self.features['campaigns']['filename'] = f'{filename}.{self.return_format}'
+    def campaigns(self, stream: TextIO):
+        self.features['campaigns']['stream'] = stream
         self.features['campaigns'].update(
             {
                 'header': '    <stix:Campaigns>\n',
@@ -94,11 +106,11 @@ class AttributeCollectionHandler():
 
     @property
     def courses_of_action(self):
-        return self.features['courses_of_action'].get('filename')
+        return self.features['courses_of_action'].get('stream')
 
     @courses_of_action.setter
-    def courses_of_action(self, filename):
-        self.features['courses_of_action']['filename'] = f'{filename}.{self.return_format}'
+    def courses_of_action(self, stream: TextIO):
+        self.features['courses_of_action']['stream'] = stream
         self.features['courses_of_action'].update(
             {
                 'header': '    <stix:CoursesOfAction>\n',
@@ -119,11 +131,11 @@ class AttributeCollectionHandler():
 
     @property
     def exploit_targets(self):
-        return self.features['exploit_targets'].get('filename')
+        return self.features['exploit_targets'].get('stream')
 
     @exploit_targets.setter
-    def exploit_targets(self, filename):
-        self.features['exploit_targets']['filename'] = f'{filename}.{self.return_format}'
+    def exploit_targets(self, stream: TextIO):
+        self.features['exploit_targets']['stream'] = stream
         self.features['exploit_targets'].update(
             {
                 'header': '    <stix:ExploitTargets>\n',
@@ -144,11 +156,11 @@ class AttributeCollectionHandler():
 
     @property
     def indicators(self):
-        return self.features['indicators'].get('filename')
+        return self.features['indicators'].get('stream')
 
     @indicators.setter
-    def indicators(self, filename):
-        self.features['indicators']['filename'] = f'{filename}.{self.return_format}'
+    def indicators(self, stream: TextIO):
+        self.features['indicators']['stream'] = stream
         self.features['indicators'].update(
             {
                 'header': '    <stix:Indicators>\n',
@@ -169,11 +181,11 @@ class AttributeCollectionHandler():
 
     @property
     def observables(self):
-        return self.features['observables'].get('filename')
+        return self.features['observables'].get('stream')
 
     @observables.setter
-    def observables(self, filename):
-        self.features['observables']['filename'] = f'{filename}.{self.return_format}'
+    def observables(self, stream: TextIO):
+        self.features['observables']['stream'] = stream
         self.features['observables'].update(
             {
                 'header': '    <stix:Observables>\n',
@@ -198,11 +210,11 @@ class AttributeCollectionHandler():
 
     @property
     def threat_actors(self):
-        return self.features['threat_actors'].get('filename')
+        return self.features['threat_actors'].get('stream')
 
     @threat_actors.setter
-    def threat_actors(self, filename):
-        self.features['threat_actors']['filename'] = f'{filename}.{self.return_format}'
+    def threat_actors(self, stream: TextIO):
+        self.features['threat_actors']['stream'] = stream
         self.features['threat_actors'].update(
             {
                 'header': '    <stix:ThreatActors>\n',
@@ -223,11 +235,11 @@ class AttributeCollectionHandler():
 
     @property
     def ttps(self):
-        return self.features['ttps'].get('filename')
+        return self.features['ttps'].get('stream')
 
     @ttps.setter
-    def ttps(self, filename):
-        self.features['ttps']['filename'] = f'{filename}.{self.return_format}'
+    def ttps(self, stream: TextIO):
+        self.features['ttps']['stream'] = stream
         self.features['ttps'].update(
             {
                 'header': '    <stix:TTPs>\n',
@@ -246,6 +258,11 @@ class AttributeCollectionHandler():
     def ttps_header(self):
         return self.features['ttps']['header']
 
+    def close(self):
+        for content in self.features.values():
+            if content.get('stream') is not None:
+                content['stream'].close()
+
 
 def misp_attribute_collection_to_stix1(
         *input_files: List[_files_type], debug: Optional[bool] = False,
@@ -256,12 +273,17 @@ def misp_attribute_collection_to_stix1(
         in_memory: Optional[bool] = False,
         single_output: Optional[bool] = False,
         output_dir: Optional[_files_type] = None,
-        output_name: Optional[_files_type] = None):
+        output_name: Optional[_files_type] = None,
+        workers: Optional[int] = None, profile: Optional[bool] = False):
+    from .misp2stix.framing import _create_stix_package
+    from .misp2stix.misp_to_stix1 import MISPtoSTIX1AttributesParser
     if return_format not in _STIX1_valid_formats:
         return_format = _STIX1_default_format
     if version not in _STIX1_valid_versions:
         version = _STIX1_default_version
     parser = MISPtoSTIX1AttributesParser(org, version)
+    if profile:
+        parser.enable_profiling()
     if len(input_files) == 1:
         try:
             filename = input_files[0]
@@ -271,12 +293,18 @@ def misp_attribute_collection_to_stix1(
             name = _check_filename(
                 filename.parent, f'{filename.name}.out', output_dir, output_name
             )
-            _write_raw_stix(
-                parser.stix_package, name, namespace, org, return_format
-            )
+            with parser.stats.timer('serialisation'):
+                _write_raw_stix(
+                    parser.stix_package, name, namespace, org, return_format
+                )
             return _generate_traceback(debug, parser, name)
         except Exception as exception:
             return {'fails': [f'{filename} -  {exception.__str__()}']}
+    if workers is not None and workers > 1:
+        return _misp_attribute_collection_to_stix1_in_pool(
+            input_files, debug, return_format, namespace, org, version,
+            single_output, output_dir, output_name, workers, profile
+        )
     traceback = defaultdict(list)
     if single_output:
         stix_package = _create_stix_package(org, version)
@@ -308,54 +336,38 @@ def misp_attribute_collection_to_stix1(
                 except Exception as exception:
                     traceback['fails'].append(f'{filename} - {exception.__str__()}')
             if any(filename not in traceback.get('fails', []) for filename in input_files):
-                _write_raw_stix(
-                    stix_package, name, namespace, org, return_format
-                )
+                with parser.stats.timer('serialisation'):
+                    _write_raw_stix(
+                        stix_package, name, namespace, org, return_format
+                    )
                 traceback.update(_generate_traceback(debug, parser, name))
             return traceback
         handler = AttributeCollectionHandler(return_format)
         tmp_path = name.parent
-        for filename in input_files:
-            try:
-                parser.parse_json_content(filename)
-                package = parser.stix_package
-                for feature in _STIX1_features:
-                    values = getattr(package, feature)
-                    if values:
-                        content = globals()[f'_get_{feature}'](values, return_format)
-                        if not content:
-                            continue
-                        filename = getattr(handler, feature)
-                        if filename is None:
-                            setattr(handler, feature, uuid4())
-                            filename = getattr(handler, feature)
-                            with open(tmp_path / filename, 'wt', encoding='utf-8') as f:
-                                current_header = getattr(handler, f'{feature}_header')
-                                f.write(f'{current_header}{content}')
-                            continue
-                        with open(tmp_path / filename, 'at', encoding='utf-8') as f:
-                            f.write(content)
-            except Exception as exception:
-                traceback['fails'].append(f'{filename} - {exception.__str__()}')
-        if any(filename not in traceback.get('fails', []) for filename in input_files):
-            header, _, footer = _stix1_attributes_framing(
-                namespace, org, return_format, stix_package
-            )
-            with open(name, 'wt', encoding='utf-8') as result:
-                result.write(header)
-                actual_features = handler.features
-                for feature in actual_features:
-                    filename = getattr(handler, feature)
-                    if filename is not None:
-                        with open(tmp_path / filename, 'rt', encoding='utf-8') as current:
-                            content = current.read() if return_format == 'xml' else current.read()[:-2]
-                        current_footer = getattr(handler, f'{feature}_footer')
-                        if return_format == 'json' and feature == actual_features[-1]:
-                            current_footer = current_footer[:-2]
-                        result.write(f'{content}{current_footer}')
-                        os.remove(tmp_path / filename)
-                result.write(footer)
-            traceback.update(_generate_traceback(debug, parser, name))
+        try:
+            for filename in input_files:
+                try:
+                    parser.parse_json_content(filename)
+                    package = parser.stix_package
+                    for feature in _STIX1_features:
+                        values = getattr(package, feature)
+                        if values is not None and len(values) > 0:
+                            with parser.stats.timer('serialisation'):
+                                _write_attributes_collection_objects(
+                                    handler, tmp_path, feature, values,
+                                    return_format
+                                )
+                except Exception as exception:
+                    traceback['fails'].append(f'{filename} - {exception.__str__()}')
+            if any(filename not in traceback.get('fails', []) for filename in input_files):
+                with parser.stats.timer('serialisation'):
+                    _write_attributes_collection(
+                        handler, name, namespace, org, return_format,
+                        stix_package
+                    )
+                traceback.update(_generate_traceback(debug, parser, name))
+        finally:
+            handler.close()
         return traceback
     output_names = []
     for filename in input_files:
@@ -366,9 +378,10 @@ def misp_attribute_collection_to_stix1(
             name = _check_output(
                 filename.parent, f'{filename.name}.out', output_dir
             )
-            _write_raw_stix(
-                parser.stix_package, name, namespace, org, return_format
-            )
+            with parser.stats.timer('serialisation'):
+                _write_raw_stix(
+                    parser.stix_package, name, namespace, org, return_format
+                )
             output_names.append(name)
         except Exception as exception:
             traceback['fails'].append(f'{filename} - {exception.__str__()}')
@@ -386,13 +399,18 @@ def misp_event_collection_to_stix1(
         in_memory: Optional[bool] = False,
         single_output: Optional[bool] = False,
         output_dir: Optional[_files_type] = None,
-        output_name: Optional[_files_type] = None):
+        output_name: Optional[_files_type] = None,
+        workers: Optional[int] = None, profile: Optional[bool] = False):
+    from .misp2stix.framing import _create_stix_package, _stix1_framing
+    from .misp2stix.misp_to_stix1 import MISPtoSTIX1EventsParser
     if return_format not in _STIX1_valid_formats:
         return_format = _STIX1_default_format
     if version not in _STIX1_valid_versions:
         version = _STIX1_default_version
     _write_args = (namespace, org, return_format)
     parser = MISPtoSTIX1EventsParser(org, version)
+    if profile:
+        parser.enable_profiling()
     if len(input_files) == 1:
         filename = input_files[0]
         try:
@@ -402,10 +420,16 @@ def misp_event_collection_to_stix1(
             name = _check_filename(
                 filename.parent, f'{filename.name}.out', output_dir, output_name
             )
-            _write_raw_stix(parser.stix_package, name, *_write_args)
+            with parser.stats.timer('serialisation'):
+                _write_raw_stix(parser.stix_package, name, *_write_args)
             return _generate_traceback(debug, parser, name)
         except Exception as exception:
             return {'fails': [f'{filename} - {exception.__str__()}']}
+    if workers is not None and workers > 1:
+        return _misp_event_collection_to_stix1_in_pool(
+            input_files, debug, return_format, namespace, org, version,
+            single_output, output_dir, output_name, workers, profile
+        )
     traceback = defaultdict(list)
     if single_output:
         stix_package = _create_stix_package(org, version, header=False)
@@ -414,6 +438,7 @@ def misp_event_collection_to_stix1(
             f'{stix_package.id_}.stix1.{return_format}',
             output_dir, output_name
         )
+        converted = False
         if in_memory:
             for filename in input_files:
                 try:
@@ -425,37 +450,49 @@ def misp_event_collection_to_stix1(
                             stix_package.add_related_package(related_package)
                     else:
                         stix_package.add_related_package(parser.stix_package)
+                    converted = True
                 except Exception as exception:
                     traceback['fails'].append(f'{filename} - {exception.__str__()}')
-            if any(filename not in traceback.get('fails', []) for filename in input_files):
-                _write_raw_stix(stix_package, name, *_write_args)
+            if converted:
+                with parser.stats.timer('serialisation'):
+                    _write_raw_stix(stix_package, name, *_write_args)
                 traceback.update(_generate_traceback(debug, parser, name))
             return traceback
         header, separator, footer = _stix1_framing(
             namespace, org, return_format, stix_package
         )
-        filename = input_files[0]
-        try:
-            if not isinstance(filename, Path):
-                filename = Path(filename).resolve()
-            parser.parse_json_content(filename)
-            content = _get_events(parser.stix_package, return_format)
-            with open(name, 'wt', encoding='utf-8') as f:
-                f.write(f'{header}{content}')
-        except Exception as exception:
-            traceback['fails'].append(filename)
-        for filename in input_files[1:]:
-            try:
-                if not isinstance(filename, Path):
-                    filename = Path(filename).resolve()
-                parser.parse_json_content(filename)
-                content = _get_events(parser.stix_package, return_format)
-                with open(name, 'at', encoding='utf-8') as f:
-                    f.write(f'{separator}{content}')
-            except Exception as exception:
-                traceback['fails'].append(f'{filename} - {exception.__str__()}')
-        with open(name, 'at', encoding='utf-8') as f:
+        with open(name, 'wt', encoding='utf-8') as f:
+            f.write(header)
+            current_separator = ''
+            for filename in input_files:
+                # Every event is written as soon as it is converted, so only
+                # the package of the current event is held in memory. The
+                # events of a file are only copied to the output once the
+                # whole file is converted, so a file failing partway leaves
+                # nothing behind
+                with SpooledTemporaryFile(
+                        max_size=_STIX1_spool_size, mode='w+t',
+                        encoding='utf-8', dir=name.parent) as events:
+                    file_separator = current_separator
+                    try:
+                        if not isinstance(filename, Path):
+                            filename = Path(filename).resolve()
+                        for content in parser.iter_json_content(filename):
+                            events.write(file_separator)
+                            with parser.stats.timer('serialisation'):
+                                _write_event(events.write, content, return_format)
+                            file_separator = separator
+                    except Exception as exception:
+                        traceback['fails'].append(f'{filename} - {exception.__str__()}')
+                        continue
+                    events.seek(0)
+                    copyfileobj(events, f)
+                    current_separator = file_separator
+                    converted = True
             f.write(footer)
+        if not converted:
+            name.unlink()
+            return traceback
         traceback.update(_generate_traceback(debug, parser, name))
         return traceback
     output_names = []
@@ -467,7 +504,8 @@ def misp_event_collection_to_stix1(
             name = _check_output(
                 filename.parent, f'{filename.name}.out', output_dir
             )
-            _write_raw_stix(parser.stix_package, name, *_write_args)
+            with parser.stats.timer('serialisation'):
+                _write_raw_stix(parser.stix_package, name, *_write_args)
             output_names.append(name)
         except Exception as exception:
             traceback['fails'].append(f'{filename} - {exception.__str__()}')
@@ -482,24 +520,64 @@ def misp_collection_to_stix2(
         in_memory: Optional[bool] = False,
         single_output: Optional[bool] = False,
         output_dir: Optional[_files_type] = None,
-        output_name: Optional[_files_type] = None):
+        output_name: Optional[_files_type] = None,
+        workers: Optional[int] = None,
+        serializer: Optional[JSONSerializer] = None,
+        payloads_dir: Optional[_files_type] = None,
+        trusted: Optional[bool] = False, profile: Optional[bool] = False,
+        cache: Optional[ConversionCache] = None,
+        parsers: Optional['ParserPool'] = None):
+    from .misp2stix.misp_to_stix20 import MISPtoSTIX20Parser
+    from .misp2stix.misp_to_stix21 import MISPtoSTIX21Parser
+    from stix2.v20 import Bundle as Bundle_v20
+    from stix2.v21 import Bundle as Bundle_v21
     if version not in _STIX2_valid_versions:
         version = _STIX2_default_version
-    parser = MISPtoSTIX21Parser() if version == '2.1' else MISPtoSTIX20Parser()
+    if serializer is None:
+        serializer = JSONSerializer()
+    stix2_args = {
+        'version': version, 'output_dir': output_dir,
+        'serializer': serializer, 'payloads_dir': payloads_dir,
+        'trusted': trusted, 'profile': profile
+    }
+    if payloads_dir is not None:
+        # The payload files are written by the parser, not cached
+        cache = None
     if len(input_files) == 1:
-        filename = input_files[0]
-        try:
-            if not isinstance(filename, Path):
-                filename = Path(filename).resolve()
-            parser.parse_json_content(filename)
-            name = _check_filename(
-                filename.parent, f'{filename.name}.out', output_dir, output_name
+        return misp_to_stix2(
+            input_files[0], debug=debug, output_name=output_name, cache=cache,
+            parsers=parsers, **stix2_args
+        )
+    if cache is not None:
+        if single_output:
+            return _misp_collection_to_stix2_with_cache(
+                input_files, debug, in_memory, output_name, workers, cache,
+                **stix2_args
             )
-            with open(name, 'wt', encoding='utf-8') as f:
-                f.write(parser.bundle.serialize(indent=4))
-            return _generate_traceback(debug, parser, name)
-        except Exception as exception:
-            return {'fails': [f'{filename} - {exception.__str__()}']}
+        # Every file is converted on its own, to be cached on its own
+        stix2_args.update({'debug': True, 'cache': cache})
+        if workers is not None and workers > 1:
+            results = _run_in_pool(
+                misp_to_stix2, _resolve_input_files(input_files), workers,
+                **stix2_args
+            )
+        else:
+            results = [
+                misp_to_stix2(filename, parsers=parsers, **stix2_args)
+                for filename in input_files
+            ]
+        return _merge_pool_results(debug, results)
+    parser_class = MISPtoSTIX21Parser if version == '2.1' else MISPtoSTIX20Parser
+    parser = _get_parser(
+        parsers, parser_class, payloads_dir=payloads_dir, trusted=trusted
+    )
+    if profile:
+        parser.enable_profiling()
+    if workers is not None and workers > 1:
+        return _misp_collection_to_stix2_in_pool(
+            input_files, debug, version, single_output, output_dir,
+            output_name, workers, serializer, payloads_dir, trusted, profile
+        )
     traceback = defaultdict(list)
     if single_output:
         if in_memory:
@@ -514,12 +592,12 @@ def misp_collection_to_stix2(
                 bundle = parser.bundle
                 name = _check_filename(
                     Path(__file__).resolve().parents[1] / 'tmp',
-                    f"{bundle.id.split('--')[1]}.stix"
+                    f"{bundle['id'].split('--')[1]}.stix"
                     f"{version.replace('.', '')}.json",
                     output_dir, output_name
                 )
-                with open(name, 'wt', encoding='utf-8') as f:
-                    f.write(bundle.serialize(indent=4))
+                with parser.stats.timer('serialisation'), open(name, 'wt', encoding='utf-8') as f:
+                    serializer.dump_stix(bundle, f)
                 traceback.update(_generate_traceback(debug, parser, name))
             return traceback
         bundle = Bundle_v21() if version == '2.1' else Bundle_v20()
@@ -529,18 +607,19 @@ def misp_collection_to_stix2(
             output_dir, output_name
         )
         with open(name, 'wt', encoding='utf-8') as f:
-            f.write(f'{bundle.serialize(indent=4)[:-2]},\n    "objects": [\n')
+            f.write(serializer.stix_bundle_header(bundle))
         written = False
         try:
             filename = input_files[0]
             if not isinstance(filename, Path):
                 filename = Path(filename).resolve()
             parser.parse_json_content(filename)
-            stix_objects = json.dumps(
-                [parser.fetch_stix_objects], cls=STIXJSONEncoder, indent=4
-            )
+            with parser.stats.timer('serialisation'):
+                stix_objects = serializer.dumps_stix_objects(
+                    parser.fetch_stix_objects
+                )
             with open(name, 'at', encoding='utf-8') as f:
-                f.write(stix_objects[8:-8])
+                f.write(stix_objects)
             written = True
         except Exception as exception:
             traceback['fails'].append(f'{filename} - {exception.__str__()}')
@@ -549,18 +628,19 @@ def misp_collection_to_stix2(
                 if not isinstance(filename, Path):
                     filename = Path(filename).resolve()
                 parser.parse_json_content(filename)
-                stix_objects = json.dumps(
-                    [parser.fetch_stix_objects], cls=STIXJSONEncoder, indent=4
-                )
-                separator = ',\n' if written else ''
+                with parser.stats.timer('serialisation'):
+                    stix_objects = serializer.dumps_stix_objects(
+                        parser.fetch_stix_objects
+                    )
+                separator = serializer.stix_objects_separator if written else ''
                 with open(name, 'at', encoding='utf-8') as f:
-                    f.write(f"{separator}{stix_objects[8:-8]}")
+                    f.write(f"{separator}{stix_objects}")
                 written = True
             except Exception as exception:
                 traceback['fails'].append(f'{filename} - {exception.__str__()}')
         if written:
             with open(name, 'at', encoding='utf-8') as f:
-                f.write('\n    ]\n}')
+                f.write(serializer.stix_bundle_footer())
             traceback.update(_generate_traceback(debug, parser, name))
         else:
             name.remove()
@@ -574,8 +654,8 @@ def misp_collection_to_stix2(
             name = _check_output(
                 filename.parent, f'{filename.name}.out', output_dir
             )
-            with open(name, 'wt', encoding='utf-8') as f:
-                f.write(parser.bundle.serialize(indent=4))
+            with parser.stats.timer('serialisation'), open(name, 'wt', encoding='utf-8') as f:
+                serializer.dump_stix(parser.bundle, f)
             output_names.append(name)
         except Exception as exception:
             traceback['fails'].append(f'{filename} - {exception.__str__()}')
@@ -591,12 +671,16 @@ def misp_to_stix1(
         org: Optional[str] = _default_org,
         version: Optional[str] = _STIX1_default_version,
         output_dir: Optional[_files_type] = None,
-        output_name: Optional[_files_type] = None):
+        output_name: Optional[_files_type] = None,
+        profile: Optional[bool] = False):
+    from .misp2stix.misp_to_stix1 import MISPtoSTIX1EventsParser
     if return_format not in _STIX1_valid_formats:
         return_format = _STIX1_default_format
     if version not in _STIX1_valid_versions:
         version = _STIX1_default_version
     parser = MISPtoSTIX1EventsParser(org, version)
+    if profile:
+        parser.enable_profiling()
     try:
         if not isinstance(filename, Path):
             filename = Path(filename).resolve()
@@ -604,9 +688,10 @@ def misp_to_stix1(
         name = _check_filename(
             filename.parent, f'{filename.name}.out', output_dir, output_name
         )
-        _write_raw_stix(
-            parser.stix_package, name, namespace, org, return_format
-        )
+        with parser.stats.timer('serialisation'):
+            _write_raw_stix(
+                parser.stix_package, name, namespace, org, return_format
+            )
         return _generate_traceback(debug, parser, name)
     except Exception as exception:
         return {'fails': [f'{filename} - {exception.__str__()}']}
@@ -615,20 +700,63 @@ def misp_to_stix1(
 def misp_to_stix2(filename: _files_type, debug: Optional[bool] = False,
                   version: Optional[str] = _STIX2_default_version,
                   output_dir: Optional[_files_type] = None,
-                  output_name: Optional[_files_type] = None):
+                  output_name: Optional[_files_type] = None,
+                  serializer: Optional[JSONSerializer] = None,
+                  payloads_dir: Optional[_files_type] = None,
+                  trusted: Optional[bool] = False,
+                  profile: Optional[bool] = False,
+                  cache: Optional[ConversionCache] = None,
+                  manifest: Optional[_files_type] = None,
+                  since: Optional[int] = None,
+                  parsers: Optional['ParserPool'] = None):
+    from .misp2stix.misp_to_stix20 import MISPtoSTIX20Parser
+    from .misp2stix.misp_to_stix21 import MISPtoSTIX21Parser
     if version not in _STIX2_valid_versions:
         version = _STIX2_default_version
-    parser = MISPtoSTIX21Parser() if version == '2.1' else MISPtoSTIX20Parser()
+    if serializer is None:
+        serializer = JSONSerializer()
+    parser_class = MISPtoSTIX21Parser if version == '2.1' else MISPtoSTIX20Parser
+    parser = _get_parser(
+        parsers, parser_class, payloads_dir=payloads_dir, trusted=trusted
+    )
+    if profile:
+        parser.enable_profiling()
     try:
         if not isinstance(filename, Path):
             filename = Path(filename).resolve()
-        parser.parse_json_content(filename)
         name = _check_filename(
             filename.parent, f'{filename.name}.out', output_dir, output_name
         )
-        with open(name, 'wt', encoding='utf-8') as f:
-            f.write(json.dumps(parser.bundle, cls=STIXJSONEncoder, indent=4))
-        return _generate_traceback(debug, parser, name)
+        if manifest is not None and not isinstance(manifest, Path):
+            manifest = Path(manifest).resolve()
+        if payloads_dir is not None:
+            # The payload files are written by the parser, not cached
+            cache = None
+        if cache is not None:
+            key = _cache_key(
+                cache, _delta_export_files(filename, manifest), serializer,
+                feature='export', version=version,
+                delta=manifest is not None, since=since
+            )
+            traceback = _fetch_cached_results(
+                cache, key, debug,
+                lambda label: manifest if label == 'manifest' else name
+            )
+            if traceback is not None:
+                return traceback
+        if manifest is not None:
+            parser.enable_delta_export(DeltaManifest.load(manifest, since))
+        parser.parse_json_content(filename)
+        with parser.stats.timer('serialisation'), open(name, 'wt', encoding='utf-8') as f:
+            serializer.dump_stix(parser.bundle, f)
+        results = {'bundle': name}
+        if manifest is not None:
+            parser.delta_manifest.dump(manifest)
+            results['manifest'] = manifest
+        traceback = _generate_traceback(debug, parser, *results.values())
+        if cache is not None:
+            _store_results(cache, key, parser, traceback, results)
+        return traceback
     except Exception as exception:
         return {'fails': [f'{filename} - {exception.__str__()}']}
 
@@ -639,6 +767,8 @@ def misp_to_stix2(filename: _files_type, debug: Optional[bool] = False,
 
 def stix_1_to_misp(
         filename: _files_type, output_filename: Optional[_files_type]=None):
+    from .stix2misp.external_stix1_to_misp import ExternalSTIX1toMISPParser
+    from .stix2misp.internal_stix1_to_misp import InternalSTIX1toMISPParser
     event = _load_stix_event(filename)
     if isinstance(event, str):
         return event
@@ -660,37 +790,100 @@ def stix_2_to_misp(filename: _files_type, debug: Optional[bool] = False,
                    output_dir: Optional[_files_type]=None,
                    output_name: Optional[_files_type]=None,
                    sharing_group_id: Optional[int] = None,
-                   single_event: Optional[bool] = False):
+                   single_event: Optional[bool] = False,
+                   streaming: Optional[bool] = False,
+                   serializer: Optional[JSONSerializer] = None,
+                   payloads_dir: Optional[_files_type] = None,
+                   profile: Optional[bool] = False,
+                   cache: Optional[ConversionCache] = None,
+                   seen_store: Optional[SeenObjectStore] = None,
+                   parsers: Optional['ParserPool'] = None):
+    from .stix2misp.external_stix2_to_misp import ExternalSTIX2toMISPParser
+    from .stix2misp.internal_stix2_to_misp import InternalSTIX2toMISPParser
+    from stix2.exceptions import InvalidValueError
+    from stix2.parsing import parse as stix2_parser, ParseError
     if isinstance(filename, str):
         filename = Path(filename).resolve()
-    try:
-        with open(filename, 'rt', encoding='utf-8') as f:
-            bundle = stix2_parser(
-                f.read(), allow_custom=True, interoperability=True
-            )
-    except (ParseError, InvalidValueError) as error:
-        return {'errors': [f'{filename} -  {error.__str__()}']}
-    from_misp = _from_misp(bundle.objects)
-    parser = InternalSTIX2toMISPParser if from_misp else ExternalSTIX2toMISPParser
-    stix_parser = parser(distribution, sharing_group_id, galaxies_as_tags)
-    stix_parser.load_stix_bundle(bundle)
-    stix_parser.parse_stix_bundle(single_event)
+    if serializer is None:
+        serializer = JSONSerializer()
     if output_dir is None:
         output_dir = filename.parent
-    if stix_parser.single_event:
-        name = _check_filename(
-            filename.parent, f'{filename.name}.out', output_dir, output_name
+    output_names = partial(_misp_output_name, filename, output_dir, output_name)
+    if seen_store is not None or payloads_dir is not None:
+        # The results depend on the objects imported before, or on the
+        # content of the payload files, not only on the content of the file
+        cache = None
+    if seen_store is not None:
+        # The store is kept by the parser once enabled, so the incremental
+        # imports never reuse a parser
+        parsers = None
+    if cache is not None:
+        try:
+            key = _cache_key(
+                cache, (filename,), serializer, feature='import',
+                distribution=distribution, galaxies_as_tags=galaxies_as_tags,
+                sharing_group_id=sharing_group_id, single_event=single_event
+            )
+        except OSError as error:
+            return {'errors': [f'{filename} -  {error.__str__()}']}
+        traceback = _fetch_cached_results(cache, key, debug, output_names)
+        if traceback is not None:
+            return traceback
+    stats = ConversionStats() if profile else _disabled_stats
+    if streaming:
+        try:
+            from_misp = _from_misp(_stream_stix_objects(filename))
+            parser = InternalSTIX2toMISPParser if from_misp else ExternalSTIX2toMISPParser
+            stix_parser = _get_parser(
+                parsers, parser, distribution, sharing_group_id,
+                galaxies_as_tags, payloads_dir
+            )
+            if profile:
+                stix_parser.enable_profiling(stats)
+            if seen_store is not None:
+                stix_parser.enable_incremental_import(seen_store)
+            stix_parser.load_stix_file(filename)
+        except (json.JSONDecodeError, ParseError, InvalidValueError) as error:
+            return {'errors': [f'{filename} -  {error.__str__()}']}
+    else:
+        try:
+            with stats.timer('file_loading'), open(filename, 'rt', encoding='utf-8') as f:
+                bundle = stix2_parser(
+                    f.read(), allow_custom=True, interoperability=True
+                )
+        except (ParseError, InvalidValueError) as error:
+            return {'errors': [f'{filename} -  {error.__str__()}']}
+        from_misp = _from_misp(bundle.objects)
+        parser = InternalSTIX2toMISPParser if from_misp else ExternalSTIX2toMISPParser
+        stix_parser = _get_parser(
+            parsers, parser, distribution, sharing_group_id, galaxies_as_tags,
+            payloads_dir
         )
-        with open(name, 'wt', encoding='utf-8') as f:
-            f.write(stix_parser.misp_event.to_json(indent=4))
-        return _generate_traceback(debug, stix_parser, name)
-    output_names = []
-    for misp_event in stix_parser.misp_events:
-        output = output_dir / f'{filename.name}.{misp_event.uuid}.misp.out'
-        with open(output, 'wt', encoding='utf-8') as f:
-            f.write(misp_event.to_json(indent=4))
-        output_names.append(output)
-    return _generate_traceback(debug, stix_parser, *output_names)
+        if profile:
+            stix_parser.enable_profiling(stats)
+        if seen_store is not None:
+            stix_parser.enable_incremental_import(seen_store)
+        stix_parser.load_stix_bundle(bundle)
+        del bundle
+    stix_parser.parse_stix_bundle(single_event)
+    if stix_parser.single_event:
+        results = {'event': output_names('event')}
+        with stix_parser.stats.timer('serialisation'), open(results['event'], 'wt', encoding='utf-8') as f:
+            serializer.dump_misp(stix_parser.misp_event, f)
+    else:
+        results = {}
+        for misp_event in stix_parser.misp_events:
+            output = output_names(misp_event.uuid)
+            with stix_parser.stats.timer('serialisation'), open(output, 'wt', encoding='utf-8') as f:
+                serializer.dump_misp(misp_event, f)
+            results[misp_event.uuid] = output
+    if seen_store is not None:
+        # The objects are only recorded once their MISP events are saved
+        stix_parser.commit_seen()
+    traceback = _generate_traceback(debug, stix_parser, *results.values())
+    if cache is not None:
+        _store_results(cache, key, stix_parser, traceback, results)
+    return traceback
 
 
 ################################################################################
@@ -704,7 +897,18 @@ def _from_misp(stix_objects):
     return False
 
 
+def _stream_stix_objects(filename: Path):
+    with open(filename, 'rt', encoding='utf-8') as f:
+        reader = JSONStreamReader(f)
+        for key in reader.iter_keys():
+            if key == 'objects':
+                yield from reader.iter_items()
+                return
+
+
 def _load_stix_event(filename, tries=0):
+    from mixbox.namespaces import NamespaceNotFoundError
+    from stix.core import STIXPackage
     try:
         return STIXPackage.from_xml(filename)
     except NamespaceNotFoundError:
@@ -726,6 +930,7 @@ def _load_stix_event(filename, tries=0):
 
 
 def _update_namespaces():
+    from mixbox.namespaces import Namespace, register_namespace
     # LIST OF ADDITIONAL NAMESPACES
     # can add additional ones whenever it is needed
     ADDITIONAL_NAMESPACES = [
@@ -748,21 +953,45 @@ def _update_namespaces():
 #                        STIX CONTENT WRITING FUNCTIONS                        #
 ################################################################################
 
-def _format_xml_objects(
-        objects: str, header_length=0, footer_length=0, to_replace='\n',
-        replacement='\n    ') -> str:
-    if footer_length == 0:
-        return f'    {objects[header_length:].replace(to_replace, replacement)}\n'
-    return f'    {objects[header_length:-footer_length].replace(to_replace, replacement)}\n'
+def _export_stix_package(
+        write: Callable, package: 'STIXPackage', namespaces: dict):
+    """
+    Same output as `package.to_xml(auto_namespace=False, ...)`, but written
+    element by element instead of being built as a whole string in memory.
+    """
+    from .misp2stix.stix1_mapping import SCHEMALOC_DICT
+    from mixbox.binding_utils import save_encoding
+    from mixbox.entities import NamespaceCollector
+    from mixbox.namespaces import get_full_ns_map
+    ns_info = NamespaceCollector()
+    stix_package = package.to_obj()
+    ns_info.finalize(ns_dict=namespaces, schemaloc_dict=SCHEMALOC_DICT)
+    ns_dict = dict(ns_info.binding_namespaces)
+    ns_dict.update(get_full_ns_map())
+    delimiter = '\n\t'
+    namespace_def = f'{delimiter}{ns_info.get_xmlns_string(delimiter)}'
+    with save_encoding('utf-8'):
+        stix_package.export(write, 0, ns_dict, namespacedef_=namespace_def)
+
+
+def _get_attributes_collection_stream(
+        handler: AttributeCollectionHandler, tmp_path: Path,
+        feature: str) -> TextIO:
+    stream = getattr(handler, feature)
+    if stream is None:
+        stream = SpooledTemporaryFile(
+            max_size=_STIX1_spool_size, mode='w+t', encoding='utf-8',
+            dir=tmp_path
+        )
+        setattr(handler, feature, stream)
+        stream.write(getattr(handler, f'{feature}_header'))
+    elif handler.return_format == 'json':
+        stream.write(', ')
+    return stream
 
 
-def _get_campaigns(campaigns: Campaigns, return_format: str = 'xml') -> str:
-    if return_format == 'xml':
-        campaigns = campaigns.to_xml(include_namespaces=True).decode()
-        return _format_xml_objects(
-            campaigns, header_length=21, footer_length=23
-        )
-    return ', '.join(campaign.to_json() for campaign in campaigns.campaign)
+def _get_campaigns(campaigns: 'Campaigns', return_format: str = 'xml') -> str:
+    return _get_stix1_objects(campaigns, 'campaigns', return_format)
 
 
 def _get_campaigns_footer(return_format: str = 'xml') -> str:
@@ -778,16 +1007,10 @@ def _get_campaigns_header(return_format: str = 'xml') -> str:
 
 
 def _get_courses_of_action(
-        courses_of_action: CoursesOfAction, return_format: str = 'xml') -> str:
-    if return_format == 'xml':
-        courses_of_action = courses_of_action.to_xml(
-            include_namespaces=False).decode()
-        return _format_xml_objects(
-            courses_of_action, header_length=27, footer_length=29
-        )
-    return ', '.join(
-        course_of_action.to_json() for course_of_action
-        in courses_of_action.course_of_action
+        courses_of_action: 'CoursesOfAction',
+        return_format: str = 'xml') -> str:
+    return _get_stix1_objects(
+        courses_of_action, 'courses_of_action', return_format
     )
 
 
@@ -803,30 +1026,15 @@ def _get_courses_of_action_header(return_format: str = 'xml') -> str:
     return '"courses_of_action": ['
 
 
-def _get_events(package: STIXPackage, return_format: str = 'xml') -> str:
-    if return_format == 'xml':
-        if package.related_packages is not None:
-            length = 135 + len(package.id_) + len(package.version)
-            return package.to_xml(include_namespaces=False).decode()[length:-82]
-        content = '\n            '.join(
-            package.to_xml(include_namespaces=False).decode().split('\n')
-        )
-        return f'            {content}\n'
-    if package.related_packages is not None:
-        return ', '.join(
-            related_package.to_json() for related_package
-            in package.related_packages
-        )
-    return json.dumps({'package': package.to_dict()})
+def _get_events(package: 'STIXPackage', return_format: str = 'xml') -> str:
+    content = StringIO()
+    _write_events(content.write, package, return_format)
+    return content.getvalue()
 
 
-def _get_indicators(indicators: Indicators, return_format: str = 'xml') -> str:
-    if return_format == 'xml':
-        indicators = indicators.to_xml(include_namespaces=False).decode()
-        return _format_xml_objects(
-            indicators, header_length=22, footer_length=24
-        )
-    return f"{', '.join(indctr.to_json() for indctr in indicators.indicator)}"
+def _get_indicators(
+        indicators: 'Indicators', return_format: str = 'xml') -> str:
+    return _get_stix1_objects(indicators, 'indicators', return_format)
 
 
 def _get_indicators_footer(return_format: str = 'xml') -> str:
@@ -842,17 +1050,8 @@ def _get_indicators_header(return_format: str = 'xml') -> str:
 
 
 def _get_observables(
-        observables: Observables, return_format: str = 'xml') -> str:
-    if return_format == 'xml':
-        header_length = 20
-        for field in _cybox_features:
-            if getattr(observables, field, None) is not None:
-                header_length += len(field) + len(getattr(observables, field)) + 4
-        observables = observables.to_xml(include_namespaces=False).decode()
-        return _format_xml_objects(
-            observables, header_length=header_length, footer_length=22
-        )
-    return f"{', '.join(obs.to_json() for obs in observables.observables)}"
+        observables: 'Observables', return_format: str = 'xml') -> str:
+    return _get_stix1_objects(observables, 'observables', return_format)
 
 
 def _get_observables_footer(return_format: str = 'xml') -> str:
@@ -862,6 +1061,7 @@ def _get_observables_footer(return_format: str = 'xml') -> str:
 
 
 def _get_observables_header(return_format: str = 'xml') -> str:
+    from cybox.core.observable import Observables
     if return_format == 'xml':
         observables = Observables()
         versions = ' '.join(
@@ -872,16 +1072,17 @@ def _get_observables_header(return_format: str = 'xml') -> str:
     return '"observables": ['
 
 
+def _get_stix1_objects(
+        values: '_STIX1_containers_type', feature: str,
+        return_format: str = 'xml') -> str:
+    content = StringIO()
+    _write_stix1_objects(content.write, values, feature, return_format)
+    return content.getvalue()
+
+
 def _get_threat_actors(
-        threat_actors: ThreatActors, return_format: str = 'xml') -> str:
-    if return_format == 'xml':
-        threat_actors = threat_actors.to_xml(include_namespaces=False).decode()
-        return _format_xml_objects(
-            threat_actors, header_length=24, footer_length=26
-        )
-    return ', '.join(
-        threat_actor.to_json() for threat_actor in threat_actors.threat_actor
-    )
+        threat_actors: 'ThreatActors', return_format: str = 'xml') -> str:
+    return _get_stix1_objects(threat_actors, 'threat_actors', return_format)
 
 
 def _get_threat_actors_footer(return_format: str = 'xml') -> str:
@@ -896,11 +1097,8 @@ def _get_threat_actors_header(return_format: str = 'xml') -> str:
     return '"threat_actors": ['
 
 
-def _get_ttps(ttps: TTPs, return_format: str = 'xml') -> str:
-    if return_format == 'xml':
-        ttps = ttps.to_xml(include_namespaces=False).decode()
-        return _format_xml_objects(ttps, header_length=16, footer_length=18)
-    return ', '.join(ttp.to_json() for ttp in ttps.ttp)
+def _get_ttps(ttps: 'TTPs', return_format: str = 'xml') -> str:
+    return _get_stix1_objects(ttps, 'ttps', return_format)
 
 
 def _get_ttps_footer(return_format: str = 'xml') -> str:
@@ -915,9 +1113,83 @@ def _get_ttps_header(return_format: str = 'xml') -> str:
     return '"ttps": {"ttps": ['
 
 
+def _write_attributes_collection(
+        handler: AttributeCollectionHandler, name: Path, namespace: str,
+        org: str, return_format: str, stix_package: 'STIXPackage'):
+    from .misp2stix.framing import _stix1_attributes_framing
+    header, _, footer = _stix1_attributes_framing(
+        namespace, org, return_format, stix_package
+    )
+    features = [
+        feature for feature, content in handler.features.items()
+        if content.get('stream') is not None
+    ]
+    with open(name, 'wt', encoding='utf-8') as result:
+        result.write(header)
+        for feature in features:
+            stream = getattr(handler, feature)
+            stream.seek(0)
+            copyfileobj(stream, result)
+            current_footer = getattr(handler, f'{feature}_footer')
+            if return_format == 'json' and feature == features[-1]:
+                current_footer = current_footer[:-2]
+            result.write(current_footer)
+        result.write(footer)
+
+
+def _write_attributes_collection_content(
+        handler: AttributeCollectionHandler, tmp_path: Path, feature: str,
+        content: str):
+    stream = _get_attributes_collection_stream(handler, tmp_path, feature)
+    stream.write(content)
+
+
+def _write_attributes_collection_objects(
+        handler: AttributeCollectionHandler, tmp_path: Path, feature: str,
+        values: '_STIX1_containers_type', return_format: str):
+    stream = _get_attributes_collection_stream(handler, tmp_path, feature)
+    _write_stix1_objects(stream.write, values, feature, return_format)
+
+
+def _write_event(
+        write: Callable, content: Union['RelatedPackage', 'STIXPackage'],
+        return_format: str = 'xml'):
+    from mixbox.binding_utils import save_encoding
+    from mixbox.namespaces import get_full_ns_map
+    from stix.common.related import RelatedPackage
+    if return_format == 'xml':
+        namespaces = get_full_ns_map()
+        with save_encoding('utf-8'):
+            if isinstance(content, RelatedPackage):
+                content.to_obj().exportChildren(write, 3, namespaces)
+                return
+            content.to_obj().export(write, 3, namespaces, name_='STIX_Package')
+        return
+    if isinstance(content, RelatedPackage):
+        write(content.to_json())
+        return
+    write(json.dumps({'package': content.to_dict()}))
+
+
+def _write_events(
+        write: Callable, package: 'STIXPackage', return_format: str = 'xml'):
+    from .misp2stix.framing import stix_xml_separator
+    if package.related_packages is None:
+        _write_event(write, package, return_format)
+        return
+    separator = ''
+    for related_package in package.related_packages:
+        write(separator)
+        _write_event(write, related_package, return_format)
+        separator = stix_xml_separator() if return_format == 'xml' else ', '
+
+
 def _write_header(
-        package: STIXPackage, filename: str, namespace: str, org: str,
+        package: 'STIXPackage', filename: str, namespace: str, org: str,
         return_format: str) -> str:
+    from .misp2stix.stix1_mapping import NS_DICT, SCHEMALOC_DICT
+    from mixbox import idgen
+    from mixbox.namespaces import Namespace
     namespaces = namespaces = {namespace: org}
     namespaces.update(NS_DICT)
     try:
@@ -942,38 +1214,75 @@ def _write_header(
 
 
 def _write_raw_stix(
-        package: STIXPackage, filename: _files_type, namespace: str,
+        package: 'STIXPackage', filename: _files_type, namespace: str,
         org: str, return_format: str) -> bool:
+    from .misp2stix.framing import _handle_namespaces
     if return_format == 'xml':
         namespaces = _handle_namespaces(namespace, org)
-        with open(filename, 'wb') as f:
-            f.write(
-                package.to_xml(
-                    auto_namespace=False,
-                    ns_dict=namespaces,
-                    schemaloc_dict=SCHEMALOC_DICT
-                )
-            )
+        with open(filename, 'wt', encoding='utf-8') as f:
+            _export_stix_package(f.write, package, namespaces)
     else:
         with open(filename, 'wt', encoding='utf-8') as f:
             f.write(json.dumps(package.to_dict(), indent=4))
 
 
+def _write_stix1_objects(
+        write: Callable, values: '_STIX1_containers_type', feature: str,
+        return_format: str = 'xml'):
+    from mixbox.binding_utils import save_encoding
+    from mixbox.namespaces import get_full_ns_map
+    if return_format == 'xml':
+        namespaces = get_full_ns_map()
+        with save_encoding('utf-8'):
+            if feature == 'observables':
+                # cybox bindings take the namespace prefix instead of a map
+                for observable in values:
+                    observable.to_obj().export(
+                        write, 2, 'cybox:', name_='Observable'
+                    )
+                return
+            binding_namespace = values._binding.XML_NS
+            name = _STIX1_xml_elements[feature]
+            for stix_object in values:
+                stix_object.to_obj().export(
+                    write, 2, namespaces, binding_namespace, name_=name
+                )
+        return
+    separator = ''
+    for stix_object in values:
+        write(f'{separator}{stix_object.to_json()}')
+        separator = ', '
+
+
 ################################################################################
 #                            COMMAND LINE FUNCTIONS                            #
 ################################################################################
 
-def _misp_to_stix(stix_args):
+def _conversion_cache(stix_args) -> Union[ConversionCache, None]:
+    if stix_args.cache_dir is None:
+        return None
+    return ConversionCache(stix_args.cache_dir, stix_args.cache_size * 1024 ** 2)
+
+
+def _seen_object_store(stix_args) -> Union[SeenObjectStore, None]:
+    if stix_args.seen_store is None:
+        return None
+    return SeenObjectStore(stix_args.seen_store)
+
+
+def _misp_to_stix(stix_args, parsers: Optional['ParserPool'] = None):
     collection_args = {
         'in_memory': stix_args.in_memory,
-        'single_output': stix_args.single_output
+        'single_output': stix_args.single_output,
+        'workers': stix_args.jobs
     }
     if stix_args.version in ('1.1.1', '1.2'):
         stix1_args = {
             'debug': stix_args.debug, 'return_format': stix_args.format,
             'version': stix_args.version, 'namespace': stix_args.namespace,
             'org': stix_args.org, 'output_dir': stix_args.output_dir,
-            'output_name': stix_args.output_name
+            'output_name': stix_args.output_name,
+            'profile': stix_args.profile
         }
         if stix_args.level == 'attribute':
             return misp_attribute_collection_to_stix1(
@@ -986,49 +1295,529 @@ def _misp_to_stix(stix_args):
         )
     stix2_args = {
         'debug': stix_args.debug, 'output_dir': stix_args.output_dir,
-        'output_name': stix_args.output_name, 'version': stix_args.version
+        'output_name': stix_args.output_name, 'version': stix_args.version,
+        'serializer': JSONSerializer(stix_args.indent, stix_args.json_backend),
+        'payloads_dir': stix_args.payloads_dir, 'trusted': stix_args.trusted,
+        'profile': stix_args.profile, 'cache': _conversion_cache(stix_args),
+        'parsers': parsers
     }
+    if stix_args.manifest is not None:
+        stix2_args.update(
+            {'manifest': stix_args.manifest, 'since': stix_args.since}
+        )
     if len(stix_args.file) == 1:
-        return misp_to_stix2(stix_args.file[0])
+        return misp_to_stix2(stix_args.file[0], **stix2_args)
+    if stix_args.manifest is not None:
+        # Every conversion updates the manifest the next one starts from, so
+        # the files are converted one after the other, each in its own file
+        stix2_args.update({'debug': True, 'output_name': None})
+        results = [
+            misp_to_stix2(filename, **stix2_args)
+            for filename in stix_args.file
+        ]
+        traceback = _merge_pool_results(stix_args.debug, results)
+        if 'results' in traceback:
+            # The manifest is part of the results of every conversion
+            traceback['results'] = list(dict.fromkeys(traceback['results']))
+        return traceback
     return misp_collection_to_stix2(
         *stix_args.file, **collection_args, **stix2_args
     )
 
 
-def _stix_to_misp(stix_args):
+def _stix_to_misp(stix_args, parsers: Optional['ParserPool'] = None):
     method = stix_2_to_misp if stix_args.version == '2' else stix_1_to_misp
+    arguments = {
+        'debug': stix_args.debug, 'distribution': stix_args.distribution,
+        'galaxies_as_tags': stix_args.galaxies_as_tags,
+        'output_dir': stix_args.output_dir,
+        'output_name': stix_args.output_name,
+        'sharing_group_id': stix_args.sharing_group,
+        'single_event': stix_args.single_output
+    }
+    if stix_args.version == '2':
+        arguments['serializer'] = JSONSerializer(
+            stix_args.indent, stix_args.json_backend
+        )
+        arguments['streaming'] = stix_args.streaming
+        arguments['payloads_dir'] = stix_args.payloads_dir
+        arguments['profile'] = stix_args.profile
+        arguments['cache'] = _conversion_cache(stix_args)
+        arguments['seen_store'] = _seen_object_store(stix_args)
+    if stix_args.jobs > 1:
+        tracebacks = _run_in_pool(
+            method, stix_args.file, stix_args.jobs, **arguments
+        )
+    else:
+        if parsers is not None:
+            arguments['parsers'] = parsers
+        tracebacks = (method(filename, **arguments) for filename in stix_args.file)
     results = defaultdict(dict)
     success = []
-    for filename in stix_args.file:
-        traceback = method(
-            filename, debug=stix_args.debug,
-            distribution=stix_args.distribution,
-            galaxies_as_tags=stix_args.galaxies_as_tags,
-            output_dir=stix_args.output_dir,
-            output_name=stix_args.output_name,
-            sharing_group_id=stix_args.sharing_group,
-            single_event=stix_args.single_output
-        )
-        if traceback.pop('success', 0) == 1:
-            success.extend(traceback.pop('results'))
-            for key, value in traceback.items():
-                if isinstance(value, dict):
-                    results[key].update(value)
-            continue
-        for field in ('errors', 'warnings'):
-            if field not in traceback:
-                continue
-            content = traceback[field]
-            if isinstance(content, list):
-                results['fails'][filename.name] = content
+    stats = _disabled_stats
+    cache = defaultdict(int)
+    try:
+        for filename, traceback in zip(stix_args.file, tracebacks):
+            if 'stats' in traceback:
+                if stats is _disabled_stats:
+                    stats = ConversionStats()
+                stats.update(traceback.pop('stats'))
+            for counter, value in traceback.pop('cache', {}).items():
+                cache[counter] += value
+            if traceback.pop('success', 0) == 1:
+                success.extend(traceback.pop('results'))
+                for key, value in traceback.items():
+                    if isinstance(value, dict):
+                        results[key].update(value)
                 continue
-            for identifier, values in traceback[field].items():
-                results['fails'][identifier] = tuple(values)
+            for field in ('errors', 'warnings'):
+                if field not in traceback:
+                    continue
+                content = traceback[field]
+                if isinstance(content, list):
+                    results['fails'][filename.name] = content
+                    continue
+                for identifier, values in traceback[field].items():
+                    results['fails'][identifier] = tuple(values)
+    finally:
+        # The tracebacks are generated lazily, the store is only closed once
+        # every file is imported
+        if arguments.get('seen_store') is not None:
+            arguments['seen_store'].close()
     if success:
         results['results'] = success
+    if stats is not _disabled_stats:
+        results['stats'] = stats.to_dict()
+    if cache:
+        results['cache'] = dict(cache)
     return results
 
 
+################################################################################
+#                          CONVERSION CACHE FUNCTIONS                          #
+################################################################################
+
+def _cache_key(cache: ConversionCache, filenames: tuple,
+               serializer: JSONSerializer, **options) -> str:
+    # The serialisation options change the result files as well
+    return cache.key(
+        *filenames, indent=serializer.indent, json_backend=serializer.backend,
+        **options
+    )
+
+
+def _delta_export_files(filename: Path,
+                        manifest: Union[Path, None]) -> tuple:
+    # The results of a delta export depend on the manifest it starts from
+    if manifest is None or not manifest.exists():
+        return (filename,)
+    return (filename, manifest)
+
+
+def _fetch_cached_results(
+        cache: ConversionCache, key: str, debug: bool,
+        output_name: Callable[[str], Path]) -> Union[dict, None]:
+    # The cached results are copied where the conversion writes its results,
+    # `output_name` giving their path from their label
+    entry = cache.fetch(key)
+    if entry is None:
+        return None
+    output_names = []
+    try:
+        for label, cached in entry['results'].items():
+            name = output_name(label)
+            copyfile(cached, name)
+            output_names.append(name)
+    except OSError:
+        # Evicted in the meantime
+        return None
+    traceback = {'success': 1}
+    if debug:
+        for feature in ('errors', 'warnings'):
+            if entry.get(feature):
+                traceback[feature] = entry[feature]
+    traceback['results'] = output_names
+    traceback['cache'] = {'hits': 1, 'misses': 0}
+    return traceback
+
+
+def _misp_collection_to_stix2_with_cache(
+        input_files: tuple, debug: bool, in_memory: bool,
+        output_name: Union[_files_type, None], workers: Union[int, None],
+        cache: ConversionCache, **stix2_args) -> dict:
+    # The single output of the collection is cached as one result, with the
+    # file name it was first written in
+    try:
+        key = _cache_key(
+            cache, _resolve_input_files(input_files), stix2_args['serializer'],
+            feature='export', version=stix2_args['version']
+        )
+    except OSError:
+        # The conversion of the missing files fails anyway
+        key = None
+    if key is not None:
+        traceback = _fetch_cached_results(
+            cache, key, debug,
+            lambda label: _check_filename(
+                Path(__file__).resolve().parents[1] / 'tmp', label,
+                stix2_args['output_dir'], output_name
+            )
+        )
+        if traceback is not None:
+            return traceback
+    traceback = misp_collection_to_stix2(
+        *input_files, debug=True, in_memory=in_memory, single_output=True,
+        output_name=output_name, workers=workers, **stix2_args
+    )
+    if key is not None and 'results' in traceback and 'fails' not in traceback:
+        name = traceback['results'][0]
+        cache.store(
+            key, {name.name: name}, traceback.get('errors'),
+            traceback.get('warnings')
+        )
+        traceback['cache'] = {'hits': 0, 'misses': 1}
+    if not debug:
+        for feature in ('errors', 'warnings'):
+            traceback.pop(feature, None)
+    return traceback
+
+
+def _store_results(cache: ConversionCache, key: str, parser,
+                   traceback: dict, results: dict):
+    cache.store(key, results, dict(parser.errors), dict(parser.warnings))
+    traceback['cache'] = {'hits': 0, 'misses': 1}
+
+
+################################################################################
+#                            PROCESS POOL FUNCTIONS                            #
+################################################################################
+
+class _PoolTraceback():
+    def __init__(self):
+        self.errors = defaultdict(list)
+        self.warnings = defaultdict(list)
+        self.stats = _disabled_stats
+        self.cache = defaultdict(int)
+
+    def update(self, result: dict):
+        for feature in ('errors', 'warnings'):
+            messages = getattr(self, feature)
+            for identifier, values in result.get(feature, {}).items():
+                for value in values:
+                    if value not in messages[identifier]:
+                        messages[identifier].append(value)
+        for counter, value in result.get('cache', {}).items():
+            self.cache[counter] += value
+        if result.get('stats'):
+            # The stats of the workers are summed up, the timers then give
+            # the time spent by all the workers together
+            if self.stats is _disabled_stats:
+                self.stats = ConversionStats()
+            self.stats.update(result['stats'])
+
+
+def _convert_misp_to_stix1(
+        filename: Path, parser_class: type, return_format: str,
+        namespace: str, org: str, version: str,
+        output_dir: Union[_files_type, None], profile: bool) -> dict:
+    parser = parser_class(org, version)
+    if profile:
+        parser.enable_profiling()
+    try:
+        parser.parse_json_content(filename)
+        name = _check_output(
+            filename.parent, f'{filename.name}.out', output_dir
+        )
+        with parser.stats.timer('serialisation'):
+            _write_raw_stix(
+                parser.stix_package, name, namespace, org, return_format
+            )
+    except Exception as exception:
+        return {'fails': [f'{filename} - {exception.__str__()}']}
+    return _pool_result(parser, results=[name])
+
+
+def _convert_misp_to_stix2(
+        filename: Path, version: str, output_dir: Union[_files_type, None],
+        serializer: JSONSerializer, payloads_dir: Union[_files_type, None],
+        trusted: bool, profile: bool) -> dict:
+    from .misp2stix.misp_to_stix20 import MISPtoSTIX20Parser
+    from .misp2stix.misp_to_stix21 import MISPtoSTIX21Parser
+    parser_class = MISPtoSTIX21Parser if version == '2.1' else MISPtoSTIX20Parser
+    parser = parser_class(payloads_dir=payloads_dir, trusted=trusted)
+    if profile:
+        parser.enable_profiling()
+    try:
+        parser.parse_json_content(filename)
+        name = _check_output(
+            filename.parent, f'{filename.name}.out', output_dir
+        )
+        with parser.stats.timer('serialisation'), open(name, 'wt', encoding='utf-8') as f:
+            serializer.dump_stix(parser.bundle, f)
+    except Exception as exception:
+        return {'fails': [f'{filename} - {exception.__str__()}']}
+    return _pool_result(parser, results=[name])
+
+
+def _fetch_stix1_attributes_contents(
+        filename: Path, return_format: str, org: str, version: str,
+        profile: bool) -> dict:
+    from .misp2stix.misp_to_stix1 import MISPtoSTIX1AttributesParser
+    parser = MISPtoSTIX1AttributesParser(org, version)
+    if profile:
+        parser.enable_profiling()
+    contents = {}
+    try:
+        parser.parse_json_content(filename)
+        package = parser.stix_package
+        with parser.stats.timer('serialisation'):
+            for feature in _STIX1_features:
+                values = getattr(package, feature)
+                if values is not None and len(values) > 0:
+                    contents[feature] = _get_stix1_objects(
+                        values, feature, return_format
+                    )
+    except Exception as exception:
+        return {'fails': [f'{filename} - {exception.__str__()}']}
+    return _pool_result(parser, contents=contents)
+
+
+def _fetch_stix1_events_content(
+        filename: Path, return_format: str, org: str, version: str,
+        profile: bool) -> dict:
+    from .misp2stix.misp_to_stix1 import MISPtoSTIX1EventsParser
+    parser = MISPtoSTIX1EventsParser(org, version)
+    if profile:
+        parser.enable_profiling()
+    try:
+        parser.parse_json_content(filename)
+        with parser.stats.timer('serialisation'):
+            content = _get_events(parser.stix_package, return_format)
+    except Exception as exception:
+        return {'fails': [f'{filename} - {exception.__str__()}']}
+    return _pool_result(parser, content=content)
+
+
+def _fetch_stix2_objects(
+        filename: Path, version: str, serializer: JSONSerializer,
+        payloads_dir: Union[_files_type, None], trusted: bool,
+        profile: bool) -> dict:
+    from .misp2stix.misp_to_stix20 import MISPtoSTIX20Parser
+    from .misp2stix.misp_to_stix21 import MISPtoSTIX21Parser
+    parser_class = MISPtoSTIX21Parser if version == '2.1' else MISPtoSTIX20Parser
+    parser = parser_class(payloads_dir=payloads_dir, trusted=trusted)
+    if profile:
+        parser.enable_profiling()
+    try:
+        parser.parse_json_content(filename)
+        with parser.stats.timer('serialisation'):
+            stix_objects = [
+                (stix_object['id'], serializer.dumps_stix_objects([stix_object]))
+                for stix_object in parser.fetch_stix_objects
+            ]
+    except Exception as exception:
+        return {'fails': [f'{filename} - {exception.__str__()}']}
+    return _pool_result(
+        parser, objects=stix_objects,
+        unique_ids=set(parser.unique_ids.values())
+    )
+
+
+def _merge_pool_results(debug: bool, results: list) -> dict:
+    traceback = defaultdict(list)
+    pool_traceback = _PoolTraceback()
+    output_names = []
+    for result in results:
+        if 'fails' in result:
+            traceback['fails'].extend(result['fails'])
+            continue
+        pool_traceback.update(result)
+        output_names.extend(result['results'])
+    if output_names:
+        traceback.update(
+            _generate_traceback(debug, pool_traceback, *output_names)
+        )
+    if pool_traceback.cache:
+        traceback['cache'] = dict(pool_traceback.cache)
+    return traceback
+
+
+def _misp_attribute_collection_to_stix1_in_pool(
+        input_files: tuple, debug: bool, return_format: str, namespace: str,
+        org: str, version: str, single_output: bool,
+        output_dir: Union[_files_type, None],
+        output_name: Union[_files_type, None], workers: int,
+        profile: bool) -> dict:
+    from .misp2stix.framing import _create_stix_package
+    from .misp2stix.misp_to_stix1 import MISPtoSTIX1AttributesParser
+    input_files = _resolve_input_files(input_files)
+    if not single_output:
+        results = _run_in_pool(
+            _convert_misp_to_stix1, input_files, workers,
+            parser_class=MISPtoSTIX1AttributesParser,
+            return_format=return_format, namespace=namespace, org=org,
+            version=version, output_dir=output_dir, profile=profile
+        )
+        return _merge_pool_results(debug, results)
+    traceback = defaultdict(list)
+    pool_traceback = _PoolTraceback()
+    stix_package = _create_stix_package(org, version)
+    name = _check_filename(
+        Path(__file__).resolve().parent / 'tmp',
+        f'{stix_package.id_}.stix1.{return_format}', output_dir, output_name
+    )
+    handler = AttributeCollectionHandler(return_format)
+    results = _run_in_pool(
+        _fetch_stix1_attributes_contents, input_files, workers,
+        return_format=return_format, org=org, version=version,
+        profile=profile
+    )
+    try:
+        for result in results:
+            if 'fails' in result:
+                traceback['fails'].extend(result['fails'])
+                continue
+            pool_traceback.update(result)
+            for feature, content in result['contents'].items():
+                _write_attributes_collection_content(
+                    handler, name.parent, feature, content
+                )
+        if len(traceback.get('fails', [])) < len(input_files):
+            _write_attributes_collection(
+                handler, name, namespace, org, return_format, stix_package
+            )
+            traceback.update(_generate_traceback(debug, pool_traceback, name))
+    finally:
+        handler.close()
+    return traceback
+
+
+def _misp_collection_to_stix2_in_pool(
+        input_files: tuple, debug: bool, version: str, single_output: bool,
+        output_dir: Union[_files_type, None],
+        output_name: Union[_files_type, None], workers: int,
+        serializer: JSONSerializer, payloads_dir: Union[_files_type, None],
+        trusted: bool, profile: bool) -> dict:
+    from stix2.v20 import Bundle as Bundle_v20
+    from stix2.v21 import Bundle as Bundle_v21
+    input_files = _resolve_input_files(input_files)
+    if not single_output:
+        results = _run_in_pool(
+            _convert_misp_to_stix2, input_files, workers,
+            version=version, output_dir=output_dir, serializer=serializer,
+            payloads_dir=payloads_dir, trusted=trusted, profile=profile
+        )
+        return _merge_pool_results(debug, results)
+    traceback = defaultdict(list)
+    pool_traceback = _PoolTraceback()
+    bundle = Bundle_v21() if version == '2.1' else Bundle_v20()
+    name = _check_filename(
+        Path(__file__).resolve().parents[1] / 'tmp',
+        f"{bundle.id.split('--')[1]}.stix{version.replace('.', '')}.json",
+        output_dir, output_name
+    )
+    results = _run_in_pool(
+        _fetch_stix2_objects, input_files, workers, version=version,
+        serializer=serializer, payloads_dir=payloads_dir, trusted=trusted,
+        profile=profile
+    )
+    # Identities, markings and galaxies are defined once per file by each
+    # parser: only the first occurrence of those objects is kept, which
+    # gives the same result as a single parser going through all the files
+    unique_ids = set()
+    separator = ''
+    with open(name, 'wt', encoding='utf-8') as f:
+        f.write(serializer.stix_bundle_header(bundle))
+        for result in results:
+            if 'fails' in result:
+                traceback['fails'].extend(result['fails'])
+                continue
+            pool_traceback.update(result)
+            for object_id, content in result['objects']:
+                if object_id in unique_ids:
+                    continue
+                if object_id in result['unique_ids']:
+                    unique_ids.add(object_id)
+                f.write(f'{separator}{content}')
+                separator = serializer.stix_objects_separator
+        f.write(serializer.stix_bundle_footer())
+    if not separator:
+        name.unlink()
+        return traceback
+    traceback.update(_generate_traceback(debug, pool_traceback, name))
+    return traceback
+
+
+def _misp_event_collection_to_stix1_in_pool(
+        input_files: tuple, debug: bool, return_format: str, namespace: str,
+        org: str, version: str, single_output: bool,
+        output_dir: Union[_files_type, None],
+        output_name: Union[_files_type, None], workers: int,
+        profile: bool) -> dict:
+    from .misp2stix.framing import _create_stix_package, _stix1_framing
+    from .misp2stix.misp_to_stix1 import MISPtoSTIX1EventsParser
+    input_files = _resolve_input_files(input_files)
+    if not single_output:
+        results = _run_in_pool(
+            _convert_misp_to_stix1, input_files, workers,
+            parser_class=MISPtoSTIX1EventsParser,
+            return_format=return_format, namespace=namespace, org=org,
+            version=version, output_dir=output_dir, profile=profile
+        )
+        return _merge_pool_results(debug, results)
+    traceback = defaultdict(list)
+    pool_traceback = _PoolTraceback()
+    stix_package = _create_stix_package(org, version, header=False)
+    name = _check_filename(
+        Path(__file__).resolve().parent / 'tmp',
+        f'{stix_package.id_}.stix1.{return_format}', output_dir, output_name
+    )
+    header, separator, footer = _stix1_framing(
+        namespace, org, return_format, stix_package
+    )
+    results = _run_in_pool(
+        _fetch_stix1_events_content, input_files, workers,
+        return_format=return_format, org=org, version=version,
+        profile=profile
+    )
+    with open(name, 'wt', encoding='utf-8') as f:
+        f.write(header)
+        current_separator = ''
+        for result in results:
+            if 'fails' in result:
+                traceback['fails'].extend(result['fails'])
+                continue
+            pool_traceback.update(result)
+            f.write(f"{current_separator}{result['content']}")
+            current_separator = separator
+        f.write(footer)
+    traceback.update(_generate_traceback(debug, pool_traceback, name))
+    return traceback
+
+
+def _pool_result(parser, **kwargs) -> dict:
+    return {
+        'errors': dict(parser.errors), 'warnings': dict(parser.warnings),
+        'stats': parser.stats.to_dict(), **kwargs
+    }
+
+
+def _resolve_input_files(input_files: tuple) -> list:
+    return [
+        filename if isinstance(filename, Path) else Path(filename).resolve()
+        for filename in input_files
+    ]
+
+
+def _run_in_pool(
+        function: Callable, input_files: list, workers: int,
+        **kwargs) -> list:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(partial(function, **kwargs), input_files)
+        )
+
+
 ################################################################################
 #                              UTILITY FUNCTIONS.                              #
 ################################################################################
@@ -1062,5 +1851,28 @@ def _generate_traceback(debug: bool, parser, *output_names: List[Path]) -> dict:
             brol = getattr(parser, feature)
             if brol:
                 traceback[feature] = brol
+    stats = parser.stats.to_dict()
+    if stats:
+        traceback['stats'] = stats
     traceback['results'] = list(output_names)
-    return traceback
\ No newline at end of file
+    return traceback
+
+
+def _get_parser(parsers: Union['ParserPool', None], parser_class: type,
+                *args, **kwargs):
+    # The conversion daemon reuses the warm parsers of its conversion slots
+    if parsers is None:
+        return parser_class(*args, **kwargs)
+    return parsers.get(parser_class, *args, **kwargs)
+
+
+def _misp_output_name(filename: Path, output_dir: Path,
+                      output_name: Union[_files_type, None],
+                      label: str) -> Path:
+    # The MISP events imported from a STIX file are either written as a
+    # single event, or every event in its own file named after its UUID
+    if label == 'event':
+        return _check_filename(
+            filename.parent, f'{filename.name}.out', output_dir, output_name
+        )
+    return output_dir / f'{filename.name}.{label}.misp.out'
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Manifest of the delta exports of MISP events to STIX 2.
+
+Long-lived MISP events only get a few attributes and objects changed at a
+time. For every exported event, the manifest records the timestamp of its
+attributes and objects with the IDs of the STIX objects converted from them.
+The next export of the same events then only converts the attributes and
+objects modified since, and simply adds the IDs of the unchanged ones to the
+`object_refs` of the event report.
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+_timestamp_type = Union[datetime, int, str]
+
+
+class DeltaManifest:
+    """
+    Holds the manifest of the previous export, read while parsing the MISP
+    events, and the manifest of the current export, filled at the same time.
+    Both are keyed by MISP event UUID:
+
+        {
+            event_uuid: {
+                'timestamp': event timestamp,
+                'items': {
+                    attribute_or_object_uuid: {
+                        'timestamp': last change timestamp,
+                        'refs': [STIX IDs]
+                    }
+                }
+            }
+        }
+
+    The events of the previous manifest that are not exported again are
+    kept, so the same manifest can follow any number of events.
+    """
+
+    def __init__(self, manifest: Optional[dict] = None,
+                 since: Optional[_timestamp_type] = None):
+        self.__previous = {} if manifest is None else manifest
+        self.__since = None if since is None else _timestamp(since)
+        self.__events = {}
+        self.__items = {}
+        self.__previous_items = {}
+
+    @classmethod
+    def load(cls, filename: Union[Path, str],
+             since: Optional[_timestamp_type] = None) -> 'DeltaManifest':
+        """
+        Reads the manifest of a previous export - without any manifest yet,
+        every attribute and object is converted.
+
+        :param filename: Path of the manifest file
+        :param since: Timestamp the attributes and objects modified after are
+            converted again, even if the manifest holds them
+        """
+        try:
+            with open(filename, 'rt', encoding='utf-8') as f:
+                return cls(json.load(f), since)
+        except FileNotFoundError:
+            return cls(since=since)
+
+    @property
+    def since(self) -> Union[int, None]:
+        return self.__since
+
+    def dump(self, filename: Union[Path, str]):
+        with open(filename, 'wt', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+    def to_dict(self) -> dict:
+        return {**self.__previous, **self.__events}
+
+    def discard(self, uuid: str):
+        """
+        Removes an attribute or object from the current manifest, when it is
+        converted with other objects, like the PE objects with their file.
+        """
+        self.__items.pop(uuid, None)
+
+    def start_event(self, misp_event: dict):
+        uuid = misp_event['uuid']
+        self.__previous_items = self.__previous.get(uuid, {}).get('items', {})
+        self.__items = {}
+        timestamp = misp_event.get('timestamp')
+        self.__events[uuid] = {
+            'timestamp': None if timestamp is None else _timestamp(timestamp),
+            'items': self.__items
+        }
+
+    def track(self, misp_item: dict) -> Tuple[bool, list]:
+        """
+        Records an attribute or object of the current event.
+
+        Returns whether it is unchanged since the previous export, with the
+        IDs of the STIX objects converted from it then, or with an empty list
+        to fill with the IDs of the STIX objects converted now.
+        Attributes and objects without timestamp are always converted.
+        """
+        uuid = misp_item['uuid']
+        last_change = _last_change(misp_item)
+        previous = self.__previous_items.get(uuid)
+        if previous is not None and last_change is not None:
+            unchanged = last_change <= previous['timestamp']
+            if unchanged and (self.since is None or last_change <= self.since):
+                self.__items[uuid] = previous
+                return True, previous['refs']
+        if last_change is None:
+            return False, []
+        refs = []
+        self.__items[uuid] = {'timestamp': last_change, 'refs': refs}
+        return False, refs
+
+
+def _last_change(misp_item: dict) -> Union[int, None]:
+    if misp_item.get('timestamp') is None:
+        return None
+    # The sightings do not change the timestamp of the attributes
+    attributes = (misp_item, *misp_item.get('Attribute', []))
+    timestamps = [attribute.get('timestamp') for attribute in attributes]
+    timestamps.extend(
+        sighting.get('date_sighting') for attribute in attributes
+        for sighting in attribute.get('Sighting', [])
+    )
+    timestamps.extend(
+        reference.get('timestamp')
+        for reference in misp_item.get('ObjectReference', [])
+    )
+    return max(
+        _timestamp(timestamp) for timestamp in timestamps
+        if timestamp is not None
+    )
+
+
+def _timestamp(timestamp: _timestamp_type) -> int:
+    if isinstance(timestamp, datetime):
+        return int(timestamp.timestamp())
+    return int(timestamp)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Dispatch tables of the parsing methods the parsers call for every converted
+attribute, object or STIX object.
+
+The mapping tables associate the MISP types and names, or the STIX types, with
+the name of the method handling them. Instead of building and resolving those
+names with `getattr` for every converted element, the parsers resolve them
+once, when their class is defined, into tables of the functions themselves,
+which are then called with the parser instance as first argument. A mapping
+table referencing a method the parser class does not define then fails as soon
+as its module is imported, rather than in the middle of a conversion.
+"""
+
+from types import MappingProxyType
+from typing import Mapping
+
+
+class DispatchTableError(Exception):
+    pass
+
+
+def dispatch_table(parser_class: type, mapping: Mapping,
+                   *fields: str) -> MappingProxyType:
+    """
+    Resolves the method names of a mapping table to the functions of the
+    parser class. The method names with replacement fields, as in the galaxy
+    types mapping, are formatted with the given `fields` first.
+    """
+    handlers = {}
+    missing = set()
+    for key, name in mapping.items():
+        if fields:
+            name = name.format(*fields)
+        handler = getattr(parser_class, name, None)
+        if handler is None:
+            missing.add(name)
+            continue
+        handlers[key] = handler
+    if missing:
+        raise DispatchTableError(
+            f"{parser_class.__name__} does not define the following parsing "
+            f"methods: {', '.join(sorted(missing))}"
+        )
+    return MappingProxyType(handlers)
+
+
+def set_dispatch_tables(parser_class: type):
+    """
+    Builds the dispatch tables declared in the `_dispatch_tables` attribute of
+    a parser class, as class attributes named after the declaration keys.
+
+    Every declaration gives the name of a table returned by the
+    `dispatch_mappings` method of the parser mapping class, followed by the
+    fields to format its method names with. The tables are built again for
+    every subclass, so they always reference the overridden methods.
+    """
+    if not hasattr(parser_class, '_dispatch_tables'):
+        return
+    mapping = getattr(parser_class, '_mapping', None)
+    if mapping is None:
+        return
+    mappings = mapping.dispatch_mappings()
+    for name, (table, *fields) in parser_class._dispatch_tables.items():
+        setattr(
+            parser_class, name,
+            dispatch_table(parser_class, mappings[table], *fields)
+        )
@@ -1,11 +1,15 @@
-class Mapping(dict):
-    def __setitem__(self, key, value):
-        raise TypeError(f'{type(self).__name__} object does not support item assignment')
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
 
-    def __delitem__(self, key):
-        raise TypeError(f'{type(self).__name__} object does not support item deletion')
+from types import MappingProxyType
 
-    def __getattribute__(self, attribute):
-        if attribute in ('clear', 'update', 'pop', 'popitem', 'setdefault'):
-            raise AttributeError(f'{type(self).__name__} object has no attribute {attribute}')
-        return super().__getattribute__(attribute)
+
+def Mapping(*args, **kwargs) -> MappingProxyType:
+    """
+    Builds the immutable mapping tables used by the parsers.
+
+    The tables are read-only views of a dictionary only referenced by the view
+    itself: they cannot be modified, and the lookups in the hottest dispatch
+    paths are handled at the C level without any Python function call.
+    """
+    return MappingProxyType(dict(*args, **kwargs))
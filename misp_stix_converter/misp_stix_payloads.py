@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Storage of the attachment and malware-sample payloads outside of the STIX
+content.
+
+The exported STIX content then references the payloads with their SHA-256 hash
+instead of embedding their base64 encoded value, the URL of the Artifacts being
+the name of the payload file relative to the directory. On import, the payloads
+are only read back from the configured directory, by SHA-256 hash: the URLs
+given by the imported content are never followed.
+"""
+
+import os
+import re
+from base64 import b64decode, b64encode
+from hashlib import sha256
+from io import BytesIO
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Optional, Tuple, Union
+
+# Multiple of 3 so the chunks are base64 encoded without padding
+_ENCODING_CHUNK_SIZE = 3 * 2**16
+_MAX_PAYLOAD_SIZE = 100 * 2**20
+_SHA256_HASH = re.compile('^[0-9a-f]{64}$')
+_payload_type = Union[BytesIO, bytes, str]
+
+
+class PayloadStoreError(Exception):
+    pass
+
+
+class PayloadStore:
+    """
+    Content-addressed directory of payloads: every payload is written once, in
+    a file named after the hexadecimal value of its SHA-256 hash.
+    """
+
+    def __init__(self, directory: Union[Path, str],
+                 max_size: Optional[int] = None):
+        self.__directory = Path(directory).resolve()
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        self.__max_size = _MAX_PAYLOAD_SIZE if max_size is None else max_size
+
+    @property
+    def directory(self) -> Path:
+        return self.__directory
+
+    @property
+    def max_size(self) -> int:
+        return self.__max_size
+
+    def load(self, sha256_hash: str) -> BytesIO:
+        """
+        Reads the payload with the given SHA-256 hash from the store, and
+        checks its content matches the hash.
+
+        :param sha256_hash: The hexadecimal value of the SHA-256 hash
+        """
+        sha256_hash = sha256_hash.lower()
+        if _SHA256_HASH.match(sha256_hash) is None:
+            raise PayloadStoreError(f'Invalid SHA-256 hash: {sha256_hash}')
+        try:
+            with open(self.directory / sha256_hash, 'rb') as f:
+                # Never more than the maximum size is read, whatever the file
+                payload = f.read(self.max_size + 1)
+        except OSError:
+            raise PayloadStoreError(f'Payload not found: {sha256_hash}')
+        if len(payload) > self.max_size:
+            raise PayloadStoreError(
+                f'The payload with SHA-256 hash {sha256_hash} is bigger than '
+                f'{self.max_size} bytes.'
+            )
+        if sha256(payload).hexdigest() != sha256_hash:
+            raise PayloadStoreError(
+                f'The content of the payload does not match its SHA-256 hash: '
+                f'{sha256_hash}'
+            )
+        return BytesIO(payload)
+
+    def store(self, payload: _payload_type) -> Tuple[str, str]:
+        """
+        Writes a payload in the store and returns its SHA-256 hash and the URL
+        of the file it is written in, relative to the store directory.
+        """
+        payload = _payload_bytes(payload)
+        sha256_hash = sha256(payload).hexdigest()
+        filename = self.directory / sha256_hash
+        if not filename.exists():
+            with NamedTemporaryFile(dir=self.directory, delete=False) as f:
+                f.write(payload)
+            os.replace(f.name, filename)
+        return sha256_hash, sha256_hash
+
+
+def encode_payload(payload: Union[BytesIO, str]) -> str:
+    """
+    Base64 encodes a payload chunk by chunk from the buffer of the BytesIO,
+    without copying its whole content first.
+    """
+    if isinstance(payload, str):
+        return payload
+    with payload.getbuffer() as buffer:
+        return ''.join(
+            b64encode(buffer[index:index + _ENCODING_CHUNK_SIZE]).decode()
+            for index in range(0, len(buffer), _ENCODING_CHUNK_SIZE)
+        )
+
+
+def _payload_bytes(payload: _payload_type) -> bytes:
+    if isinstance(payload, str):
+        return b64decode(payload)
+    if isinstance(payload, BytesIO):
+        return payload.getvalue()
+    return payload
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Persistent store of the STIX objects already imported to MISP.
+
+Polling the same TAXII collection, or importing again the same growing STIX
+bundles, mostly returns objects already converted. The store records the `id`
+and `modified` timestamp of every imported STIX object, so the next imports
+only convert the new objects and the new versions of the updated ones, and
+give MISP events holding only this delta.
+
+The store is a SQLite database in WAL mode: it survives the restarts of the
+process importing the STIX content, and any number of processes can read it
+while another one records the objects it just imported.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Optional, Tuple, Union
+
+_DEFAULT_TIMEOUT = 30
+
+
+class SeenObjectStore:
+    """
+    SQLite database of the imported STIX objects, keyed by `id` and
+    `modified` timestamp - the objects without `modified` timestamp, like the
+    STIX 2.1 observables, are keyed by their `id` alone.
+
+    Only the path of the database is kept when the store is sent to the
+    worker processes of a pool, every process opening its own connection.
+    """
+
+    def __init__(self, filename: Union[Path, str],
+                 timeout: Optional[float] = _DEFAULT_TIMEOUT):
+        self.__filename = Path(filename).resolve()
+        self.__timeout = timeout
+        self.__connection = None
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS seen_objects ('
+                'id TEXT NOT NULL, modified TEXT NOT NULL, '
+                'PRIMARY KEY (id, modified)) WITHOUT ROWID'
+            )
+
+    def __enter__(self) -> 'SeenObjectStore':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_SeenObjectStore__connection'] = None
+        return state
+
+    def __len__(self) -> int:
+        cursor = self.connection.execute('SELECT COUNT(*) FROM seen_objects')
+        return cursor.fetchone()[0]
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self.__connection is None:
+            self.__filename.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.__filename, timeout=self.__timeout
+            )
+            # The readers are never blocked by the process recording objects
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self.__connection = connection
+        return self.__connection
+
+    @property
+    def filename(self) -> Path:
+        return self.__filename
+
+    def add(self, stix_objects: Iterable[Tuple[str, str]]):
+        """
+        Records the imported STIX objects, in a single transaction.
+
+        :param stix_objects: The `id` and `modified` timestamp of the objects
+        """
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO seen_objects (id, modified) '
+                'VALUES (?, ?)', stix_objects
+            )
+
+    def close(self):
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def seen(self, object_id: str, modified: str) -> bool:
+        cursor = self.connection.execute(
+            'SELECT 1 FROM seen_objects WHERE id = ? AND modified = ?',
+            (object_id, modified)
+        )
+        return cursor.fetchone() is not None
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from datetime import date, datetime
+from importlib import import_module
+from pymisp.abstract import AbstractMISP, pymisp_json_default
+from stix2.base import _STIXBase
+from stix2.utils import format_datetime
+from typing import Optional, TextIO, Union
+
+_JSON_BACKENDS = ('json', 'orjson', 'ujson')
+_JSON_default_backend = 'json'
+_JSON_default_indent = 4
+
+
+class JSONSerializerError(Exception):
+    pass
+
+
+class JSONSerializer:
+    """
+    Serialises the STIX 2 content and the MISP events written by the
+    conversion functions.
+
+    The default configuration (4 spaces indentation and the standard library
+    `json` module) gives the same output as `bundle.serialize(indent=4)` and
+    `misp_event.to_json(indent=4)`. With `indent=None`, the output is compact.
+
+    `orjson` and `ujson` are optional backends used only when they are
+    installed, `auto` selecting the fastest one available for the requested
+    indentation. `orjson` supports the compact and 2 spaces indented outputs.
+
+    Only the backend name and the indentation are kept, so a serializer can be
+    sent to the worker processes of a pool.
+    """
+
+    def __init__(self, indent: Optional[int] = _JSON_default_indent,
+                 backend: Optional[str] = _JSON_default_backend):
+        if indent is not None and indent < 0:
+            raise JSONSerializerError(f'Invalid indentation: {indent}')
+        self.__indent = indent or None
+        if backend == 'auto':
+            backend = _select_backend(self.__indent)
+        if backend not in _JSON_BACKENDS:
+            raise JSONSerializerError(f'Unknown JSON backend: {backend}')
+        if backend == 'orjson' and self.__indent not in (None, 2):
+            raise JSONSerializerError(
+                'The orjson backend only supports the compact and 2 spaces '
+                'indented outputs.'
+            )
+        _load_backend(backend)
+        self.__backend = backend
+
+    @property
+    def backend(self) -> str:
+        return self.__backend
+
+    @property
+    def indent(self) -> Union[int, None]:
+        return self.__indent
+
+    @property
+    def stix_objects_separator(self) -> str:
+        return ',' if self.indent is None else ',\n'
+
+    def dump_misp(self, misp_content: Union[AbstractMISP, dict], f: TextIO):
+        self.__dump(misp_content, f, _misp_default)
+
+    def dump_stix(self, stix_content: Union[_STIXBase, dict, list], f: TextIO):
+        self.__dump(stix_content, f, _stix_default)
+
+    def dumps_misp(self, misp_content: Union[AbstractMISP, dict]) -> str:
+        return self.__dumps(misp_content, _misp_default)
+
+    def dumps_stix(self, stix_content: Union[_STIXBase, dict, list]) -> str:
+        return self.__dumps(stix_content, _stix_default)
+
+    def dumps_stix_objects(self, stix_objects: list) -> str:
+        """
+        Serialises STIX objects as the content of the `objects` field of a
+        bundle, i.e. with the indentation of the bundle objects and without
+        the enclosing brackets.
+        """
+        bound = 2 if self.indent is None else self.indent + 4
+        return self.dumps_stix([stix_objects])[bound:-bound]
+
+    def stix_bundle_footer(self) -> str:
+        if self.indent is None:
+            return ']}'
+        return f"\n{' ' * self.indent}]\n}}"
+
+    def stix_bundle_header(self, bundle: Union[_STIXBase, dict]) -> str:
+        """
+        Serialises the bundle fields up to the opening of the `objects` array,
+        which is then filled object by object.
+        """
+        header = {key: value for key, value in bundle.items() if key != 'objects'}
+        content = self.dumps_stix(header)
+        if self.indent is None:
+            return f'{content[:-1]},"objects":['
+        return f"{content[:-2]},\n{' ' * self.indent}\"objects\": [\n"
+
+    ############################################################################
+    #                        BACKENDS SPECIFIC METHODS                         #
+    ############################################################################
+
+    def __dump(self, content, f: TextIO, default):
+        if self.backend == 'json' and self.indent is not None:
+            # The indented output is encoded by the pure python encoder anyway
+            # and then written chunk by chunk in the file
+            json.dump(content, f, default=default, indent=self.indent)
+            return
+        if self.backend == 'ujson':
+            ujson = _load_backend('ujson')
+            ujson.dump(
+                _jsonable(content, default), f, indent=self.indent or 0,
+                escape_forward_slashes=False
+            )
+            return
+        f.write(self.__dumps(content, default))
+
+    def __dumps(self, content, default) -> str:
+        if self.backend == 'orjson':
+            orjson = _load_backend('orjson')
+            option = orjson.OPT_PASSTHROUGH_DATETIME
+            if self.indent is not None:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(content, default=default, option=option).decode()
+        if self.backend == 'ujson':
+            ujson = _load_backend('ujson')
+            return ujson.dumps(
+                _jsonable(content, default), indent=self.indent or 0,
+                escape_forward_slashes=False
+            )
+        if self.indent is None:
+            return json.dumps(content, default=default, separators=(',', ':'))
+        return json.dumps(content, default=default, indent=self.indent)
+
+
+def _jsonable(content, default):
+    # ujson has no hook for the types it cannot serialise
+    if isinstance(content, dict):
+        return {key: _jsonable(value, default) for key, value in content.items()}
+    if isinstance(content, (list, tuple)):
+        return [_jsonable(value, default) for value in content]
+    if isinstance(content, (bool, float, int, str)) or content is None:
+        return content
+    return _jsonable(default(content), default)
+
+
+def _load_backend(backend: str):
+    try:
+        return import_module(backend)
+    except ImportError as error:
+        raise JSONSerializerError(
+            f'The {backend} JSON backend is not installed.'
+        ) from error
+
+
+def _misp_default(value):
+    if isinstance(value, AbstractMISP):
+        return value.to_dict()
+    content = pymisp_json_default(value)
+    if content is None:
+        raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+    return content
+
+
+def _select_backend(indent: Union[int, None]) -> str:
+    backends = ('orjson', 'ujson') if indent in (None, 2) else ('ujson',)
+    for backend in backends:
+        try:
+            import_module(backend)
+        except ImportError:
+            continue
+        return backend
+    return _JSON_default_backend
+
+
+def _stix_default(value):
+    # Same conversions as the stix2 STIXJSONEncoder
+    if isinstance(value, (date, datetime)):
+        return format_datetime(value)
+    if isinstance(value, _STIXBase):
+        content = dict(value)
+        for name in value._defaulted_optional_properties:
+            del content[name]
+        return content
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
@@ -0,0 +1,557 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Long-running conversion daemon.
+
+Running the command line for every export or import pays the interpreter
+start-up, the import of the STIX libraries, the construction of the mapping
+and dispatch tables and the loading of the galaxies resources again. The
+daemon loads all of them once at start-up, then accepts the conversion jobs as
+HTTP requests, on a Unix socket only its user can connect to, or on a local
+port:
+
+    POST /export  {"file": ["event.json"], "version": "2.1", "indent": 0}
+    POST /import  {"file": ["bundle.json"], "version": "2", "distribution": 1}
+    GET  /status
+
+Every request carries the token of the daemon in an `Authorization: Bearer`
+header, and the jobs are sent as `application/json` content. The jobs accept
+the same options as the `export` and `import` command line features, with the
+argument names as keys, and return the same traceback as the command line
+conversion functions, as JSON. The files they read and write must be under the
+root directories of the daemon.
+
+Every conversion slot keeps a pool of warm STIX 2 parsers, which the jobs
+running in the slot reuse once reset, so no conversion state is carried from
+one job to another. The mapping and dispatch tables and the galaxies resources
+are shared by all the parsers, and the conversions never modify them.
+The jobs converting several files in a single output set its location, as the
+default one is shared by every job and outside of the root directories.
+"""
+
+import argparse
+import hmac
+import json
+import logging
+import os
+import secrets
+import signal
+import socket
+import threading
+from . import __version__, _argument_parser, _check_arguments
+from .misp_stix_stats import _disabled_stats
+from collections import OrderedDict
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from queue import Empty, Queue
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Iterable, Optional, Union
+
+_logger = logging.getLogger(__name__)
+
+_FEATURES = ('export', 'import')
+# The jobs only hold the conversion arguments, never the content to convert
+_MAX_CONTENT_LENGTH = 1024 * 1024
+_PATH_ARGUMENTS = (
+    'cache_dir', 'manifest', 'output_dir', 'output_name', 'payloads_dir',
+    'seen_store'
+)
+# Number of parsers with different settings each conversion slot keeps warm
+_POOL_SIZE = 8
+# Arguments defining the daemon conversion itself, not set by the jobs
+_RESERVED_ARGUMENTS = ('feature', 'file', 'func', 'version')
+_TMP_PATH = Path(__file__).parents[1] / 'tmp'
+_DEFAULT_SOCKET = _TMP_PATH / 'misp_stix_converter.sock'
+_DEFAULT_TOKEN_FILE = _TMP_PATH / 'misp_stix_converter.token'
+# The STIX 1 libraries register their namespaces globally
+_STIX1_VERSIONS = ('1', '1.1.1', '1.2')
+
+
+class ConversionServerError(Exception):
+    pass
+
+
+class ConversionServerBusyError(ConversionServerError):
+    pass
+
+
+class _JobArgumentParser(argparse.ArgumentParser):
+    def error(self, message: str):
+        # Invalid jobs must not exit the daemon
+        raise ConversionServerError(message)
+
+
+class ConversionServer:
+    def __init__(self, max_concurrency: Optional[int] = 4,
+                 queue_timeout: Optional[float] = 30,
+                 stix1: Optional[bool] = False,
+                 roots: Optional[Iterable[Union[Path, str]]] = None,
+                 token: Optional[str] = None):
+        if max_concurrency < 1:
+            raise ConversionServerError(
+                'The maximum number of concurrent jobs must be at least 1.'
+            )
+        self.__max_concurrency = max_concurrency
+        self.__queue_timeout = queue_timeout
+        self.__roots = tuple(
+            Path(root).resolve() for root in (roots or (Path.cwd(),))
+        )
+        self.__token = token or secrets.token_urlsafe(32)
+        self.__argument_parser = _argument_parser(_JobArgumentParser)
+        self.__actions = self.__job_actions(self.__argument_parser)
+        self.__slots: Queue = Queue()
+        for _ in range(max_concurrency):
+            self.__slots.put(ParserPool())
+        self.__stix1_lock = threading.Lock()
+        self.__counters_lock = threading.Lock()
+        self.__active = 0
+        self.__processed = 0
+        self.__rejected = 0
+        self.__warm_up(stix1, self.__slots.queue)
+
+    @property
+    def max_concurrency(self) -> int:
+        return self.__max_concurrency
+
+    @property
+    def queue_timeout(self) -> float:
+        return self.__queue_timeout
+
+    @property
+    def roots(self) -> tuple:
+        return self.__roots
+
+    @property
+    def token(self) -> str:
+        return self.__token
+
+    def check_token(self, token: str) -> bool:
+        return hmac.compare_digest(token.encode(), self.token.encode())
+
+    def convert(self, feature: str, job: dict) -> dict:
+        """
+        Runs a conversion job, with the same options as the command line.
+
+        :param feature: `export` or `import`
+        :param job: Command line arguments of the conversion, with the
+            argument names as keys - `file` and `version` are required
+        :return: The traceback of the command line conversion functions
+        """
+        return self.run(self.conversion_arguments(feature, job))
+
+    def conversion_arguments(self, feature: str,
+                             job: dict) -> argparse.Namespace:
+        """
+        Returns the command line arguments of a conversion job, with the
+        default values of the options the job does not set.
+        """
+        if feature not in _FEATURES:
+            raise ConversionServerError(f'Unknown feature: {feature}')
+        if not isinstance(job, dict):
+            raise ConversionServerError('The job must be a JSON object.')
+        files = job.get('file')
+        if isinstance(files, str):
+            files = [files]
+        if not files or not isinstance(files, list):
+            raise ConversionServerError('Missing file(s) to convert.')
+        if 'version' not in job:
+            raise ConversionServerError('Missing STIX version.')
+        stix_args = self.__argument_parser.parse_args(
+            [
+                feature, '-f', *(str(self.__check_path('file', filename))
+                                 for filename in files),
+                '-v', str(job['version'])
+            ]
+        )
+        actions = self.__actions[feature]
+        for key, value in job.items():
+            if key in _RESERVED_ARGUMENTS:
+                continue
+            if key not in actions:
+                raise ConversionServerError(f'Unknown argument: {key}')
+            setattr(
+                stix_args, key,
+                self.__check_argument(
+                    actions[key], value, getattr(stix_args, key)
+                )
+            )
+        if len(files) > 1 and stix_args.single_output and \
+                stix_args.output_dir is None and stix_args.output_name is None:
+            raise ConversionServerError(
+                'The jobs converting several files in a single output must '
+                'set the output_dir or output_name argument.'
+            )
+        return _check_arguments(stix_args)
+
+    def run(self, stix_args: argparse.Namespace) -> dict:
+        """
+        Runs a conversion once a slot is available, or raises a
+        `ConversionServerBusyError` after `queue_timeout` seconds.
+        """
+        try:
+            parsers = self.__slots.get(timeout=self.queue_timeout)
+        except Empty:
+            with self.__counters_lock:
+                self.__rejected += 1
+            raise ConversionServerBusyError(
+                f'The {self.max_concurrency} conversion slots are busy.'
+            )
+        with self.__counters_lock:
+            self.__active += 1
+        try:
+            if stix_args.version in _STIX1_VERSIONS:
+                with self.__stix1_lock:
+                    return self.__convert(stix_args, parsers)
+            return self.__convert(stix_args, parsers)
+        finally:
+            with self.__counters_lock:
+                self.__active -= 1
+                self.__processed += 1
+            self.__slots.put(parsers)
+
+    def status(self) -> dict:
+        with self.__counters_lock:
+            return {
+                'version': __version__,
+                'max_concurrency': self.max_concurrency,
+                'active': self.__active,
+                'processed': self.__processed,
+                'rejected': self.__rejected
+            }
+
+    ############################################################################
+    #                          SERVER HANDLING METHODS                         #
+    ############################################################################
+
+    def http_server(self, host: Optional[str] = '127.0.0.1',
+                    port: Optional[int] = 8089) -> ThreadingHTTPServer:
+        server = _ConversionHTTPServer((host, port), _ConversionRequestHandler)
+        server.conversion_server = self
+        return server
+
+    def serve_forever(self, socket_path: Optional[Union[Path, str]] = None,
+                      host: Optional[str] = '127.0.0.1',
+                      port: Optional[int] = None):
+        if port is None:
+            socket_path = socket_path or _DEFAULT_SOCKET
+            server = self.unix_server(socket_path)
+            address = socket_path
+        else:
+            server = self.http_server(host, port)
+            address = f'http://{host}:{port}'
+        _logger.info('Conversion server listening on %s', address)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+    def unix_server(self, socket_path: Union[Path, str]) -> UnixStreamServer:
+        socket_path = Path(socket_path)
+        if socket_path.is_socket():
+            # Left by a previous daemon which did not exit properly
+            socket_path.unlink()
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        server = _ConversionUnixServer(
+            str(socket_path), _ConversionRequestHandler
+        )
+        server.conversion_server = self
+        return server
+
+    ############################################################################
+    #                             UTILITY METHODS.                             #
+    ############################################################################
+
+    def __check_argument(self, action: argparse.Action, value, default):
+        key = action.dest
+        if value is None:
+            return None
+        if key in _PATH_ARGUMENTS:
+            return self.__check_path(key, value)
+        if key == 'jobs' and value != 1:
+            # The jobs share the conversion slots of the daemon, and do not
+            # start processes of their own
+            raise ConversionServerError(
+                'The conversion jobs run in a single process.'
+            )
+        if action.choices is not None and value not in action.choices:
+            raise ConversionServerError(
+                f'Invalid value for the {key} argument: {value} - choose '
+                f"from {', '.join(map(str, action.choices))}"
+            )
+        for value_type in (bool, int, float, str):
+            if isinstance(default, value_type):
+                if isinstance(value, value_type):
+                    return value
+                raise ConversionServerError(
+                    f'Invalid value for the {key} argument: {value}'
+                )
+        return value
+
+    def __check_path(self, key: str, value) -> Path:
+        if not isinstance(value, str):
+            raise ConversionServerError(
+                f'Invalid value for the {key} argument: {value}'
+            )
+        # The symbolic links and `..` parts are resolved first, so the paths
+        # cannot escape from the roots
+        path = Path(value).resolve()
+        for root in self.roots:
+            if path == root or root in path.parents:
+                return path
+        raise ConversionServerError(
+            f'The {key} argument is not under the root directories of the '
+            f'conversion server: {value}'
+        )
+
+    @staticmethod
+    def __convert(stix_args: argparse.Namespace, parsers: 'ParserPool') -> dict:
+        from .misp_stix_converter import _misp_to_stix, _stix_to_misp
+        if stix_args.feature == 'export':
+            return _misp_to_stix(stix_args, parsers)
+        return _stix_to_misp(stix_args, parsers)
+
+    @staticmethod
+    def __job_actions(argument_parser: argparse.ArgumentParser) -> dict:
+        actions = {
+            action.dest: action for action in argument_parser._actions
+            if not isinstance(action, argparse._HelpAction)
+        }
+        subparsers = next(
+            action for action in argument_parser._actions
+            if isinstance(action, argparse._SubParsersAction)
+        )
+        return {
+            feature: {
+                **actions,
+                **{
+                    action.dest: action
+                    for action in subparsers.choices[feature]._actions
+                    if not isinstance(action, argparse._HelpAction)
+                }
+            } for feature in _FEATURES
+        }
+
+    @staticmethod
+    def __warm_up(stix1: bool, slots: Iterable['ParserPool']):
+        from .misp2stix.galaxies_catalog import (
+            GalaxiesCatalogError, load_galaxies_catalog)
+        from .misp2stix.misp_to_stix20 import MISPtoSTIX20Parser # noqa
+        from .misp2stix.misp_to_stix21 import MISPtoSTIX21Parser
+        from .stix2misp.external_stix2_to_misp import ExternalSTIX2toMISPParser # noqa
+        from .stix2misp.importparser import UnavailableGalaxyResourcesError
+        from .stix2misp.internal_stix2_to_misp import InternalSTIX2toMISPParser
+        if stix1:
+            from .misp2stix.misp_to_stix1 import MISPtoSTIX1EventsParser # noqa
+            from .stix2misp.external_stix1_to_misp import ExternalSTIX1toMISPParser # noqa
+            from .stix2misp.internal_stix1_to_misp import InternalSTIX1toMISPParser # noqa
+        try:
+            load_galaxies_catalog()
+        except (GalaxiesCatalogError, OSError) as exception:
+            _logger.warning('Unable to load the galaxies catalog: %s', exception)
+        galaxies = True
+        for parsers in slots:
+            # Parsers with the default settings of the jobs
+            parsers.get(MISPtoSTIX21Parser, payloads_dir=None, trusted=False)
+            parser = parsers.get(InternalSTIX2toMISPParser, 0, None, False, None)
+            if galaxies:
+                try:
+                    parser.galaxy_definitions
+                    parser.synonyms_mapping
+                except UnavailableGalaxyResourcesError as exception:
+                    _logger.warning(
+                        'Unable to load the galaxies resources: %s', exception
+                    )
+                    galaxies = False
+            parser.relationship_types
+
+
+class ParserPool:
+    """
+    Warm parsers of a conversion slot, one per parser class and settings.
+
+    The parsers are reset before they are returned, so a job only gets the
+    settings, the mapping tables and the galaxies resources of the previous
+    jobs. A pool is never used by two jobs at the same time.
+    """
+    def __init__(self, size: Optional[int] = _POOL_SIZE):
+        self.__parsers: OrderedDict = OrderedDict()
+        self.__size = size
+
+    def __len__(self) -> int:
+        return len(self.__parsers)
+
+    def get(self, parser_class: type, *args, **kwargs):
+        """
+        Returns a parser of the given class, built with the given arguments,
+        reusing the one of a previous job when available.
+        """
+        key = (parser_class, args, tuple(sorted(kwargs.items())))
+        parser = self.__parsers.pop(key, None)
+        if parser is None:
+            parser = parser_class(*args, **kwargs)
+        else:
+            parser.reset()
+            # The stats are kept by the reset, the jobs enable their own
+            parser.enable_profiling(_disabled_stats)
+        self.__parsers[key] = parser
+        if len(self.__parsers) > self.__size:
+            self.__parsers.popitem(last=False)
+        return parser
+
+
+################################################################################
+#                        HTTP SERVER AND REQUEST HANDLER                       #
+################################################################################
+
+class _ConversionHTTPServer(ThreadingHTTPServer):
+    conversion_server: ConversionServer
+
+
+class _ConversionUnixServer(ThreadingMixIn, UnixStreamServer):
+    conversion_server: ConversionServer
+    daemon_threads = True
+
+    def server_bind(self):
+        # Only the user running the daemon can connect to the socket
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+        os.chmod(self.server_address, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        Path(self.server_address).unlink(missing_ok=True)
+
+
+class _ConversionRequestHandler(BaseHTTPRequestHandler):
+    server_version = f'MISP-STIX-Converter/{__version__}'
+
+    def address_string(self) -> str:
+        # The Unix socket clients have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path != '/status':
+            self._send_json(404, {'error': f'Unknown path: {self.path}'})
+            return
+        self._send_json(200, self.server.conversion_server.status())
+
+    def do_POST(self):
+        # The token is checked before the body is read, so the clients which
+        # are not authenticated cannot make the daemon read their content
+        if not self._authorized():
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self._send_json(400, {'error': 'Invalid Content-Length header.'})
+            return
+        if length > _MAX_CONTENT_LENGTH:
+            self._send_json(
+                413,
+                {'error': f'The jobs are limited to {_MAX_CONTENT_LENGTH} bytes.'}
+            )
+            return
+        content = self.rfile.read(length)
+        feature = self.path.strip('/')
+        if feature not in _FEATURES:
+            self._send_json(404, {'error': f'Unknown path: {self.path}'})
+            return
+        if self.headers.get_content_type() != 'application/json':
+            self._send_json(
+                415, {'error': 'The jobs must be sent as application/json.'}
+            )
+            return
+        conversion_server = self.server.conversion_server
+        try:
+            job = json.loads(content or b'{}')
+            stix_args = conversion_server.conversion_arguments(feature, job)
+        except (ConversionServerError, ValueError) as exception:
+            self._send_json(400, {'error': str(exception)})
+            return
+        try:
+            traceback = conversion_server.run(stix_args)
+        except ConversionServerBusyError as exception:
+            self._send_json(503, {'error': str(exception)})
+            return
+        except Exception as exception:
+            self._send_json(500, {'error': str(exception)})
+            return
+        self._send_json(200, traceback)
+
+    def _authorized(self) -> bool:
+        scheme, _, token = self.headers.get('Authorization', '').partition(' ')
+        conversion_server = self.server.conversion_server
+        if scheme == 'Bearer' and conversion_server.check_token(token):
+            return True
+        self._send_json(401, {'error': 'Missing or invalid token.'})
+        return False
+
+    def log_message(self, format: str, *args):
+        _logger.debug('%s - %s', self.address_string(), format % args)
+
+    def _send_json(self, status: int, content: dict):
+        body = json.dumps(content, default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class UnixHTTPConnection(HTTPConnection):
+    """
+    HTTP client connection to a conversion daemon listening on a Unix socket.
+    """
+    def __init__(self, socket_path: Union[Path, str], **kwargs):
+        super().__init__('localhost', **kwargs)
+        self.__socket_path = str(socket_path)
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.__socket_path)
+
+
+################################################################################
+#                            COMMAND LINE FUNCTIONS                            #
+################################################################################
+
+def _load_token(token_file: Path) -> str:
+    if token_file.exists():
+        return token_file.read_text(encoding='utf-8').strip()
+    token_file.parent.mkdir(parents=True, exist_ok=True)
+    token = secrets.token_urlsafe(32)
+    # The token file is only readable by the user running the daemon
+    descriptor = os.open(
+        token_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600
+    )
+    with open(descriptor, 'wt', encoding='utf-8') as f:
+        f.write(token)
+    return token
+
+
+def _serve(stix_args: argparse.Namespace):
+    logging.basicConfig(
+        level=logging.DEBUG if stix_args.debug else logging.INFO,
+        format='%(asctime)s %(levelname)s %(message)s'
+    )
+    # Stopping the daemon closes the server and removes its Unix socket
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    token_file = stix_args.token_file or _DEFAULT_TOKEN_FILE
+    server = ConversionServer(
+        stix_args.max_concurrency, stix_args.queue_timeout, stix_args.stix1,
+        roots=stix_args.root, token=_load_token(token_file)
+    )
+    _logger.info('Conversion server token available in %s', token_file)
+    server.serve_forever(stix_args.socket, stix_args.host, stix_args.port)
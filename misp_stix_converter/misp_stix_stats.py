@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Opt-in instrumentation of the conversion stages.
+
+The parsers hold a disabled stats instance by default, whose timers and
+counters do nothing, and record the time spent in every stage and the number
+of converted objects only once `enable_profiling` is called.
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import Union
+
+_disabled_timer = nullcontext()
+
+
+class ConversionStats:
+    def __init__(self):
+        self.__counters: defaultdict = defaultdict(int)
+        self.__calls: defaultdict = defaultdict(int)
+        self.__timers: defaultdict = defaultdict(float)
+
+    def count(self, counter: str, value: int = 1):
+        self.__counters[counter] += value
+
+    @contextmanager
+    def timer(self, stage: str):
+        """
+        Measures the time spent in the context for the given stage.
+        Nested stages are measured independently: the time of a stage
+        includes the time of the stages nested in it.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.__timers[stage] += perf_counter() - start
+            self.__calls[stage] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            'counters': dict(sorted(self.__counters.items())),
+            'timers': {
+                stage: {'calls': self.__calls[stage], 'time': round(time, 6)}
+                for stage, time in sorted(self.__timers.items())
+            }
+        }
+
+    def update(self, stats: dict):
+        """
+        Adds the figures of another conversion, as returned by `to_dict`.
+        """
+        for counter, value in stats.get('counters', {}).items():
+            self.__counters[counter] += value
+        for stage, timer in stats.get('timers', {}).items():
+            self.__timers[stage] += timer['time']
+            self.__calls[stage] += timer['calls']
+
+
+class DisabledConversionStats:
+    def count(self, counter: str, value: int = 1):
+        pass
+
+    def timer(self, stage: str) -> nullcontext:
+        return _disabled_timer
+
+    def to_dict(self) -> dict:
+        return {}
+
+
+_disabled_stats = DisabledConversionStats()
+_stats_typing = Union[ConversionStats, DisabledConversionStats]
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from typing import Generator, TextIO
+
+_CHUNK_SIZE = 65536
+# Longest distance from the end of the buffer at which a truncated value
+# fails to decode: an escaped surrogate pair (`\ud83d\ude00`)
+_TRUNCATION_MARGIN = 12
+_WHITESPACES = ' \t\n\r'
+
+
+class JSONStreamReader:
+    """
+    Incremental JSON reader walking through a file one token at a time.
+
+    Only the value currently decoded is kept in memory, which makes it possible
+    to go through the content of very large JSON arrays (STIX Bundle objects,
+    MISP events in a `response` field, etc.) without loading the whole file.
+
+    The reader is driven by its caller: `iter_keys` and `iter_array` position
+    the reader on the next value, and the caller then either dives into it
+    with another `iter_keys` / `iter_array` call, or decodes it completely with
+    `read_value`.
+    """
+
+    def __init__(self, stream: TextIO, chunk_size: int = _CHUNK_SIZE):
+        self.__buffer = ''
+        self.__chunk_size = chunk_size
+        self.__decoder = json.JSONDecoder()
+        self.__eof = False
+        self.__offset = 0
+        self.__position = 0
+        self.__stream = stream
+
+    def iter_array(self) -> Generator[None, None, None]:
+        """
+        Goes through the items of the JSON array the reader is positioned on.
+        Every item that is not consumed by the caller (with `read_value` or by
+        going through its own content) is decoded and discarded.
+        """
+        self.__expect('[')
+        if self.__peek_token() == ']':
+            self.__position += 1
+            return
+        while True:
+            self.__peek_token()
+            position = self.__tell()
+            yield
+            if self.__tell() == position:
+                self.read_value()
+            character = self.__next_token()
+            if character == ']':
+                return
+            if character != ',':
+                self.__syntax_error(f'Expecting "," or "]", got "{character}"')
+
+    def iter_items(self) -> Generator[object, None, None]:
+        """Decodes and yields the items of the JSON array one by one."""
+        for _ in self.iter_array():
+            yield self.read_value()
+
+    def iter_keys(self) -> Generator[str, None, None]:
+        """
+        Goes through the keys of the JSON object the reader is positioned on.
+        Each key is yielded with the reader positioned on the related value.
+        Values that are not consumed by the caller are decoded and discarded.
+        """
+        self.__expect('{')
+        if self.__peek_token() == '}':
+            self.__position += 1
+            return
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str):
+                self.__syntax_error('Expecting a string as object key')
+            self.__expect(':')
+            self.__peek_token()
+            position = self.__tell()
+            yield key
+            if self.__tell() == position:
+                self.read_value()
+            character = self.__next_token()
+            if character == '}':
+                return
+            if character != ',':
+                self.__syntax_error(f'Expecting "," or "}}", got "{character}"')
+
+    def peek(self) -> str:
+        """Returns the first character of the next value without consuming it."""
+        return self.__peek_token()
+
+    def read_value(self):
+        """Decodes the whole value the reader is positioned on."""
+        self.__peek_token()
+        chunk_size = self.__chunk_size
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(
+                    self.__buffer, self.__position
+                )
+            except json.JSONDecodeError as error:
+                # Only the values cut by the end of the buffer are worth
+                # reading more content, any other error is a syntax error
+                if self.__eof or not self.__truncated(error):
+                    raise
+                self.__fill(chunk_size)
+                chunk_size *= 2
+                continue
+            # A number or a literal at the very end of the buffer might be
+            # truncated, so we make sure there is nothing left to read
+            if end == len(self.__buffer) and not self.__eof:
+                self.__fill(chunk_size)
+                continue
+            self.__position = end
+            return value
+
+    ############################################################################
+    #                          BUFFER HANDLING METHODS                         #
+    ############################################################################
+
+    def __expect(self, expected: str):
+        character = self.__next_token()
+        if character != expected:
+            self.__syntax_error(f'Expecting "{expected}", got "{character}"')
+
+    def __fill(self, size: int) -> bool:
+        if self.__position:
+            self.__buffer = self.__buffer[self.__position:]
+            self.__offset += self.__position
+            self.__position = 0
+        chunk = self.__stream.read(size)
+        if not chunk:
+            self.__eof = True
+            return False
+        self.__buffer = f'{self.__buffer}{chunk}'
+        return True
+
+    def __next_token(self) -> str:
+        character = self.__peek_token()
+        self.__position += 1
+        return character
+
+    def __peek_token(self) -> str:
+        while True:
+            length = len(self.__buffer)
+            while self.__position < length:
+                character = self.__buffer[self.__position]
+                if character not in _WHITESPACES:
+                    return character
+                self.__position += 1
+            if not self.__fill(self.__chunk_size):
+                self.__syntax_error('Unexpected end of JSON content')
+
+    def __syntax_error(self, message: str):
+        raise json.JSONDecodeError(message, self.__buffer, self.__position)
+
+    def __tell(self) -> int:
+        return self.__offset + self.__position
+
+    def __truncated(self, error: json.JSONDecodeError) -> bool:
+        # An unterminated string is reported at its opening quote, the other
+        # truncated values at their last decoded characters
+        if error.msg.startswith('Unterminated string'):
+            return True
+        return error.pos >= len(self.__buffer) - _TRUNCATION_MARGIN
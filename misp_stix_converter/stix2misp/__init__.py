@@ -1,7 +1,27 @@
-from .external_stix1_to_misp import ExternalSTIX1toMISPParser # noqa
-from .external_stix2_mapping import ExternalSTIX2toMISPMapping # noqa
-from .external_stix2_to_misp import ExternalSTIX2toMISPParser # noqa
-from .internal_stix1_to_misp import InternalSTIX1toMISPParser # noqa
-from .internal_stix2_mapping import InternalSTIX2toMISPMapping # noqa
-from .internal_stix2_to_misp import InternalSTIX2toMISPParser # noqa
-from .stix2_pattern_parser import STIX2PatternParser # noqa
+from importlib import import_module
+
+# Imported on first access, so that using the STIX 2 parsers does not load the
+# STIX 1 libraries, and conversely
+_lazy_attributes = {
+    'ExternalSTIX1toMISPParser': '.external_stix1_to_misp',
+    'ExternalSTIX2toMISPMapping': '.external_stix2_mapping',
+    'ExternalSTIX2toMISPParser': '.external_stix2_to_misp',
+    'InternalSTIX1toMISPParser': '.internal_stix1_to_misp',
+    'InternalSTIX2toMISPMapping': '.internal_stix2_mapping',
+    'InternalSTIX2toMISPParser': '.internal_stix2_to_misp',
+    'STIX2PatternParser': '.stix2_pattern_parser'
+}
+__all__ = list(_lazy_attributes)
+
+
+def __getattr__(name: str):
+    module = _lazy_attributes.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_lazy_attributes})
@@ -14,11 +14,7 @@ from stix2.v20.common import ExternalReference as ExternalReference_v20
 from stix2.v20.sdo import AttackPattern as AttackPattern_v20
 from stix2.v21.common import ExternalReference as ExternalReference_v21
 from stix2.v21.sdo import AttackPattern as AttackPattern_v21
-from typing import Optional, TYPE_CHECKING, Union
-
-if TYPE_CHECKING:
-    from ..external_stix2_to_misp import ExternalSTIX2toMISPParser
-    from ..internal_stix2_to_misp import InternalSTIX2toMISPParser
+from typing import Optional, Union
 
 _ATTACK_PATTERN_TYPING = Union[
     AttackPattern_v20, AttackPattern_v21
@@ -71,9 +67,7 @@ class ExternalSTIX2AttackPatternMapping(
 
 class ExternalSTIX2AttackPatternConverter(
         STIX2AttackPatternConverter, ExternalSTIX2Converter):
-    def __init__(self, main: 'ExternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = ExternalSTIX2AttackPatternMapping
+    _mapping = ExternalSTIX2AttackPatternMapping
 
     def parse(self, attack_pattern_ref: str):
         attack_pattern = self.main_parser._get_stix_object(attack_pattern_ref)
@@ -108,9 +102,7 @@ class InternalSTIX2AttackPatternMapping(
 
 class InternalSTIX2AttackPatternConverter(
         STIX2AttackPatternConverter, InternalSTIX2Converter):
-    def __init__(self, main: 'InternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = InternalSTIX2AttackPatternMapping
+    _mapping = InternalSTIX2AttackPatternMapping
 
     def parse(self, attack_pattern_ref: str):
         attack_pattern = self.main_parser._get_stix_object(attack_pattern_ref)
@@ -2,23 +2,23 @@
 # -*- coding: utf-8 -*-
 
 from ... import Mapping
-from .stix2converter import ExternalSTIX2Converter, InternalSTIX2Converter
-from .stix2mapping import ExternalSTIX2Mapping, InternalSTIX2Mapping
+from .stix2converter import (
+    ExternalSTIX2Converter, InternalSTIX2Converter, STIX2Converter,
+    _MAIN_PARSER_TYPING)
+from .stix2mapping import (
+    ExternalSTIX2Mapping, InternalSTIX2Mapping, STIX2Mapping)
+from abc import ABCMeta
 from pymisp import MISPGalaxyCluster
 from stix2.v20.sdo import Campaign as Campaign_v20
 from stix2.v21.sdo import Campaign as Campaign_v21
-from typing import Optional, TYPE_CHECKING, Union
-
-if TYPE_CHECKING:
-    from ..external_stix2_to_misp import ExternalSTIX2toMISPParser
-    from ..internal_stix2_to_misp import InternalSTIX2toMISPParser
+from typing import Optional, Union
 
 _CAMPAIGN_TYPING = Union[
     Campaign_v20, Campaign_v21
 ]
 
 
-class STIX2CampaignMapping(ExternalSTIX2Mapping):
+class STIX2CampaignMapping(STIX2Mapping, metaclass=ABCMeta):
     __campaign_meta_mapping = Mapping(
         aliases='synonyms',
         objective='objective'
@@ -29,14 +29,9 @@ class STIX2CampaignMapping(ExternalSTIX2Mapping):
         return cls.__campaign_meta_mapping
 
 
-class ExternalSTIX2CampaignConverter(ExternalSTIX2Converter):
-    def __init__(self, main: 'ExternalSTIX2toMISPParser'):
+class STIX2CampaignConverter(STIX2Converter, metaclass=ABCMeta):
+    def __init__(self, main: _MAIN_PARSER_TYPING):
         self._set_main_parser(main)
-        self._mapping = STIX2CampaignMapping
-
-    def parse(self, campaign_ref: str):
-        campaign = self.main_parser._get_stix_object(campaign_ref)
-        self._parse_galaxy(campaign)
 
     def _create_cluster(self, campaign: _CAMPAIGN_TYPING,
                         description: Optional[str] = None,
@@ -54,13 +49,34 @@ class ExternalSTIX2CampaignConverter(ExternalSTIX2Converter):
         return self._create_misp_galaxy_cluster(campaign_args)
 
 
-class InternalSTIX2CampaignConverter(InternalSTIX2Converter):
-    def __init__(self, main: 'InternalSTIX2toMISPParser'):
-        self._set_main_parser(main)
-        self._mapping = InternalSTIX2Mapping
+class ExternalSTIX2CampaignMapping(STIX2CampaignMapping, ExternalSTIX2Mapping):
+    pass
+
+
+class ExternalSTIX2CampaignConverter(
+        STIX2CampaignConverter, ExternalSTIX2Converter):
+    _mapping = ExternalSTIX2CampaignMapping
+
+    def parse(self, campaign_ref: str):
+        campaign = self.main_parser._get_stix_object(campaign_ref)
+        self._parse_galaxy(campaign)
+
+
+class InternalSTIX2CampaignMapping(STIX2CampaignMapping, InternalSTIX2Mapping):
+    pass
+
+
+class InternalSTIX2CampaignConverter(
+        STIX2CampaignConverter, InternalSTIX2Converter):
+    _mapping = InternalSTIX2CampaignMapping
 
     def parse(self, campaign_ref: str):
         campaign = self.main_parser._get_stix_object(campaign_ref)
+        # Campaigns exported from galaxy clusters carry the galaxy labels
+        if any(label.startswith('misp:galaxy-type=')
+               for label in campaign.labels):
+            self._parse_galaxy(campaign)
+            return
         attribute = self._create_attribute_dict(campaign)
         attribute['value'] = campaign.name
         self.main_parser._add_misp_attribute(attribute, campaign)
@@ -12,11 +12,7 @@ from abc import ABCMeta
 from pymisp import MISPGalaxyCluster
 from stix2.v20.sdo import CourseOfAction as CourseOfAction_v20
 from stix2.v21.sdo import CourseOfAction as CourseOfAction_v21
-from typing import Optional, TYPE_CHECKING, Union
-
-if TYPE_CHECKING:
-    from ..external_stix2_to_misp import ExternalSTIX2toMISPParser
-    from ..internal_stix2_to_misp import InternalSTIX2toMISPParser
+from typing import Optional, Union
 
 _COURSE_OF_ACTION_TYPING = Union[
     CourseOfAction_v20, CourseOfAction_v21
@@ -47,9 +43,7 @@ class STIX2CourseOfActionConverter(STIX2Converter, metaclass=ABCMeta):
 
 class ExternalSTIX2CourseOfActionConverter(
         STIX2CourseOfActionConverter, ExternalSTIX2Converter):
-    def __init__(self, main: 'ExternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = ExternalSTIX2Mapping
+    _mapping = ExternalSTIX2Mapping
 
     def parse(self, course_of_action_ref: str):
         course_of_action = self.main_parser._get_stix_object(
@@ -77,9 +71,7 @@ class InternalSTIX2CourseOfActionMapping(InternalSTIX2Mapping):
 
 class InternalSTIX2CourseOfActionConverter(
         STIX2CourseOfActionConverter, InternalSTIX2Converter):
-    def __init__(self, main: 'InternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = InternalSTIX2CourseOfActionMapping
+    _mapping = InternalSTIX2CourseOfActionMapping
 
     def parse(self, course_of_action_ref: str):
         course_of_action = self.main_parser._get_stix_object(
@@ -18,14 +18,11 @@ from .stix2mapping import (
     ExternalSTIX2Mapping, InternalSTIX2Mapping, STIX2Mapping)
 from abc import ABCMeta
 from collections import defaultdict
+from io import BytesIO
 from pymisp import MISPObject
 from stix2.v21.sdo import Indicator
 from stix2patterns.inspector import _PatternData as PatternData
-from typing import TYPE_CHECKING, Tuple, Union
-
-if TYPE_CHECKING:
-    from ..external_stix2_to_misp import ExternalSTIX2toMISPParser
-    from ..internal_stix2_to_misp import InternalSTIX2toMISPParser
+from typing import Tuple, Union
 
 
 class STIX2IndicatorMapping(STIX2Mapping, metaclass=ABCMeta):
@@ -290,9 +287,7 @@ class ExternalSTIX2IndicatorMapping(
 
 class ExternalSTIX2IndicatorConverter(
         STIX2IndicatorConverter, ExternalSTIX2Converter):
-    def __init__(self, main: 'ExternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = ExternalSTIX2IndicatorMapping
+    _mapping = ExternalSTIX2IndicatorMapping
 
     def parse(self, indicator_ref: str):
         indicator = self.main_parser._get_stix_object(indicator_ref)
@@ -338,11 +333,13 @@ class ExternalSTIX2IndicatorConverter(
 
     def _compile_stix_pattern(
             self, indicator: _INDICATOR_TYPING) -> PatternData:
-        try:
-            self._pattern_parser.handle_indicator(indicator)
-        except AttributeError:
-            self._pattern_parser = STIX2PatternParser()
-            self._pattern_parser.handle_indicator(indicator)
+        self.main_parser.stats.count('patterns')
+        with self.main_parser.stats.timer('patterns'):
+            try:
+                self._pattern_parser.handle_indicator(indicator)
+            except AttributeError:
+                self._pattern_parser = STIX2PatternParser()
+                self._pattern_parser.handle_indicator(indicator)
         if not self._pattern_parser.valid:
             raise InvalidSTIXPatternError(indicator.pattern)
         return self._pattern_parser.pattern
@@ -1354,6 +1351,21 @@ class InternalSTIX2IndicatorMapping(
     def credential_pattern_mapping(cls, field: str) -> Union[dict, None]:
         return cls.credential_object_mapping().get(field)
 
+    @classmethod
+    def dispatch_mappings(cls) -> dict:
+        mappings = super().dispatch_mappings()
+        # The other MISP objects are exported as STIX objects of their own
+        # type and converted back by the matching converters
+        object_features = (
+            feature for feature in mappings['objects'].values()
+            if feature.startswith('_object_from_')
+        )
+        mappings['indicators'] = {
+            feature: f'{feature}_indicator' for feature
+            in (*cls.__attributes_mapping.values(), *object_features)
+        }
+        return mappings
+
     @classmethod
     def domain_ip_pattern_mapping(cls, field: str) -> Union[dict, None]:
         return cls.domain_ip_object_mapping().get(field)
@@ -1463,9 +1475,11 @@ class InternalSTIX2IndicatorMapping(
 
 class InternalSTIX2IndicatorConverter(
         STIX2IndicatorConverter, InternalSTIX2Converter):
-    def __init__(self, main: 'InternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = InternalSTIX2IndicatorMapping
+    _dispatch_tables = Mapping(
+        **InternalSTIX2Converter._dispatch_tables,
+        _indicator_handlers=('indicators',)
+    )
+    _mapping = InternalSTIX2IndicatorMapping
 
     def parse(self, indicator_ref: str):
         indicator = self.main_parser._get_stix_object(indicator_ref)
@@ -1475,12 +1489,11 @@ class InternalSTIX2IndicatorConverter(
             )
         except UndefinedSTIXObjectError as error:
             raise UndefinedIndicatorError(error)
-        try:
-            parser = getattr(self, f"{feature}_indicator")
-        except AttributeError:
+        parser = self._indicator_handlers.get(feature)
+        if parser is None:
             raise UnknownParsingFunctionError(f"{feature}_indicator")
         try:
-            parser(indicator)
+            parser(self, indicator)
         except AttributeFromPatternParsingError as error:
             self.main_parser._attribute_from_pattern_parsing_error(error)
         except Exception as exception:
@@ -1500,12 +1513,13 @@ class InternalSTIX2IndicatorConverter(
     def _attribute_from_attachment_indicator(
             self, indicator: _INDICATOR_TYPING):
         attribute = self._create_attribute_dict(indicator)
-        pattern = indicator.pattern[1:-1]
-        if ' AND ' in pattern:
-            pattern, data_pattern = pattern.split(' AND ')
-            attribute['data'] = self._extract_value_from_pattern(
-                data_pattern
+        pattern, *data_patterns = indicator.pattern[1:-1].split(' AND ')
+        if data_patterns:
+            data = self._fetch_payload_from_features(
+                dict(map(self._extract_features_from_pattern, data_patterns))
             )
+            if data is not None:
+                attribute['data'] = data
         attribute['value'] = self._extract_value_from_pattern(pattern)
         self.main_parser._add_misp_attribute(attribute, indicator)
 
@@ -1553,17 +1567,16 @@ class InternalSTIX2IndicatorConverter(
     def _attribute_from_malware_sample_indicator(
             self, indicator: _INDICATOR_TYPING):
         attribute = self._create_attribute_dict(indicator)
-        pattern = indicator.pattern[1:-1]
-        filename_pattern, md5_pattern, *pattern = pattern.split(' AND ')
-        filename_value = self._extract_value_from_pattern(
-            filename_pattern
-        )
-        md5_value = self._extract_value_from_pattern(md5_pattern)
-        attribute['value'] = f'{filename_value}|{md5_value}'
-        if pattern:
-            attribute['data'] = self._extract_value_from_pattern(
-                pattern[0]
+        features = dict(
+            map(
+                self._extract_features_from_pattern,
+                indicator.pattern[1:-1].split(' AND ')
             )
+        )
+        attribute['value'] = f"{features['name']}|{features['hashes.MD5']}"
+        data = self._fetch_payload_from_features(features)
+        if data is not None:
+            attribute['data'] = data
         self.main_parser._add_misp_attribute(attribute, indicator)
 
     def _attribute_from_patterning_language_indicator(
@@ -1761,8 +1774,9 @@ class InternalSTIX2IndicatorConverter(
         if attachments:
             for attachment in attachments:
                 attribute = {'value': attachment['content_ref.x_misp_filename']}
-                if 'content_ref.payload_bin' in attachment:
-                    attribute['data'] = attachment['content_ref.payload_bin']
+                data = self._fetch_payload_from_features(attachment)
+                if data is not None:
+                    attribute['data'] = data
                 if 'content_ref.hashes.MD5' in attachment:
                     attribute.update(
                         {
@@ -1898,7 +1912,7 @@ class InternalSTIX2IndicatorConverter(
         for pattern in indicator.pattern[1:-1].split(' AND '):
             feature, value = self._extract_features_from_pattern(pattern)
             if 'content_ref.' in feature:
-                attachment[feature.split('.')[-1]] = value
+                attachment[feature] = value
                 continue
             misp_object.add_attribute(
                 **{'value': value, **self._mapping.lnk_pattern_mapping(feature)}
@@ -1907,10 +1921,12 @@ class InternalSTIX2IndicatorConverter(
             attribute = {
                 'type': 'malware-sample',
                 'object_relation': 'malware-sample',
-                'value': f"{attachment['x_misp_filename']}|{attachment['MD5']}"
+                'value': f"{attachment['content_ref.x_misp_filename']}|"
+                         f"{attachment['content_ref.hashes.MD5']}"
             }
-            if 'payload_bin' in attachment:
-                attribute['data'] = attachment['payload_bin']
+            data = self._fetch_payload_from_features(attachment)
+            if data is not None:
+                attribute['data'] = data
             misp_object.add_attribute(**attribute)
         self.main_parser._add_misp_object(misp_object, indicator)
 
@@ -2229,6 +2245,14 @@ class InternalSTIX2IndicatorConverter(
         identifier, value = pattern.split(' = ')
         return identifier.split(':')[1], value.strip("'")
 
+    def _fetch_payload_from_features(
+            self, features: dict) -> Union[BytesIO, str, None]:
+        if 'content_ref.payload_bin' in features:
+            return features['content_ref.payload_bin']
+        sha256_hash = features.get("content_ref.hashes.'SHA-256'")
+        if sha256_hash is not None:
+            return self.main_parser._load_payload(sha256_hash)
+
     @staticmethod
     def _get_contained_value(first_value: str, second_value: str) -> Tuple[str]:
         if first_value in second_value:
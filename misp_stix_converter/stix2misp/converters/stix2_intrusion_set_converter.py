@@ -12,11 +12,7 @@ from abc import ABCMeta
 from pymisp import MISPGalaxyCluster
 from stix2.v20.sdo import IntrusionSet as IntrusionSet_v20
 from stix2.v21.sdo import IntrusionSet as IntrusionSet_v21
-from typing import Optional, TYPE_CHECKING, Union
-
-if TYPE_CHECKING:
-    from ..external_stix2_to_misp import ExternalSTIX2toMISPParser
-    from ..internal_stix2_to_misp import InternalSTIX2toMISPParser
+from typing import Optional, Union
 
 _INTRUSION_SET_TYPING = Union[
     IntrusionSet_v20, IntrusionSet_v21
@@ -66,9 +62,7 @@ class ExternalSTIX2IntrusionSetMapping(
 
 class ExternalSTIX2IntrusionSetConverter(
         STIX2IntrusionSetConverter, ExternalSTIX2Converter):
-    def __init__(self, main: 'ExternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = ExternalSTIX2IntrusionSetMapping
+    _mapping = ExternalSTIX2IntrusionSetMapping
 
     def parse(self, intrusion_set_ref: str):
         intrusion_set = self.main_parser._get_stix_object(intrusion_set_ref)
@@ -100,9 +94,7 @@ class InternalSTIX2IntrusionSetMapping(
 
 class InternalSTIX2IntrusionSetConverter(
         STIX2IntrusionSetConverter, InternalSTIX2Converter):
-    def __init__(self, main: 'InternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = InternalSTIX2IntrusionSetMapping
+    _mapping = InternalSTIX2IntrusionSetMapping
 
     def parse(self, intrusion_set_ref: str):
         intrusion_set = self.main_parser._get_stix_object(intrusion_set_ref)
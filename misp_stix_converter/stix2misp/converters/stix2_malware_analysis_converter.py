@@ -49,9 +49,10 @@ class STIX2MalwareAnalysisMapping(STIX2Mapping):
 
 
 class STIX2MalwareAnalysisConverter(STIX2Converter, metaclass=ABCMeta):
+    _mapping = STIX2MalwareAnalysisMapping
+
     def __init__(self, main: _MAIN_PARSER_TYPING):
         self._set_main_parser(main)
-        self._mapping = STIX2MalwareAnalysisMapping
 
     def parse(self, malware_analysis_ref: str):
         malware_analysis = self.main_parser._get_stix_object(
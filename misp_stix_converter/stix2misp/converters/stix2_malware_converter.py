@@ -122,9 +122,10 @@ class ExternalSTIX2MalwareMapping(STIX2MalwareMapping, ExternalSTIX2Mapping):
 
 class ExternalSTIX2MalwareConverter(
         STIX2MalwareConverter, ExternalSTIX2Converter):
+    _mapping = ExternalSTIX2MalwareMapping
+
     def __init__(self, main: 'ExternalSTIX2toMISPParser'):
         super().__init__(main)
-        self._mapping = ExternalSTIX2MalwareMapping
         self._converter = ExternalSTIX2SampleObservableConverter(self)
 
     def parse(self, malware_ref: str):
@@ -195,9 +196,10 @@ class InternalSTIX2MalwareMapping(STIX2MalwareMapping, InternalSTIX2Mapping):
 
 class InternalSTIX2MalwareConverter(
         STIX2MalwareConverter, InternalSTIX2Converter):
+    _mapping = InternalSTIX2MalwareMapping
+
     def __init__(self, main: 'InternalSTIX2toMISPParser'):
         super().__init__(main)
-        self._mapping = InternalSTIX2MalwareMapping
         self._converter = InternalSTIX2SampleObservableConverter(self)
 
     def parse(self, malware_ref: str):
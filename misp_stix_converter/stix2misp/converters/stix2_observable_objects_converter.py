@@ -35,9 +35,10 @@ _OBSERVABLE_TYPING = Union[
 
 
 class STIX2ObservableObjectConverter(STIX2ObservableConverter):
+    _mapping = ExternalSTIX2ObservableMapping
+
     def __init__(self, main: 'ExternalSTIX2toMISPParser'):
         self._set_main_parser(main)
-        self._mapping = ExternalSTIX2ObservableMapping
 
     def _create_misp_attribute(
             self, attribute_type: str, observable: DomainName,
@@ -328,13 +329,16 @@ class STIX2ObservableObjectConverter(STIX2ObservableConverter):
         return misp_object
 
     def _parse_ip_addresses_belonging_to_AS(self, AS_id: str):
-        for content in self.main_parser._observable.values():
+        references = self.main_parser._fetch_referencing_observables(
+            'belongs_to_refs', AS_id
+        )
+        for reference in references:
+            content = self.main_parser._observable[reference]
             observable = content['observable']
             if observable.type not in ('ipv4-addr', 'ipv6-addr'):
                 continue
-            if AS_id in getattr(observable, 'belongs_to_refs', []):
-                content['used'][self.event_uuid] = True
-                yield super()._parse_ip_belonging_to_AS_observable(observable)
+            content['used'][self.event_uuid] = True
+            yield super()._parse_ip_belonging_to_AS_observable(observable)
 
     def _parse_ip_address_observable_object(
             self, ip_address_ref: str) -> _MISP_CONTENT_TYPING:
@@ -662,12 +666,8 @@ class STIX2SampleObservableConverter(
 
 
 class ExternalSTIX2SampleObservableConverter(STIX2SampleObservableConverter):
-    def __init__(self, main: 'ExternalSTIX2MalwareConverter'):
-        super().__init__(main)
-        self._mapping = ExternalSTIX2ObservableMapping
+    _mapping = ExternalSTIX2ObservableMapping
 
 
 class InternalSTIX2SampleObservableConverter(STIX2SampleObservableConverter):
-    def __init__(self, main: 'InternalSTIX2MalwareConverter'):
-        super().__init__(main)
-        self._mapping = InternalSTIX2ObservableMapping
+    _mapping = InternalSTIX2ObservableMapping
@@ -12,11 +12,7 @@ from abc import ABCMeta
 from pymisp import MISPGalaxyCluster
 from stix2.v20.sdo import ThreatActor as ThreatActor_v20
 from stix2.v21.sdo import ThreatActor as ThreatActor_v21
-from typing import Optional, TYPE_CHECKING, Union
-
-if TYPE_CHECKING:
-    from ..external_stix2_to_misp import ExternalSTIX2toMISPParser
-    from ..internal_stix2_to_misp import InternalSTIX2toMISPParser
+from typing import Optional, Union
 
 _THREAT_ACTOR_TYPING = Union[
     ThreatActor_v20, ThreatActor_v21
@@ -72,9 +68,7 @@ class ExternalSTIX2ThreatActorMapping(
 
 class ExternalSTIX2ThreatActorConverter(
         STIX2ThreatActorConverter, ExternalSTIX2Converter):
-    def __init__(self, main: 'ExternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = ExternalSTIX2ThreatActorMapping
+    _mapping = ExternalSTIX2ThreatActorMapping
 
     def parse(self, threat_actor_ref: str):
         threat_actor = self.main_parser._get_stix_object(threat_actor_ref)
@@ -88,9 +82,7 @@ class InternalSTIX2ThreatActorMapping(
 
 class InternalSTIX2ThreatActorConverter(
         STIX2ThreatActorConverter, InternalSTIX2Converter):
-    def __init__(self, main: 'InternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = InternalSTIX2ThreatActorMapping
+    _mapping = InternalSTIX2ThreatActorMapping
 
     def parse(self, threat_actor_ref: str):
         threat_actor = self.main_parser._get_stix_object(threat_actor_ref)
@@ -12,11 +12,7 @@ from abc import ABCMeta
 from pymisp import MISPGalaxyCluster
 from stix2.v20.sdo import Tool as Tool_v20
 from stix2.v21.sdo import Tool as Tool_v21
-from typing import Optional, TYPE_CHECKING, Union
-
-if TYPE_CHECKING:
-    from ..external_stix2_to_misp import ExternalSTIX2toMISPParser
-    from ..internal_stix2_to_misp import InternalSTIX2toMISPParser
+from typing import Optional, Union
 
 _TOOL_TYPING = Union[
     Tool_v20, Tool_v21
@@ -68,10 +64,8 @@ class ExternalSTIX2ToolMapping(
 
 class ExternalSTIX2ToolConverter(
         STIX2ToolConverter, ExternalSTIX2Converter):
-    def __init__(self, main: 'ExternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = ExternalSTIX2ToolMapping
-    
+    _mapping = ExternalSTIX2ToolMapping
+
     def parse(self, tool_ref: str):
         tool = self.main_parser._get_stix_object(tool_ref)
         self._parse_galaxy(tool)
@@ -94,10 +88,8 @@ class InternalSTIX2ToolMapping(
 
 class InternalSTIX2ToolConverter(
         STIX2ToolConverter, InternalSTIX2Converter):
-    def __init__(self, main: 'InternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = InternalSTIX2ToolMapping
-    
+    _mapping = InternalSTIX2ToolMapping
+
     def parse(self, tool_ref: str):
         tool = self.main_parser._get_stix_object(tool_ref)
         feature = self._handle_mapping_from_labels(tool.labels, tool.id)
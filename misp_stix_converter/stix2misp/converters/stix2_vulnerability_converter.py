@@ -12,11 +12,7 @@ from abc import ABCMeta
 from pymisp import MISPGalaxyCluster
 from stix2.v20.sdo import Vulnerability as Vulnerability_v20
 from stix2.v21.sdo import Vulnerability as Vulnerability_v21
-from typing import Optional, TYPE_CHECKING, Union
-
-if TYPE_CHECKING:
-    from ..external_stix2_to_misp import ExternalSTIX2toMISPParser
-    from ..internal_stix2_to_misp import InternalSTIX2toMISPParser
+from typing import Optional, Union
 
 _VULNERABILITY_TYPING = Union[
     Vulnerability_v20, Vulnerability_v21
@@ -62,9 +58,7 @@ class ExternalSTIX2VulnerabilityMapping(
 
 class ExternalSTIX2VulnerabilityConverter(
         STIX2VulnerabilityConverter, ExternalSTIX2Converter):
-    def __init__(self, main: 'ExternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = ExternalSTIX2VulnerabilityMapping
+    _mapping = ExternalSTIX2VulnerabilityMapping
 
     def parse(self, vulnerability_ref: str):
         vulnerability = self.main_parser._get_stix_object(vulnerability_ref)
@@ -95,9 +89,7 @@ class InternalSTIX2VulnerabilityMapping(
 
 class InternalSTIX2VulnerabilityConverter(
         STIX2VulnerabilityConverter, InternalSTIX2Converter):
-    def __init__(self, main: 'InternalSTIX2toMISPParser'):
-        super().__init__(main)
-        self._mapping = InternalSTIX2VulnerabilityMapping
+    _mapping = InternalSTIX2VulnerabilityMapping
 
     def parse(self, vulnerability_ref: str):
         vulnerability = self.main_parser._get_stix_object(vulnerability_ref)
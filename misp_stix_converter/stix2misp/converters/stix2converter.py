@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from ... import Mapping
+from ...misp_stix_dispatch import set_dispatch_tables
 from ..exceptions import (
     ObjectRefLoadingError, ObjectTypeLoadingError, UndefinedSTIXObjectError)
 from abc import ABCMeta
@@ -35,6 +37,10 @@ _SDO_TYPING = Union[
 
 
 class STIX2Converter(metaclass=ABCMeta):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        set_dispatch_tables(cls)
+
     def _set_main_parser(self, main: _MAIN_PARSER_TYPING):
         self.__main_parser = main
 
@@ -212,6 +218,9 @@ class STIX2Converter(metaclass=ABCMeta):
 
 
 class ExternalSTIX2Converter(STIX2Converter, metaclass=ABCMeta):
+    _dispatch_tables = Mapping(
+        _galaxy_handlers=('galaxy_features', '_parse_galaxy')
+    )
 
     def parse(self, stix_object_ref: str):
         stix_object = self.main_parser._get_stix_object(stix_object_ref)
@@ -298,9 +307,9 @@ class ExternalSTIX2Converter(STIX2Converter, metaclass=ABCMeta):
             misp_event_uuid = self.event_uuid
             clusters[stix_object.id]['used'][misp_event_uuid] = False
         else:
-            feature = f'_parse_galaxy_{self.main_parser.galaxy_feature}'
-            clusters[stix_object.id] = getattr(self, feature)(
-                stix_object, object_type or stix_object.type
+            parser = self._galaxy_handlers[self.main_parser.galaxy_feature]
+            clusters[stix_object.id] = parser(
+                self, stix_object, object_type or stix_object.type
             )
 
     def _parse_galaxy_as_container(self, stix_object: _GALAXY_OBJECTS_TYPING,
@@ -377,6 +386,9 @@ class ExternalSTIX2Converter(STIX2Converter, metaclass=ABCMeta):
 
 
 class InternalSTIX2Converter(STIX2Converter, metaclass=ABCMeta):
+    _dispatch_tables = Mapping(
+        _galaxy_handlers=('galaxy_features', '_parse_galaxy')
+    )
 
     def _create_attribute_dict(self, stix_object: _SDO_TYPING) -> dict:
         attribute = {}
@@ -453,8 +465,8 @@ class InternalSTIX2Converter(STIX2Converter, metaclass=ABCMeta):
             misp_event_uuid = self.event_uuid
             clusters[stix_object.id]['used'][misp_event_uuid] = False
         else:
-            feature = f'_parse_galaxy_{self.main_parser.galaxy_feature}'
-            clusters[stix_object.id] = getattr(self, feature)(stix_object)
+            parser = self._galaxy_handlers[self.main_parser.galaxy_feature]
+            clusters[stix_object.id] = parser(self, stix_object)
 
     def _parse_galaxy_as_container(
             self, stix_object: _GALAXY_OBJECTS_TYPING) -> dict:
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from ... import Mapping
+from ..stix2_mapping import STIX2toMISPMapping
 from abc import ABCMeta
 from typing import Union
 
@@ -467,6 +468,12 @@ class STIX2Mapping:
     def description_attribute(cls) -> dict:
         return cls.__description_attribute
 
+    @classmethod
+    def dispatch_mappings(cls) -> dict:
+        return {
+            'galaxy_features': STIX2toMISPMapping.galaxy_features_mapping()
+        }
+
     @classmethod
     def domain_attribute(cls) -> dict:
         return cls.__domain_attribute
@@ -1523,6 +1530,14 @@ class InternalSTIX2Mapping(STIX2Mapping):
     def dash_meta_fields(cls) -> tuple:
         return cls.__dash_meta_fields
 
+    @classmethod
+    def dispatch_mappings(cls) -> dict:
+        return {
+            **super().dispatch_mappings(),
+            'attributes': cls.__attributes_mapping,
+            'objects': cls.__objects_mapping
+        }
+
     @classmethod
     def domain_ip_object_mapping(cls) -> dict:
         return cls.__domain_ip_object_mapping
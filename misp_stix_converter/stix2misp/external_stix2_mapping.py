@@ -518,6 +518,17 @@ class ExternalSTIX2toMISPMapping(STIX2toMISPMapping):
     def directory_object_mapping(cls) -> dict:
         return cls.__directory_object_mapping
 
+    @classmethod
+    def dispatch_mappings(cls) -> dict:
+        return {
+            **super().dispatch_mappings(),
+            'observable_objects': {
+                observable_types: f'_parse_{feature}_observable_objects'
+                for observable_types, feature
+                in cls.__observable_mapping.items()
+            }
+        }
+
     @classmethod
     def domain_ip_pattern_mapping(cls, field) -> Union[dict, None]:
         return cls.__domain_ip_pattern_mapping.get(field)
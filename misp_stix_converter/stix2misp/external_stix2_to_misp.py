@@ -17,6 +17,7 @@ from .converters import (
     ExternalSTIX2ThreatActorConverter, ExternalSTIX2ToolConverter,
     ExternalSTIX2VulnerabilityConverter)
 from .stix2_pattern_parser import STIX2PatternParser
+from .. import Mapping
 from .stix2_to_misp import (
     STIX2toMISPParser, _COURSE_OF_ACTION_TYPING, _GALAXY_OBJECTS_TYPING,
     _IDENTITY_TYPING, _NETWORK_TRAFFIC_TYPING, _OBSERVABLE_TYPING,
@@ -49,7 +50,8 @@ from stix2.v21.sdo import (
     CourseOfAction as CourseOfAction_v21, Indicator as Indicator_v21, Location,
     ObservedData as ObservedData_v21, Vulnerability as Vulnerability_v21)
 from stix2patterns.inspector import _PatternData as PatternData
-from typing import Optional, Tuple, Union
+from pathlib import Path
+from typing import Callable, Optional, Tuple, Union
 
 # Useful lists
 _observable_skip_properties = (
@@ -57,6 +59,8 @@ _observable_skip_properties = (
     'encryption_algorithm', 'extensions', 'id', 'is_encrypted', 'is_multipart',
     'magic_number_hex', 'received_lines', 'sender_ref', 'spec_version', 'type'
 )
+# Only the references the converters look up from the referenced observable
+_observable_reference_features = ('belongs_to_refs',)
 _valid_pattern_assertions = ('=', 'IN', 'LIKE')
 
 # Typing definitions
@@ -129,11 +133,19 @@ _X509_TYPING = Union[
 
 
 class ExternalSTIX2toMISPParser(STIX2toMISPParser):
+    _dispatch_tables = Mapping(
+        **STIX2toMISPParser._dispatch_tables,
+        _observable_objects_handlers=('observable_objects',)
+    )
+    _mapping = ExternalSTIX2toMISPMapping
+
     def __init__(self, distribution: Optional[int] = 0,
                  sharing_group_id: Optional[int] = None,
-                 galaxies_as_tags: Optional[bool] = False):
-        super().__init__(distribution, sharing_group_id, galaxies_as_tags)
-        self._mapping = ExternalSTIX2toMISPMapping
+                 galaxies_as_tags: Optional[bool] = False,
+                 payloads_dir: Optional[Path] = None):
+        super().__init__(
+            distribution, sharing_group_id, galaxies_as_tags, payloads_dir
+        )
         # parsers
         self._attack_pattern_parser: ExternalSTIX2AttackPatternConverter
         self._campaign_parser: ExternalSTIX2CampaignConverter
@@ -149,10 +161,10 @@ class ExternalSTIX2toMISPParser(STIX2toMISPParser):
 
     @property
     def observable_object_parser(self) -> STIX2ObservableObjectConverter:
-        return getattr(
-            self, '_observable_objects_parser',
-            self._set_observable_object_parser()
-        )
+        try:
+            return self._observable_object_parser
+        except AttributeError:
+            return self._set_observable_object_parser()
 
     def _set_attack_pattern_parser(self) -> ExternalSTIX2AttackPatternConverter:
         self._attack_pattern_parser = ExternalSTIX2AttackPatternConverter(self)
@@ -209,6 +221,30 @@ class ExternalSTIX2toMISPParser(STIX2toMISPParser):
             self._observable[observable.id] = to_load
         except AttributeError:
             self._observable = {observable.id: to_load}
+        self._load_observable_references(observable)
+
+    def _load_observable_references(self, observable: _OBSERVABLE_TYPING):
+        # Reverse indexes of the references between observable objects, so the
+        # observables referencing a given one are found without going through
+        # all the loaded observables
+        try:
+            observable_references = self._observable_references
+        except AttributeError:
+            observable_references = self._observable_references = defaultdict(dict)
+        for feature in _observable_reference_features:
+            if not hasattr(observable, feature):
+                continue
+            references = getattr(observable, feature)
+            if isinstance(references, str):
+                references = (references,)
+            for reference in references:
+                observable_references[(feature, reference)][observable.id] = None
+
+    def _fetch_referencing_observables(self, feature: str, reference: str) -> tuple:
+        try:
+            return tuple(self._observable_references.get((feature, reference), {}))
+        except AttributeError:
+            return tuple()
 
     ################################################################################
     #                     MAIN STIX OBJECTS PARSING FUNCTIONS.                     #
@@ -298,21 +334,22 @@ class ExternalSTIX2toMISPParser(STIX2toMISPParser):
             except UnknownParsingFunctionError as error:
                 self._unknown_parsing_function_error(error)
 
-    def _handle_observables_mapping(self, observable_mapping: set) -> str:
+    def _handle_observables_mapping(self, observable_mapping: set) -> Callable:
         """
         Simple Observable object types handling function.
         We check if the Observable object types are actually mapped with a
         parsing function and return it, or raise an exception.
 
         :param observable_mapping: The observable types in a set
-        :returns: The feature used to identify the appropriate parsing function
+        :returns: The function parsing the Observable objects, to call with
+            the parser as first argument
         :raises: Exception when the observable types are not known
         """
         to_call = '_'.join(sorted(observable_mapping))
-        mapping = self._mapping.observable_mapping(to_call)
-        if mapping is None:
+        parser = self._observable_objects_handlers.get(to_call)
+        if parser is None:
             raise UnknownObservableMappingError(to_call)
-        return mapping
+        return parser
 
     def _handle_pattern_mapping(self, indicator: _INDICATOR_TYPING) -> str:
         """
@@ -353,6 +390,8 @@ class ExternalSTIX2toMISPParser(STIX2toMISPParser):
             for object_id in unparsed_content[observable_type]:
                 if self._observable[object_id]['used'][self.misp_event.uuid]:
                     continue
+                if self._is_unchanged(object_id):
+                    continue
                 try:
                     getattr(self.observable_object_parser, to_call)(object_id)
                 except Exception as exception:
@@ -364,8 +403,9 @@ class ExternalSTIX2toMISPParser(STIX2toMISPParser):
         if object_type is None:
             object_type = object_ref.split("--")[0]
         stix_object = self._get_stix_object(object_ref)
-        feature = f'_parse_galaxy_{self.galaxy_feature}'
-        return getattr(self, feature)(stix_object, object_type)
+        return self._galaxy_handlers[self.galaxy_feature](
+            self, stix_object, object_type
+        )
 
     def _parse_galaxy_as_container(self, stix_object: _GALAXY_OBJECTS_TYPING,
                                    object_type: str) -> dict:
@@ -487,11 +527,9 @@ class ExternalSTIX2toMISPParser(STIX2toMISPParser):
                 self._add_misp_object(misp_object, location)
             else:
                 feature = 'region' if not hasattr(location, 'country') else 'country'
-                self._clusters[location_ref] = getattr(
-                    self, f'_parse_galaxy_{self.galaxy_feature}'
-                )(
-                    location, feature
-                )
+                self._clusters[location_ref] = self._galaxy_handlers[
+                    self.galaxy_feature
+                ](self, location, feature)
 
     def _parse_observable_objects(self, observed_data: _OBSERVED_DATA_TYPING):
         """
@@ -504,13 +542,8 @@ class ExternalSTIX2toMISPParser(STIX2toMISPParser):
         observable_types = set(
             observable['type'] for observable in observed_data.objects.values()
         )
-        mapping = self._handle_observables_mapping(observable_types)
-        feature = f'_parse_{mapping}_observable_objects'
-        try:
-            parser = getattr(self, feature)
-        except AttributeError:
-            raise UnknownParsingFunctionError(feature)
-        parser(observed_data, 'objects')
+        parser = self._handle_observables_mapping(observable_types)
+        parser(self, observed_data, 'objects')
 
     def _parse_observable_refs(self, observed_data: ObservedData_v21):
         """
@@ -523,13 +556,8 @@ class ExternalSTIX2toMISPParser(STIX2toMISPParser):
         observable_types = set(
             reference.split('--')[0] for reference in observed_data.object_refs
         )
-        mapping = self._handle_observables_mapping(observable_types)
-        feature = f'_parse_{mapping}_observable_objects'
-        try:
-            parser = getattr(self, feature)
-        except AttributeError:
-            raise UnknownParsingFunctionError(feature)
-        parser(observed_data, 'object_refs')
+        parser = self._handle_observables_mapping(observable_types)
+        parser(self, observed_data, 'object_refs')
 
     def _parse_observed_data(self, observed_data_ref: str):
         """
@@ -859,13 +887,14 @@ class ExternalSTIX2toMISPParser(STIX2toMISPParser):
             )
         )
         feature = 'observable' if len(as_ids) > 1 else 'single_observable'
+        ip_addresses = defaultdict(dict)
+        for ref, observable_object in observable_objects.items():
+            if observable_object.type in ('ipv4-addr', 'ipv6-addr'):
+                for as_id in getattr(observable_object, 'belongs_to_refs', []):
+                    ip_addresses[as_id][ref] = None
         for as_id in as_ids:
             autonomous_system = observable_objects[as_id]
-            references = tuple(
-                ref for ref, observable_object in observable_objects.items()
-                if observable_object.type in ('ipv4-addr', 'ipv6-addr')
-                and as_id in getattr(observable_object, 'belongs_to_refs', [])
-            )
+            references = tuple(ip_addresses[as_id])
             if references:
                 reference = f"{as_id} - {' - '.join(sorted(references))}"
                 misp_object = self._parse_asn_observable_object(
@@ -1890,11 +1919,13 @@ class ExternalSTIX2toMISPParser(STIX2toMISPParser):
 
     def _compile_stix_pattern(
             self, indicator: _INDICATOR_TYPING) -> PatternData:
-        try:
-            self._pattern_parser.handle_indicator(indicator)
-        except AttributeError:
-            self._pattern_parser = STIX2PatternParser()
-            self._pattern_parser.handle_indicator(indicator)
+        self.stats.count('patterns')
+        with self.stats.timer('patterns'):
+            try:
+                self._pattern_parser.handle_indicator(indicator)
+            except AttributeError:
+                self._pattern_parser = STIX2PatternParser()
+                self._pattern_parser.handle_indicator(indicator)
         if not self._pattern_parser.valid:
             raise InvalidSTIXPatternError(indicator.pattern)
         return self._pattern_parser.pattern
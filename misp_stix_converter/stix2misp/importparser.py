@@ -2,11 +2,13 @@
 #!/usr/bin/env python3
 
 import json
-import subprocess
 import traceback
 from .exceptions import UnavailableGalaxyResourcesError
+from ..misp_stix_dispatch import set_dispatch_tables
+from ..misp_stix_stats import ConversionStats, _disabled_stats, _stats_typing
 from abc import ABCMeta
 from collections import defaultdict
+from hashlib import sha256
 from pathlib import Path
 from pymisp import AbstractMISP, MISPEvent, MISPObject
 from stix2.v20.sdo import Indicator as Indicator_v20
@@ -20,6 +22,9 @@ _INDICATOR_TYPING = Union[
     Indicator_v21
 ]
 _DATA_PATH = Path(__file__).parents[1].resolve() / 'data'
+# Galaxy definitions, synonyms mapping and misp-galaxy fingerprint, loaded at
+# most once per interpreter and shared by every parser instance
+_GALAXY_RESOURCES: dict = {}
 
 _VALID_DISTRIBUTIONS = (0, 1, 2, 3, 4)
 _RFC_VERSIONS = (1, 3, 4, 5)
@@ -48,6 +53,11 @@ class STIXtoMISPParser(metaclass=ABCMeta):
             self._galaxies: dict = {}
             self.__galaxy_feature = 'as_container'
         self.__replacement_uuids: dict = {}
+        self.__stats: _stats_typing = _disabled_stats
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        set_dispatch_tables(cls)
 
     def _sanitise_distribution(self, distribution: int) -> int:
         try:
@@ -124,6 +134,10 @@ class STIXtoMISPParser(metaclass=ABCMeta):
     def sharing_group_id(self) -> Union[int, None]:
         return self.__sharing_group_id
 
+    @property
+    def stats(self) -> _stats_typing:
+        return self.__stats
+
     @property
     def synonyms_mapping(self) -> dict:
         try:
@@ -136,6 +150,39 @@ class STIXtoMISPParser(metaclass=ABCMeta):
     def warnings(self) -> defaultdict:
         return self.__warnings
 
+    def enable_profiling(self, stats: Optional[ConversionStats] = None):
+        """
+        Records the time spent in the conversion stages and the number of
+        converted objects, then available with `stats.to_dict()`.
+
+        :param stats: Existing stats to record the figures in, e.g. to
+            include the time spent loading a file before the parser is created
+        """
+        self.__stats = ConversionStats() if stats is None else stats
+
+    def reset(self):
+        """
+        Re-initialises the conversion state, so the same parser instance can
+        convert any number of STIX contents, one after the other:
+
+            parser.load_stix_bundle(bundle)
+            parser.parse_stix_bundle()
+            misp_events = parser.misp_events
+            errors, warnings = parser.errors, parser.warnings
+            parser.reset()
+
+        The results, errors and warnings must be fetched before the reset.
+        The settings, the converters, the galaxies resources and the stats,
+        which then sum up all the conversions, are kept.
+        """
+        self._clusters = {}
+        self.__errors = defaultdict(set)
+        self.__warnings = defaultdict(set)
+        if not self.galaxies_as_tags:
+            self._galaxies = {}
+        self.__replacement_uuids = {}
+        self.__dict__.pop('_identifier', None)
+
     ############################################################################
     #                   ERRORS AND WARNINGS HANDLING METHODS                   #
     ############################################################################
@@ -260,6 +307,12 @@ class STIXtoMISPParser(metaclass=ABCMeta):
         tb = ''.join(traceback.format_tb(exception.__traceback__))
         return f'{tb}{exception.__str__()}'
 
+    def _payload_loading_error(self, sha256_hash: str, exception: Exception):
+        self.__errors[self._identifier].add(
+            f'Unable to load the payload with SHA-256 hash {sha256_hash}: '
+            f'{exception}'
+        )
+
     def _sharing_group_id_error(self, exception: Exception):
         self.__errors['init'].add(
             f'Wrong sharing group id format: {exception}'
@@ -370,82 +423,107 @@ class STIXtoMISPParser(metaclass=ABCMeta):
     #          SYNONYMS TO GALAXY TAG NAMES MAPPING HANDLING METHODS.          #
     ############################################################################
 
-    def __check_fingerprint(self):
-        latest_fingerprint = self.__get_misp_galaxy_fingerprint()
+    @staticmethod
+    def __check_fingerprint(resource: str):
+        latest_fingerprint = STIXtoMISPParser.__get_misp_galaxy_fingerprint()
         if latest_fingerprint is not None:
-            fingerprint_path = _DATA_PATH / 'synonymsToTagNames.fingerprint'
+            fingerprint_path = _DATA_PATH / f'{resource}.fingerprint'
             with open(fingerprint_path, 'wt', encoding='utf-8') as f:
                 f.write(latest_fingerprint)
 
-    def __galaxies_up_to_date(self) -> bool:
-        fingerprint_path = _DATA_PATH / 'synonymsToTagNames.fingerprint'
-        if not fingerprint_path.exists():
-            return False
-        latest_fingerprint = self.__get_misp_galaxy_fingerprint()
+    @staticmethod
+    def __galaxies_up_to_date(resource: str) -> bool:
+        latest_fingerprint = STIXtoMISPParser.__get_misp_galaxy_fingerprint()
         if latest_fingerprint is None:
+            # Without the misp-galaxy content, the resource already generated
+            # is the best we can get
+            return True
+        fingerprint_path = _DATA_PATH / f'{resource}.fingerprint'
+        if not fingerprint_path.exists():
             return False
         with open(fingerprint_path, 'rt', encoding='utf-8') as f:
             fingerprint = f.read()
         return fingerprint == latest_fingerprint
 
     def __get_galaxy_definitions(self):
-        definitions_path = _DATA_PATH / 'galaxyDefinitions.json'
-        if not definitions_path.exists() or not self.__galaxies_up_to_date():
-            data_path = _DATA_PATH / 'misp-galaxy' / 'galaxies'
-            if not data_path.exists():
-                raise UnavailableGalaxyResourcesError(data_path)
-            definitions = {}
-            for filename in data_path.glob('*.json'):
-                with open(filename, 'rt', encoding='utf-8') as f:
-                    galaxy_definition = json.loads(f.read())
-                definitions[galaxy_definition['type']] = galaxy_definition
-            with open(definitions_path, 'wt', encoding='utf-8') as f:
-                f.write(json.dumps(definitions))
-            self.__check_fingerprint()
-        with open(definitions_path, 'rt', encoding='utf-8') as f:
-            self.__galaxy_definitions = json.load(f)
+        if 'galaxyDefinitions' not in _GALAXY_RESOURCES:
+            _GALAXY_RESOURCES['galaxyDefinitions'] = self.__load_galaxy_resource(
+                'galaxyDefinitions', self.__generate_galaxy_definitions
+            )
+        self.__galaxy_definitions = _GALAXY_RESOURCES['galaxyDefinitions']
+
+    @staticmethod
+    def __generate_galaxy_definitions() -> dict:
+        data_path = _DATA_PATH / 'misp-galaxy' / 'galaxies'
+        if not data_path.exists():
+            raise UnavailableGalaxyResourcesError(data_path)
+        definitions = {}
+        for filename in data_path.glob('*.json'):
+            with open(filename, 'rt', encoding='utf-8') as f:
+                galaxy_definition = json.loads(f.read())
+            definitions[galaxy_definition['type']] = galaxy_definition
+        return definitions
 
     @staticmethod
-    def __get_misp_galaxy_fingerprint():
+    def __generate_synonyms_mapping() -> dict:
+        data_path = _DATA_PATH / 'misp-galaxy' / 'clusters'
+        if not data_path.exists():
+            raise UnavailableGalaxyResourcesError(data_path)
+        synonyms_mapping = defaultdict(list)
+        for filename in data_path.glob('*.json'):
+            with open(filename, 'rt', encoding='utf-8') as f:
+                cluster_definition = json.loads(f.read())
+            cluster_type = f"misp-galaxy:{cluster_definition['type']}"
+            for cluster in cluster_definition['values']:
+                value = cluster['value']
+                tag_name = f'{cluster_type}="{value}"'
+                synonyms_mapping[value].append(tag_name)
+                if cluster.get('meta', {}).get('synonyms') is not None:
+                    for synonym in cluster['meta']['synonyms']:
+                        synonyms_mapping[synonym].append(tag_name)
+        return synonyms_mapping
+
+    @staticmethod
+    def __get_misp_galaxy_fingerprint() -> Union[str, None]:
+        # The misp-galaxy content does not change while the converter runs, so
+        # its fingerprint is computed once and shared by all the parsers
+        if 'fingerprint' in _GALAXY_RESOURCES:
+            return _GALAXY_RESOURCES['fingerprint']
         galaxy_path = _DATA_PATH / 'misp-galaxy'
-        status = subprocess.Popen(
-            [
-                'git',
-                'submodule',
-                'status',
-                galaxy_path
-            ],
-            stdout=subprocess.PIPE
-        )
-        stdout = status.communicate()[0]
-        try:
-            return stdout.decode().split(' ')[1]
-        except IndexError:
-            return None
+        filenames = sorted(
+            filename for feature in ('clusters', 'galaxies')
+            for filename in (galaxy_path / feature).glob('*.json')
+        )
+        fingerprint = None
+        if filenames:
+            digest = sha256()
+            for filename in filenames:
+                stat = filename.stat()
+                digest.update(
+                    f'{filename.relative_to(galaxy_path)}:{stat.st_size}:'
+                    f'{stat.st_mtime_ns}\n'.encode()
+                )
+            fingerprint = digest.hexdigest()
+        _GALAXY_RESOURCES['fingerprint'] = fingerprint
+        return fingerprint
 
     def __get_synonyms_mapping(self):
-        synonyms_path = _DATA_PATH / 'synonymsToTagNames.json'
-        if not synonyms_path.exists() or not self.__galaxies_up_to_date():
-            data_path = _DATA_PATH / 'misp-galaxy' / 'clusters'
-            if not data_path.exists():
-                raise UnavailableGalaxyResourcesError(data_path)
-            synonyms_mapping = defaultdict(list)
-            for filename in data_path.glob('*.json'):
-                with open(filename, 'rt', encoding='utf-8') as f:
-                    cluster_definition = json.loads(f.read())
-                cluster_type = f"misp-galaxy:{cluster_definition['type']}"
-                for cluster in cluster_definition['values']:
-                    value = cluster['value']
-                    tag_name = f'{cluster_type}="{value}"'
-                    synonyms_mapping[value].append(tag_name)
-                    if cluster.get('meta', {}).get('synonyms') is not None:
-                        for synonym in cluster['meta']['synonyms']:
-                            synonyms_mapping[synonym].append(tag_name)
-            with open(synonyms_path, 'wt', encoding='utf-8') as f:
-                f.write(json.dumps(synonyms_mapping))
-            self.__check_fingerprint()
-        with open(synonyms_path, 'rt', encoding='utf-8') as f:
-            self.__synonyms_mapping = json.load(f)
+        if 'synonymsToTagNames' not in _GALAXY_RESOURCES:
+            _GALAXY_RESOURCES['synonymsToTagNames'] = self.__load_galaxy_resource(
+                'synonymsToTagNames', self.__generate_synonyms_mapping
+            )
+        self.__synonyms_mapping = _GALAXY_RESOURCES['synonymsToTagNames']
+
+    def __load_galaxy_resource(self, resource: str, generate) -> dict:
+        resource_path = _DATA_PATH / f'{resource}.json'
+        if not resource_path.exists() or not self.__galaxies_up_to_date(resource):
+            content = generate()
+            with open(resource_path, 'wt', encoding='utf-8') as f:
+                f.write(json.dumps(content))
+            self.__check_fingerprint(resource)
+            return dict(content)
+        with open(resource_path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
 
     ############################################################################
     #                     UUID SANITATION HANDLING METHODS                     #
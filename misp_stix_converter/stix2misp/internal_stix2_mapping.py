@@ -11,6 +11,22 @@ class InternalSTIX2toMISPMapping(STIX2toMISPMapping):
         *STIX2toMISPMapping.object_type_refs_to_skip(),
         *STIX2toMISPMapping.observable_object_types()
     )
+    __stix_object_loading_mapping = Mapping(
+        **{
+            'x-misp-attribute': '_load_custom_attribute',
+            'x-misp-galaxy-cluster': '_load_custom_galaxy_cluster',
+            'x-misp-object': '_load_custom_object',
+            'x-misp-opinion': '_load_custom_opinion'
+        }
+    )
+    __stix_to_misp_mapping = Mapping(
+        **{
+            'note': '_parse_note',
+            'x-misp-attribute': '_parse_custom_attribute',
+            'x-misp-galaxy-cluster': '_parse_custom_galaxy_cluster',
+            'x-misp-object': '_parse_custom_object'
+        }
+    )
     __attributes_mapping = {
         'vulnerability': '_parse_vulnerability_attribute'
     }
@@ -1071,6 +1087,18 @@ class InternalSTIX2toMISPMapping(STIX2toMISPMapping):
     def credential_pattern_mapping(cls, field) -> Union[dict, None]:
         return cls.__credential_object_mapping.get(field)
 
+    @classmethod
+    def dispatch_mappings(cls) -> dict:
+        mappings = super().dispatch_mappings()
+        mappings['stix_object_loading'] = {
+            **mappings['stix_object_loading'],
+            **cls.__stix_object_loading_mapping
+        }
+        mappings['stix_to_misp'] = {
+            **mappings['stix_to_misp'], **cls.__stix_to_misp_mapping
+        }
+        return mappings
+
     @classmethod
     def domain_ip_object_mapping(cls) -> dict:
         return cls.__domain_ip_object_mapping
@@ -1327,6 +1355,20 @@ class InternalSTIX2toMISPMapping(STIX2toMISPMapping):
     def src_as_attribute(cls) -> dict:
         return cls.__src_as_attribute
 
+    @classmethod
+    def stix_object_loading_mapping(cls, field: str) -> Union[str, None]:
+        return (
+            cls.__stix_object_loading_mapping.get(field)
+            or super().stix_object_loading_mapping(field)
+        )
+
+    @classmethod
+    def stix_to_misp_mapping(cls, field: str) -> Union[str, None]:
+        return (
+            cls.__stix_to_misp_mapping.get(field)
+            or super().stix_to_misp_mapping(field)
+        )
+
     @classmethod
     def tcp_flags_attribute(cls) -> dict:
         return cls.__tcp_flags_attribute
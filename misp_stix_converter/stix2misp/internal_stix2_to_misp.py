@@ -20,17 +20,21 @@ from .stix2_to_misp import (
     _OBSERVED_DATA_TYPING, _SDO_TYPING, _VULNERABILITY_TYPING)
 from collections import defaultdict
 from copy import deepcopy
+from io import BytesIO
 from pymisp import MISPGalaxy, MISPGalaxyCluster, MISPObject, MISPSighting
 from stix2.v20.observables import (
-    Process as Process_v20, WindowsPEBinaryExt as WindowsExtension_v20)
+    Artifact as Artifact_v20, Process as Process_v20,
+    WindowsPEBinaryExt as WindowsExtension_v20)
 from stix2.v20.sdo import (
     CustomObject as CustomObject_v20, Malware as Malware_v20,
     ObservedData as ObservedData_v20, Tool as Tool_v20)
 from stix2.v21.observables import (
-    DomainName, Process as Process_v21, WindowsPEBinaryExt as WindowsExtension_v21)
+    Artifact as Artifact_v21, DomainName, Process as Process_v21,
+    WindowsPEBinaryExt as WindowsExtension_v21)
 from stix2.v21.sdo import (
     CustomObject as CustomObject_v21, Indicator as Indicator_v21, Location,
     Malware as Malware_v21, ObservedData as ObservedData_v21, Tool as Tool_v21)
+from pathlib import Path
 from typing import Optional, Union
 
 _attribute_additional_fields = (
@@ -40,6 +44,10 @@ _attribute_additional_fields = (
     'to_ids',
     'uuid'
 )
+_ARTIFACT_TYPING = Union[
+    Artifact_v20,
+    Artifact_v21
+]
 _CUSTOM_TYPING = Union[
     CustomObject_v20,
     CustomObject_v21
@@ -59,11 +67,15 @@ _SCRIPT_TYPING = Union[
 
 
 class InternalSTIX2toMISPParser(STIX2toMISPParser):
+    _mapping = InternalSTIX2toMISPMapping
+
     def __init__(self, distribution: Optional[int] = 0,
                  sharing_group_id: Optional[int] = None,
-                 galaxies_as_tags: Optional[bool] = False):
-        super().__init__(distribution, sharing_group_id, galaxies_as_tags)
-        self._mapping = InternalSTIX2toMISPMapping
+                 galaxies_as_tags: Optional[bool] = False,
+                 payloads_dir: Optional[Path] = None):
+        super().__init__(
+            distribution, sharing_group_id, galaxies_as_tags, payloads_dir
+        )
         # parsers
         self._attack_pattern_parser: InternalSTIX2AttackPatternConverter
         self._campaign_parser: InternalSTIX2CampaignConverter
@@ -413,8 +425,9 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
         if stix_object.id in self._clusters:
             self._clusters[stix_object.id]['used'][self.misp_event.uuid] = False
         else:
-            feature = f'_parse_galaxy_{self.galaxy_feature}'
-            self._clusters[stix_object.id] = getattr(self, feature)(stix_object)
+            self._clusters[stix_object.id] = self._galaxy_handlers[
+                self.galaxy_feature
+            ](self, stix_object)
 
     def _parse_galaxy_as_container(
             self, stix_object: _GALAXY_OBJECTS_TYPING) -> dict:
@@ -575,14 +588,13 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
         attribute['value'] = self._parse_AS_value(observable.number)
         self._add_misp_attribute(attribute, observed_data)
 
-    @staticmethod
-    def _attribute_from_attachment_observable(observables: tuple) -> dict:
+    def _attribute_from_attachment_observable(self, observables: tuple) -> dict:
         attribute = {}
         for observable in observables:
             if observable.type == 'file':
                 attribute['value'] = observable.name
             else:
-                attribute['data'] = observable.payload_bin
+                attribute['data'] = self._fetch_artifact_payload(observable)
         return attribute
 
     def _attribute_from_attachment_observable_v20(
@@ -800,14 +812,13 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
             network, address.value, observed_data
         )
 
-    @staticmethod
-    def _attribute_from_malware_sample_observable(observables: tuple) -> dict:
+    def _attribute_from_malware_sample_observable(self, observables: tuple) -> dict:
         attribute = {}
         for observable in observables:
             if observable.type == 'file':
                 attribute['value'] = f"{observable.name}|{observable.hashes['MD5']}"
             else:
-                attribute['data'] = observable.payload_bin
+                attribute['data'] = self._fetch_artifact_payload(observable)
         return attribute
 
     def _attribute_from_malware_sample_observable_v20(
@@ -1193,7 +1204,7 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
                 artifact = observables[observable.content_ref]
                 attribute = {
                     'value': artifact.x_misp_filename,
-                    'data': artifact.payload_bin
+                    'data': self._fetch_artifact_payload(artifact)
                 }
                 if getattr(artifact, 'hashes', {}).get('MD5') is not None:
                     attribute.update(
@@ -1463,7 +1474,7 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
                     'type': 'malware-sample',
                     'object_relation': 'malware-sample',
                     'value': f"{artifact.x_misp_filename}|{artifact.hashes['MD5']}",
-                    'data': artifact.payload_bin
+                    'data': self._fetch_artifact_payload(artifact)
                 }
                 if hasattr(artifact, 'id'):
                     attribute.update(
@@ -2734,6 +2745,12 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
                 galaxy_name = label.split('=')[1].strip('"')
         return galaxy_type, galaxy_name
 
+    def _fetch_artifact_payload(self, artifact: _ARTIFACT_TYPING) -> Union[BytesIO, str, None]:
+        if hasattr(artifact, 'payload_bin'):
+            return artifact.payload_bin
+        if 'SHA-256' in getattr(artifact, 'hashes', {}):
+            return self._load_payload(artifact.hashes['SHA-256'])
+
     @staticmethod
     def _fetch_main_process(observables: dict) -> _PROCESS_TYPING:
         if tuple(observable.type for observable in observables.values()).count('process') == 1:
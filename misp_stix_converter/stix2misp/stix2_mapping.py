@@ -15,6 +15,11 @@ class STIX2toMISPMapping(metaclass=ABCMeta):
             '2': '_parse_bundle_with_multiple_reports'
         }
     )
+    # Parsing methods suffixed with the galaxy feature of the parser
+    __galaxy_features_mapping = Mapping(
+        as_container='{}_as_container',
+        as_tag_names='{}_as_tag_names'
+    )
     __observable_object_types = (
         'network-traffic',
         'file',
@@ -68,10 +73,6 @@ class STIX2toMISPMapping(metaclass=ABCMeta):
             'threat-actor': '_load_threat_actor',
             'tool': '_load_tool',
             'vulnerability': '_load_vulnerability',
-            'x-misp-attribute': '_load_custom_attribute',
-            'x-misp-galaxy-cluster': '_load_custom_galaxy_cluster',
-            'x-misp-object': '_load_custom_object',
-            'x-misp-opinion': '_load_custom_opinion',
             **dict.fromkeys(
                 __observable_object_types,
                 '_load_observable_object'
@@ -90,17 +91,12 @@ class STIX2toMISPMapping(metaclass=ABCMeta):
             'location': '_parse_location',
             'malware': '_parse_malware',
             'malware-analysis': '_parse_malware_analysis',
-            'marking-definition': '_parse_marking_definition',
-            'note': '_parse_note',
             'observed-data': '_parse_observed_data',
             # 'report': '_parse_report',
             'sighting': '_parse_sighting',
             'threat-actor': '_parse_threat_actor',
             'tool': '_parse_tool',
-            'vulnerability': '_parse_vulnerability',
-            'x-misp-attribute': '_parse_custom_attribute',
-            'x-misp-galaxy-cluster': '_parse_custom_galaxy_cluster',
-            'x-misp-object': '_parse_custom_object'
+            'vulnerability': '_parse_vulnerability'
         }
     )
 
@@ -678,6 +674,14 @@ class STIX2toMISPMapping(metaclass=ABCMeta):
     def disabled_attribute(cls) -> dict:
         return cls.__disabled_attribute
 
+    @classmethod
+    def dispatch_mappings(cls) -> dict:
+        return {
+            'galaxy_features': cls.__galaxy_features_mapping,
+            'stix_object_loading': cls.__stix_object_loading_mapping,
+            'stix_to_misp': cls.__stix_to_misp_mapping
+        }
+
     @classmethod
     def display_name_attribute(cls) -> dict:
         return cls.__display_name_attribute
@@ -742,6 +746,10 @@ class STIX2toMISPMapping(metaclass=ABCMeta):
     def first_packet_seen_attribute(cls) -> dict:
         return cls.__first_packet_seen_attribute
 
+    @classmethod
+    def galaxy_features_mapping(cls) -> dict:
+        return cls.__galaxy_features_mapping
+
     @classmethod
     def group_id_attribute(cls) -> dict:
         return cls.__group_id_attribute
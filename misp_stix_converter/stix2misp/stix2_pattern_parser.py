@@ -1,31 +1,69 @@
 import ast
+import re
 import stix2patterns.v20.object_validator as validator_v20
 import stix2patterns.v21.object_validator as validator_v21
 from antlr4 import CommonTokenStream, InputStream, ParseTreeWalker
+from functools import lru_cache
 from stix2.v20.sdo import Indicator as Indicator_v20
 from stix2.v21.sdo import Indicator as Indicator_v21
 from stix2patterns.exceptions import STIXPatternErrorListener
+from stix2patterns.inspector import INDEX_STAR, _PatternData as PatternData
 from stix2patterns.v20.grammars.STIXPatternLexer import STIXPatternLexer as lexer_v20
 from stix2patterns.v20.grammars.STIXPatternParser import STIXPatternParser as parser_v20
 from stix2patterns.v20.inspector import InspectionListener as inspector_v20
 from stix2patterns.v21.grammars.STIXPatternLexer import STIXPatternLexer as lexer_v21
 from stix2patterns.v21.grammars.STIXPatternParser import STIXPatternParser as parser_v21
 from stix2patterns.v21.inspector import InspectionListener as inspector_v21
+from types import MappingProxyType
 from typing import Union
 
+# Threat feeds repeat the same pattern shapes over and over, so the results
+# of the patterns compilation are cached for all the parsers
+_PATTERN_CACHE_SIZE = 4096
+_STIX_PATTERN_GRAMMARS = {
+    '20': (lexer_v20, parser_v20, inspector_v20, validator_v20),
+    '21': (lexer_v21, parser_v21, inspector_v21, validator_v21)
+}
+
+# Fast path for the patterns made of simple equality comparisons joined with
+# AND, within one or several observations also joined with AND.
+# Any other construction (OR, qualifiers, FOLLOWEDBY, parentheses, other
+# operators or literals) is left to the ANTLR grammar.
+_IDENTIFIER = r"[a-zA-Z_][a-zA-Z0-9_]*"
+_STRING_LITERAL = r"'(?:[^'\\]|\\['\\])*'"
+_WHITESPACES = r"[ \t\r\n]*"
+_FAST_PATTERN_TOKEN = re.compile(
+    rf"{_WHITESPACES}(?:(?P<open>\[)|(?P<close>\])|"
+    r"(?P<and>AND)(?![a-zA-Z0-9_-])|"
+    rf"(?P<comparison>(?P<type>[a-zA-Z_][a-zA-Z0-9_-]*):"
+    rf"(?P<path>(?:{_IDENTIFIER}|{_STRING_LITERAL})"
+    rf"(?:\.(?:{_IDENTIFIER}|{_STRING_LITERAL})|\[(?:\*|0|[1-9][0-9]*)\])*)"
+    rf"{_WHITESPACES}(?P<operator>!?=){_WHITESPACES}"
+    rf"(?P<value>{_STRING_LITERAL}|0|[1-9][0-9]*)(?![a-zA-Z0-9_.'])))"
+)
+_FAST_PATTERN_PATH = re.compile(
+    rf"\.?(?:(?P<identifier>{_IDENTIFIER})|(?P<string>{_STRING_LITERAL}))|"
+    r"\[(?P<index>\*|[0-9]+)\]"
+)
+_PATTERN_KEYWORDS = (
+    'AND', 'OR', 'NOT', 'FOLLOWEDBY', 'LIKE', 'MATCHES', 'ISSUPERSET',
+    'ISSUBSET', 'EXISTS', 'LAST', 'IN', 'START', 'STOP', 'SECONDS', 'true',
+    'false', 'WITHIN', 'REPEATS', 'TIMES'
+)
+
 
 class STIX2PatternParser:
     def __init__(self):
-        self.__pattern_data: dict
+        self.__pattern_data: PatternData
         self.__valid: bool
         self.__valid_versions = ('2.0', '2.1')
 
     @property
-    def errors(self):
+    def errors(self) -> tuple:
         return self.__errors
 
     @property
-    def pattern(self):
+    def pattern(self) -> PatternData:
         return self.__pattern_data
 
     @property
@@ -36,90 +74,166 @@ class STIX2PatternParser:
     def valid_versions(self) -> tuple:
         return self.__valid_versions
 
+    @staticmethod
+    def cache_clear():
+        _compile_stix_pattern.cache_clear()
+
+    @staticmethod
+    def cache_info():
+        """Hits, misses, maximum size and current size of the patterns cache."""
+        return _compile_stix_pattern.cache_info()
+
     def handle_indicator(
             self, indicator: Union[Indicator_v20, Indicator_v21, dict]):
         version = self.__set_version(indicator.get('spec_version', '2.0'))
         getattr(self, f'_load_stix_{version}_pattern')(indicator['pattern'])
 
     def _load_stix_20_pattern(self, pattern_str: str):
-        pattern = InputStream(pattern_str)
-        parseErrListener = STIXPatternErrorListener()
-        lexer = lexer_v20(pattern)
-        lexer.removeErrorListeners()
-        stream = CommonTokenStream(lexer)
-        parser = parser_v20(stream)
-        parser.removeErrorListeners()
-        parser.addErrorListener(parseErrListener)
-        for i, lit_name in enumerate(parser.literalNames):
-            if lit_name == u"<INVALID>":
-                parser.literalNames[i] = parser.symbolicNames[i]
-        tree = parser.pattern()
-        inspection_listener = inspector_v20()
-        if len(parseErrListener.err_strings) == 0:
-            ParseTreeWalker.DEFAULT.walk(inspection_listener, tree)
-            pattern_data = inspection_listener.pattern_data()
-            obj_validator_results = validator_v20.verify_object(pattern_data)
-            if obj_validator_results:
-                parseErrListener.err_strings.extend(obj_validator_results)
-            else:
-                self.__set_pattern_data(pattern_data)
-        self.__valid = self.__parse_err_listener(parseErrListener.err_strings)
+        self.__set_compiled_pattern(*_compile_stix_pattern('20', pattern_str))
 
     def _load_stix_21_pattern(self, pattern_str: str):
-        pattern = InputStream(pattern_str)
-        parseErrListener = STIXPatternErrorListener()
-        lexer = lexer_v21(pattern)
-        lexer.removeErrorListeners()
-        stream = CommonTokenStream(lexer)
-        parser = parser_v21(stream)
-        parser.removeErrorListeners()
-        parser.addErrorListener(parseErrListener)
-        for i, lit_name in enumerate(parser.literalNames):
-            if lit_name == u"<INVALID>":
-                parser.literalNames[i] = parser.symbolicNames[i]
-        tree = parser.pattern()
-        inspection_listener = inspector_v21()
-        if len(parseErrListener.err_strings) == 0:
-            ParseTreeWalker.DEFAULT.walk(inspection_listener, tree)
-            pattern_data = inspection_listener.pattern_data()
-            obj_validator_results = validator_v21.verify_object(pattern_data)
-            if obj_validator_results:
-                parseErrListener.err_strings.extend(obj_validator_results)
-            else:
-                self.__set_pattern_data(pattern_data)
-        self.__valid = self.__parse_err_listener(parseErrListener.err_strings)
-
-    def __handle_value(
-            self, features: list, assertion: str, value: str) -> list:
-        return [
-            [
-                feature if isinstance(feature, str) else '[*]'
-                for feature in features
-            ],
-            assertion, self.__validate_value(value)
-        ]
-
-    def __parse_err_listener(self, err_listener):
-        if len(err_listener) == 0:
-            return True
-        self.__errors = err_listener
-        return False
-
-    def __set_pattern_data(self, pattern_data):
-        for key, values in pattern_data.comparisons.items():
-            pattern_data.comparisons[key] = [
-                self.__handle_value(*value) for value in values
-            ]
+        self.__set_compiled_pattern(*_compile_stix_pattern('21', pattern_str))
+
+    def __set_compiled_pattern(self, pattern_data: Union[PatternData, None],
+                               errors: tuple):
+        if errors:
+            self.__errors = errors
+            self.__valid = False
+            return
         self.__pattern_data = pattern_data
+        self.__valid = True
 
     def __set_version(self, version: str) -> str:
         if version in self.valid_versions:
             return version.replace('.', '')
         return '21'
 
-    @staticmethod
-    def __validate_value(value: str) -> Union[int, str, tuple]:
-        try:
-            return ast.literal_eval(value)
-        except ValueError:
-            return value
+
+@lru_cache(maxsize=_PATTERN_CACHE_SIZE)
+def _compile_stix_pattern(version: str, pattern_str: str) -> tuple:
+    compiled_pattern = _fast_compile_stix_pattern(version, pattern_str)
+    if compiled_pattern is not None:
+        return compiled_pattern
+    return _parse_stix_pattern(version, pattern_str)
+
+
+def _fast_compile_stix_pattern(version: str, pattern_str: str) -> Union[tuple, None]:
+    """
+    Compiles the simple patterns without the ANTLR grammar, producing the same
+    results as the inspection of the parse tree.
+    Returns None when the pattern is not simple enough to be handled here.
+    """
+    comparisons = {}
+    observation_ops = set()
+    expected = ('open',)
+    position = 0
+    while True:
+        match = _FAST_PATTERN_TOKEN.match(pattern_str, position)
+        if match is None:
+            if expected == ('and', None) and not pattern_str[position:].strip(' \t\r\n'):
+                break
+            return None
+        token = match.lastgroup
+        if token not in expected:
+            return None
+        position = match.end()
+        if token == 'open':
+            expected = ('comparison',)
+        elif token == 'comparison':
+            object_type = match.group('type')
+            object_path = _fast_compile_object_path(match.group('path'))
+            if object_type in _PATTERN_KEYWORDS or object_path is None:
+                return None
+            comparisons.setdefault(object_type, []).append(
+                (object_path, match.group('operator'), match.group('value'))
+            )
+            expected = ('and', 'close')
+        elif token == 'close':
+            expected = ('and', None)
+        elif 'close' in expected:
+            expected = ('comparison',)
+        else:
+            observation_ops.add('AND')
+            expected = ('open',)
+    validator = _STIX_PATTERN_GRAMMARS[version][-1]
+    pattern_data = PatternData(comparisons, observation_ops, set())
+    errors = validator.verify_object(pattern_data)
+    if errors:
+        return None, tuple(errors)
+    return _freeze_pattern_data(pattern_data), tuple()
+
+
+def _fast_compile_object_path(path: str) -> Union[list, None]:
+    object_path = []
+    for match in _FAST_PATTERN_PATH.finditer(path):
+        if match.group('identifier') is not None:
+            identifier = match.group('identifier')
+            if identifier in _PATTERN_KEYWORDS:
+                return None
+            object_path.append(identifier)
+        elif match.group('string') is not None:
+            object_path.append(
+                match.group('string')[1:-1].replace("\\'", "'").replace('\\\\', '\\')
+            )
+        elif match.group('index') == '*':
+            object_path.append(INDEX_STAR)
+        else:
+            object_path.append(int(match.group('index')))
+    return object_path
+
+
+def _parse_stix_pattern(version: str, pattern_str: str) -> tuple:
+    lexer_class, parser_class, inspector_class, validator = _STIX_PATTERN_GRAMMARS[version]
+    pattern = InputStream(pattern_str)
+    parseErrListener = STIXPatternErrorListener()
+    lexer = lexer_class(pattern)
+    lexer.removeErrorListeners()
+    stream = CommonTokenStream(lexer)
+    parser = parser_class(stream)
+    parser.removeErrorListeners()
+    parser.addErrorListener(parseErrListener)
+    for i, lit_name in enumerate(parser.literalNames):
+        if lit_name == u"<INVALID>":
+            parser.literalNames[i] = parser.symbolicNames[i]
+    tree = parser.pattern()
+    inspection_listener = inspector_class()
+    if len(parseErrListener.err_strings) == 0:
+        ParseTreeWalker.DEFAULT.walk(inspection_listener, tree)
+        pattern_data = inspection_listener.pattern_data()
+        obj_validator_results = validator.verify_object(pattern_data)
+        if obj_validator_results:
+            parseErrListener.err_strings.extend(obj_validator_results)
+        else:
+            return _freeze_pattern_data(pattern_data), tuple()
+    return None, tuple(parseErrListener.err_strings)
+
+
+def _freeze_pattern_data(pattern_data: PatternData) -> PatternData:
+    # The same compiled pattern is shared by every indicator with the same
+    # pattern, so the converters get a read-only view of it
+    comparisons = {
+        key: tuple(_handle_value(*value) for value in values)
+        for key, values in pattern_data.comparisons.items()
+    }
+    return PatternData(
+        MappingProxyType(comparisons),
+        frozenset(pattern_data.observation_ops),
+        frozenset(pattern_data.qualifiers)
+    )
+
+
+def _handle_value(features: list, assertion: str, value: str) -> tuple:
+    return (
+        tuple(
+            feature if isinstance(feature, str) else '[*]'
+            for feature in features
+        ),
+        assertion, _validate_value(value)
+    )
+
+
+def _validate_value(value: str) -> Union[int, str, tuple]:
+    try:
+        return ast.literal_eval(value)
+    except ValueError:
+        return value
@@ -12,6 +12,10 @@ from .exceptions import (
     UnknownStixObjectTypeError)
 from .external_stix2_mapping import ExternalSTIX2toMISPMapping
 from .importparser import STIXtoMISPParser, _INDICATOR_TYPING
+from .. import Mapping
+from ..misp_stix_payloads import PayloadStore, PayloadStoreError
+from ..misp_stix_seen import SeenObjectStore
+from ..misp_stix_streaming import JSONStreamReader
 from .internal_stix2_mapping import InternalSTIX2toMISPMapping
 from .converters import (
     ExternalSTIX2AttackPatternConverter, ExternalSTIX2MalwareAnalysisConverter,
@@ -27,6 +31,8 @@ from .converters import (
 from abc import ABCMeta
 from collections import defaultdict
 from datetime import datetime
+from io import BytesIO
+from pathlib import Path
 from pymisp import (
     AbstractMISP, MISPEvent, MISPAttribute, MISPGalaxy, MISPGalaxyCluster,
     MISPObject, MISPSighting)
@@ -60,7 +66,7 @@ from stix2.v21.sdo import (
     Vulnerability as Vulnerability_v21)
 from stix2.v21.sro import (
     Relationship as Relationship_v21, Sighting as Sighting_v21)
-from typing import Optional, Union
+from typing import Iterable, Optional, Union
 
 # Some constants
 _LOADED_FEATURES = (
@@ -81,6 +87,18 @@ _LOADED_FEATURES = (
     '_tool',
     '_vulnerability'
 )
+# Loaded STIX objects only converted as referenced by other objects
+_REFERENCED_FEATURES = (
+    '_custom_galaxy_cluster',
+    '_grouping',
+    '_location',
+    '_marking_definition',
+    '_observable',
+    '_observable_references',
+    '_relationship',
+    '_report',
+    '_sighting'
+)
 _MISP_OBJECTS_PATH = AbstractMISP().misp_objects_path
 
 # Typing
@@ -190,10 +208,32 @@ _VULNERABILITY_TYPING = Union[
 
 
 class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
+    _dispatch_tables = Mapping(
+        _attribute_relationships_handlers=(
+            'galaxy_features', '_parse_attribute_relationships'
+        ),
+        _galaxies_handlers=('galaxy_features', '_parse_galaxies'),
+        _galaxy_handlers=('galaxy_features', '_parse_galaxy'),
+        _object_relationships_handlers=(
+            'galaxy_features', '_parse_object_relationships'
+        ),
+        _stix_object_handlers=('stix_to_misp',),
+        _stix_object_loading_handlers=('stix_object_loading',)
+    )
+
     def __init__(self, distribution: int, sharing_group_id: Union[int, None],
-                 galaxies_as_tags: bool):
+                 galaxies_as_tags: bool, payloads_dir: Optional[Path] = None):
         super().__init__(distribution, sharing_group_id, galaxies_as_tags)
         self._creators: set = set()
+        self.__payloads = None
+        if payloads_dir is not None:
+            self.__payloads = PayloadStore(payloads_dir)
+        self.__seen_store: Union[SeenObjectStore, None] = None
+        self.__unchanged: set = set()
+        self.__updated_refs: set = set()
+        self.__seen_objects: list = []
+        self.__failed_objects: set = set()
+        self.__converted_objects: list = []
         self._mapping: Union[
             ExternalSTIX2toMISPMapping, InternalSTIX2toMISPMapping
         ]
@@ -219,28 +259,65 @@ class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
         self._tool: dict
         self._vulnerability: dict
 
+    def enable_incremental_import(self, seen_store: SeenObjectStore):
+        """
+        Only converts the STIX objects that are not in the store yet, or with
+        a different `modified` timestamp, so the MISP events only hold the
+        attributes and objects new or updated since the previous imports.
+        The unchanged objects related to, or sighted by, new or updated ones
+        are converted again, to attach the references, galaxies and sightings.
+        The objects converted without error are only recorded in the store
+        with `commit_seen`, once the MISP events are saved, so the objects
+        that failed to convert, or whose results were lost, are converted
+        again by the next imports.
+
+        :param seen_store: Store of the STIX objects already imported
+        """
+        self.__seen_store = seen_store
+
+    def commit_seen(self):
+        """
+        Records in the store of the incremental import the STIX objects
+        converted by the last call of `parse_stix_bundle`.
+        """
+        if self.__converted_objects:
+            self.__seen_store.add(self.__converted_objects)
+            self.__converted_objects = []
+
     def load_stix_bundle(self, bundle: Union[Bundle_v20, Bundle_v21]):
         self._identifier = bundle.id
         self.__stix_version = getattr(bundle, 'spec_version', '2.1')
-        n_report = 0
-        for stix_object in bundle.objects:
-            try:
-                object_type = stix_object.type
-            except AttributeError:
-                object_type = stix_object['type']
-            if object_type in ('grouping', 'report'):
-                n_report += 1
-            feature = self._mapping.stix_object_loading_mapping(object_type)
-            if feature is None:
-                self._unable_to_load_stix_object_type_error(object_type)
-                continue
-            if hasattr(stix_object, 'created_by_ref'):
-                self._creators.add(stix_object.created_by_ref)
-            try:
-                getattr(self, feature)(stix_object)
-            except AttributeError as exception:
-                self._critical_error(exception)
-        self.__n_report = 2 if n_report >= 2 else n_report
+        with self.stats.timer('loading'):
+            self._load_stix_objects(bundle.objects)
+
+    def load_stix_file(self, filename: Union[Path, str]):
+        """
+        Streaming alternative to `load_stix_bundle`.
+        The STIX objects of the Bundle are read from the file and loaded one
+        at a time, so the raw content of the file is never entirely held in
+        memory.
+
+        :param filename: The path of the file containing the STIX 2 Bundle
+        """
+        self._identifier = str(filename)
+        self.__stix_version = '2.1'
+        version = None
+        with self.stats.timer('loading'), open(filename, 'rt', encoding='utf-8') as f:
+            reader = JSONStreamReader(f)
+            for key in reader.iter_keys():
+                if key == 'objects':
+                    self._load_stix_objects(
+                        stix2_parser(
+                            stix_object, allow_custom=True,
+                            interoperability=True, version=version
+                        ) for stix_object in reader.iter_items()
+                    )
+                    continue
+                value = reader.read_value()
+                if key == 'id':
+                    self._identifier = value
+                elif key == 'spec_version':
+                    self.__stix_version = version = value
 
     def parse_stix_bundle(self, single_event: Optional[bool] = False):
         self.__single_event = single_event
@@ -250,22 +327,37 @@ class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
             sys.exit(
                 'No STIX content loaded, please run `load_stix_content` first.'
             )
+        if self.__unchanged:
+            self.__handle_unchanged_references()
         try:
-            getattr(self, feature)()
+            with self.stats.timer('conversion'):
+                getattr(self, feature)()
         except (
             SynonymsResourceJSONError,
             UnavailableGalaxyResourcesError,
             UnavailableSynonymsResourceError
         ) as error:
             self._critical_error(error)
-        for feature in ('_grouping', 'report', *_LOADED_FEATURES):
-            if hasattr(self, feature):
-                setattr(self, feature, {})
+        else:
+            self.__converted_objects = [
+                (object_id, modified)
+                for object_id, modified in self.__seen_objects
+                if object_id not in self.__failed_objects
+            ]
+        self._release_stix_objects()
 
     def parse_stix_content(
-            self, filename: str, single_event: Optional[bool] = False):
+            self, filename: str, single_event: Optional[bool] = False,
+            streaming: Optional[bool] = False):
+        if streaming:
+            try:
+                self.load_stix_file(filename)
+            except Exception as exception:
+                sys.exit(exception)
+            self.parse_stix_bundle(single_event)
+            return
         try:
-            with open(filename, 'rt', encoding='utf-8') as f:
+            with self.stats.timer('file_loading'), open(filename, 'rt', encoding='utf-8') as f:
                 bundle = stix2_parser(
                     f.read(), allow_custom=True, interoperability=True
                 )
@@ -275,28 +367,49 @@ class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
         del bundle
         self.parse_stix_bundle(single_event)
 
+    def reset(self):
+        super().reset()
+        self._creators = set()
+        self._release_stix_objects()
+        self.__converted_objects = []
+        for feature in ('misp_event', 'misp_events', 'n_report',
+                        'single_event', 'stix_version'):
+            self.__dict__.pop(f'_STIX2toMISPParser__{feature}', None)
+
+    def _release_stix_objects(self):
+        # The loaded STIX objects are removed once converted, so the next
+        # bundle is loaded from scratch
+        for feature in (*_LOADED_FEATURES, *_REFERENCED_FEATURES):
+            self.__dict__.pop(feature, None)
+        self.__unchanged = set()
+        self.__updated_refs = set()
+        self.__seen_objects = []
+        self.__failed_objects = set()
+
     ################################################################################
     #                                  PROPERTIES                                  #
     ################################################################################
 
     @property
     def attack_pattern_parser(self) -> _ATTACK_PATTERN_PARSER_TYPING:
-        return getattr(
-            self, '_attack_pattern_parser', self._set_attack_pattern_parser()
-        )
+        try:
+            return self._attack_pattern_parser
+        except AttributeError:
+            return self._set_attack_pattern_parser()
 
     @property
     def campaign_parser(self) -> _CAMPAIGN_PARSER_TYPING:
-        return getattr(
-            self, '_campaign_parser', self._set_campaign_parser()
-        )
+        try:
+            return self._campaign_parser
+        except AttributeError:
+            return self._set_campaign_parser()
 
     @property
     def course_of_action_parser(self) -> _COURSE_OF_ACTION_PARSER_TYPING:
-        return getattr(
-            self, '_course_of_action_parser',
-            self._set_course_of_action_parser()
-        )
+        try:
+            return self._course_of_action_parser
+        except AttributeError:
+            return self._set_course_of_action_parser()
 
     @property
     def generic_info_field(self) -> str:
@@ -304,24 +417,31 @@ class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
 
     @property
     def indicator_parser(self) -> _INDICATOR_PARSER_TYPING:
-        return getattr(self, '_indicator_parser', self._set_indicator_parser())
+        try:
+            return self._indicator_parser
+        except AttributeError:
+            return self._set_indicator_parser()
 
     @property
     def intrusion_set_parser(self) -> _INTRUSION_SET_PARSER_TYPING:
-        return getattr(
-            self, '_intrusion_set_parser', self._set_intrusion_set_parser()
-        )
+        try:
+            return self._intrusion_set_parser
+        except AttributeError:
+            return self._set_intrusion_set_parser()
 
     @property
     def malware_analysis_parser(self) -> _MALWARE_ANALYSIS_PARSER_TYPING:
-        return getattr(
-            self, '_malware_analysis_parser',
-            self._set_malware_analysis_parser()
-        )
+        try:
+            return self._malware_analysis_parser
+        except AttributeError:
+            return self._set_malware_analysis_parser()
 
     @property
     def malware_parser(self) -> _MALWARE_PARSER_TYPING:
-        return getattr(self, '_malware_parser', self._set_malware_parser())
+        try:
+            return self._malware_parser
+        except AttributeError:
+            return self._set_malware_parser()
 
     @property
     def misp_event(self) -> MISPEvent:
@@ -333,6 +453,14 @@ class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
             self, '_STIX2toMISPParser__misp_events', self.__misp_event
         )
 
+    @property
+    def payloads(self) -> Union[PayloadStore, None]:
+        return self.__payloads
+
+    @property
+    def seen_store(self) -> Union[SeenObjectStore, None]:
+        return self.__seen_store
+
     @property
     def single_event(self) -> bool:
         return self.__single_event
@@ -343,24 +471,89 @@ class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
 
     @property
     def threat_actor_parser(self) -> _THREAT_ACTOR_PARSER_TYPING:
-        return getattr(
-            self, '_threat_actor_parser', self._set_threat_actor_parser()
-        )
+        try:
+            return self._threat_actor_parser
+        except AttributeError:
+            return self._set_threat_actor_parser()
 
     @property
     def tool_parser(self) -> _TOOL_PARSER_TYPING:
-        return getattr(self, '_tool_parser', self._set_tool_parser())
+        try:
+            return self._tool_parser
+        except AttributeError:
+            return self._set_tool_parser()
 
     @property
     def vulnerability_parser(self) -> _VULNERABILITY_PARSER_TYPING:
-        return getattr(
-            self, '_vulnerability_parser', self._set_vulnerability_parser()
-        )
+        try:
+            return self._vulnerability_parser
+        except AttributeError:
+            return self._set_vulnerability_parser()
 
     ################################################################################
     #                        STIX OBJECTS LOADING FUNCTIONS                        #
     ################################################################################
 
+    def _load_stix_objects(self, stix_objects: Iterable):
+        n_report = 0
+        for stix_object in stix_objects:
+            self.stats.count('stix_objects')
+            try:
+                object_type = stix_object.type
+            except AttributeError:
+                object_type = stix_object['type']
+            if object_type in ('grouping', 'report'):
+                n_report += 1
+            loader = self._stix_object_loading_handlers.get(object_type)
+            if loader is None:
+                self._unable_to_load_stix_object_type_error(object_type)
+                continue
+            if hasattr(stix_object, 'created_by_ref'):
+                self._creators.add(stix_object.created_by_ref)
+            try:
+                loader(self, stix_object)
+            except AttributeError as exception:
+                self._critical_error(exception)
+                continue
+            if self.seen_store is not None:
+                self.__check_seen_object(stix_object)
+        self.__n_report = 2 if n_report >= 2 else n_report
+
+    def __check_seen_object(self, stix_object):
+        # The unchanged objects are still loaded, as the new or updated ones
+        # may need them, but they are not converted
+        modified = stix_object.get('modified', stix_object.get('created', ''))
+        if not isinstance(modified, str):
+            modified = modified.isoformat()
+        if self.seen_store.seen(stix_object['id'], modified):
+            self.__unchanged.add(stix_object['id'])
+            return
+        self.__seen_objects.append((stix_object['id'], modified))
+        object_type = stix_object['type']
+        if object_type == 'relationship':
+            self.__updated_refs.update(
+                (stix_object['source_ref'], stix_object['target_ref'])
+            )
+        elif object_type == 'sighting':
+            self.__updated_refs.add(stix_object['sighting_of_ref'])
+        elif object_type == 'opinion':
+            self.__updated_refs.update(stix_object['object_refs'])
+
+    def __handle_unchanged_references(self):
+        # The references are held by the target of the relationships with
+        # MISP attributes, and the sightings by the sighted objects
+        if hasattr(self, '_relationship'):
+            updated = {
+                self._sanitise_uuid(object_id)
+                for object_id, _ in self.__seen_objects
+            }
+            for source_uuid, references in self._relationship.items():
+                if source_uuid in updated:
+                    self.__unchanged.difference_update(
+                        target_ref for target_ref, _ in references
+                    )
+        self.__unchanged.difference_update(self.__updated_refs)
+
     def _load_attack_pattern(self, attack_pattern: _ATTACK_PATTERN_TYPING):
         self._check_uuid(attack_pattern.id)
         try:
@@ -538,18 +731,18 @@ class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
         elif hasattr(self, '_sighting'):
             self._parse_sightings()
         else:
-            getattr(self, f'_parse_galaxies_{self.galaxy_feature}')()
+            with self.stats.timer('galaxies'):
+                self._galaxies_handlers[self.galaxy_feature](self)
 
     def _handle_object(self, object_type: str, object_ref: str):
-        feature = self._mapping.stix_to_misp_mapping(object_type)
-        if feature is None:
+        if self._is_unchanged(object_ref):
+            return
+        parser = self._stix_object_handlers.get(object_type)
+        if parser is None:
+            self.__failed_objects.add(object_ref)
             raise UnknownStixObjectTypeError(object_type)
         try:
-            parser = getattr(self, feature)
-        except AttributeError:
-            raise UnknownParsingFunctionError(feature)
-        try:
-            parser(object_ref)
+            parser(self, object_ref)
         except ObjectRefLoadingError as error:
             self._object_ref_loading_error(error)
         except ObjectTypeLoadingError as error:
@@ -568,6 +761,11 @@ class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
             self._unknown_parsing_function_error(error)
         except UnknownPatternTypeError as error:
             self._unknown_pattern_type_error(object_ref, error)
+        else:
+            return
+        # The objects that failed to convert are not recorded as seen, so the
+        # next incremental imports convert them again
+        self.__failed_objects.add(object_ref)
 
     def _handle_misp_event_tags(
             self, misp_event: MISPEvent, stix_object: _GROUPING_REPORT_TYPING):
@@ -582,6 +780,12 @@ class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
         if hasattr(stix_object, 'labels'):
             self._fetch_tags_from_labels(misp_event, stix_object.labels)
 
+    def _is_unchanged(self, object_ref: str) -> bool:
+        if object_ref in self.__unchanged:
+            self.stats.count('unchanged')
+            return True
+        return False
+
     def _misp_event_from_grouping(self, grouping: Grouping) -> MISPEvent:
         self.__single_event = True
         misp_event = self._create_misp_event(grouping)
@@ -957,20 +1161,16 @@ class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
     def _parse_relationships(self):
         for attribute in self.misp_event.attributes:
             if attribute.uuid in self._relationship:
-                getattr(
-                    self,
-                    f'_parse_attribute_relationships_{self.galaxy_feature}'
-                )(
-                    attribute
+                self._attribute_relationships_handlers[self.galaxy_feature](
+                    self, attribute
                 )
         for misp_object in self.misp_event.objects:
             if misp_object.uuid in self._relationship:
-                getattr(
-                    self, f'_parse_object_relationships_{self.galaxy_feature}'
-                )(
-                    misp_object
+                self._object_relationships_handlers[self.galaxy_feature](
+                    self, misp_object
                 )
-        getattr(self, f'_parse_galaxies_{self.galaxy_feature}')()
+        with self.stats.timer('galaxies'):
+            self._galaxies_handlers[self.galaxy_feature](self)
         if not self.galaxies_as_tags:
             self._parse_galaxy_relationships()
 
@@ -979,22 +1179,18 @@ class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
             self._sighting['opinion'][opinion_id] = self._parse_opinion(opinion)
         for attribute in self.misp_event.attributes:
             if attribute.uuid in self._relationship:
-                getattr(
-                    self,
-                    f'_parse_attribute_relationships_{self.galaxy_feature}'
-                )(
-                    attribute
+                self._attribute_relationships_handlers[self.galaxy_feature](
+                    self, attribute
                 )
             self._handle_attribute_sightings(attribute)
         for misp_object in self.misp_event.objects:
             if misp_object.uuid in self._relationship:
-                getattr(
-                    self, f'_parse_object_relationships_{self.galaxy_feature}'
-                )(
-                    misp_object
+                self._object_relationships_handlers[self.galaxy_feature](
+                    self, misp_object
                 )
             self._handle_object_sightings(misp_object)
-        getattr(self, f'_parse_galaxies_{self.galaxy_feature}')()
+        with self.stats.timer('galaxies'):
+            self._galaxies_handlers[self.galaxy_feature](self)
         if not self.galaxies_as_tags:
             self._parse_galaxy_relationships()
 
@@ -1022,7 +1218,8 @@ class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
             self._handle_attribute_sightings(attribute)
         for misp_object in self.misp_event.objects:
             self._handle_object_sightings(misp_object)
-        getattr(self, f'_parse_galaxies_{self.galaxy_feature}')()
+        with self.stats.timer('galaxies'):
+            self._galaxies_handlers[self.galaxy_feature](self)
 
     ################################################################################
     #                       MISP FEATURES CREATION FUNCTIONS                       #
@@ -1131,6 +1328,19 @@ class STIX2toMISPParser(STIXtoMISPParser, metaclass=ABCMeta):
                       if label.lower() != 'threat-report'):
             misp_feature.add_tag(label)
 
+    def _load_payload(self, sha256_hash: str) -> Union[BytesIO, None]:
+        # The payloads are only read from the configured directory: the URL
+        # of the Artifacts comes from the imported content and is ignored
+        if self.payloads is None:
+            self._payload_loading_error(
+                sha256_hash, 'no payloads directory is configured'
+            )
+            return
+        try:
+            return self.payloads.load(sha256_hash)
+        except PayloadStoreError as error:
+            self._payload_loading_error(sha256_hash, error)
+
     @staticmethod
     def _parse_AS_value(number: Union[int, str]) -> str:
         if isinstance(number, int) or not number.startswith('AS'):
@@ -1,15 +1,31 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import inspect
 import json
 import os
 import unittest
-from base64 import b64encode
+from base64 import b64decode, b64encode
 from collections import defaultdict
+from copy import deepcopy
 from datetime import datetime, timezone
+from hashlib import sha256
+from io import BytesIO
+from itertools import count
+from misp_stix_converter import (
+    InternalSTIX2toMISPParser, JSONSerializer, JSONSerializerError,
+    PayloadStore, PayloadStoreError, misp_collection_to_stix2, misp_to_stix2)
+from misp_stix_converter.misp2stix.misp_to_stix2 import TrustedModeError
 from pathlib import Path
 from stix.core import STIXPackage
+from stix2.exceptions import InvalidValueError
+from stix2.parsing import parse as stix2_parser
+from stix2.serialization import STIXJSONEncoder
+from stix2.utils import STIXdatetime
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
 from uuid import uuid5, UUID
+from . import test_events
 from ._test_stix import TestSTIX
 
 _DEFAULT_ORGNAME = 'MISP'
@@ -75,6 +91,271 @@ class TestCollectionSTIX2Export(TestCollectionSTIXExport):
             reference = json.loads(f.read())
         self.assertEqual(reference['objects'], to_test['objects'])
 
+    def _check_stix2_profiled_export(self, version):
+        name = 'test_events_collection'
+        output_file = self._current_path / f'{name}.json.out'
+        input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+        for arguments in ({}, {'in_memory': True}, {'workers': 2}):
+            with self.subTest(**arguments):
+                traceback = misp_collection_to_stix2(
+                    *input_files, version=version, single_output=True,
+                    output_name=output_file, profile=True, **arguments
+                )
+                self.assertEqual(traceback['results'], [output_file])
+                stats = traceback['stats']
+                self.assertEqual(
+                    stats['counters'], {'attributes': 4, 'events': 4}
+                )
+                self.assertEqual(stats['timers']['conversion']['calls'], 4)
+                self.assertIn('serialisation', stats['timers'])
+                self.assertTrue(
+                    all(timer['time'] >= 0 for timer in stats['timers'].values())
+                )
+
+    def _check_stix2_serialized_export(self, to_test_file, serializer):
+        with open(to_test_file, 'rt', encoding='utf-8') as f:
+            content = f.read()
+        self.assertEqual(content, serializer.dumps_stix(json.loads(content)))
+
+    @staticmethod
+    def _get_serializers() -> list:
+        serializers = [JSONSerializer(indent=None), JSONSerializer(indent=2)]
+        try:
+            serializers.append(JSONSerializer(indent=2, backend='orjson'))
+        except JSONSerializerError:
+            pass
+        return serializers
+
+
+class TestSTIX2PayloadsExport(unittest.TestCase):
+    _payload_events = (
+        test_events.get_event_with_attachment_attribute,
+        test_events.get_event_with_malware_sample_attribute,
+        test_events.get_event_with_file_object_with_artifact
+    )
+
+    def _check_inline_payloads_export(self, parser_class):
+        event = test_events.get_event_with_attachment_attribute()
+        attribute = event['Event']['Attribute'][0]
+        # Bigger than a single base64 encoding chunk
+        attribute['data'] = b64encode(os.urandom(500000)).decode()
+        reference = self.__export_event(parser_class(), event)
+        attribute['data'] = BytesIO(b64decode(attribute['data']))
+        self.assertEqual(self.__export_event(parser_class(), event), reference)
+
+    def _check_payloads_export(self, parser_class):
+        for get_event in self._payload_events:
+            for to_ids in (True, False):
+                event = get_event()
+                attributes = self.__get_payload_attributes(event, to_ids)
+                payloads = sorted(
+                    b64decode(attribute['data']) for attribute in attributes
+                )
+                with self.subTest(event=get_event.__name__, to_ids=to_ids):
+                    with TemporaryDirectory() as tmp_dir:
+                        content = self.__export_event(
+                            parser_class(payloads_dir=tmp_dir), event
+                        )
+                        self.assertNotIn('payload_bin', content)
+                        self.assertNotIn('file://', content)
+                        for payload in payloads:
+                            filename = Path(tmp_dir) / sha256(payload).hexdigest()
+                            if filename.exists():
+                                self.assertEqual(filename.read_bytes(), payload)
+                        parser = self.__import_bundle(content, tmp_dir)
+                        self.assertEqual(parser.errors, {})
+                        self.assertEqual(
+                            sorted(
+                                self.__get_data_value(attribute.data)
+                                for attribute in self.__get_imported_attributes(parser)
+                                if attribute.get('data')
+                            ),
+                            payloads
+                        )
+
+    def _check_payloads_loading_error(self, parser_class):
+        event = test_events.get_event_with_attachment_attribute()
+        with TemporaryDirectory() as tmp_dir:
+            content = self.__export_event(
+                parser_class(payloads_dir=tmp_dir), event
+            )
+            for filename in Path(tmp_dir).iterdir():
+                filename.write_bytes(b'corrupted payload')
+            parser = self.__import_bundle(content, tmp_dir)
+        self.__check_payload_loading_error(parser)
+
+    def _check_payloads_loading_from_url(self, parser_class):
+        event = test_events.get_event_with_attachment_attribute()
+        event['Event']['Attribute'][0]['to_ids'] = False
+        with TemporaryDirectory() as tmp_dir:
+            tmp_path = Path(tmp_dir)
+            content = self.__export_event(
+                parser_class(payloads_dir=tmp_path / 'export'), event
+            )
+            filename, = (tmp_path / 'export').iterdir()
+            # The URL given by the imported content is never followed
+            url = f'"url": "{filename.as_uri()}"'
+            content = content.replace(f'"url": "{filename.name}"', url)
+            self.assertIn(url, content)
+            for payloads_dir in (None, tmp_path / 'import'):
+                with self.subTest(payloads_dir=payloads_dir):
+                    parser = self.__import_bundle(content, payloads_dir)
+                    self.__check_payload_loading_error(parser)
+
+    def _check_payloads_loading_size_limit(self, parser_class):
+        event = test_events.get_event_with_attachment_attribute()
+        with TemporaryDirectory() as tmp_dir:
+            content = self.__export_event(
+                parser_class(payloads_dir=tmp_dir), event
+            )
+            filename, = Path(tmp_dir).iterdir()
+            with patch(
+                    'misp_stix_converter.misp_stix_payloads._MAX_PAYLOAD_SIZE',
+                    filename.stat().st_size - 1):
+                parser = self.__import_bundle(content, tmp_dir)
+        self.__check_payload_loading_error(parser)
+
+    def _check_payloads_store_hashes(self):
+        with TemporaryDirectory() as tmp_dir:
+            store = PayloadStore(Path(tmp_dir) / 'payloads')
+            sha256_hash, url = store.store(b'payload')
+            self.assertEqual(url, sha256_hash)
+            self.assertEqual(store.load(sha256_hash.upper()).getvalue(), b'payload')
+            (Path(tmp_dir) / 'secret').write_bytes(b'secret')
+            for value in ('../secret', f'../payloads/{sha256_hash}', '0' * 64):
+                with self.assertRaises(PayloadStoreError):
+                    store.load(value)
+
+    def __check_payload_loading_error(self, parser):
+        attribute = parser.misp_event.attributes[0]
+        self.assertEqual(attribute.value, 'attachment.test')
+        self.assertFalse(attribute.get('data'))
+        errors = tuple(parser.errors.values())[0]
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(
+            tuple(errors)[0].startswith('Unable to load the payload')
+        )
+
+    @staticmethod
+    def __export_event(parser, event: dict) -> str:
+        parser.parse_misp_event(deepcopy(event))
+        return json.dumps(parser.bundle, cls=STIXJSONEncoder, indent=4)
+
+    @staticmethod
+    def __get_data_value(data) -> bytes:
+        return data.getvalue() if isinstance(data, BytesIO) else b64decode(data)
+
+    @staticmethod
+    def __get_imported_attributes(parser) -> list:
+        attributes = list(parser.misp_event.attributes)
+        for misp_object in parser.misp_event.objects:
+            attributes.extend(misp_object.attributes)
+        return attributes
+
+    @staticmethod
+    def __get_payload_attributes(event: dict, to_ids: bool) -> list:
+        attributes = list(event['Event'].get('Attribute', []))
+        for misp_object in event['Event'].get('Object', []):
+            attributes.extend(misp_object['Attribute'])
+        for attribute in attributes:
+            attribute['to_ids'] = to_ids
+        return [attribute for attribute in attributes if attribute.get('data')]
+
+    @staticmethod
+    def __import_bundle(content: str, payloads_dir: str):
+        parser = InternalSTIX2toMISPParser(payloads_dir=payloads_dir)
+        parser.load_stix_bundle(
+            stix2_parser(content, allow_custom=True, interoperability=True)
+        )
+        parser.parse_stix_bundle()
+        return parser
+
+
+class TestSTIX2TrustedExport(unittest.TestCase):
+    def _check_trusted_export(self, parser_class):
+        for name, get_event in inspect.getmembers(test_events, inspect.isfunction):
+            if not name.startswith('get_event'):
+                continue
+            event = deepcopy(get_event())
+            with self.subTest(event=name):
+                try:
+                    reference = self.__export_event(parser_class(), event)
+                except Exception as error:
+                    with self.assertRaises(type(error)):
+                        self.__export_event(parser_class(trusted=True), event)
+                    continue
+                parser = parser_class(trusted=True)
+                self.assertEqual(self.__export_event(parser, event), reference)
+                parser.validate()
+
+    def _check_trusted_collection_export(self, version: str):
+        input_files = [
+            Path(__file__).parent / f'test_events_collection_{n}.json'
+            for n in (1, 2)
+        ]
+        with TemporaryDirectory() as tmp_dir:
+            tmp_path = Path(tmp_dir)
+            for label, convert in self.__trusted_conversions(input_files):
+                with self.subTest(conversion=label):
+                    contents = []
+                    for trusted in (False, True):
+                        output_name = tmp_path / f'{label}_{trusted}.json'
+                        self.assertEqual(
+                            convert(
+                                version=version, output_name=output_name,
+                                trusted=trusted
+                            ),
+                            {'success': 1, 'results': [output_name]}
+                        )
+                        contents.append(output_name.read_text(encoding='utf-8'))
+                    self.assertEqual(*contents)
+
+    def _check_trusted_export_stix2_version(self, parser_class):
+        module = 'misp_stix_converter.misp2stix.misp_to_stix2'
+        with patch(f'{module}._stix2_version', '3.1.0'):
+            with self.assertRaises(TrustedModeError):
+                parser_class(trusted=True)
+            self.assertFalse(parser_class().trusted)
+
+    def _check_trusted_export_validation(self, parser_class):
+        parser = parser_class(trusted=True)
+        parser.parse_misp_event(test_events.get_event_with_vulnerability_attribute())
+        bundle = parser.bundle
+        self.assertIsInstance(bundle, dict)
+        identity, report, vulnerability = bundle['objects']
+        for stix_object in (identity, report, vulnerability):
+            self.assertIsInstance(stix_object, dict)
+        parser.validate()
+        vulnerability['created'] = 'not a timestamp'
+        with self.assertRaises(InvalidValueError):
+            parser.validate()
+
+    @staticmethod
+    def __trusted_conversions(input_files: list) -> tuple:
+        return (
+            (
+                'collection',
+                lambda **kwargs: misp_collection_to_stix2(
+                    *input_files, in_memory=True, single_output=True, **kwargs
+                )
+            ),
+            ('event', lambda **kwargs: misp_to_stix2(input_files[0], **kwargs))
+        )
+
+    @staticmethod
+    def __export_event(parser, event: dict) -> str:
+        # The UUIDs and timestamps generated for the STIX objects without MISP
+        # counterpart, like the relationships, are the same for every export
+        uuids = (UUID(int=index, version=4) for index in count(1))
+        timestamp = STIXdatetime(2020, 10, 25, 16, 22, tzinfo=timezone.utc)
+        with patch('uuid.uuid4', side_effect=lambda: next(uuids)), \
+                patch('stix2.base.get_timestamp', return_value=timestamp), \
+                patch(
+                    'misp_stix_converter.misp2stix.misp_to_stix2.get_timestamp',
+                    return_value=timestamp):
+            parser.parse_misp_event(deepcopy(event))
+            return json.dumps(parser.bundle, cls=STIXJSONEncoder, indent=4)
+
 
 class TestSTIX2Export(TestSTIX):
     _labels = [
@@ -173,6 +454,12 @@ class TestSTIX2Export(TestSTIX):
         self.assertEqual(vulnerability.created, timestamp)
         self.assertEqual(vulnerability.modified, timestamp)
 
+    def _check_campaign_meta_fields(self, stix_object, meta):
+        self.assertEqual(stix_object.aliases, meta['synonyms'])
+        self.assertEqual(stix_object.x_misp_objective, meta['objective'])
+        for external_ref, ref in zip(stix_object.external_references, meta['refs']):
+            self.assertEqual(external_ref.url, ref)
+
     def _check_course_of_action_meta_fields(self, stix_object, meta):
         self.assertEqual(stix_object.external_references[0].external_id, meta['external_id'])
         for external_ref, ref in zip(stix_object.external_references[1:], meta['refs']):
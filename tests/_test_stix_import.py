@@ -4,9 +4,12 @@
 import json
 from base64 import b64encode
 from collections import defaultdict
+from io import StringIO
+from pathlib import Path
 from misp_stix_converter import (
     ExternalSTIX2toMISPMapping, ExternalSTIX2toMISPParser,
     InternalSTIX2toMISPParser)
+from misp_stix_converter.misp_stix_streaming import JSONStreamReader
 from uuid import UUID, uuid5
 from ._test_stix import TestSTIX
 from .update_documentation import AttributesDocumentationUpdater, ObjectsDocumentationUpdater
@@ -355,6 +358,58 @@ class TestInternalSTIX2Import(TestSTIX2Import):
     def setUp(self):
         self.parser = InternalSTIX2toMISPParser()
 
+    def _check_profiled_import(self, filename):
+        filename = Path(__file__).parent / filename
+        with open(filename, 'rt', encoding='utf-8') as f:
+            n_objects = len(json.load(f)['objects'])
+        self.parser.parse_stix_content(filename, single_event=True)
+        self.assertEqual(self.parser.stats.to_dict(), {})
+        for streaming, loading in ((False, 'file_loading'), (True, 'loading')):
+            with self.subTest(streaming=streaming):
+                profiled_parser = InternalSTIX2toMISPParser()
+                profiled_parser.enable_profiling()
+                profiled_parser.parse_stix_content(
+                    filename, single_event=True, streaming=streaming
+                )
+                stats = profiled_parser.stats.to_dict()
+                self.assertEqual(stats['counters']['stix_objects'], n_objects)
+                self.assertIn(loading, stats['timers'])
+                self.assertEqual(stats['timers']['conversion']['calls'], 1)
+                self.assertEqual(
+                    json.loads(profiled_parser.misp_event.to_json()),
+                    json.loads(self.parser.misp_event.to_json())
+                )
+
+    def _check_malformed_streaming_import(self, filename):
+        with open(Path(__file__).parent / filename, 'rt', encoding='utf-8') as f:
+            content = f.read()
+        # A syntax error at the beginning of the objects, far from the end of
+        # the first chunks read
+        position = content.index('"objects"')
+        stream = StringIO(
+            f"{content[:position]}\"objects\": [{{,{content[position + 12:]}"
+        )
+        reader = JSONStreamReader(stream, chunk_size=64)
+        with self.assertRaises(json.JSONDecodeError):
+            for key in reader.iter_keys():
+                if key == 'objects':
+                    for _ in reader.iter_items():
+                        pass
+        self.assertLess(stream.tell(), len(content) // 2)
+
+    def _check_streaming_import(self, filename):
+        filename = Path(__file__).parent / filename
+        self.parser.parse_stix_content(filename, single_event=True)
+        streaming_parser = InternalSTIX2toMISPParser()
+        streaming_parser.parse_stix_content(
+            filename, single_event=True, streaming=True
+        )
+        self.assertEqual(streaming_parser._identifier, self.parser._identifier)
+        self.assertEqual(
+            json.loads(streaming_parser.misp_event.to_json()),
+            json.loads(self.parser.misp_event.to_json())
+        )
+
     ################################################################################
     #                      MISP ATTRIBUTES CHECKING FUNCTIONS                      #
     ################################################################################
@@ -547,6 +602,15 @@ class TestInternalSTIX2Import(TestSTIX2Import):
             [f'{kill_chain.kill_chain_name}:{kill_chain.phase_name}']
         )
 
+    def _check_campaign_galaxy(self, galaxy, campaign, version):
+        self._check_galaxy_fields(
+            galaxy, campaign, f'stix-{version}-campaign', 'Campaign'
+        )
+        meta = galaxy.clusters[0].meta
+        self.assertEqual(meta['synonyms'], campaign.aliases)
+        self.assertEqual(meta['objective'], campaign.x_misp_objective)
+        self.assertEqual(meta['refs'], [campaign.external_references[0].url])
+
     def _check_course_of_action_galaxy(self, galaxy, course_of_action):
         self._check_galaxy_fields(
             galaxy, course_of_action, 'mitre-course-of-action',
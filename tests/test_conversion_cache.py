@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import shutil
+import unittest
+from .test_events import get_event_with_attachment_attribute
+from misp_stix_converter import (
+    ConversionCache, ConversionCacheError, misp_collection_to_stix2,
+    misp_to_stix2, stix_2_to_misp)
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+_TESTFILES_PATH = Path(__file__).parent.resolve()
+
+
+class TestConversionCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = TemporaryDirectory()
+        self._tmp_path = Path(self._tmp_dir.name)
+        self._cache = ConversionCache(self._tmp_path / 'cache')
+        for filename in ('test_events_collection_1.json',
+                         'test_events_collection_2.json',
+                         'test_event1_stix20.json'):
+            shutil.copy(_TESTFILES_PATH / filename, self._tmp_path)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_export_cache(self):
+        filename = self._tmp_path / 'test_events_collection_1.json'
+        traceback = misp_to_stix2(filename, cache=self._cache)
+        self.assertEqual(traceback['cache'], {'hits': 0, 'misses': 1})
+        output_name = traceback['results'][0]
+        with open(output_name, 'rt', encoding='utf-8') as f:
+            bundle = json.load(f)
+        output_name.unlink()
+        with patch(
+                'misp_stix_converter.misp2stix.misp_to_stix2.'
+                'MISPtoSTIX2Parser.parse_json_content',
+                side_effect=AssertionError('The parser should not run.')):
+            traceback = misp_to_stix2(filename, cache=self._cache)
+        self.assertEqual(traceback['cache'], {'hits': 1, 'misses': 0})
+        self.assertEqual(traceback['results'], [output_name])
+        with open(output_name, 'rt', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), bundle)
+        traceback = misp_to_stix2(filename, version='2.0', cache=self._cache)
+        self.assertEqual(traceback['cache'], {'hits': 0, 'misses': 1})
+
+    def test_import_cache(self):
+        filename = self._tmp_path / 'test_event1_stix20.json'
+        traceback = stix_2_to_misp(filename, cache=self._cache)
+        self.assertEqual(traceback['cache'], {'hits': 0, 'misses': 1})
+        output_names = traceback['results']
+        for output_name in output_names:
+            output_name.unlink()
+        traceback = stix_2_to_misp(filename, cache=self._cache)
+        self.assertEqual(traceback['cache'], {'hits': 1, 'misses': 0})
+        self.assertEqual(traceback['results'], output_names)
+        self.assertTrue(all(name.exists() for name in output_names))
+        traceback = stix_2_to_misp(
+            filename, distribution=1, cache=self._cache
+        )
+        self.assertEqual(traceback['cache'], {'hits': 0, 'misses': 1})
+        traceback = stix_2_to_misp(
+            filename, single_event=True, cache=self._cache
+        )
+        self.assertEqual(traceback['cache'], {'hits': 0, 'misses': 1})
+        self.assertEqual(len(traceback['results']), 1)
+
+    def test_collection_cache(self):
+        input_files = (
+            self._tmp_path / 'test_events_collection_1.json',
+            self._tmp_path / 'test_events_collection_2.json'
+        )
+        misp_to_stix2(input_files[0], cache=self._cache)
+        traceback = misp_collection_to_stix2(*input_files, cache=self._cache)
+        self.assertEqual(traceback['cache'], {'hits': 1, 'misses': 1})
+        self.assertEqual(len(traceback['results']), 2)
+        output_name = self._tmp_path / 'collection.json'
+        for cache_counters in ({'hits': 0, 'misses': 1}, {'hits': 1, 'misses': 0}):
+            traceback = misp_collection_to_stix2(
+                *input_files, single_output=True, output_name=output_name,
+                cache=self._cache
+            )
+            self.assertEqual(traceback['cache'], cache_counters)
+            self.assertEqual(traceback['results'], [output_name])
+
+    def test_payloads_cache_bypass(self):
+        filename = self._tmp_path / 'test_event_with_attachment.json'
+        filename.write_text(
+            json.dumps(get_event_with_attachment_attribute()), encoding='utf-8'
+        )
+        payloads_dir = self._tmp_path / 'payloads'
+        for _ in range(2):
+            traceback = misp_to_stix2(
+                filename, payloads_dir=payloads_dir, cache=self._cache
+            )
+            self.assertNotIn('cache', traceback)
+            self.assertEqual(len(list(payloads_dir.iterdir())), 1)
+            # The payload files are written again by every conversion
+            shutil.rmtree(payloads_dir)
+        traceback = misp_to_stix2(filename, cache=self._cache)
+        self.assertEqual(traceback['cache'], {'hits': 0, 'misses': 1})
+        bundle = traceback['results'][0]
+        traceback = stix_2_to_misp(
+            bundle, payloads_dir=payloads_dir, cache=self._cache
+        )
+        self.assertNotIn('cache', traceback)
+
+    def test_least_recently_used_eviction(self):
+        result = self._tmp_path / 'result.json'
+        result.write_text('x' * 400)
+        cache = ConversionCache(self._tmp_path / 'small_cache', max_size=1000)
+        keys = [cache.key(result, index=index) for index in range(3)]
+        self.assertEqual(len(set(keys)), 3)
+        for timestamp, key in enumerate(keys[:2]):
+            cache.store(key, {'result': result})
+            os.utime(cache.directory / key, (timestamp, timestamp))
+        self.assertIsNotNone(cache.fetch(keys[0]))
+        cache.store(keys[2], {'result': result})
+        self.assertIsNotNone(cache.fetch(keys[0]))
+        self.assertIsNone(cache.fetch(keys[1]))
+        self.assertIsNotNone(cache.fetch(keys[2]))
+        self.assertLessEqual(cache.size, cache.max_size)
+        with self.assertRaises(ConversionCacheError):
+            ConversionCache(self._tmp_path / 'small_cache', max_size=0)
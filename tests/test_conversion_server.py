@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import stat
+import threading
+import unittest
+from misp_stix_converter import (
+    ConversionServer, ConversionServerError, MISPtoSTIX21Parser, ParserPool)
+from misp_stix_converter.misp_stix_server import UnixHTTPConnection
+from pathlib import Path
+from tempfile import TemporaryDirectory, gettempdir
+from unittest.mock import patch
+
+
+class TestConversionServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._current_path = Path(__file__).resolve().parent
+        cls._conversion_server = ConversionServer(
+            max_concurrency=1, queue_timeout=0.1,
+            roots=(cls._current_path, gettempdir())
+        )
+
+    def setUp(self):
+        self._tmp_dir = TemporaryDirectory()
+        self._socket_path = Path(self._tmp_dir.name) / 'misp_stix.sock'
+        self._server = self._conversion_server.unix_server(self._socket_path)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+
+    def tearDown(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._tmp_dir.cleanup()
+
+    def _request(self, method: str, path: str, job: dict = None,
+                 token: str = None,
+                 content_type: str = 'application/json') -> tuple:
+        connection = UnixHTTPConnection(self._socket_path, timeout=60)
+        body = None if job is None else json.dumps(job)
+        headers = {
+            'Authorization': f'Bearer {token or self._conversion_server.token}',
+            'Content-Type': content_type
+        }
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        content = json.loads(response.read())
+        connection.close()
+        return response.status, content
+
+    def test_export(self):
+        output_name = Path(self._tmp_dir.name) / 'event.stix21.json'
+        status, traceback = self._request(
+            'POST', '/export',
+            {
+                'file': [str(self._current_path / 'test_events_collection_1.json')],
+                'version': '2.1', 'indent': 0, 'output_name': str(output_name)
+            }
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(traceback, {'success': 1, 'results': [str(output_name)]})
+        with open(output_name, 'rt', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['type'], 'bundle')
+
+    def test_import(self):
+        output_name = Path(self._tmp_dir.name) / 'event.misp.json'
+        status, traceback = self._request(
+            'POST', '/import',
+            {
+                'file': [str(self._current_path / 'test_event1_stix21.json')],
+                'version': '2', 'distribution': 1,
+                'output_name': str(output_name)
+            }
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(traceback['results'], [str(output_name)])
+        with open(output_name, 'rt', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['distribution'], '1')
+
+    def test_warm_parsers(self):
+        filename = str(self._current_path / 'test_events_collection_1.json')
+        output_names = []
+        with patch.object(MISPtoSTIX21Parser, 'reset', autospec=True,
+                          side_effect=MISPtoSTIX21Parser.reset) as reset:
+            for index in range(2):
+                output_name = Path(self._tmp_dir.name) / f'event{index}.json'
+                status, traceback = self._request(
+                    'POST', '/export',
+                    {
+                        'file': [filename], 'version': '2.1',
+                        'output_name': str(output_name)
+                    }
+                )
+                self.assertEqual(status, 200)
+                self.assertNotIn('stats', traceback)
+                with open(output_name, 'rt', encoding='utf-8') as f:
+                    output_names.append(json.load(f)['objects'])
+        # The warm parser of the conversion slot is reset for each job
+        self.assertEqual(reset.call_count, 2)
+        self.assertIs(reset.call_args_list[0][0][0], reset.call_args_list[1][0][0])
+        self.assertEqual(
+            [stix_object['id'] for stix_object in output_names[0]],
+            [stix_object['id'] for stix_object in output_names[1]]
+        )
+
+    def test_parser_pool(self):
+        parsers = ParserPool(size=2)
+        parser = parsers.get(MISPtoSTIX21Parser, payloads_dir=None, trusted=False)
+        parser.enable_profiling()
+        self.assertIs(
+            parsers.get(MISPtoSTIX21Parser, trusted=False, payloads_dir=None),
+            parser
+        )
+        self.assertFalse(parser.stats.to_dict())
+        trusted = parsers.get(MISPtoSTIX21Parser, payloads_dir=None, trusted=True)
+        self.assertIsNot(trusted, parser)
+        parsers.get(MISPtoSTIX21Parser, interoperability=True)
+        # The least recently used parser is released
+        self.assertEqual(len(parsers), 2)
+        self.assertIsNot(
+            parsers.get(MISPtoSTIX21Parser, payloads_dir=None, trusted=False),
+            parser
+        )
+        self.assertIs(
+            parsers.get(MISPtoSTIX21Parser, interoperability=True),
+            parsers.get(MISPtoSTIX21Parser, interoperability=True)
+        )
+
+    def test_single_output_location(self):
+        filenames = [
+            str(self._current_path / f'test_events_collection_{index}.json')
+            for index in (1, 2)
+        ]
+        for feature in ('export', 'import'):
+            status, content = self._request(
+                'POST', f'/{feature}',
+                {
+                    'file': filenames, 'single_output': True,
+                    'version': '2.1' if feature == 'export' else '2'
+                }
+            )
+            self.assertEqual(status, 400)
+            self.assertIn('output_dir', content['error'])
+        output_name = Path(self._tmp_dir.name) / 'events.stix21.json'
+        status, traceback = self._request(
+            'POST', '/export',
+            {
+                'file': filenames, 'version': '2.1', 'single_output': True,
+                'output_name': str(output_name)
+            }
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(traceback['results'], [str(output_name)])
+
+    def test_invalid_jobs(self):
+        filename = str(self._current_path / 'test_events_collection_1.json')
+        for job in ({'version': '2.1'},
+                    {'file': [filename], 'version': '3.0'},
+                    {'file': [filename], 'version': '2.1', 'unknown': True},
+                    {'file': [filename], 'version': '2.1', 'indent': 'four'},
+                    {'file': [filename], 'version': '2.1', 'jobs': 4},
+                    {'file': [filename], 'version': '1.2', 'format': 'yaml'},
+                    {'file': [filename], 'version': '2.1',
+                     'json_backend': 'pickle'}):
+            status, content = self._request('POST', '/export', job)
+            self.assertEqual(status, 400)
+            self.assertIn('error', content)
+        self.assertEqual(self._request('POST', '/convert', {})[0], 404)
+        with self.assertRaises(ConversionServerError):
+            self._conversion_server.conversion_arguments('serve', {})
+
+    def test_authentication(self):
+        job = {
+            'file': [str(self._current_path / 'test_events_collection_1.json')],
+            'version': '2.1'
+        }
+        status, content = self._request('POST', '/export', job, token='token')
+        self.assertEqual(status, 401)
+        self.assertEqual(self._request('GET', '/status', token='token')[0], 401)
+        status, content = self._request(
+            'POST', '/export', job, content_type='text/plain'
+        )
+        self.assertEqual(status, 415)
+        self.assertEqual(
+            stat.S_IMODE(self._socket_path.stat().st_mode), 0o600
+        )
+
+    def test_content_length(self):
+        for token, length, expected in ((None, 'ten', 400), (None, '-1', 400),
+                                        (None, str(1 << 30), 413),
+                                        ('token', str(1 << 30), 401)):
+            connection = UnixHTTPConnection(self._socket_path, timeout=10)
+            connection.putrequest('POST', '/export')
+            connection.putheader(
+                'Authorization',
+                f'Bearer {token or self._conversion_server.token}'
+            )
+            connection.putheader('Content-Type', 'application/json')
+            connection.putheader('Content-Length', length)
+            connection.endheaders()
+            response = connection.getresponse()
+            self.assertEqual(response.status, expected)
+            self.assertIn('error', json.loads(response.read()))
+            connection.close()
+
+    def test_paths_outside_roots(self):
+        filename = str(self._current_path / 'test_events_collection_1.json')
+        for job in ({'file': ['/etc/passwd'], 'version': '2.1'},
+                    {'file': [filename], 'version': '2.1',
+                     'output_name': '/etc/misp_stix.json'},
+                    {'file': [filename], 'version': '2.1',
+                     'output_dir': str(self._current_path / '..' / '..')}):
+            status, content = self._request('POST', '/export', job)
+            self.assertEqual(status, 400)
+            self.assertIn('root directories', content['error'])
+
+    def test_concurrency_limit(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def _blocking_conversion(stix_args, parsers=None):
+            started.set()
+            release.wait(10)
+            return {}
+
+        job = {
+            'file': [str(self._current_path / 'test_events_collection_1.json')],
+            'version': '2.1'
+        }
+        with patch(
+                'misp_stix_converter.misp_stix_converter._misp_to_stix',
+                _blocking_conversion):
+            thread = threading.Thread(
+                target=self._request, args=('POST', '/export', job)
+            )
+            thread.start()
+            started.wait(10)
+            status, content = self._request('POST', '/export', job)
+            self.assertEqual(status, 503)
+            self.assertEqual(self._request('GET', '/status')[1]['active'], 1)
+            release.set()
+            thread.join()
+        status, content = self._request('GET', '/status')
+        self.assertEqual(status, 200)
+        self.assertEqual(content['active'], 0)
+        self.assertGreaterEqual(content['rejected'], 1)
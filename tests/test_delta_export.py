@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import unittest
+from .test_events import (
+    get_event_with_event_report, get_event_with_object_references)
+from misp_stix_converter import (
+    DeltaManifest, MISPtoSTIX20Parser, MISPtoSTIX21Parser, misp_to_stix2)
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+_TESTFILES_PATH = Path(__file__).parent.resolve()
+
+
+class TestDeltaExport(unittest.TestCase):
+    @staticmethod
+    def _export(parser_class, misp_event: dict,
+                manifest: DeltaManifest = None) -> tuple:
+        parser = parser_class()
+        parser.enable_profiling()
+        if manifest is not None:
+            parser.enable_delta_export(manifest)
+        parser.parse_misp_event(misp_event)
+        bundle = json.loads(parser.bundle.serialize())
+        return bundle['objects'], parser.stats.to_dict()['counters']
+
+    @staticmethod
+    def _relationships(*bundles: list) -> dict:
+        # The relationships get a new ID with every conversion
+        return {
+            stix_object['id']: (
+                stix_object['source_ref'], stix_object['target_ref'],
+                stix_object['relationship_type']
+            ) for stix_objects in bundles for stix_object in stix_objects
+            if stix_object['type'] == 'relationship'
+        }
+
+    def _check_report_refs(self, delta: list, full: list, previous: list):
+        relationships = self._relationships(previous, delta, full)
+        delta_report, full_report = (
+            next(
+                stix_object for stix_object in stix_objects
+                if stix_object['type'] in ('grouping', 'report')
+            ) for stix_objects in (delta, full)
+        )
+        self.assertEqual(
+            sorted(
+                str(relationships.get(object_ref, object_ref))
+                for object_ref in delta_report['object_refs']
+            ),
+            sorted(
+                str(relationships.get(object_ref, object_ref))
+                for object_ref in full_report['object_refs']
+            )
+        )
+
+    def test_delta_export(self):
+        for parser_class in (MISPtoSTIX20Parser, MISPtoSTIX21Parser):
+            manifest = DeltaManifest()
+            previous, _ = self._export(
+                parser_class, get_event_with_object_references(), manifest
+            )
+            misp_event = get_event_with_object_references()
+            misp_object = misp_event['Event']['Object'][4]
+            misp_object['timestamp'] = '1703642920'
+            misp_object['Attribute'][0]['value'] = '10.0.0.1'
+            delta, counters = self._export(
+                parser_class, misp_event,
+                DeltaManifest(json.loads(json.dumps(manifest.to_dict())))
+            )
+            self.assertEqual(counters['objects'], 1)
+            self.assertEqual(counters['unchanged'], 6)
+            self.assertEqual(
+                {
+                    stix_object['type'] for stix_object in delta
+                    if stix_object['type'] not in ('identity', 'relationship')
+                },
+                {'indicator', 'grouping' if parser_class is MISPtoSTIX21Parser else 'report'}
+            )
+            full, _ = self._export(parser_class, misp_event)
+            self._check_report_refs(delta, full, previous)
+
+    def test_delta_export_with_deleted_attribute(self):
+        manifest = DeltaManifest()
+        previous, _ = self._export(
+            MISPtoSTIX21Parser, get_event_with_event_report(), manifest
+        )
+        misp_event = get_event_with_event_report()
+        attribute = misp_event['Event']['Attribute'].pop(0)
+        delta, counters = self._export(
+            MISPtoSTIX21Parser, misp_event, DeltaManifest(manifest.to_dict())
+        )
+        self.assertEqual(counters['unchanged'], 2)
+        self.assertNotIn('attributes', counters)
+        full, _ = self._export(MISPtoSTIX21Parser, misp_event)
+        self._check_report_refs(delta, full, previous)
+        delta_note, full_note = (
+            next(
+                stix_object for stix_object in stix_objects
+                if stix_object['type'] == 'note'
+            ) for stix_objects in (delta, full)
+        )
+        self.assertEqual(
+            sorted(delta_note['object_refs']), sorted(full_note['object_refs'])
+        )
+        self.assertNotIn(
+            f"indicator--{attribute['uuid']}", delta_note['object_refs']
+        )
+
+    def test_delta_export_since(self):
+        manifest = DeltaManifest()
+        self._export(
+            MISPtoSTIX20Parser, get_event_with_object_references(), manifest
+        )
+        _, counters = self._export(
+            MISPtoSTIX20Parser, get_event_with_object_references(),
+            DeltaManifest(manifest.to_dict(), since=1603642919)
+        )
+        self.assertEqual(counters['objects'], 7)
+        self.assertNotIn('unchanged', counters)
+        misp_event = get_event_with_object_references()['Event']
+        manifest = DeltaManifest(manifest.to_dict())
+        manifest.start_event(misp_event)
+        misp_object = misp_event['Object'][0]
+        self.assertTrue(manifest.track(misp_object)[0])
+        del misp_object['timestamp']
+        self.assertEqual(manifest.track(misp_object), (False, []))
+
+    def test_misp_to_stix2_with_manifest(self):
+        with TemporaryDirectory() as tmp_dir:
+            manifest = Path(tmp_dir) / 'manifest.json'
+            filename = _TESTFILES_PATH / 'test_events_collection_1.json'
+            output_name = Path(tmp_dir) / 'bundle.json'
+            traceback = misp_to_stix2(
+                filename, output_name=output_name, manifest=manifest,
+                profile=True
+            )
+            self.assertEqual(traceback['results'], [output_name, manifest])
+            self.assertEqual(traceback['stats']['counters']['attributes'], 2)
+            with open(manifest, 'rt', encoding='utf-8') as f:
+                self.assertEqual(len(json.load(f)), 2)
+            traceback = misp_to_stix2(
+                filename, output_name=output_name, manifest=manifest,
+                profile=True
+            )
+            counters = traceback['stats']['counters']
+            self.assertNotIn('attributes', counters)
+            self.assertEqual(counters['unchanged'], 2)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from misp_stix_converter import (
+    DispatchTableError, MISPtoSTIX20Mapping, MISPtoSTIX20Parser,
+    MISPtoSTIX21Mapping, MISPtoSTIX21Parser)
+from misp_stix_converter.stix2misp.converters import (
+    InternalSTIX2IntrusionSetConverter)
+
+
+class TestDispatchTables(unittest.TestCase):
+    def test_galaxy_handlers(self):
+        parsers = (
+            (MISPtoSTIX20Parser, MISPtoSTIX20Mapping, '2.0'),
+            (MISPtoSTIX21Parser, MISPtoSTIX21Mapping, '2.1')
+        )
+        for parser, mapping, version in parsers:
+            galaxy_types = mapping.dispatch_mappings()['galaxy_types']
+            for table in ('attribute', 'event', 'parent'):
+                handlers = getattr(parser, f'_{table}_galaxy_handlers')
+                self.assertEqual(set(handlers), set(galaxy_types))
+            for galaxy_type in (f'stix-{version}-campaign', 'sector'):
+                self.assertEqual(
+                    parser._parent_galaxy_handlers[galaxy_type].__name__,
+                    f"_parse_{galaxy_type.split('-')[-1]}_parent_galaxy"
+                )
+
+    def test_missing_export_handler(self):
+        with self.assertRaises(DispatchTableError) as context:
+            class MISPtoSTIX21SectorlessParser(MISPtoSTIX21Parser):
+                _parse_sector_parent_galaxy = None
+        self.assertIn('_parse_sector_parent_galaxy', str(context.exception))
+
+    def test_missing_export_mapping_handler(self):
+        class MISPtoSTIX21UnknownGalaxyMapping(MISPtoSTIX21Mapping):
+            @classmethod
+            def dispatch_mappings(cls) -> dict:
+                mappings = dict(super().dispatch_mappings())
+                mappings['galaxy_types'] = {
+                    **mappings['galaxy_types'],
+                    'unknown': '_parse_unknown_{}_galaxy'
+                }
+                return mappings
+
+        with self.assertRaises(DispatchTableError) as context:
+            class MISPtoSTIX21UnknownGalaxyParser(MISPtoSTIX21Parser):
+                _mapping = MISPtoSTIX21UnknownGalaxyMapping
+        self.assertIn(
+            '_parse_unknown_attribute_galaxy', str(context.exception)
+        )
+
+    def test_missing_import_handler(self):
+        with self.assertRaises(DispatchTableError):
+            class InternalSTIX2ContainerlessIntrusionSetConverter(
+                    InternalSTIX2IntrusionSetConverter):
+                _parse_galaxy_as_container = None
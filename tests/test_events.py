@@ -775,6 +775,30 @@ _TEST_ATTACK_PATTERN_GALAXY = {
     ]
 }
 
+_TEST_CAMPAIGN_GALAXY = {
+    "uuid": "8c4f3d2e-5d1a-4e6b-9c3f-0a7b2e4d6f81",
+    "name": "Campaign",
+    "type": "stix-2.1-campaign",
+    "description": "STIX 2.1 Campaign",
+    "GalaxyCluster": [
+        {
+            "uuid": "1a2b3c4d-5e6f-4a8b-9c0d-1e2f3a4b5c6d",
+            "type": "stix-2.1-campaign",
+            "value": "Operation Lotus Blossom",
+            "description": "Long running espionage campaign targeting government and military organizations in Southeast Asia.",
+            "meta": {
+                "objective": "Espionage",
+                "refs": [
+                    "https://unit42.paloaltonetworks.com/operation-lotus-blossom/"
+                ],
+                "synonyms": [
+                    "Lotus Blossom"
+                ]
+            }
+        }
+    ]
+}
+
 _TEST_COUNTRY_GALAXY = {
     "uuid": "84668357-5a8c-4bdd-9f0f-6b50b2aee4c1",
     "type": "country",
@@ -3175,6 +3199,15 @@ def get_event_with_attack_pattern_galaxy():
     return event
 
 
+def get_event_with_campaign_galaxy(version='2.1'):
+    event = deepcopy(_BASE_EVENT)
+    galaxy = deepcopy(_TEST_CAMPAIGN_GALAXY)
+    galaxy['type'] = galaxy['GalaxyCluster'][0]['type'] = f'stix-{version}-campaign'
+    galaxy['description'] = f'STIX {version} Campaign'
+    event['Event']['Galaxy'] = [galaxy]
+    return event
+
+
 def get_event_with_course_of_action_galaxy():
     event = deepcopy(_BASE_EVENT)
     event['Event']['Galaxy'] = [
@@ -3371,6 +3404,13 @@ def get_indicator_attribute_with_galaxy():
     return attribute
 
 
+def get_indicator_attribute_with_sector_galaxy():
+    return {
+        'Attribute': [deepcopy(_INDICATOR_ATTRIBUTE)],
+        'Galaxy': [deepcopy(_TEST_SECTOR_GALAXY)]
+    }
+
+
 def get_embedded_indicator_attribute_galaxy():
     attribute = get_indicator_attribute_with_galaxy()
     attribute['Galaxy'].append(deepcopy(_TEST_TEA_MATRIX_GALAXY))
@@ -340,6 +340,48 @@ _VULNERABILITY_OBJECTS = [
     }
 ]
 
+_AS_OBSERVABLE_OBJECTS = [
+    {
+        "type": "observed-data",
+        "spec_version": "2.1",
+        "id": "observed-data--3cd23a7b-a099-49df-b397-189018311d4e",
+        "created_by_ref": "identity--a0c22599-9e58-4da4-96ac-7051603fa951",
+        "created": "2020-10-25T16:22:00.000Z",
+        "modified": "2020-10-25T16:22:00.000Z",
+        "first_observed": "2020-10-25T16:22:00Z",
+        "last_observed": "2020-10-25T16:22:00Z",
+        "number_observed": 1,
+        "object_refs": [
+            "autonomous-system--f2259650-bc33-4b64-a3a8-a2b0d24d8d4e",
+            "ipv4-addr--1a7c3b1c-1c6d-4a4d-8b8b-0f7e2e6d5c4a",
+            "ipv6-addr--2b8d4c2d-2d7e-4b5e-9c9c-1f8f3f7e6d5b"
+        ]
+    },
+    {
+        "type": "autonomous-system",
+        "spec_version": "2.1",
+        "id": "autonomous-system--f2259650-bc33-4b64-a3a8-a2b0d24d8d4e",
+        "number": 174
+    },
+    {
+        "type": "ipv4-addr",
+        "spec_version": "2.1",
+        "id": "ipv4-addr--1a7c3b1c-1c6d-4a4d-8b8b-0f7e2e6d5c4a",
+        "value": "1.2.3.0/24",
+        "belongs_to_refs": [
+            "autonomous-system--f2259650-bc33-4b64-a3a8-a2b0d24d8d4e"
+        ]
+    },
+    {
+        "type": "ipv6-addr",
+        "spec_version": "2.1",
+        "id": "ipv6-addr--2b8d4c2d-2d7e-4b5e-9c9c-1f8f3f7e6d5b",
+        "value": "2001:db8::/32",
+        "belongs_to_refs": [
+            "autonomous-system--f2259650-bc33-4b64-a3a8-a2b0d24d8d4e"
+        ]
+    }
+]
 
 class TestExternalSTIX21Bundles:
     __bundle = {
@@ -453,3 +495,17 @@ class TestExternalSTIX21Bundles:
     @classmethod
     def get_bundle_with_vulnerability_galaxy(cls):
         return cls.__assemble_galaxy_bundle(*_VULNERABILITY_OBJECTS)
+
+    ################################################################################
+    #                          OBSERVABLE OBJECTS SAMPLES                          #
+    ################################################################################
+
+    @classmethod
+    def get_bundle_with_as_observable_objects(cls):
+        bundle = deepcopy(cls.__bundle)
+        bundle['objects'] = [
+            deepcopy(cls.__identity), deepcopy(cls.__grouping),
+            *deepcopy(_AS_OBSERVABLE_OBJECTS)
+        ]
+        bundle['objects'][1]['object_refs'] = [_AS_OBSERVABLE_OBJECTS[0]['id']]
+        return dict_to_stix2(bundle, allow_custom=True)
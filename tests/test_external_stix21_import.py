@@ -1,12 +1,121 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import inspect
+import json
+from misp_stix_converter import ExternalSTIX2toMISPParser, STIX2PatternParser
+from misp_stix_converter.stix2misp import importparser
+from misp_stix_converter.stix2misp.stix2_pattern_parser import (
+    _fast_compile_stix_pattern, _parse_stix_pattern)
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+from .test_external_stix20_bundles import TestExternalSTIX20Bundles
 from .test_external_stix21_bundles import TestExternalSTIX21Bundles
+from .test_internal_stix20_bundles import TestInternalSTIX20Bundles
+from .test_internal_stix21_bundles import TestInternalSTIX21Bundles
 from ._test_stix import TestSTIX21
 from ._test_stix_import import TestExternalSTIX2Import, TestSTIX21Import
 
 
 class TestExternalSTIX21Import(TestExternalSTIX2Import, TestSTIX21, TestSTIX21Import):
+
+    def test_converters_initialisation(self):
+        for feature in ('attack_pattern', 'indicator', 'observable_object'):
+            converter = getattr(self.parser, f'{feature}_parser')
+            self.assertIs(getattr(self.parser, f'{feature}_parser'), converter)
+            self.assertIs(converter.main_parser, self.parser)
+
+    def test_galaxy_resources_loaded_once(self):
+        with TemporaryDirectory() as tmp_dir:
+            data_path = Path(tmp_dir)
+            for feature, content in zip(
+                    ('clusters', 'galaxies'),
+                    ({'type': 'threat-actor',
+                      'values': [{'value': 'APT1', 'meta': {'synonyms': ['Comment Crew']}}]},
+                     {'type': 'threat-actor', 'name': 'Threat Actor'})):
+                (data_path / 'misp-galaxy' / feature).mkdir(parents=True)
+                filename = data_path / 'misp-galaxy' / feature / 'threat-actor.json'
+                with open(filename, 'wt', encoding='utf-8') as f:
+                    f.write(json.dumps(content))
+            with patch.object(importparser, '_DATA_PATH', data_path), \
+                    patch.dict(importparser._GALAXY_RESOURCES, clear=True), \
+                    patch('subprocess.Popen') as popen:
+                synonyms_mapping = self.parser.synonyms_mapping
+                self.assertEqual(
+                    synonyms_mapping['Comment Crew'],
+                    ['misp-galaxy:threat-actor="APT1"']
+                )
+                galaxy_definitions = self.parser.galaxy_definitions
+                parser = ExternalSTIX2toMISPParser()
+                self.assertIs(parser.synonyms_mapping, synonyms_mapping)
+                self.assertIs(parser.galaxy_definitions, galaxy_definitions)
+                popen.assert_not_called()
+                for resource in ('galaxyDefinitions', 'synonymsToTagNames'):
+                    self.assertTrue((data_path / f'{resource}.json').exists())
+                    self.assertTrue((data_path / f'{resource}.fingerprint').exists())
+
+    def test_stix_pattern_cache(self):
+        STIX2PatternParser.cache_clear()
+        indicator = {
+            'spec_version': '2.1',
+            'pattern': "[file:name = 'malware.exe' AND file:size = 1024]"
+        }
+        pattern_parser = STIX2PatternParser()
+        pattern_parser.handle_indicator(indicator)
+        pattern = pattern_parser.pattern
+        STIX2PatternParser().handle_indicator(indicator)
+        cache_info = STIX2PatternParser.cache_info()
+        self.assertEqual((cache_info.hits, cache_info.misses), (1, 1))
+        self.assertEqual(
+            dict(pattern.comparisons),
+            {'file': ((('name',), '=', 'malware.exe'), (('size',), '=', 1024))}
+        )
+        pattern_parser.handle_indicator(indicator)
+        self.assertIs(pattern_parser.pattern, pattern)
+        with self.assertRaises(TypeError):
+            pattern.comparisons['file'] = ()
+        invalid = {'spec_version': '2.1', 'pattern': "[file:name = 'malware.exe'"}
+        for _ in range(2):
+            pattern_parser.handle_indicator(invalid)
+            self.assertFalse(pattern_parser.valid)
+        self.assertEqual(STIX2PatternParser.cache_info().misses, 2)
+
+    def test_stix_pattern_fast_path(self):
+        patterns = set()
+        for bundles in (TestExternalSTIX20Bundles, TestExternalSTIX21Bundles,
+                        TestInternalSTIX20Bundles, TestInternalSTIX21Bundles):
+            for name, method in inspect.getmembers(bundles, inspect.ismethod):
+                if not name.startswith('get_bundle'):
+                    continue
+                for stix_object in method().objects:
+                    if stix_object['type'] != 'indicator':
+                        continue
+                    if stix_object.get('pattern_type', 'stix') != 'stix':
+                        continue
+                    version = stix_object.get('spec_version', '2.0')
+                    patterns.add(
+                        (version.replace('.', ''), stix_object['pattern'])
+                    )
+        simple_patterns = 0
+        for version, pattern in patterns:
+            compiled_pattern = _fast_compile_stix_pattern(version, pattern)
+            if compiled_pattern is None:
+                continue
+            simple_patterns += 1
+            self.assertEqual(
+                compiled_pattern, _parse_stix_pattern(version, pattern)
+            )
+        self.assertGreater(simple_patterns, len(patterns) // 2)
+        for pattern in ("[file:name = 'a' OR file:name = 'b']",
+                        "[file:name = 'a'] FOLLOWEDBY [file:name = 'b']",
+                        "[file:name = 'a'] WITHIN 5 SECONDS",
+                        "[file:size > 10]", "[file:name = 'a'"):
+            self.assertIsNone(_fast_compile_stix_pattern('21', pattern))
+        self.assertEqual(
+            _fast_compile_stix_pattern('21', "[file:hashes.MD5 = 'abc']"),
+            _parse_stix_pattern('21', "[file:hashes.MD5 = 'abc']")
+        )
     
     ################################################################################
     #                          MISP GALAXIES IMPORT TESTS                          #
@@ -218,4 +327,41 @@ class TestExternalSTIX21Import(TestExternalSTIX2Import, TestSTIX21, TestSTIX21Im
         self.assertEqual(
             meta['external_id'],
             attribute_vuln.external_references[0].external_id
-        )
\ No newline at end of file
+        )
+
+    ################################################################################
+    #                       OBSERVABLE OBJECTS IMPORT TESTS                        #
+    ################################################################################
+
+    def test_stix21_bundle_with_as_observable_objects(self):
+        bundle = TestExternalSTIX21Bundles.get_bundle_with_as_observable_objects()
+        self.parser.load_stix_bundle(bundle)
+        _, grouping, _, autonomous_system, ipv4, ipv6 = bundle.objects
+        self.assertEqual(
+            self.parser._fetch_referencing_observables(
+                'belongs_to_refs', autonomous_system.id
+            ),
+            (ipv4.id, ipv6.id)
+        )
+        self.assertEqual(
+            list(self.parser._observable_references),
+            [('belongs_to_refs', autonomous_system.id)]
+        )
+        self.parser.parse_stix_bundle()
+        event = self.parser.misp_event
+        self._check_misp_event_features_from_grouping(event, grouping)
+        self.assertEqual(len(event.attributes), 0)
+        self.assertEqual(len(event.objects), 1)
+        misp_object = event.objects[0]
+        self.assertEqual(misp_object.name, 'asn')
+        self.assertEqual(
+            [
+                (attribute.object_relation, attribute.value)
+                for attribute in misp_object.attributes
+            ],
+            [
+                ('asn', f'AS{autonomous_system.number}'),
+                ('subnet-announced', ipv4.value),
+                ('subnet-announced', ipv6.value)
+            ]
+        )
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+_STIX1_LIBRARIES = ('cybox', 'maec', 'mixbox', 'stix')
+_STIX2_LIBRARIES = ('pymisp', 'stix2')
+
+
+class TestImportTime(unittest.TestCase):
+    @staticmethod
+    def _imported_modules(statement: str) -> set:
+        process = subprocess.run(
+            (sys.executable, '-X', 'importtime', '-c', statement),
+            capture_output=True, check=True, cwd=_ROOT, text=True
+        )
+        return {
+            line.split('|')[-1].strip()
+            for line in process.stderr.splitlines()
+            if line.startswith('import time:') and 'cumulative' not in line
+        }
+
+    def _assert_not_imported(self, modules: set, *libraries: str):
+        for name in modules:
+            self.assertNotIn(name.split('.')[0], libraries, name)
+
+    def test_package_import(self):
+        modules = self._imported_modules('import misp_stix_converter')
+        self.assertIn('misp_stix_converter', modules)
+        self._assert_not_imported(
+            modules, *_STIX1_LIBRARIES, *_STIX2_LIBRARIES
+        )
+        self.assertFalse(
+            any(name.startswith('misp_stix_converter.') and
+                name != 'misp_stix_converter.misp_stix_mapping'
+                for name in modules)
+        )
+
+    def test_mapping_import(self):
+        modules = self._imported_modules(
+            'from misp_stix_converter import Mapping'
+        )
+        self._assert_not_imported(
+            modules, *_STIX1_LIBRARIES, *_STIX2_LIBRARIES
+        )
+
+    def test_command_line_functions_import(self):
+        modules = self._imported_modules(
+            'from misp_stix_converter import _misp_to_stix, _stix_to_misp'
+        )
+        self._assert_not_imported(modules, *_STIX1_LIBRARIES)
+
+    def test_stix1_parser_import(self):
+        modules = self._imported_modules(
+            'from misp_stix_converter import MISPtoSTIX1EventsParser'
+        )
+        self.assertIn('stix', modules)
+
+    def test_stix20_parsers_import(self):
+        modules = self._imported_modules(
+            'from misp_stix_converter import '
+            'ExternalSTIX2toMISPParser, MISPtoSTIX20Parser'
+        )
+        self.assertIn('stix2', modules)
+        self._assert_not_imported(modules, *_STIX1_LIBRARIES)
+
+    def test_stix21_parsers_import(self):
+        modules = self._imported_modules(
+            'from misp_stix_converter import '
+            'InternalSTIX2toMISPParser, MISPtoSTIX21Parser'
+        )
+        self.assertIn('stix2', modules)
+        self._assert_not_imported(modules, *_STIX1_LIBRARIES)
+
+    def test_star_import(self):
+        statement = (
+            'from misp_stix_converter{} import *; '
+            "print(*sorted(name for name in dir() if not name.startswith('_')))"
+        )
+        names = {
+            package: set(
+                subprocess.run(
+                    (sys.executable, '-c', statement.format(package)),
+                    capture_output=True, check=True, cwd=_ROOT, text=True
+                ).stdout.split()
+            ) for package in ('', '.misp2stix', '.stix2misp')
+        }
+        self.assertEqual(
+            names[''], {
+                'ConversionCache', 'ConversionCacheError', 'ConversionServer',
+                'ConversionServerError', 'ConversionStats', 'DeltaManifest',
+                'DispatchTableError', 'ExternalSTIX2toMISPMapping',
+                'ExternalSTIX2toMISPParser', 'InternalSTIX2toMISPMapping',
+                'InternalSTIX2toMISPParser', 'JSONSerializer',
+                'JSONSerializerError', 'MISPtoSTIX1AttributesParser',
+                'MISPtoSTIX1EventsParser', 'MISPtoSTIX1Mapping',
+                'MISPtoSTIX20Mapping', 'MISPtoSTIX20Parser',
+                'MISPtoSTIX21Mapping', 'MISPtoSTIX21Parser', 'Mapping',
+                'ParserPool', 'PayloadStore', 'PayloadStoreError', 'STIX2PatternParser',
+                'SeenObjectStore', 'main', 'misp_attribute_collection_to_stix1',
+                'misp_collection_to_stix2', 'misp_event_collection_to_stix1',
+                'misp_to_stix1', 'misp_to_stix2', 'stix1_attributes_framing',
+                'stix1_framing', 'stix20_framing', 'stix21_framing',
+                'stix_1_to_misp', 'stix_2_to_misp'
+            }
+        )
+        self.assertEqual(
+            names['.misp2stix'], {
+                'MISPtoSTIX1AttributesParser', 'MISPtoSTIX1EventsParser',
+                'MISPtoSTIX1Mapping', 'MISPtoSTIX20Mapping',
+                'MISPtoSTIX20Parser', 'MISPtoSTIX21Mapping',
+                'MISPtoSTIX21Parser', 'stix1_attributes_framing',
+                'stix1_framing', 'stix20_framing', 'stix21_framing'
+            }
+        )
+        self.assertEqual(
+            names['.stix2misp'], {
+                'ExternalSTIX1toMISPParser', 'ExternalSTIX2toMISPMapping',
+                'ExternalSTIX2toMISPParser', 'InternalSTIX1toMISPParser',
+                'InternalSTIX2toMISPMapping', 'InternalSTIX2toMISPParser',
+                'STIX2PatternParser'
+            }
+        )
+
+    def test_lazy_attributes(self):
+        import misp_stix_converter
+        self.assertIn('MISPtoSTIX21Parser', dir(misp_stix_converter))
+        with self.assertRaises(AttributeError):
+            misp_stix_converter.UnknownParser
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import pickle
+import sqlite3
+import unittest
+from .test_internal_stix21_bundles import TestInternalSTIX21Bundles
+from misp_stix_converter import (
+    InternalSTIX2toMISPParser, SeenObjectStore, stix_2_to_misp)
+from misp_stix_converter.stix2misp.converters import (
+    InternalSTIX2IndicatorConverter)
+from misp_stix_converter.stix2misp.exceptions import UndefinedSTIXObjectError
+from pathlib import Path
+from stix2.parsing import parse as stix2_parser
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+_TESTFILES_PATH = Path(__file__).parent.resolve()
+
+
+class TestIncrementalImport(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = TemporaryDirectory()
+        self._tmp_path = Path(self._tmp_dir.name)
+        self._store = SeenObjectStore(self._tmp_path / 'seen.db')
+
+    def tearDown(self):
+        self._store.close()
+        self._tmp_dir.cleanup()
+
+    def _import(self, bundle: dict) -> tuple:
+        parser = InternalSTIX2toMISPParser(0, None, False)
+        parser.enable_profiling()
+        parser.enable_incremental_import(self._store)
+        parser.load_stix_bundle(
+            stix2_parser(
+                json.dumps(bundle), allow_custom=True, interoperability=True
+            )
+        )
+        parser.parse_stix_bundle()
+        parser.commit_seen()
+        return parser.misp_event, parser.stats.to_dict()['counters']
+
+    def _import_file(self, filename: Path) -> tuple:
+        traceback = stix_2_to_misp(
+            filename, seen_store=self._store, single_event=True, profile=True
+        )
+        with open(traceback['results'][0], 'rt', encoding='utf-8') as f:
+            misp_event = json.load(f)
+        return misp_event, traceback['stats']['counters']
+
+    def test_incremental_import(self):
+        filename = self._tmp_path / 'test_event1_stix21.json'
+        with open(_TESTFILES_PATH / 'test_event1_stix21.json', 'rt',
+                  encoding='utf-8') as f:
+            bundle = json.load(f)
+        filename.write_text(json.dumps(bundle), encoding='utf-8')
+        misp_event, counters = self._import_file(filename)
+        self.assertEqual(len(misp_event['Attribute']), 2)
+        self.assertNotIn('unchanged', counters)
+        self.assertEqual(len(self._store), len(bundle['objects']))
+        misp_event, counters = self._import_file(filename)
+        self.assertNotIn('Attribute', misp_event)
+        self.assertEqual(counters['unchanged'], 2)
+        indicator = bundle['objects'][-1]
+        indicator['modified'] = '2020-10-26T16:22:00.000Z'
+        filename.write_text(json.dumps(bundle), encoding='utf-8')
+        misp_event, counters = self._import_file(filename)
+        self.assertEqual(
+            [attribute['uuid'] for attribute in misp_event['Attribute']],
+            [indicator['id'].split('--')[1]]
+        )
+        self.assertEqual(counters['unchanged'], 1)
+
+    def test_incremental_import_retry(self):
+        filename = self._tmp_path / 'test_event1_stix21.json'
+        with open(_TESTFILES_PATH / 'test_event1_stix21.json', 'rt',
+                  encoding='utf-8') as f:
+            bundle = json.load(f)
+        filename.write_text(json.dumps(bundle), encoding='utf-8')
+        indicator = bundle['objects'][-1]
+        with patch.object(
+                InternalSTIX2IndicatorConverter, 'parse',
+                side_effect=UndefinedSTIXObjectError(indicator['id'])):
+            misp_event, _ = self._import_file(filename)
+        self.assertEqual(len(misp_event['Attribute']), 1)
+        self.assertEqual(len(self._store), len(bundle['objects']) - 1)
+        self.assertFalse(
+            self._store.seen(indicator['id'], indicator['modified'])
+        )
+        # The indicator is converted again, although it did not change
+        misp_event, counters = self._import_file(filename)
+        self.assertEqual(
+            [attribute['uuid'] for attribute in misp_event['Attribute']],
+            [indicator['id'].split('--')[1]]
+        )
+        self.assertEqual(counters['unchanged'], 1)
+        self.assertEqual(len(self._store), len(bundle['objects']))
+
+    def test_incremental_import_uncommitted(self):
+        bundle = json.loads(
+            TestInternalSTIX21Bundles.get_bundle_with_sightings().serialize()
+        )
+        parser = InternalSTIX2toMISPParser(0, None, False)
+        parser.enable_incremental_import(self._store)
+        parser.load_stix_bundle(
+            stix2_parser(
+                json.dumps(bundle), allow_custom=True, interoperability=True
+            )
+        )
+        parser.parse_stix_bundle()
+        # Nothing is recorded until the results are saved
+        self.assertEqual(len(self._store), 0)
+        parser.commit_seen()
+        self.assertEqual(len(self._store), len(bundle['objects']))
+
+    def test_incremental_import_with_sightings(self):
+        bundle = json.loads(
+            TestInternalSTIX21Bundles.get_bundle_with_sightings().serialize()
+        )
+        misp_event, _ = self._import(bundle)
+        self.assertEqual(len(misp_event.attributes), 2)
+        misp_event, counters = self._import(bundle)
+        self.assertEqual(misp_event.attributes, [])
+        self.assertEqual(counters['unchanged'], 2)
+        sighting = next(
+            stix_object for stix_object in bundle['objects']
+            if stix_object['type'] == 'sighting'
+        )
+        sighting['modified'] = '2020-10-25T16:23:00.000Z'
+        misp_event, counters = self._import(bundle)
+        attribute, = misp_event.attributes
+        self.assertEqual(
+            attribute.uuid, sighting['sighting_of_ref'].split('--')[1]
+        )
+        self.assertEqual(len(attribute.sightings), 4)
+        self.assertEqual(counters['unchanged'], 1)
+
+    def test_seen_object_store(self):
+        object_id = 'indicator--4bb235a7-7d25-4aef-802f-2c6b45c5eceb'
+        modified = '2020-10-25T16:22:00.000Z'
+        self._store.add([(object_id, modified)])
+        self._store.close()
+        store = SeenObjectStore(self._tmp_path / 'seen.db')
+        self.assertTrue(store.seen(object_id, modified))
+        self.assertFalse(store.seen(object_id, '2020-10-26T16:22:00.000Z'))
+        mode = store.connection.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+        # The readers are not blocked by a pending write transaction
+        writer = sqlite3.connect(store.filename)
+        writer.execute('BEGIN IMMEDIATE')
+        writer.execute(
+            'INSERT INTO seen_objects (id, modified) VALUES (?, ?)',
+            (object_id, '2020-10-26T16:22:00.000Z')
+        )
+        self.assertEqual(len(store), 1)
+        writer.commit()
+        writer.close()
+        unpickled = pickle.loads(pickle.dumps(store))
+        self.assertTrue(
+            unpickled.seen(object_id, '2020-10-26T16:22:00.000Z')
+        )
+        self.assertEqual(len(unpickled), 2)
+        store.close()
+        unpickled.close()
@@ -1168,6 +1168,15 @@ class TestInternalSTIX20Import(TestInternalSTIX2Import, TestSTIX20, TestSTIX20Im
         self._check_misp_event_features(event, report)
         self._check_attack_pattern_galaxy(event.galaxies[0], attack_pattern)
 
+    def test_stix20_bundle_with_campaign_galaxy(self):
+        bundle = TestInternalSTIX20Bundles.get_bundle_with_campaign_galaxy()
+        self.parser.load_stix_bundle(bundle)
+        self.parser.parse_stix_bundle()
+        event = self.parser.misp_event
+        _, report, campaign = bundle.objects
+        self._check_misp_event_features(event, report)
+        self._check_campaign_galaxy(event.galaxies[0], campaign, '2.0')
+
     def test_stix20_bundle_with_course_of_action_galaxy(self):
         bundle = TestInternalSTIX20Bundles.get_bundle_with_course_of_action_galaxy()
         self.parser.load_stix_bundle(bundle)
@@ -2287,3 +2296,26 @@ class TestInternalSTIX20Import(TestInternalSTIX2Import, TestSTIX20, TestSTIX20Im
             misp_object = json.loads(misp_object.to_json()),
             observed_data = observed_data
         )
+
+    ################################################################################
+    #                            STREAMING IMPORT TESTS                            #
+    ################################################################################
+
+    def test_stix20_attributes_collection_streaming_import(self):
+        self._check_streaming_import('test_attributes_collection_stix20.json')
+
+    def test_stix20_event_streaming_import(self):
+        self._check_streaming_import('test_event1_stix20.json')
+
+    def test_stix20_malformed_streaming_import(self):
+        self._check_malformed_streaming_import('test_events_collection_stix20.json')
+
+    def test_stix20_events_collection_streaming_import(self):
+        self._check_streaming_import('test_events_collection_stix20.json')
+
+    ################################################################################
+    #                            PROFILED IMPORT TESTS                             #
+    ################################################################################
+
+    def test_stix20_event_profiled_import(self):
+        self._check_profiled_import('test_event1_stix20.json')
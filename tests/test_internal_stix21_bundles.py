@@ -1822,6 +1822,29 @@ _BUNDLE_WITH_SIGHTINGS = [
         "identity_class": "organization"
     }
 ]
+_CAMPAIGN_GALAXY = {
+    "type": "campaign",
+    "spec_version": "2.1",
+    "id": "campaign--1a2b3c4d-5e6f-4a8b-9c0d-1e2f3a4b5c6d",
+    "created": "2020-10-25T16:22:00.000Z",
+    "modified": "2020-10-25T16:22:00.000Z",
+    "name": "Operation Lotus Blossom",
+    "description": "Long running espionage campaign targeting government and military organizations in Southeast Asia.",
+    "aliases": [
+        "Lotus Blossom"
+    ],
+    "labels": [
+        "misp:galaxy-name=\"Campaign\"",
+        "misp:galaxy-type=\"stix-2.1-campaign\""
+    ],
+    "external_references": [
+        {
+            "source_name": "url",
+            "url": "https://unit42.paloaltonetworks.com/operation-lotus-blossom/"
+        }
+    ],
+    "x_misp_objective": "Espionage"
+}
 _CAMPAIGN_NAME_ATTRIBUTE = {
     "type": "campaign",
     "spec_version": "2.1",
@@ -8022,6 +8045,10 @@ class TestInternalSTIX21Bundles:
     def get_bundle_with_attack_pattern_galaxy(cls):
         return cls.__assemble_bundle(_ATTACK_PATTERN_GALAXY)
 
+    @classmethod
+    def get_bundle_with_campaign_galaxy(cls):
+        return cls.__assemble_bundle(_CAMPAIGN_GALAXY)
+
     @classmethod
     def get_bundle_with_course_of_action_galaxy(cls):
         return cls.__assemble_bundle(_COURSE_OF_ACTION_GALAXY)
@@ -1428,6 +1428,15 @@ class TestInternalSTIX21Import(TestInternalSTIX2Import, TestSTIX21, TestSTIX21Im
         self._check_misp_event_features_from_grouping(event, grouping)
         self._check_attack_pattern_galaxy(event.galaxies[0], attack_pattern)
 
+    def test_stix21_bundle_with_campaign_galaxy(self):
+        bundle = TestInternalSTIX21Bundles.get_bundle_with_campaign_galaxy()
+        self.parser.load_stix_bundle(bundle)
+        self.parser.parse_stix_bundle()
+        event = self.parser.misp_event
+        _, grouping, campaign = bundle.objects
+        self._check_misp_event_features_from_grouping(event, grouping)
+        self._check_campaign_galaxy(event.galaxies[0], campaign, '2.1')
+
     def test_stix21_bundle_with_course_of_action_galaxy(self):
         bundle = TestInternalSTIX21Bundles.get_bundle_with_course_of_action_galaxy()
         self.parser.load_stix_bundle(bundle)
@@ -3067,3 +3076,26 @@ class TestInternalSTIX21Import(TestInternalSTIX2Import, TestSTIX21, TestSTIX21Im
             misp_object = json.loads(misp_object.to_json()),
             observed_data = [observed_data, x509]
         )
+
+    ################################################################################
+    #                            STREAMING IMPORT TESTS                            #
+    ################################################################################
+
+    def test_stix21_attributes_collection_streaming_import(self):
+        self._check_streaming_import('test_attributes_collection_stix21.json')
+
+    def test_stix21_event_streaming_import(self):
+        self._check_streaming_import('test_event1_stix21.json')
+
+    def test_stix21_malformed_streaming_import(self):
+        self._check_malformed_streaming_import('test_events_collection_stix21.json')
+
+    def test_stix21_events_collection_streaming_import(self):
+        self._check_streaming_import('test_events_collection_stix21.json')
+
+    ################################################################################
+    #                            PROFILED IMPORT TESTS                             #
+    ################################################################################
+
+    def test_stix21_event_profiled_import(self):
+        self._check_profiled_import('test_event1_stix21.json')
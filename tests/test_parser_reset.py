@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import unittest
+from .test_events import get_event_with_tags
+from misp_stix_converter import (
+    ExternalSTIX2toMISPParser, InternalSTIX2toMISPParser,
+    MISPtoSTIX1EventsParser, MISPtoSTIX20Parser, MISPtoSTIX21Parser)
+from misp_stix_converter.misp_stix_converter import _default_org
+from pathlib import Path
+from stix2.parsing import parse as stix2_parser
+
+_TESTFILES_PATH = Path(__file__).parent.resolve()
+
+
+class TestParserReset(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(_TESTFILES_PATH / 'test_events_collection_1.json', 'rt',
+                  encoding='utf-8') as f:
+            cls._misp_events = json.load(f)['response']
+
+    @staticmethod
+    def _export(parser, misp_event: dict) -> list:
+        parser.parse_misp_event(misp_event)
+        return json.loads(parser.bundle.serialize())['objects']
+
+    @staticmethod
+    def _import(parser, filename: str) -> list:
+        parser.load_stix_bundle(
+            stix2_parser(
+                (_TESTFILES_PATH / filename).read_text(encoding='utf-8'),
+                allow_custom=True, interoperability=True
+            )
+        )
+        parser.parse_stix_bundle()
+        misp_events = parser.misp_events
+        if not isinstance(misp_events, list):
+            misp_events = [misp_events]
+        return [misp_event.to_dict() for misp_event in misp_events]
+
+    def test_stix1_export_reset(self):
+        parser = MISPtoSTIX1EventsParser(_default_org, '1.2')
+        first, second = self._misp_events
+        parser.parse_misp_event(first)
+        parser.reset()
+        parser.parse_misp_event(second)
+        reused = parser.stix_package.to_xml()
+        parser.reset()
+        self.assertFalse(hasattr(parser, '_ids'))
+        with self.assertRaises(AttributeError):
+            parser.stix_package
+        fresh_parser = MISPtoSTIX1EventsParser(_default_org, '1.2')
+        fresh_parser.parse_misp_event(second)
+        self.assertEqual(reused, fresh_parser.stix_package.to_xml())
+
+    def test_stix2_export_reset(self):
+        for parser_class in (MISPtoSTIX20Parser, MISPtoSTIX21Parser):
+            parser = parser_class()
+            parser.enable_profiling()
+            first, second = self._misp_events
+            self._export(parser, first)
+            parser._missing_orgc_error()
+            parser.reset()
+            self.assertEqual(parser.errors, {})
+            self.assertEqual(parser.unique_ids, {})
+            self.assertEqual(
+                self._export(parser, second),
+                self._export(parser_class(), second)
+            )
+            self.assertEqual(parser.stats.to_dict()['counters']['events'], 2)
+
+    def test_stix2_import_reset(self):
+        for parser_class in (ExternalSTIX2toMISPParser, InternalSTIX2toMISPParser):
+            parser = parser_class()
+            self._import(parser, 'test_event1_stix20.json')
+            parser.reset()
+            self.assertEqual(parser._clusters, {})
+            self.assertEqual(parser._creators, set())
+            self.assertEqual(parser.replacement_uuids, {})
+            with self.assertRaises(AttributeError):
+                parser.misp_events
+            self.assertEqual(
+                self._import(parser, 'test_event2_stix20.json'),
+                self._import(parser_class(), 'test_event2_stix20.json')
+            )
+
+    def test_stix2_import_with_multiple_then_single_report(self):
+        exporter = MISPtoSTIX21Parser()
+        exporter.parse_misp_event(get_event_with_tags())
+        single_report = exporter.bundle.serialize()
+        parser = InternalSTIX2toMISPParser()
+        self.assertEqual(len(self._import(parser, 'test_event1_stix20.json')), 2)
+        parser.reset()
+        parser.load_stix_bundle(
+            stix2_parser(single_report, allow_custom=True, interoperability=True)
+        )
+        parser.parse_stix_bundle()
+        self.assertIs(parser.misp_events, parser.misp_event)
+
+    def test_stix2_loaded_objects_release(self):
+        parser = InternalSTIX2toMISPParser()
+        self._import(parser, 'test_events_collection_stix21.json')
+        for feature in ('_grouping', '_indicator', '_observable',
+                        '_observed_data', '_report'):
+            self.assertFalse(hasattr(parser, feature), feature)
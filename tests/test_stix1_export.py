@@ -1,13 +1,18 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import json
 import re
 import unittest
 from base64 import b64encode
 from datetime import datetime, timezone
+from pathlib import Path
 from misp_stix_converter import (MISPtoSTIX1EventsParser, misp_attribute_collection_to_stix1,
                                  misp_event_collection_to_stix1, misp_to_stix1)
 from pymisp import MISPEvent
+from stix.core import STIXPackage
+from tempfile import SpooledTemporaryFile, TemporaryDirectory
+from unittest.mock import patch
 from uuid import uuid5, UUID
 from .test_events import *
 from ._test_stix import TestSTIX
@@ -4169,6 +4174,90 @@ class TestCollectionStix1Export(TestCollectionSTIX1Export):
         )
         self._check_stix1_export_results(output_file, reference_file)
 
+    def test_attribute_collection_export_with_workers(self):
+        name = 'test_attributes_collection'
+        output_file = self._current_path / f'{name}.json.out'
+        reference_file = self._current_path / f'{name}_stix12.xml'
+        input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+        self.assertEqual(
+            misp_attribute_collection_to_stix1(
+                *input_files, return_format='xml', version='1.2',
+                single_output=True, output_name=output_file, workers=2
+            ),
+            {'success': 1, 'results': [output_file]}
+        )
+        self._check_stix1_export_results(output_file, reference_file)
+
+    def test_attribute_collection_export_json(self):
+        name = 'test_attributes_collection'
+        output_file = self._current_path / f'{name}.json.out'
+        input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+        self.assertEqual(
+            misp_attribute_collection_to_stix1(
+                *input_files, return_format='json', version='1.2',
+                in_memory=True, single_output=True, output_name=output_file
+            ),
+            {'success': 1, 'results': [output_file]}
+        )
+        with open(output_file, 'rt', encoding='utf-8') as f:
+            reference = json.load(f)
+        self.assertEqual(
+            misp_attribute_collection_to_stix1(
+                *input_files, return_format='json', version='1.2',
+                single_output=True, output_name=output_file
+            ),
+            {'success': 1, 'results': [output_file]}
+        )
+        with open(output_file, 'rt', encoding='utf-8') as f:
+            to_test = json.load(f)
+        self.assertEqual(
+            [indicator['id'] for indicator in to_test['indicators']],
+            [indicator['id'] for indicator in reference['indicators']]
+        )
+        self.assertEqual(
+            to_test['observables']['observables'],
+            reference['observables']['observables']
+        )
+
+    def test_attribute_collection_export_spooled(self):
+        name = 'test_attributes_collection'
+        output_file = self._current_path / f'{name}.json.out'
+        reference_file = self._current_path / f'{name}_stix12.xml'
+        input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+        with patch(
+                'misp_stix_converter.misp_stix_converter._STIX1_spool_size', 1):
+            self.assertEqual(
+                misp_attribute_collection_to_stix1(
+                    *input_files, return_format='xml', version='1.2',
+                    single_output=True, output_name=output_file
+                ),
+                {'success': 1, 'results': [output_file]}
+            )
+        self._check_stix1_export_results(output_file, reference_file)
+
+    def test_attribute_collection_export_spooled_failure(self):
+        name = 'test_attributes_collection'
+        output_file = self._current_path / f'{name}.json.out'
+        input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+        streams = []
+
+        def _spooled_file(*args, **kwargs):
+            stream = SpooledTemporaryFile(*args, **kwargs)
+            streams.append(stream)
+            return stream
+
+        module = 'misp_stix_converter.misp_stix_converter'
+        with patch(f'{module}.SpooledTemporaryFile', _spooled_file), \
+                patch(f'{module}._write_attributes_collection',
+                      side_effect=OSError('No space left on device')):
+            with self.assertRaises(OSError):
+                misp_attribute_collection_to_stix1(
+                    *input_files, return_format='xml', version='1.2',
+                    single_output=True, output_name=output_file
+                )
+        self.assertGreater(len(streams), 0)
+        self.assertTrue(all(stream.closed for stream in streams))
+
     def test_event_collection_export_11(self):
         name = 'test_events_collection'
         output_file = self._current_path / f'{name}.json.out'
@@ -4245,6 +4334,102 @@ class TestCollectionStix1Export(TestCollectionSTIX1Export):
                 self._current_path / f'test_event{n}_stix12.xml'
             )
 
+    def test_event_collection_export_with_failing_file(self):
+        name = 'test_events_collection'
+        with open(self._current_path / f'{name}_2.json', 'rt', encoding='utf-8') as f:
+            event = json.load(f)['response'][0]
+        with TemporaryDirectory() as tmp_dir:
+            tmp_path = Path(tmp_dir)
+            # The file fails on its second event, once the first one is written
+            failing_file = tmp_path / f'{name}_2.json'
+            failing_file.write_text(
+                f'{{"response": [{json.dumps(event)}, {{"Event": {{"uuid": ',
+                encoding='utf-8'
+            )
+            input_files = [self._current_path / f'{name}_1.json', failing_file]
+            reference_file = tmp_path / f'{name}.in_memory.out'
+            traceback = misp_event_collection_to_stix1(
+                *input_files, return_format='xml', version='1.2',
+                in_memory=True, single_output=True, output_name=reference_file
+            )
+            self.assertEqual(traceback['results'], [reference_file])
+            self.assertEqual(len(traceback['fails']), 1)
+            output_file = tmp_path / f'{name}.out'
+            traceback = misp_event_collection_to_stix1(
+                *input_files, return_format='xml', version='1.2',
+                single_output=True, output_name=output_file
+            )
+            self.assertEqual(traceback['results'], [output_file])
+            self.assertEqual(len(traceback['fails']), 1)
+            # Nothing from the failing file is left in the output
+            with open(input_files[0], 'rt', encoding='utf-8') as f:
+                events = json.load(f)['response']
+            self.assertEqual(
+                len(STIXPackage.from_xml(output_file).related_packages),
+                len(events)
+            )
+            self._check_stix1_collection_export_results(
+                output_file, reference_file
+            )
+            for in_memory in (True, False):
+                output_file = tmp_path / f'{name}.failed.out'
+                traceback = misp_event_collection_to_stix1(
+                    failing_file, failing_file, return_format='xml',
+                    version='1.2', in_memory=in_memory, single_output=True,
+                    output_name=output_file
+                )
+                self.assertNotIn('results', traceback)
+                self.assertEqual(len(traceback['fails']), 2)
+                self.assertFalse(output_file.exists())
+
+    def test_event_collection_export_with_workers(self):
+        name = 'test_events_collection'
+        output_file = self._current_path / f'{name}.json.out'
+        reference_file = self._current_path / f'{name}_stix12.xml'
+        input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+        self.assertEqual(
+            misp_event_collection_to_stix1(
+                *input_files, return_format='xml', version='1.2',
+                single_output=True, output_name=output_file, workers=2
+            ),
+            {'success': 1, 'results': [output_file]}
+        )
+        self._check_stix1_collection_export_results(output_file, reference_file)
+        self.assertEqual(
+            misp_event_collection_to_stix1(
+                *input_files, return_format='xml', version='1.2', workers=2
+            ),
+            {
+                'success': 1,
+                'results': [
+                    self._current_path / f'{name}_{n}.json.out' for n in (1, 2)
+                ]
+            }
+        )
+        for n in (1, 2):
+            self._check_stix1_export_results(
+                self._current_path / f'{name}_{n}.json.out',
+                self._current_path / f'test_event{n}_stix12.xml'
+            )
+
+    def test_event_collection_iter_json_content(self):
+        filename = self._current_path / 'test_events_collection_1.json'
+        with open(filename, 'rt', encoding='utf-8') as f:
+            events = json.load(f)['response']
+        parser = MISPtoSTIX1EventsParser(_ORGNAME_ID, '1.2')
+        package_ids = []
+        for related_package in parser.iter_json_content(filename):
+            # The package of every event is yielded as soon as it is converted
+            self.assertIs(related_package.item, parser.stix_package)
+            package_ids.append(related_package.item.id_)
+        self.assertEqual(
+            package_ids,
+            [
+                f"{_ORGNAME_ID}:STIXPackage-{event['Event']['uuid']}"
+                for event in events
+            ]
+        )
+
     def test_event_export_11(self):
         name = 'test_events_collection_1.json'
         filename = self._current_path / name
@@ -1,17 +1,21 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import json
 from datetime import datetime
 from misp_stix_converter import (
     MISPtoSTIX20Mapping, MISPtoSTIX20Parser, misp_collection_to_stix2,
     misp_to_stix2)
 from pymisp import MISPAttribute, MISPEvent
+from tempfile import NamedTemporaryFile
 from .test_events import *
 from .update_documentation import (
     AttributesDocumentationUpdater, GalaxiesDocumentationUpdater,
     ObjectsDocumentationUpdater)
 from ._test_stix import TestSTIX20
-from ._test_stix_export import TestCollectionSTIX2Export, TestSTIX2Export, TestSTIX20Export
+from ._test_stix_export import (
+    TestCollectionSTIX2Export, TestSTIX2Export, TestSTIX2PayloadsExport,
+    TestSTIX2TrustedExport, TestSTIX20Export)
 
 
 class TestSTIX20GenericExport(TestSTIX20Export, TestSTIX20):
@@ -4465,6 +4469,15 @@ class TestSTIX20GalaxiesExport(TestSTIX20GenericExport):
         self.assertEqual(attack_pattern.type, 'attack-pattern')
         self._check_galaxy_features(attack_pattern, galaxy, timestamp)
 
+    def _test_event_with_campaign_galaxy(self, event):
+        galaxy = event['Galaxy'][0]
+        timestamp = event['timestamp']
+        if not isinstance(timestamp, datetime):
+            timestamp = self._datetime_from_timestamp(timestamp)
+        campaign = self._run_galaxy_tests(event, timestamp)
+        self.assertEqual(campaign.type, 'campaign')
+        self._check_galaxy_features(campaign, galaxy, timestamp)
+
     def _test_event_with_course_of_action_galaxy(self, event):
         galaxy = event['Galaxy'][0]
         timestamp = event['timestamp']
@@ -4552,6 +4565,10 @@ class TestSTIX20JSONGalaxiesExport(TestSTIX20GalaxiesExport):
             )
         )
 
+    def test_event_with_campaign_galaxy(self):
+        event = get_event_with_campaign_galaxy('2.0')
+        self._test_event_with_campaign_galaxy(event['Event'])
+
     def test_event_with_course_of_action_galaxy(self):
         event = get_event_with_course_of_action_galaxy()
         self._test_event_with_course_of_action_galaxy(event['Event'])
@@ -4622,6 +4639,20 @@ class TestSTIX20JSONGalaxiesExport(TestSTIX20GalaxiesExport):
             summary = ', '.join(sorted(self._mapping_types.vulnerability_types()))
         )
 
+    def test_attributes_with_sector_galaxy(self):
+        attributes = get_indicator_attribute_with_sector_galaxy()
+        self.parser.parse_misp_attributes(attributes)
+        identity, sector, indicator = self.parser.stix_objects
+        self.assertEqual(identity.identity_class, 'organization')
+        self.assertEqual(indicator.type, 'indicator')
+        galaxy = attributes['Galaxy'][0]
+        cluster = galaxy['GalaxyCluster'][0]
+        self.assertEqual(sector.id, f"identity--{cluster['uuid']}")
+        self.assertEqual(sector.identity_class, 'class')
+        self.assertEqual(sector.name, cluster['value'])
+        self.assertEqual(sector.labels[0], f'misp:galaxy-name="{galaxy["name"]}"')
+        self.assertEqual(sector.labels[1], f'misp:galaxy-type="{galaxy["type"]}"')
+
 
 class TestSTIX20MISPGalaxiesExport(TestSTIX20GalaxiesExport):
     def test_event_with_attack_pattern_galaxy(self):
@@ -4630,6 +4661,12 @@ class TestSTIX20MISPGalaxiesExport(TestSTIX20GalaxiesExport):
         misp_event.from_dict(**event)
         self._test_event_with_attack_pattern_galaxy(misp_event)
 
+    def test_event_with_campaign_galaxy(self):
+        event = get_event_with_campaign_galaxy('2.0')
+        misp_event = MISPEvent()
+        misp_event.from_dict(**event)
+        self._test_event_with_campaign_galaxy(misp_event)
+
     def test_event_with_course_of_action_galaxy(self):
         event = get_event_with_course_of_action_galaxy()
         misp_event = MISPEvent()
@@ -4883,6 +4920,30 @@ class TestCollectionSTIX20Export(TestCollectionSTIX2Export):
         )
         self._check_stix2_results_export(output_file, reference_file)
 
+    def test_events_collection_profile(self):
+        self._check_stix2_profiled_export('2.0')
+
+    def test_events_collection_serializers(self):
+        name = 'test_events_collection'
+        output_file = self._current_path / f'{name}.json.out'
+        reference_file = self._current_path / f'{name}_stix20.json'
+        input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+        for serializer in self._get_serializers():
+            for arguments in ({}, {'in_memory': True}, {'workers': 2}):
+                with self.subTest(
+                        backend=serializer.backend, indent=serializer.indent,
+                        **arguments):
+                    self.assertEqual(
+                        misp_collection_to_stix2(
+                            *input_files, version='2.0', single_output=True,
+                            output_name=output_file, serializer=serializer,
+                            **arguments
+                        ),
+                        {'success': 1, 'results': [output_file]}
+                    )
+                    self._check_stix2_results_export(output_file, reference_file)
+                    self._check_stix2_serialized_export(output_file, serializer)
+
 
 class TestFeedSTIX20Export(TestSTIX2Export):
     def setUp(self):
@@ -4916,6 +4977,19 @@ class TestFeedSTIX20JSONExport(TestFeedSTIX20Export):
         for attribute, indicator in zip(attributes, indicators):
             self.assertEqual(indicator.id, f"indicator--{attribute['Attribute']['uuid']}")
 
+    def test_attributes_feed_file(self):
+        attributes = get_attributes_feed()
+        with NamedTemporaryFile('wt', suffix='.json') as f:
+            f.write(json.dumps(attributes))
+            f.flush()
+            self.parser.parse_json_content(f.name)
+        identity, *indicators = self.parser.bundle.objects
+        for attribute in attributes:
+            self.parser.parse_misp_attribute(attribute)
+        reference_identity, *reference_indicators = self.parser.bundle.objects
+        self.assertEqual(identity.id, reference_identity.id)
+        self.assertEqual(indicators, reference_indicators)
+
 
 class TestFeedSTIX20MISPExport(TestFeedSTIX20Export):
     def test_attributes_feed(self):
@@ -4947,3 +5021,37 @@ class TestFeedSTIX20MISPExport(TestFeedSTIX20Export):
         indicators = (indicator1, indicator2, indicator3, indicator4)
         for attribute, indicator in zip(attributes, indicators):
             self.assertEqual(indicator.id, f"indicator--{attribute['Attribute']['uuid']}")
+
+
+class TestSTIX20PayloadsExport(TestSTIX2PayloadsExport):
+    def test_inline_payloads_export(self):
+        self._check_inline_payloads_export(MISPtoSTIX20Parser)
+
+    def test_payloads_export(self):
+        self._check_payloads_export(MISPtoSTIX20Parser)
+
+    def test_payloads_loading_error(self):
+        self._check_payloads_loading_error(MISPtoSTIX20Parser)
+
+    def test_payloads_loading_from_url(self):
+        self._check_payloads_loading_from_url(MISPtoSTIX20Parser)
+
+    def test_payloads_loading_size_limit(self):
+        self._check_payloads_loading_size_limit(MISPtoSTIX20Parser)
+
+    def test_payloads_store_hashes(self):
+        self._check_payloads_store_hashes()
+
+
+class TestSTIX20TrustedExport(TestSTIX2TrustedExport):
+    def test_trusted_collection_export(self):
+        self._check_trusted_collection_export('2.0')
+
+    def test_trusted_export(self):
+        self._check_trusted_export(MISPtoSTIX20Parser)
+
+    def test_trusted_export_stix2_version(self):
+        self._check_trusted_export_stix2_version(MISPtoSTIX20Parser)
+
+    def test_trusted_export_validation(self):
+        self._check_trusted_export_validation(MISPtoSTIX20Parser)
@@ -1,17 +1,26 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import json
+import os
 from datetime import datetime
 from misp_stix_converter import (
     MISPtoSTIX21Mapping, MISPtoSTIX21Parser, misp_collection_to_stix2,
     misp_to_stix2)
+from misp_stix_converter.misp2stix.galaxies_catalog import (
+    GalaxiesCatalogError, _catalogs, load_galaxies_catalog)
 from pymisp import MISPAttribute, MISPEvent
+from pathlib import Path
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from unittest.mock import patch
 from .test_events import *
 from .update_documentation import (
     AttributesDocumentationUpdater, GalaxiesDocumentationUpdater,
     ObjectsDocumentationUpdater)
 from ._test_stix import TestSTIX21
-from ._test_stix_export import TestCollectionSTIX2Export, TestSTIX2Export, TestSTIX21Export
+from ._test_stix_export import (
+    TestCollectionSTIX2Export, TestSTIX2Export, TestSTIX2PayloadsExport,
+    TestSTIX2TrustedExport, TestSTIX21Export)
 
 
 class TestSTIX21GenericExport(TestSTIX21Export, TestSTIX21):
@@ -5729,6 +5738,15 @@ class TestSTIX21GalaxiesExport(TestSTIX21GenericExport):
         self.assertEqual(attack_pattern.type, 'attack-pattern')
         self._check_galaxy_features(attack_pattern, galaxy, timestamp)
 
+    def _test_event_with_campaign_galaxy(self, event):
+        galaxy = event['Galaxy'][0]
+        timestamp = event['timestamp']
+        if not isinstance(timestamp, datetime):
+            timestamp = self._datetime_from_timestamp(timestamp)
+        campaign = self._run_galaxy_tests(event, timestamp)
+        self.assertEqual(campaign.type, 'campaign')
+        self._check_galaxy_features(campaign, galaxy, timestamp)
+
     def _test_event_with_course_of_action_galaxy(self, event):
         galaxy = event['Galaxy'][0]
         timestamp = event['timestamp']
@@ -5863,6 +5881,10 @@ class TestSTIX21JSONGalaxiesExport(TestSTIX21GalaxiesExport):
             )
         )
 
+    def test_event_with_campaign_galaxy(self):
+        event = get_event_with_campaign_galaxy('2.1')
+        self._test_event_with_campaign_galaxy(event['Event'])
+
     def test_event_with_course_of_action_galaxy(self):
         event = get_event_with_course_of_action_galaxy()
         self._test_event_with_course_of_action_galaxy(event['Event'])
@@ -5948,6 +5970,20 @@ class TestSTIX21JSONGalaxiesExport(TestSTIX21GalaxiesExport):
         self.parser.parse_misp_attributes(misp_attribute)
         self.assertIsNotNone(self.parser.bundle)
 
+    def test_attributes_with_sector_galaxy(self):
+        attributes = get_indicator_attribute_with_sector_galaxy()
+        self.parser.parse_misp_attributes(attributes)
+        identity, sector, indicator = self.parser.stix_objects
+        self.assertEqual(identity.identity_class, 'organization')
+        self.assertEqual(indicator.type, 'indicator')
+        galaxy = attributes['Galaxy'][0]
+        cluster = galaxy['GalaxyCluster'][0]
+        self.assertEqual(sector.id, f"identity--{cluster['uuid']}")
+        self.assertEqual(sector.identity_class, 'class')
+        self.assertEqual(sector.name, cluster['value'])
+        self.assertEqual(sector.labels[0], f'misp:galaxy-name="{galaxy["name"]}"')
+        self.assertEqual(sector.labels[1], f'misp:galaxy-type="{galaxy["type"]}"')
+
 
 class TestSTIX21MISPGalaxiesExport(TestSTIX21GalaxiesExport):
     def test_event_with_attack_pattern_galaxy(self):
@@ -5956,6 +5992,12 @@ class TestSTIX21MISPGalaxiesExport(TestSTIX21GalaxiesExport):
         misp_event.from_dict(**event)
         self._test_event_with_attack_pattern_galaxy(misp_event)
 
+    def test_event_with_campaign_galaxy(self):
+        event = get_event_with_campaign_galaxy('2.1')
+        misp_event = MISPEvent()
+        misp_event.from_dict(**event)
+        self._test_event_with_campaign_galaxy(misp_event)
+
     def test_event_with_course_of_action_galaxy(self):
         event = get_event_with_course_of_action_galaxy()
         misp_event = MISPEvent()
@@ -6021,6 +6063,12 @@ class TestSTIX21MISPGalaxiesExport(TestSTIX21GalaxiesExport):
 class TestSTIX21ExportInteroperability(TestSTIX2Export, TestSTIX21):
     def setUp(self):
         self.parser = MISPtoSTIX21Parser(interoperability=True)
+        self._cached_catalogs = set(_catalogs)
+
+    def tearDown(self):
+        # The catalogs loaded by a test are not shared with the next ones
+        for filename in set(_catalogs) - self._cached_catalogs:
+            del _catalogs[filename]
 
     def _check_galaxy_object(self, stix_object, name, cluster_value):
         self.assertEqual(stix_object.type, name)
@@ -6057,6 +6105,105 @@ class TestSTIX21JSONExportInteroperability(TestSTIX21ExportInteroperability):
         attack_pattern = self._run_galaxy_tests(event)
         self._check_galaxy_object(attack_pattern, 'attack-pattern', cluster_value)
 
+    def test_attack_pattern_from_catalog_index(self):
+        event = get_event_with_attack_pattern_galaxy()['Event']
+        cluster_value = event['Galaxy'][0]['GalaxyCluster'][0]['value']
+        name, external_id = cluster_value.split(' - ')
+        identity_id = 'identity--c78cb6e5-0c4b-4611-8297-d1b8b55e40b5'
+        attack_patterns = []
+        object_ids = (
+            'attack-pattern--d92c4b6e-3a8e-4a8e-9c3c-8c3e5e2f5f5e',
+            'attack-pattern--3e6f2a1c-4f0e-4d5a-8f7e-2b1c9d8e7f6a'
+        )
+        for object_id, reference in zip(object_ids, (external_id, 'PRE-T1135')):
+            attack_patterns.append(
+                {
+                    'type': 'attack-pattern',
+                    'id': object_id,
+                    'created': '2017-05-31T21:30:19.735Z',
+                    'modified': '2017-05-31T21:30:19.735Z',
+                    'created_by_ref': identity_id,
+                    'name': name,
+                    'external_references': [
+                        {
+                            'source_name': 'mitre-pre-attack',
+                            'external_id': reference,
+                            'url': f'https://attack.mitre.org/techniques/{reference}'
+                        }
+                    ]
+                }
+            )
+        bundle = {
+            'type': 'bundle',
+            'id': 'bundle--0e4d8b2a-7c1f-4b6e-9a3d-5f2e8c1b7a90',
+            'objects': [
+                {
+                    'type': 'identity',
+                    'id': identity_id,
+                    'created': '2017-06-01T00:00:00.000Z',
+                    'modified': '2017-06-01T00:00:00.000Z',
+                    'name': 'The MITRE Corporation',
+                    'identity_class': 'organization'
+                },
+                *attack_patterns
+            ]
+        }
+        with TemporaryDirectory() as tmp_dir:
+            cti_path = Path(tmp_dir) / 'cti'
+            (cti_path / 'pre-attack').mkdir(parents=True)
+            with open(cti_path / 'pre-attack' / 'pre-attack.json', 'wt', encoding='utf-8') as f:
+                f.write(json.dumps(bundle))
+            index = Path(tmp_dir) / 'galaxies_catalog.idx'
+            catalog = load_galaxies_catalog(cti_path, index)
+            self.assertIs(catalog, load_galaxies_catalog(cti_path, index))
+            self.assertIn(name, catalog)
+            self.assertIn(external_id, catalog)
+            self.assertEqual(catalog.get_object_types(name), ('attack-pattern',))
+            self.assertEqual(
+                catalog.get_referenced_object_ids('external_id', external_id),
+                (attack_patterns[0]['id'],)
+            )
+            self.parser._galaxies_catalog = catalog
+            attack_pattern = self._run_galaxy_tests(event)
+        self.assertEqual(attack_pattern.id, attack_patterns[0]['id'])
+        self._check_galaxy_object(attack_pattern, 'attack-pattern', cluster_value)
+
+    def test_catalog_index_in_user_cache(self):
+        identity_id = 'identity--c78cb6e5-0c4b-4611-8297-d1b8b55e40b5'
+        bundle = {
+            'type': 'bundle',
+            'id': 'bundle--0e4d8b2a-7c1f-4b6e-9a3d-5f2e8c1b7a90',
+            'objects': [
+                {
+                    'type': 'identity',
+                    'id': identity_id,
+                    'created': '2017-06-01T00:00:00.000Z',
+                    'modified': '2017-06-01T00:00:00.000Z',
+                    'name': 'The MITRE Corporation',
+                    'identity_class': 'organization'
+                }
+            ]
+        }
+        with TemporaryDirectory() as tmp_dir:
+            cti_path = Path(tmp_dir) / 'cti'
+            (cti_path / 'pre-attack').mkdir(parents=True)
+            with open(cti_path / 'pre-attack' / 'pre-attack.json', 'wt', encoding='utf-8') as f:
+                f.write(json.dumps(bundle))
+            index = Path(tmp_dir) / 'galaxies_catalog.idx'
+            cache_directory = Path(tmp_dir) / 'cache' / 'misp-stix'
+            module = 'misp_stix_converter.misp2stix.galaxies_catalog'
+            with patch.dict(os.environ, {'XDG_CACHE_HOME': str(cache_directory.parent)}), \
+                    patch(f'{module}.os.access', return_value=False):
+                catalog = load_galaxies_catalog(cti_path, index)
+                self.assertFalse(index.exists())
+                self.assertEqual(catalog.filename.parent, cache_directory)
+                self.assertEqual(cache_directory.stat().st_mode & 0o777, 0o700)
+                self.assertEqual(catalog.get_identity(identity_id)['id'], identity_id)
+                del _catalogs[index]
+                cache_directory.chmod(0o777)
+                with self.assertRaises(GalaxiesCatalogError):
+                    load_galaxies_catalog(cti_path, index)
+
     def test_course_of_action(self):
         event = get_event_with_course_of_action_galaxy()['Event']
         cluster_value = event['Galaxy'][0]['GalaxyCluster'][0]['value']
@@ -6207,6 +6354,47 @@ class TestCollectionSTIX21Export(TestCollectionSTIX2Export):
                 self._current_path / f'test_event{n}_stix21.json'
             )
 
+    def test_attributes_collection_with_workers(self):
+        name = 'test_attributes_collection'
+        output_file = self._current_path / f'{name}.json.out'
+        reference_file = self._current_path / f'{name}_stix21.json'
+        input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+        self.assertEqual(
+            misp_collection_to_stix2(
+                *input_files, version='2.1', single_output=True,
+                output_name=output_file, workers=2
+            ),
+            {'success': 1, 'results': [output_file]}
+        )
+        self._check_stix2_results_export(output_file, reference_file)
+
+    def test_events_collection_with_workers(self):
+        name = 'test_events_collection'
+        output_file = self._current_path / f'{name}.json.out'
+        reference_file = self._current_path / f'{name}_stix21.json'
+        input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+        self.assertEqual(
+            misp_collection_to_stix2(
+                *input_files, version='2.1', single_output=True,
+                output_name=output_file, workers=2
+            ),
+            {'success': 1, 'results': [output_file]}
+        )
+        self._check_stix2_results_export(output_file, reference_file)
+        self.assertEqual(
+            misp_collection_to_stix2(*input_files, version='2.1', workers=2),
+            {
+                'success': 1,
+                'results': [
+                    self._current_path / f'{name}_{n}.json.out' for n in (1, 2)
+                ]
+            }
+        )
+        for n in (1, 2):
+            self._check_stix2_results_export(
+                self._current_path / f'{name}_{n}.json.out',
+                self._current_path / f'test_event{n}_stix21.json'
+            )
 
     def test_event_export(self):
         name = 'test_events_collection_1.json'
@@ -6226,6 +6414,30 @@ class TestCollectionSTIX21Export(TestCollectionSTIX2Export):
         )
         self._check_stix2_results_export(output_file, reference_file)
 
+    def test_events_collection_profile(self):
+        self._check_stix2_profiled_export('2.1')
+
+    def test_events_collection_serializers(self):
+        name = 'test_events_collection'
+        output_file = self._current_path / f'{name}.json.out'
+        reference_file = self._current_path / f'{name}_stix21.json'
+        input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+        for serializer in self._get_serializers():
+            for arguments in ({}, {'in_memory': True}, {'workers': 2}):
+                with self.subTest(
+                        backend=serializer.backend, indent=serializer.indent,
+                        **arguments):
+                    self.assertEqual(
+                        misp_collection_to_stix2(
+                            *input_files, version='2.1', single_output=True,
+                            output_name=output_file, serializer=serializer,
+                            **arguments
+                        ),
+                        {'success': 1, 'results': [output_file]}
+                    )
+                    self._check_stix2_results_export(output_file, reference_file)
+                    self._check_stix2_serialized_export(output_file, serializer)
+
 
 class TestFeedSTIX21Export(TestSTIX2Export):
     def setUp(self):
@@ -6259,6 +6471,19 @@ class TestFeedSTIX21JSONExport(TestFeedSTIX21Export):
         for attribute, indicator in zip(attributes, indicators):
             self.assertEqual(indicator.id, f"indicator--{attribute['Attribute']['uuid']}")
 
+    def test_attributes_feed_file(self):
+        attributes = get_attributes_feed()
+        with NamedTemporaryFile('wt', suffix='.json') as f:
+            f.write(json.dumps(attributes))
+            f.flush()
+            self.parser.parse_json_content(f.name)
+        identity, *indicators = self.parser.bundle.objects
+        for attribute in attributes:
+            self.parser.parse_misp_attribute(attribute)
+        reference_identity, *reference_indicators = self.parser.bundle.objects
+        self.assertEqual(identity.id, reference_identity.id)
+        self.assertEqual(indicators, reference_indicators)
+
 
 class TestFeedSTIX21MISPExport(TestFeedSTIX21Export):
     def test_attributes_feed(self):
@@ -6290,3 +6515,37 @@ class TestFeedSTIX21MISPExport(TestFeedSTIX21Export):
         indicators = (indicator1, indicator2, indicator3, indicator4)
         for attribute, indicator in zip(attributes, indicators):
             self.assertEqual(indicator.id, f"indicator--{attribute['Attribute']['uuid']}")
+
+
+class TestSTIX21PayloadsExport(TestSTIX2PayloadsExport):
+    def test_inline_payloads_export(self):
+        self._check_inline_payloads_export(MISPtoSTIX21Parser)
+
+    def test_payloads_export(self):
+        self._check_payloads_export(MISPtoSTIX21Parser)
+
+    def test_payloads_loading_error(self):
+        self._check_payloads_loading_error(MISPtoSTIX21Parser)
+
+    def test_payloads_loading_from_url(self):
+        self._check_payloads_loading_from_url(MISPtoSTIX21Parser)
+
+    def test_payloads_loading_size_limit(self):
+        self._check_payloads_loading_size_limit(MISPtoSTIX21Parser)
+
+    def test_payloads_store_hashes(self):
+        self._check_payloads_store_hashes()
+
+
+class TestSTIX21TrustedExport(TestSTIX2TrustedExport):
+    def test_trusted_collection_export(self):
+        self._check_trusted_collection_export('2.1')
+
+    def test_trusted_export(self):
+        self._check_trusted_export(MISPtoSTIX21Parser)
+
+    def test_trusted_export_stix2_version(self):
+        self._check_trusted_export_stix2_version(MISPtoSTIX21Parser)
+
+    def test_trusted_export_validation(self):
+        self._check_trusted_export_validation(MISPtoSTIX21Parser)